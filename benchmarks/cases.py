@@ -0,0 +1,79 @@
+"""
+数值热点路径的基准测试用例
+
+每个用例在合成 OHLCV 数据上运行，不依赖任何网络数据源。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from src.tools.api import enrich_price_history
+from src.tools.synthetic_data import generate_price_history
+from src.agents.technicals import calculate_adx, calculate_hurst_exponent, calculate_obv
+from src.agents.risk_manager import calculate_risk_metrics, run_stress_tests
+
+
+@dataclass
+class BenchmarkCase:
+    """单个基准测试用例
+
+    Attributes:
+        name: 用例名称
+        setup: 接收K线数量，返回被测函数的输入（不计时）
+        func: 被测函数，接收 setup 的返回值
+        max_bars: 默认运行的最大K线数量，更大的规模仅在 --full 时运行
+        repeat: 重复测量次数
+        threshold: 用例级回归阈值，None 表示使用全局阈值
+    """
+    name: str
+    setup: Callable[[int], Any]
+    func: Callable[[Any], Any]
+    max_bars: Optional[int] = None
+    repeat: int = 5
+    threshold: Optional[float] = None
+
+
+def make_ohlcv(n_bars: int, seed: int = 42) -> pd.DataFrame:
+    """生成与 get_price_history 原始列一致的合成日线数据"""
+    return generate_price_history("BENCH", start_date="1850-01-01", n_bars=n_bars, seed=seed)
+
+
+def _risk_pipeline(df: pd.DataFrame):
+    metrics = calculate_risk_metrics(df)
+    stress = run_stress_tests(1000 * df["close"].iloc[-1], 100000.0)
+    return metrics, stress
+
+
+CASES = [
+    BenchmarkCase(
+        name="calculate_hurst_exponent",
+        setup=lambda n: make_ohlcv(n)["close"],
+        func=calculate_hurst_exponent,
+    ),
+    BenchmarkCase(
+        name="calculate_adx",
+        setup=make_ohlcv,
+        func=calculate_adx,
+    ),
+    BenchmarkCase(
+        name="calculate_obv",
+        setup=make_ohlcv,
+        func=calculate_obv,
+        repeat=3,
+    ),
+    BenchmarkCase(
+        name="enrich_price_history",
+        setup=make_ohlcv,
+        func=enrich_price_history,
+        # 滚动 Hurst 指数逐窗口调用 Python 函数，10万根K线需要数分钟
+        max_bars=10_000,
+        repeat=2,
+    ),
+    BenchmarkCase(
+        name="risk_metrics_and_stress",
+        setup=make_ohlcv,
+        func=_risk_pipeline,
+    ),
+]
@@ -0,0 +1,193 @@
+"""
+基准测试运行器
+
+用法:
+    python -m benchmarks.run_benchmarks                    # 运行并与基线比较
+    python -m benchmarks.run_benchmarks --save-baseline    # 运行并保存为新基线
+    python -m benchmarks.run_benchmarks --filter hurst --sizes 1000 10000
+    python -m benchmarks.run_benchmarks --full             # 包含超出 max_bars 的大规模用例
+
+任一用例的最短单次耗时超过基线的 (1 + 阈值) 倍时，进程以退出码 1 结束；
+基线文件不存在时以退出码 2 结束（先用 --save-baseline 在改动前的代码上生成基线）。
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.cases import CASES, BenchmarkCase
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_THRESHOLD = 0.20
+MISSING_BASELINE_EXIT = 2
+MIN_REPEAT_TIME = 0.05  # 每轮测量至少运行的秒数
+
+
+def time_case(case: BenchmarkCase, n_bars: int) -> Dict[str, Any]:
+    """测量单个用例在指定规模下的单次调用耗时
+
+    Args:
+        case: 基准测试用例
+        n_bars: K线数量
+
+    Returns:
+        包含 min、median（秒/次）、number、repeat 的字典
+    """
+    arg = case.setup(n_bars)
+
+    # 预热一次，同时估算每轮需要的调用次数
+    start = time.perf_counter()
+    case.func(arg)
+    single = time.perf_counter() - start
+    number = max(1, int(MIN_REPEAT_TIME / single)) if single > 0 else 1000
+
+    timings = []
+    for _ in range(case.repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.func(arg)
+        timings.append((time.perf_counter() - start) / number)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "number": number,
+        "repeat": case.repeat,
+    }
+
+
+def environment_info() -> Dict[str, str]:
+    """记录运行环境，便于判断基线是否可比"""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+            threshold: float, cases: Dict[str, BenchmarkCase]) -> List[str]:
+    """与基线比较，返回回归的用例描述列表"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        case_threshold = cases[result["case"]].threshold
+        limit = case_threshold if case_threshold is not None else threshold
+        ratio = result["min"] / base["min"]
+        result["baseline_min"] = base["min"]
+        result["ratio"] = ratio
+        if ratio > 1 + limit:
+            regressions.append(
+                f"{key}: {result['min'] * 1000:.3f}ms vs baseline {base['min'] * 1000:.3f}ms "
+                f"({ratio:.2f}x, threshold {1 + limit:.2f}x)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='运行数值热点路径的基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='合成K线数量 (默认: 1000 10000 100000)')
+    parser.add_argument('--filter', type=str, default=None,
+                        help='只运行名称包含该字符串的用例')
+    parser.add_argument('--full', action='store_true',
+                        help='忽略用例的 max_bars 限制')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE,
+                        help='基线文件路径')
+    parser.add_argument('--results-dir', type=str, default=None,
+                        help='结果目录 (默认: benchmarks/results)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='将本次结果写入基线文件')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='允许的相对变慢比例 (默认: 0.20)')
+    args = parser.parse_args(argv)
+
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        # 基线与机器相关，不纳入版本控制；没有基线时无法判断回归，直接失败而不是静默通过
+        print(f"Error: baseline file {args.baseline} not found.\n"
+              f"Record one on the unmodified code first:\n"
+              f"    python -m benchmarks.run_benchmarks --save-baseline")
+        return MISSING_BASELINE_EXIT
+
+    cases = {case.name: case for case in CASES
+             if not args.filter or args.filter in case.name}
+
+    results = {}
+    for case in cases.values():
+        for n_bars in args.sizes:
+            if case.max_bars and n_bars > case.max_bars and not args.full:
+                print(f"{case.name}[{n_bars}]: skipped (max_bars={case.max_bars}, use --full)")
+                continue
+            key = f"{case.name}[{n_bars}]"
+            result = time_case(case, n_bars)
+            result["case"] = case.name
+            result["n_bars"] = n_bars
+            results[key] = result
+            print(f"{key}: min {result['min'] * 1000:.3f}ms, "
+                  f"median {result['median'] * 1000:.3f}ms "
+                  f"({result['number']} x {result['repeat']})")
+
+    regressions = []
+    if not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment_info():
+            print("Warning: baseline was recorded in a different environment")
+        regressions = compare(results, baseline, args.threshold, cases)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "environment": environment_info(),
+        "results": results,
+    }
+
+    results_dir = args.results_dir or RESULTS_DIR
+    os.makedirs(results_dir, exist_ok=True)
+    result_file = os.path.join(
+        results_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(result_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {result_file}")
+
+    if args.save_baseline:
+        baseline = report
+        if os.path.exists(args.baseline):
+            # 只覆盖本次运行过的用例，保留其它规模的基线
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            baseline["results"] = {**previous.get("results", {}), **results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print("\nPerformance regressions detected:")
+        for line in regressions:
+            print(f"- {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
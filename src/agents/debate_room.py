@@ -1,6 +1,6 @@
 from langchain_core.messages import HumanMessage
 from src.agents.state import AgentState, show_agent_reasoning, show_workflow_status
-from src.tools.openrouter_config import get_chat_completion
+from src.tools.openrouter_config import get_chat_completion_async
 from src.utils.api_utils import agent_endpoint, log_llm_interaction
 import json
 import ast
@@ -9,9 +9,12 @@ import logging
 # 获取日志记录器
 logger = logging.getLogger('debate_room')
 
+# LLM 评分在混合置信度差异中的权重，其余为多空研究员的置信度差异
+LLM_WEIGHT = 0.3
+
 
 @agent_endpoint("debate_room", "辩论室，分析多空双方观点，得出平衡的投资结论")
-def debate_room_agent(state: AgentState):
+async def debate_room_agent(state: AgentState):
     """Facilitates debate between bull and bear researchers to reach a balanced conclusion."""
     show_workflow_status("Debate Room")
     show_reasoning = state["metadata"]["show_reasoning"]
@@ -126,8 +129,8 @@ def debate_room_agent(state: AgentState):
         ]
 
         # 使用log_llm_interaction装饰器记录LLM交互
-        llm_response = log_llm_interaction(state)(
-            lambda: get_chat_completion(messages)
+        llm_response = await log_llm_interaction(state)(
+            lambda: get_chat_completion_async(messages)
         )()
 
         logger.info("LLM 返回响应完成")
@@ -160,8 +163,7 @@ def debate_room_agent(state: AgentState):
     # 计算混合置信度差异
     confidence_diff = bull_confidence - bear_confidence
 
-    # 默认 LLM 权重为 30%
-    llm_weight = 0.3
+    llm_weight = LLM_WEIGHT
 
     # 将 LLM 评分（-1 到 1范围）转换为与 confidence_diff 相同的比例
     # 计算混合置信度差异
@@ -20,6 +20,41 @@ def fundamentals_agent(state: AgentState):
     data = state["data"]
     metrics = data["financial_metrics"][0]
 
+    message_content = analyze_fundamentals(metrics)
+
+    # Create the fundamental analysis message
+    message = HumanMessage(
+        content=json.dumps(message_content),
+        name="fundamentals_agent",
+    )
+
+    # Print the reasoning if the flag is set
+    if show_reasoning:
+        show_agent_reasoning(message_content, "Fundamental Analysis Agent")
+        # 保存推理信息到metadata供API使用
+        state["metadata"]["agent_reasoning"] = message_content
+
+    show_workflow_status("Fundamentals Analyst", "completed")
+    # logger.info(f"--- DEBUG: fundamentals_agent RETURN messages: {[msg.name for msg in [message]]} ---")
+    return {
+        "messages": [message],
+        "data": {
+            **data,
+            "fundamental_analysis": message_content
+        },
+        "metadata": state["metadata"],
+    }
+
+
+def analyze_fundamentals(metrics: dict) -> dict:
+    """Score profitability, growth, financial health and price ratios
+
+    Args:
+        metrics: one financial metrics record as returned by get_financial_metrics
+
+    Returns:
+        dict with the overall signal, confidence (percentage string) and per-aspect reasoning
+    """
     # Initialize signals list for different fundamental aspects
     signals = []
     reasoning = {}
@@ -160,25 +195,4 @@ def fundamentals_agent(state: AgentState):
         "reasoning": reasoning
     }
 
-    # Create the fundamental analysis message
-    message = HumanMessage(
-        content=json.dumps(message_content),
-        name="fundamentals_agent",
-    )
-
-    # Print the reasoning if the flag is set
-    if show_reasoning:
-        show_agent_reasoning(message_content, "Fundamental Analysis Agent")
-        # 保存推理信息到metadata供API使用
-        state["metadata"]["agent_reasoning"] = message_content
-
-    show_workflow_status("Fundamentals Analyst", "completed")
-    # logger.info(f"--- DEBUG: fundamentals_agent RETURN messages: {[msg.name for msg in [message]]} ---")
-    return {
-        "messages": [message],
-        "data": {
-            **data,
-            "fundamental_analysis": message_content
-        },
-        "metadata": state["metadata"],
-    }
+    return message_content
@@ -1,3 +1,4 @@
+import asyncio
 from langchain_core.messages import HumanMessage
 from src.agents.state import AgentState, show_agent_reasoning, show_workflow_status
 from src.tools.news_crawler import get_stock_news
@@ -5,14 +6,14 @@ from src.utils.logging_config import setup_logger
 from src.utils.api_utils import agent_endpoint, log_llm_interaction
 import json
 from datetime import datetime, timedelta
-from src.tools.openrouter_config import get_chat_completion
+from src.tools.openrouter_config import get_chat_completion_async
 
 # 设置日志记录
 logger = setup_logger('macro_analyst_agent')
 
 
 @agent_endpoint("macro_analyst", "宏观分析师，分析宏观经济环境对目标股票的影响")
-def macro_analyst_agent(state: AgentState):
+async def macro_analyst_agent(state: AgentState):
     """负责宏观经济分析"""
     show_workflow_status("Macro Analyst")
     show_reasoning = state["metadata"]["show_reasoning"]
@@ -21,7 +22,8 @@ def macro_analyst_agent(state: AgentState):
     logger.info(f"正在进行宏观分析: {symbol}")
 
     # 获取大量新闻数据（最多100条）
-    news_list = get_stock_news(symbol, max_news=100)  # 尝试获取100条新闻
+    # 新闻抓取只有同步接口，在线程中执行
+    news_list = await asyncio.to_thread(get_stock_news, symbol, max_news=100)  # 尝试获取100条新闻
 
     # 过滤七天前的新闻
     cutoff_date = datetime.now() - timedelta(days=7)
@@ -41,7 +43,7 @@ def macro_analyst_agent(state: AgentState):
         }
     else:
         # 获取宏观分析结果
-        macro_analysis = get_macro_news_analysis(recent_news)
+        macro_analysis = await get_macro_news_analysis(recent_news)
         message_content = macro_analysis
 
     # 如果需要显示推理过程
@@ -67,7 +69,7 @@ def macro_analyst_agent(state: AgentState):
     }
 
 
-def get_macro_news_analysis(news_list: list) -> dict:
+async def get_macro_news_analysis(news_list: list) -> dict:
     """分析宏观经济新闻对股票的影响
 
     Args:
@@ -182,7 +184,7 @@ Make sure your analysis:
     try:
         # Call LLM for macro analysis
         logger.info("Calling LLM for macro analysis...")
-        result = get_chat_completion([system_message, user_message])
+        result = await get_chat_completion_async([system_message, user_message])
         if result is None:
             logger.error("LLM analysis failed, unable to get macro analysis result")
             return {
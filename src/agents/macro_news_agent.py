@@ -1,3 +1,4 @@
+import asyncio
 import os
 import json
 from datetime import datetime
@@ -6,7 +7,7 @@ from src.utils.logging_config import setup_logger
 from src.agents.state import AgentState, show_agent_reasoning, show_workflow_status
 from typing import Dict, Any, List
 from src.utils.api_utils import agent_endpoint
-from src.tools.openrouter_config import get_chat_completion
+from src.tools.openrouter_config import get_chat_completion_async
 from langchain_core.messages import HumanMessage
 import re
 
@@ -38,7 +39,7 @@ logger = setup_logger('macro_news_agent')
 
 
 @agent_endpoint("macro_news_agent", "Fetch full CSI 300 news and conduct macro analysis to provide a market-level macro environment assessment for investment decisions")
-def macro_news_agent(state: AgentState) -> Dict[str, Any]:
+async def macro_news_agent(state: AgentState) -> Dict[str, Any]:
     """
     Fetch full CSI 300/IXIC news, call LLM for macro analysis, and save the result.
     """
@@ -120,18 +121,19 @@ def macro_news_agent(state: AgentState) -> Dict[str, Any]:
         try:
             show_workflow_status(f"{agent_name}: Fetching news for symbol {symbol}")
             # 优化分流逻辑：A股（数字）、美股（字母）、指数（^开头）
+            # 新闻抓取（akshare / yfinance）只有同步接口，在线程中执行
             if symbol.isdigit():
                 # A股
                 from src.tools.news_crawler import get_cn_stock_news
-                news_list = get_cn_stock_news(symbol, max_news=30)
+                news_list = await asyncio.to_thread(get_cn_stock_news, symbol, max_news=30)
             elif symbol.isalpha() or symbol.startswith("^") or symbol in ["IXIC", "GSPC"]:
                 # 美股或指数
                 from src.tools.news_crawler import get_us_stock_news
-                news_list = get_us_stock_news(symbol, max_news=30)
+                news_list = await asyncio.to_thread(get_us_stock_news, symbol, max_news=30)
             else:
                 # 其他情况默认A股
                 from src.tools.news_crawler import get_cn_stock_news
-                news_list = get_cn_stock_news(symbol, max_news=30)
+                news_list = await asyncio.to_thread(get_cn_stock_news, symbol, max_news=30)
             if not news_list:
                 show_workflow_status(f"{agent_name}: No news data retrieved for {symbol}.")
                 show_agent_reasoning(f"No news found for {symbol}. Proceeding with no data summary.", agent_name)
@@ -152,7 +154,7 @@ def macro_news_agent(state: AgentState) -> Dict[str, Any]:
                 news_data_json_string_for_prompt = json.dumps(news_list_for_llm, ensure_ascii=False, indent=2)
                 prompt_filled = LLM_PROMPT_MACRO_ANALYSIS.format(news_data_json_string=news_data_json_string_for_prompt)
                 show_workflow_status(f"{agent_name}: Calling LLM for analysis.")
-                llm_response_str = get_chat_completion(messages=[{"role": "user", "content": prompt_filled}])
+                llm_response_str = await get_chat_completion_async(messages=[{"role": "user", "content": prompt_filled}])
                 if llm_response_str:
                     llm_response_clean = llm_response_str.strip()
                     # Extract JSON from LLM response
@@ -2,15 +2,89 @@ from langchain_core.messages import HumanMessage
 from src.tools.openrouter_config import get_chat_completion
 from src.agents.state import AgentState, show_agent_reasoning, show_workflow_status
 from src.tools.api import get_financial_metrics, get_financial_statements, get_market_data, get_price_history
+from src.tools.pit_store import fetch_point_in_time
+from src.tools.feature_store import FeatureStore
 from src.utils.logging_config import setup_logger
 from src.utils.api_utils import agent_endpoint, log_llm_interaction
+from src.utils.request_deadline import request_deadline
 
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FetchTimeoutError
 from datetime import datetime, timedelta
+import contextvars
+import os
+import time
 import pandas as pd
 
 # 设置日志记录
 logger = setup_logger('market_data_agent')
 
+# 价格、财务指标、财务报表和市场数据来自不同的接口，互相独立，并发获取。
+# 每个请求有各自的超时（秒），超时或失败的部分使用默认值，不阻塞其它部分；
+# 超时同时作为底层 HTTP 请求的截止时间（见 request_deadline），超时的工作线程随之退出，不会长期占用线程池。
+FETCH_TIMEOUTS = {
+    "prices": float(os.getenv("MARKET_DATA_PRICES_TIMEOUT", "60")),
+    "financial_metrics": float(os.getenv("MARKET_DATA_METRICS_TIMEOUT", "30")),
+    "financial_statements": float(os.getenv("MARKET_DATA_STATEMENTS_TIMEOUT", "30")),
+    "market_data": float(os.getenv("MARKET_DATA_QUOTE_TIMEOUT", "20")),
+}
+FETCH_LABELS = {
+    "prices": "价格数据",
+    "financial_metrics": "财务指标",
+    "financial_statements": "财务报表",
+    "market_data": "市场数据",
+}
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="market_data")
+
+
+def _load_prices(ticker: str, start_date: str, end_date: str):
+    # 收盘后批量任务已生成最新特征时直接读取，否则实时获取并计算
+    prices_df = FeatureStore().read_fresh(ticker, start_date, end_date)
+    if prices_df is not None:
+        logger.info(f"使用预计算特征: {ticker} ({len(prices_df)} 行)")
+        return prices_df
+    return get_price_history(ticker, start_date, end_date)
+
+
+def _fetch_with_deadline(fetch, timeout: float):
+    with request_deadline(timeout):
+        return fetch()
+
+
+def fetch_concurrently(tasks, defaults, timeouts=None):
+    """并发执行互相独立的数据请求
+
+    Args:
+        tasks: 名称到无参数函数的映射
+        defaults: 名称到默认值的映射，请求失败、超时或返回空值时使用
+        timeouts: 名称到超时秒数的映射，默认 FETCH_TIMEOUTS
+
+    Returns:
+        名称到结果的映射
+    """
+    timeouts = timeouts or FETCH_TIMEOUTS
+    started = time.monotonic()
+    # 复制上下文，工作流运行 ID 等 contextvars 在工作线程中保持不变
+    futures = {name: _executor.submit(contextvars.copy_context().run, _fetch_with_deadline,
+                                      fetch, timeouts.get(name, 30.0))
+               for name, fetch in tasks.items()}
+    results = {}
+    for name, future in futures.items():
+        label = FETCH_LABELS.get(name, name)
+        timeout = timeouts.get(name, 30.0)
+        remaining = max(0.0, started + timeout - time.monotonic())
+        try:
+            result = future.result(timeout=remaining)
+        except FetchTimeoutError:
+            logger.error(f"获取{label}超时 ({timeout:.0f}s)，使用默认值")
+            future.cancel()
+            result = None
+        except Exception as e:
+            logger.error(f"获取{label}失败: {str(e)}")
+            result = None
+        results[name] = result if result is not None and (
+            isinstance(result, pd.DataFrame) or result) else defaults[name]
+    return results
+
 
 @agent_endpoint("market_data", "市场数据收集，负责获取股价历史、财务指标和市场信息")
 def market_data_agent(state: AgentState):
@@ -42,34 +116,38 @@ def market_data_agent(state: AgentState):
     # Get all required data
     ticker = data["ticker"]
 
-    # 获取价格数据并验证
-    prices_df = get_price_history(ticker, start_date, end_date)
+    # 并发获取价格、财务指标、财务报表和市场数据
+    # 回测中激活了时点存储时，财务和市场数据读取的是 end_date 当日已知的快照
+    fetched = fetch_concurrently(
+        {
+            "prices": lambda: _load_prices(ticker, start_date, end_date),
+            "financial_metrics": lambda: fetch_point_in_time(
+                "financial_metrics", ticker, end_date,
+                lambda: get_financial_metrics(ticker)),
+            "financial_statements": lambda: fetch_point_in_time(
+                "financial_statements", ticker, end_date,
+                lambda: get_financial_statements(ticker)),
+            "market_data": lambda: fetch_point_in_time(
+                "market_data", ticker, end_date,
+                lambda: get_market_data(ticker)),
+        },
+        defaults={
+            "prices": None,
+            "financial_metrics": {},
+            "financial_statements": {},
+            "market_data": {"market_cap": 0},
+        })
+    prices_df = fetched["prices"]
+    financial_metrics = fetched["financial_metrics"]
+    financial_line_items = fetched["financial_statements"]
+    market_data = fetched["market_data"]
+
+    # 验证价格数据
     if prices_df is None or prices_df.empty:
         logger.warning(f"警告：无法获取{ticker}的价格数据，将使用空数据继续")
         prices_df = pd.DataFrame(
             columns=['close', 'open', 'high', 'low', 'volume'])
 
-    # 获取财务指标
-    try:
-        financial_metrics = get_financial_metrics(ticker)
-    except Exception as e:
-        logger.error(f"获取财务指标失败: {str(e)}")
-        financial_metrics = {}
-
-    # 获取财务报表
-    try:
-        financial_line_items = get_financial_statements(ticker)
-    except Exception as e:
-        logger.error(f"获取财务报表失败: {str(e)}")
-        financial_line_items = {}
-
-    # 获取市场数据
-    try:
-        market_data = get_market_data(ticker)
-    except Exception as e:
-        logger.error(f"获取市场数据失败: {str(e)}")
-        market_data = {"market_cap": 0}
-
     # 确保数据格式正确
     if not isinstance(prices_df, pd.DataFrame):
         prices_df = pd.DataFrame(
@@ -4,7 +4,7 @@ import json
 from src.utils.logging_config import setup_logger
 
 from src.agents.state import AgentState, show_agent_reasoning, show_workflow_status
-from src.tools.openrouter_config import get_chat_completion
+from src.tools.openrouter_config import get_chat_completion_async
 from src.utils.api_utils import agent_endpoint, log_llm_interaction
 
 from src.tools.crypto_symbols import CRYPTO_SYMBOLS
@@ -28,7 +28,7 @@ def get_latest_message_by_name(messages: list, name: str):
 
 
 @agent_endpoint("portfolio_management", "负责投资组合管理和最终交易决策")
-def portfolio_management_agent(state: AgentState):
+async def portfolio_management_agent(state: AgentState):
     agent_name = "portfolio_management_agent"
     show_workflow_status(f"{agent_name}: --- Executing Portfolio Management Agent ---")
 
@@ -187,7 +187,7 @@ For 'macro_news_agent' in 'agent_signals', use the overall_sentiment as its sign
 
     llm_response_content = "{\"action\": \"hold\", \"quantity\": 0, \"confidence\": 0.5, \"reasoning\": \"Default hold due to LLM call issue.\", \"agent_signals\": []}"
     try:
-        response = get_chat_completion(
+        response = await get_chat_completion_async(
             messages=[
                 {"role": "system", "content": system_message_content},
                 {"role": "user", "content": user_message_content}
@@ -11,6 +11,12 @@ import ast
 
 ##### Risk Management Agent #####
 
+STRESS_TEST_SCENARIOS = {
+    "market_crash": -0.20,
+    "moderate_decline": -0.10,
+    "slight_decline": -0.05
+}
+
 
 @agent_endpoint("risk_management", "风险管理专家，评估投资风险并给出风险调整后的交易建议")
 def risk_management_agent(state: AgentState):
@@ -32,22 +38,11 @@ def risk_management_agent(state: AgentState):
         debate_results = ast.literal_eval(debate_message.content)
 
     # 1. Calculate Risk Metrics
-    returns = prices_df['close'].pct_change().dropna()
-    daily_vol = returns.std()
-    # Annualized volatility approximation
-    volatility = daily_vol * (252 ** 0.5)
-
-    # 计算波动率的历史分布
-    rolling_std = returns.rolling(window=120).std() * (252 ** 0.5)
-    volatility_mean = rolling_std.mean()
-    volatility_std = rolling_std.std()
-    volatility_percentile = (volatility - volatility_mean) / volatility_std
-
-    # Simple historical VaR at 95% confidence
-    var_95 = returns.quantile(0.05)
-    # 使用60天窗口计算最大回撤
-    max_drawdown = (
-        prices_df['close'] / prices_df['close'].rolling(window=60).max() - 1).min()
+    risk_metrics = calculate_risk_metrics(prices_df)
+    volatility = risk_metrics["volatility"]
+    volatility_percentile = risk_metrics["volatility_percentile"]
+    var_95 = risk_metrics["var_95"]
+    max_drawdown = risk_metrics["max_drawdown"]
 
     # 2. Market Risk Assessment
     market_risk_score = 0
@@ -73,7 +68,7 @@ def risk_management_agent(state: AgentState):
 
     # 3. Position Size Limits
     # Consider total portfolio value, not just cash
-    current_stock_value = portfolio['stock'] * prices_df['close'].iloc[-1]
+    current_stock_value = portfolio['stock'] * float(prices_df['close'].iloc[-1])
     total_portfolio_value = portfolio['cash'] + current_stock_value
 
     # Start with 25% max position of total portfolio
@@ -90,23 +85,8 @@ def risk_management_agent(state: AgentState):
         max_position_size = base_position_size
 
     # 4. Stress Testing
-    stress_test_scenarios = {
-        "market_crash": -0.20,
-        "moderate_decline": -0.10,
-        "slight_decline": -0.05
-    }
-
-    stress_test_results = {}
-    current_position_value = current_stock_value
-
-    for scenario, decline in stress_test_scenarios.items():
-        potential_loss = current_position_value * decline
-        portfolio_impact = potential_loss / (portfolio['cash'] + current_position_value) if (
-            portfolio['cash'] + current_position_value) != 0 else math.nan
-        stress_test_results[scenario] = {
-            "potential_loss": potential_loss,
-            "portfolio_impact": portfolio_impact
-        }
+    stress_test_results = run_stress_tests(
+        current_stock_value, portfolio['cash'])
 
     # 5. Risk-Adjusted Signal Analysis
     # Consider debate room confidence levels
@@ -182,3 +162,67 @@ def risk_management_agent(state: AgentState):
         },
         "metadata": state["metadata"],
     }
+
+
+def calculate_risk_metrics(prices_df):
+    """
+    Calculate the quantitative market risk metrics used by the risk manager
+
+    Args:
+        prices_df: DataFrame with a 'close' column
+
+    Returns:
+        dict with volatility, volatility_percentile, var_95 and max_drawdown
+    """
+    # 紧凑模式下价格为 float32，统计量统一按 float64 计算
+    close = prices_df['close'].astype('float64')
+    returns = close.pct_change().dropna()
+    daily_vol = returns.std()
+    # Annualized volatility approximation
+    volatility = daily_vol * (252 ** 0.5)
+
+    # 计算波动率的历史分布
+    rolling_std = returns.rolling(window=120).std() * (252 ** 0.5)
+    volatility_mean = rolling_std.mean()
+    volatility_std = rolling_std.std()
+    volatility_percentile = (volatility - volatility_mean) / volatility_std
+
+    # Simple historical VaR at 95% confidence
+    var_95 = returns.quantile(0.05)
+    # 使用60天窗口计算最大回撤
+    max_drawdown = (
+        close / close.rolling(window=60).max() - 1).min()
+
+    return {
+        "volatility": volatility,
+        "volatility_percentile": volatility_percentile,
+        "var_95": var_95,
+        "max_drawdown": max_drawdown,
+    }
+
+
+def run_stress_tests(current_position_value, cash, scenarios=None):
+    """
+    Apply price shock scenarios to the current position
+
+    Args:
+        current_position_value: Market value of the stock position
+        cash: Cash balance
+        scenarios: Mapping of scenario name to price decline, defaults to STRESS_TEST_SCENARIOS
+
+    Returns:
+        dict of scenario name to potential_loss and portfolio_impact
+    """
+    scenarios = scenarios or STRESS_TEST_SCENARIOS
+    total_value = cash + current_position_value
+
+    stress_test_results = {}
+    for scenario, decline in scenarios.items():
+        potential_loss = current_position_value * decline
+        portfolio_impact = potential_loss / \
+            total_value if total_value != 0 else math.nan
+        stress_test_results[scenario] = {
+            "potential_loss": potential_loss,
+            "portfolio_impact": portfolio_impact
+        }
+    return stress_test_results
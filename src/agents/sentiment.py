@@ -1,6 +1,7 @@
+import asyncio
 from langchain_core.messages import HumanMessage
 from src.agents.state import AgentState, show_agent_reasoning, show_workflow_status
-from src.tools.news_crawler import get_stock_news, get_news_sentiment
+from src.tools.news_crawler import get_stock_news, get_news_sentiment_async
 from src.utils.logging_config import setup_logger
 from src.utils.api_utils import agent_endpoint, log_llm_interaction
 import json
@@ -11,7 +12,7 @@ logger = setup_logger('sentiment_agent')
 
 
 @agent_endpoint("sentiment", "情感分析师，分析市场新闻和社交媒体情绪")
-def sentiment_agent(state: AgentState):
+async def sentiment_agent(state: AgentState):
     """Responsible for sentiment analysis"""
     show_workflow_status("Sentiment Analyst")
     show_reasoning = state["metadata"]["show_reasoning"]
@@ -21,15 +22,15 @@ def sentiment_agent(state: AgentState):
     # 从命令行参数获取新闻数量，默认为5条
     num_of_news = data.get("num_of_news", 5)
 
-    # 获取新闻数据并分析情感
-    news_list = get_stock_news(symbol, max_news=num_of_news)  # 确保获取足够的新闻
+    # 获取新闻数据并分析情感；新闻抓取（akshare / yfinance）只有同步接口，在线程中执行
+    news_list = await asyncio.to_thread(get_stock_news, symbol, max_news=num_of_news)  # 确保获取足够的新闻
 
     # 过滤7天内的新闻
     cutoff_date = datetime.now() - timedelta(days=7)
     recent_news = [news for news in news_list
                    if datetime.strptime(news['publish_time'], '%Y-%m-%d %H:%M:%S') > cutoff_date]
 
-    sentiment_score = get_news_sentiment(recent_news, num_of_news=num_of_news)
+    sentiment_score = await get_news_sentiment_async(recent_news, num_of_news=num_of_news)
 
     # 根据情感分数生成交易信号和置信度
     if sentiment_score >= 0.5:
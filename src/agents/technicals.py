@@ -16,6 +16,21 @@ from src.tools.api import prices_to_df
 # 初始化 logger
 logger = setup_logger('technical_analyst_agent')
 
+# compute_technical_features 生成的列，特征存储中预计算
+TECHNICAL_FEATURE_COLUMNS = [
+    'macd', 'macd_signal', 'rsi_14', 'bb_upper', 'bb_lower', 'obv',
+    'ema_8', 'ema_21', 'ema_55', 'adx', 'plus_di', 'minus_di', 'atr_14',
+]
+
+# Weights of the strategy ensemble in weighted_signal_combination
+STRATEGY_WEIGHTS = {
+    'trend': 0.30,
+    'mean_reversion': 0.25,  # Increased weight for mean reversion
+    'momentum': 0.25,
+    'volatility': 0.15,
+    'stat_arb': 0.05
+}
+
 
 ##### Technical Analyst #####
 @agent_endpoint("technical_analyst", "技术分析师，提供基于价格走势、指标和技术模式的交易信号")
@@ -39,17 +54,26 @@ def technical_analyst_agent(state: AgentState):
     confidence = 0.0
 
     # Calculate indicators
+    # 价格数据来自特征存储时，指标已预先计算，直接使用
+    precomputed = all(column in prices_df.columns for column in TECHNICAL_FEATURE_COLUMNS)
+
     # 1. MACD (Moving Average Convergence Divergence)
-    macd_line, signal_line = calculate_macd(prices_df)
+    if precomputed:
+        macd_line, signal_line = prices_df['macd'], prices_df['macd_signal']
+    else:
+        macd_line, signal_line = calculate_macd(prices_df)
 
     # 2. RSI (Relative Strength Index)
-    rsi = calculate_rsi(prices_df)
+    rsi = prices_df['rsi_14'] if precomputed else calculate_rsi(prices_df)
 
     # 3. Bollinger Bands (Bollinger Bands)
-    upper_band, lower_band = calculate_bollinger_bands(prices_df)
+    if precomputed:
+        upper_band, lower_band = prices_df['bb_upper'], prices_df['bb_lower']
+    else:
+        upper_band, lower_band = calculate_bollinger_bands(prices_df)
 
     # 4. OBV (On-Balance Volume)
-    obv = calculate_obv(prices_df)
+    obv = prices_df['obv'] if precomputed else calculate_obv(prices_df)
 
     # Generate individual signals
     signals = []
@@ -163,21 +187,13 @@ def technical_analyst_agent(state: AgentState):
     stat_arb_signals = calculate_stat_arb_signals(prices_df)
 
     # Combine all signals using a weighted ensemble approach
-    strategy_weights = {
-        'trend': 0.30,
-        'mean_reversion': 0.25,  # Increased weight for mean reversion
-        'momentum': 0.25,
-        'volatility': 0.15,
-        'stat_arb': 0.05
-    }
-
     combined_signal = weighted_signal_combination({
         'trend': trend_signals,
         'mean_reversion': mean_reversion_signals,
         'momentum': momentum_signals,
         'volatility': volatility_signals,
         'stat_arb': stat_arb_signals
-    }, strategy_weights)
+    }, STRATEGY_WEIGHTS)
 
     # Generate detailed analysis report
     analysis_report = {
@@ -723,3 +739,32 @@ def calculate_obv(prices_df: pd.DataFrame) -> pd.Series:
             obv.append(obv[-1])
     prices_df['OBV'] = obv
     return prices_df['OBV']
+
+
+def compute_technical_features(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the indicator columns used by the technical analyst in one pass,
+    for the nightly feature store job
+
+    Args:
+        prices_df: DataFrame with OHLCV data
+
+    Returns:
+        DataFrame aligned with prices_df containing TECHNICAL_FEATURE_COLUMNS
+    """
+    df = prices_df[['open', 'high', 'low', 'close', 'volume']].copy()
+    features = pd.DataFrame(index=prices_df.index)
+
+    features['macd'], features['macd_signal'] = calculate_macd(df)
+    features['rsi_14'] = calculate_rsi(df)
+    features['bb_upper'], features['bb_lower'] = calculate_bollinger_bands(df)
+    features['obv'] = calculate_obv(df)
+    for window in (8, 21, 55):
+        features[f'ema_{window}'] = calculate_ema(df, window)
+    adx = calculate_adx(df)
+    features['adx'] = adx['adx']
+    features['plus_di'] = adx['+di']
+    features['minus_di'] = adx['-di']
+    features['atr_14'] = calculate_atr(df)
+
+    return features[TECHNICAL_FEATURE_COLUMNS]
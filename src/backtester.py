@@ -2,9 +2,19 @@ from datetime import datetime, timedelta
 import json
 import time
 import logging
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-from src.tools.api import get_price_data
+from src.tools.api import EXTENDED_HISTORY_DAYS, preload_price_history, price_preload_scope
+from src.tools.trading_calendar import get_calendar_for_symbol
+from src.tools.pit_store import PointInTimeStore, activate_store, restore_store
+from src.backtesting.agent_output import parse_agent_output
+from src.backtesting.analytics import analyze_frame
+from src.backtesting.checkpoint import BacktestCheckpoint, default_checkpoint_path
+from src.backtesting.decision_cache import DecisionCache, agent_config_hash
+from src.backtesting.execution import BUY, SELL, build_execution_model
+from src.backtesting.fast_mode import FastAgent
+from src.backtesting.journal import MARKET_COLUMNS, DecisionJournal, default_run_id
+from src.backtesting.report import write_report
 from src.main import run_hedge_fund
 import sys
 import matplotlib
@@ -26,7 +36,10 @@ matplotlib.rcParams['axes.unicode_minus'] = False
 
 
 class Backtester:
-    def __init__(self, agent, ticker, start_date, end_date, initial_capital, num_of_news):
+    def __init__(self, agent, ticker, start_date, end_date, initial_capital, num_of_news,
+                 pit_store=None, decision_cache=None, checkpoint=None, checkpoint_every=1,
+                 resume=False, rate_limit=True, rate_limiter=None, journal=None, journal_run_id=None,
+                 execution_model=None):
         self.agent = agent
         self.ticker = ticker
         self.start_date = start_date
@@ -35,6 +48,32 @@ class Backtester:
         self.portfolio = {"cash": initial_capital, "stock": 0}
         self.portfolio_values = []
         self.num_of_news = num_of_news
+        # 时点数据存储：回测中财务和市场数据按当日已知的快照读取
+        self.pit_store = pit_store
+        # 决策缓存：输入相同的交易日直接复用记录的智能体输出
+        self.decision_cache = decision_cache
+        # 检查点：每完成 checkpoint_every 个交易日原子写入一次，resume 时从最后完成的交易日继续
+        self.checkpoint = checkpoint
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.resume = resume
+        self._last_completed = None
+        self._days_since_checkpoint = 0
+        self._versions = None
+        # 调用 LLM 的智能体需要限速，确定性的快速模式不需要
+        self.rate_limit = rate_limit
+        # 多个回测并发运行时共享的限速器，提供时代替本实例的限速
+        self.rate_limiter = rate_limiter
+        # 决策日志：记录每天的智能体信号、决策和行情，供 replay 重新模拟成交
+        self.journal = journal
+        self.journal_run_id = journal_run_id or default_run_id(ticker, start_date, end_date)
+        self._bars = {}
+        # 成交模型：佣金、滑点和成交量限制，None 表示按开盘价无成本成交
+        self.execution_model = execution_model
+        self.last_fees = 0.0
+        self._volatility = self._liquidity = None
+        # 进度：本次运行需要处理的交易日数和已完成的交易日数
+        self.total_days = 0
+        self.completed_days = 0
         # 设置回测日志
         self.setup_backtest_logging()
         self.logger = self.setup_logging()
@@ -73,75 +112,35 @@ class Backtester:
             raise
 
     def get_agent_decision(self, current_date, lookback_start, portfolio):
-        """获取智能体决策，包含 API 限制处理"""
+        """获取智能体决策，包含 API 限制处理；启用决策缓存时先查询缓存"""
         max_retries = 3
 
-        # 检查并重置 API 时间窗口
-        current_time = time.time()
-        if current_time - self._api_window_start >= 60:
-            self._api_call_count = 0
-            self._api_window_start = current_time
+        cache_key = None
+        if self.decision_cache is not None:
+            cache_key = self.decision_cache.key(
+                self.ticker, current_date, portfolio,
+                lookback_start=lookback_start, num_of_news=self.num_of_news)
+            cached = self.decision_cache.get(cache_key)
+            if cached is not None:
+                self.logger.info(f"{current_date} 命中决策缓存")
+                return self.parse_agent_result(cached)
 
-        # 如果达到 API 限制，等待新的时间窗口
-        if self._api_call_count >= 8:  # 预留余量
-            wait_time = 60 - (current_time - self._api_window_start)
-            if wait_time > 0:
-                time.sleep(wait_time)
-                self._api_call_count = 0
-                self._api_window_start = time.time()
+        if self.rate_limit and self.rate_limiter is None:
+            self.wait_for_api_window()
 
         for attempt in range(max_retries):
             try:
-                # 确保调用间隔至少 6 秒
-                if self._last_api_call:
-                    time_since_last_call = time.time() - self._last_api_call
-                    if time_since_last_call < 6:
-                        sleep_time = 6 - time_since_last_call
-                        time.sleep(sleep_time)
-
-                # 更新调用时间和计数
-                self._last_api_call = time.time()
-                self._api_call_count += 1
-
                 # 调用智能体并解析结果
-                result = self.agent(
-                    ticker=self.ticker,
-                    start_date=lookback_start,
-                    end_date=current_date,
-                    portfolio=portfolio,
-                    num_of_news=self.num_of_news,
-                    run_id=f"backtest_{self.ticker}_{current_date.replace('-', '')}"
-                )
+                if self.rate_limiter is not None:
+                    with self.rate_limiter:
+                        result = self.call_agent(current_date, lookback_start, portfolio)
+                else:
+                    if self.rate_limit:
+                        self.wait_for_call_interval()
+                    result = self.call_agent(current_date, lookback_start, portfolio)
 
                 try:
-                    # 尝试解析返回的字符串为 JSON
-                    if isinstance(result, str):
-                        # 清理可能的markdown标记
-                        result = result.replace(
-                            '```json\n', '').replace('\n```', '').strip()
-                        print(f"---------------result------------\n: {result}")
-                        parsed_result = json.loads(result)
-
-                        # 构建标准格式的结果
-                        formatted_result = {
-                            "decision": parsed_result,  # 保持原始决策结构
-                            "analyst_signals": {}
-                        }
-
-                        # 处理智能体信号 - 修复：agent_signals 在 decision 下面，字段名是 agent_name
-                        if "decision" in parsed_result and "agent_signals" in parsed_result["decision"]:
-                            formatted_result["analyst_signals"] = {
-                                signal["agent_name"]: {  # 修复：使用 agent_name 而不是 agent
-                                    "signal": signal.get("signal", "unknown"),
-                                    "confidence": signal.get("confidence", 0)
-                                }
-                                for signal in parsed_result["decision"]["agent_signals"]
-                            }
-
-                        self.logger.info(
-                            f"解析后的决策: {formatted_result['decision']}")
-                        return formatted_result
-                    return result
+                    formatted_result = self.parse_agent_result(result)
                 except json.JSONDecodeError as e:
                     # 如果无法解析为 JSON，记录错误并返回默认决策
                     self.logger.warning(f"JSON解析错误: {str(e)}")
@@ -151,9 +150,18 @@ class Backtester:
                         "analyst_signals": {}
                     }
 
+                # 只缓存能正常解析的输出
+                if cache_key is not None and isinstance(result, str):
+                    self.decision_cache.put(cache_key, self.ticker, current_date, result)
+                return formatted_result
+
             except Exception as e:
                 if "AFC is enabled" in str(e):
                     self.logger.warning(f"触发 AFC 限制，等待 60 秒后重试...")
+                    if self.rate_limiter is not None:
+                        # 共享限速器暂停所有回测的调用，重试时在限速器中等待
+                        self.rate_limiter.pause(60)
+                        continue
                     time.sleep(60)
                     self._api_call_count = 0
                     self._api_window_start = time.time()
@@ -165,6 +173,59 @@ class Backtester:
                     return {"decision": {"action": "hold", "quantity": 0}, "analyst_signals": {}}
                 time.sleep(2 ** attempt)
 
+    def call_agent(self, current_date, lookback_start, portfolio):
+        return self.agent(
+            ticker=self.ticker,
+            start_date=lookback_start,
+            end_date=current_date,
+            portfolio=portfolio,
+            num_of_news=self.num_of_news,
+            run_id=f"backtest_{self.ticker}_{current_date.replace('-', '')}"
+        )
+
+    def wait_for_api_window(self):
+        """每分钟最多 8 次调用，达到上限时等待新的时间窗口"""
+        # 检查并重置 API 时间窗口
+        current_time = time.time()
+        if current_time - self._api_window_start >= 60:
+            self._api_call_count = 0
+            self._api_window_start = current_time
+
+        # 如果达到 API 限制，等待新的时间窗口
+        if self._api_call_count >= 8:  # 预留余量
+            wait_time = 60 - (current_time - self._api_window_start)
+            if wait_time > 0:
+                time.sleep(wait_time)
+                self._api_call_count = 0
+                self._api_window_start = time.time()
+
+    def wait_for_call_interval(self):
+        """确保调用间隔至少 6 秒，并记录本次调用"""
+        if self._last_api_call:
+            time_since_last_call = time.time() - self._last_api_call
+            if time_since_last_call < 6:
+                sleep_time = 6 - time_since_last_call
+                time.sleep(sleep_time)
+
+        # 更新调用时间和计数
+        self._last_api_call = time.time()
+        self._api_call_count += 1
+
+    def parse_agent_result(self, result):
+        """把智能体返回的 JSON 文本解析为标准格式的决策
+
+        Raises:
+            json.JSONDecodeError: 文本不是合法的 JSON
+        """
+        if not isinstance(result, str):
+            return result
+
+        print(f"---------------result------------\n: {result}")
+        formatted_result = parse_agent_output(result)
+        self.logger.info(
+            f"解析后的决策: {formatted_result['decision']}")
+        return formatted_result
+
     def parse_decision_from_text(self, text):
         """从文本中解析交易决策"""
         text = text.lower()
@@ -182,8 +243,15 @@ class Backtester:
 
         return decision
 
-    def execute_trade(self, action, quantity, current_price):
-        """执行交易，验证组合约束"""
+    def execute_trade(self, action, quantity, current_price, bar=None):
+        """执行交易，验证组合约束
+
+        配置了 execution_model 时由成交模型决定成交数量、成交价和费用，
+        bar 为当日K线在预加载价格中的位置，用于取当日的波动率和成交量
+        """
+        self.last_fees = 0.0
+        if self.execution_model is not None and action in ("buy", "sell") and quantity > 0:
+            return self._execute_with_model(action, quantity, current_price, bar)
         if action == "buy" and quantity > 0:
             cost = quantity * current_price
             if cost <= self.portfolio["cash"]:
@@ -207,6 +275,29 @@ class Backtester:
             return 0
         return 0
 
+    def _execute_with_model(self, action, quantity, current_price, bar):
+        volatility = liquidity = None
+        if bar is not None and self._volatility is not None:
+            volatility, liquidity = self._volatility[bar], self._liquidity[bar]
+        if action == "buy":
+            fills = self.execution_model.fill(BUY, quantity, current_price, volatility, liquidity,
+                                              budget=self.portfolio["cash"])
+        else:
+            fills = self.execution_model.fill(SELL, min(quantity, self.portfolio["stock"]),
+                                              current_price, volatility, liquidity)
+        executed = float(fills.quantity)
+        if executed <= 0:
+            return 0
+        notional, fees = float(fills.notional), float(fills.fees)
+        if action == "buy":
+            self.portfolio["stock"] += executed
+            self.portfolio["cash"] -= notional + fees
+        else:
+            self.portfolio["stock"] -= executed
+            self.portfolio["cash"] += notional - fees
+        self.last_fees = fees
+        return executed
+
     def setup_backtest_logging(self):
         """设置回测日志"""
         # 创建日志目录
@@ -215,7 +306,8 @@ class Backtester:
         os.makedirs(log_dir, exist_ok=True)
 
         # 创建回测日志记录器
-        self.backtest_logger = logging.getLogger('backtest')
+        # 每个代码独立的记录器，同一进程内的多个回测互不清除对方的处理器
+        self.backtest_logger = logging.getLogger(f'backtest.{self.ticker}')
         self.backtest_logger.setLevel(logging.INFO)
 
         # 清除已存在的处理器
@@ -247,7 +339,120 @@ class Backtester:
 
     def run_backtest(self):
         """运行回测"""
-        dates = pd.date_range(self.start_date, self.end_date, freq="B")
+        # 时点存储只在当前线程的上下文中生效，编排器中并发的回测互不覆盖
+        store_token = activate_store(self.pit_store) if self.pit_store is not None else None
+        try:
+            # 预加载的价格只在本次回测内可见，结束时随范围一起丢弃
+            with price_preload_scope():
+                self._run_backtest()
+            self.save_checkpoint()
+            if self.decision_cache is not None:
+                self.logger.info(
+                    f"决策缓存命中 {self.decision_cache.hits} 天，未命中 {self.decision_cache.misses} 天")
+        except BaseException:
+            # 中断（包括 Ctrl-C）时保存最后完成的交易日，之后可用 resume 继续
+            self.save_checkpoint()
+            raise
+        finally:
+            if store_token is not None:
+                restore_store(store_token)
+            if self.journal is not None:
+                self.journal.flush()
+
+    def checkpoint_config(self):
+        """决定回测结果的配置，恢复检查点时必须一致"""
+        config = {
+            "ticker": self.ticker,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "initial_capital": self.initial_capital,
+            "num_of_news": self.num_of_news,
+        }
+        if self.execution_model is not None:
+            config["execution_model"] = repr(self.execution_model)
+        return config
+
+    def checkpoint_versions(self):
+        """智能体代码和模型版本，与检查点不一致时只警告"""
+        if self._versions is None:
+            from src.utils.llm_clients import active_model_name
+            self._versions = {"agent_config_hash": agent_config_hash(), "model": active_model_name()}
+        return self._versions
+
+    def restore_checkpoint(self):
+        """从检查点恢复组合状态
+
+        Returns:
+            最后完成的交易日（YYYY-MM-DD），没有检查点时返回 None
+        """
+        state = self.checkpoint.load(self.checkpoint_config(), self.checkpoint_versions())
+        if state is None:
+            self.logger.info(f"未找到检查点 {self.checkpoint.path}，从头开始回测")
+            return None
+        self.portfolio = state["portfolio"]
+        self.portfolio_values = state["portfolio_values"]
+        self._last_completed = (state["last_date"], dict(self.portfolio), len(self.portfolio_values))
+        self.logger.info(f"从检查点恢复，已完成至 {state['last_date']}")
+        return state["last_date"]
+
+    def mark_day_completed(self, current_date_str):
+        """记录一个交易日已完成，按 checkpoint_every 写入检查点"""
+        self._last_completed = (current_date_str, dict(self.portfolio), len(self.portfolio_values))
+        self.completed_days += 1
+        self._days_since_checkpoint += 1
+        if self._days_since_checkpoint >= self.checkpoint_every:
+            self.save_checkpoint()
+
+    def save_checkpoint(self):
+        """写入最后完成的交易日的状态（不包含进行到一半的交易日）"""
+        if self.checkpoint is None or self._last_completed is None or self._days_since_checkpoint == 0:
+            return
+        last_date, portfolio, n_values = self._last_completed
+        try:
+            self.checkpoint.save(self.checkpoint_config(), portfolio,
+                                 self.portfolio_values[:n_values], last_date,
+                                 self.checkpoint_versions())
+            self._days_since_checkpoint = 0
+        except Exception as e:
+            self.logger.error(f"写入检查点失败: {e}")
+
+    def preload_prices(self):
+        """回测开始前一次性获取整段价格（含指标预热区间）
+
+        智能体请求的价格数据和每日成交价都从这份数据中切片，不再逐日请求。
+
+        Returns:
+            (升序日期数组, 开盘价数组)，获取失败时均为空数组
+        """
+        warmup_start = (datetime.strptime(self.start_date, "%Y-%m-%d") -
+                        timedelta(days=EXTENDED_HISTORY_DAYS)).strftime("%Y-%m-%d")
+        prices = preload_price_history(self.ticker, warmup_start, self.end_date)
+        if prices.empty:
+            self.logger.warning(f"预加载 {self.ticker} 价格数据失败")
+            return np.array([], dtype="datetime64[ns]"), np.array([])
+        self._bars = {column: prices[column].to_numpy(dtype=float)
+                      for column in MARKET_COLUMNS if column in prices}
+        if self.execution_model is not None:
+            self._volatility, self._liquidity = self.execution_model.market_inputs(prices)
+        # 快速模式的智能体在整段价格上一次性计算信号
+        if hasattr(self.agent, "prepare"):
+            self.agent.prepare(self.ticker, prices)
+        return (prices["date"].to_numpy(dtype="datetime64[ns]"),
+                prices["open"].to_numpy(dtype=float))
+
+    def _run_backtest(self):
+        # 只在交易所开市日运行，避免在节假日调用整条智能体链路
+        dates = get_calendar_for_symbol(
+            self.ticker).trading_days(self.start_date, self.end_date)
+
+        if self.checkpoint is not None and self.resume:
+            resume_after = self.restore_checkpoint()
+            if resume_after is not None:
+                dates = [d for d in dates if d > pd.Timestamp(resume_after)]
+        self.total_days = len(dates)
+        self.completed_days = 0
+
+        price_dates, open_prices = self.preload_prices()
 
         self.logger.info("\n开始回测...")
         print(f"{'日期':<12} {'代码':<6} {'操作':<6} {'数量':>8} {'价格':>8} {'现金':>12} {'持仓':>8} {'总值':>12} {'看多':>8} {'看空':>8} {'中性':>8}")
@@ -316,14 +521,20 @@ class Backtester:
             if "reason" in agent_decision:
                 self.backtest_logger.info(f"决策理由: {agent_decision['reason']}")
 
-            # 获取当前价格并执行交易
-            df = get_price_data(self.ticker, lookback_start, current_date_str)
-            if df is None or df.empty:
+            # 取当日（或之前最近一个有数据的交易日）开盘价执行交易
+            idx = np.searchsorted(price_dates, np.datetime64(current_date, "ns"), side="right") - 1
+            if idx < 0:
+                self.mark_day_completed(current_date_str)
                 continue
 
-            current_price = df.iloc[-1]['open']
+            current_price = open_prices[idx]
+            portfolio_before = dict(self.portfolio)
             executed_quantity = self.execute_trade(
-                action, quantity, current_price)
+                action, quantity, current_price, idx)
+            if self.journal is not None:
+                self.journal.record(self.journal_run_id, self.ticker, current_date_str, output,
+                                    portfolio_before, executed_quantity,
+                                    {column: values[idx] for column, values in self._bars.items()})
 
             # 更新组合总值
             total_value = self.portfolio["cash"] + \
@@ -341,11 +552,19 @@ class Backtester:
             self.portfolio_values.append({
                 "Date": current_date,
                 "Portfolio Value": total_value,
-                "Daily Return": daily_return
+                "Daily Return": daily_return,
+                "Position Value": self.portfolio["stock"] * current_price,
+                "Traded Value": executed_quantity * current_price,
+                "Fees": self.last_fees
             })
+            self.mark_day_completed(current_date_str)
 
-    def analyze_performance(self):
-        """分析回测性能"""
+    def analyze_performance(self, report_dir=None):
+        """分析回测性能，并写出无界面的报告（metrics.json、report.png、report.html）
+
+        Args:
+            report_dir: 报告目录，默认 logs/backtest_report_<代码>_<区间>
+        """
         performance_df = pd.DataFrame(self.portfolio_values).set_index("Date")
 
         # 计算累计收益率
@@ -355,65 +574,15 @@ class Backtester:
         # 将金额转换为千元
         performance_df["Portfolio Value (K)"] = performance_df["Portfolio Value"] / 1000
 
-        # 创建两个子图
-        fig, (ax1, ax2) = plt.subplots(
-            2, 1, figsize=(12, 10), height_ratios=[1, 1])
-        fig.suptitle("Backtest Results Analysis", fontsize=14, fontweight='bold')
-
-        # 绘制资金变化图
-        line1 = ax1.plot(performance_df.index,
-                         performance_df["Portfolio Value (K)"], label="Portfolio Value", marker='o', linewidth=2, markersize=4)
-        ax1.set_ylabel("Portfolio Value (K CNY)", fontsize=12)
-        ax1.set_title("Portfolio Value Over Time", fontsize=12, fontweight='bold')
-        ax1.grid(True, alpha=0.3)
-        ax1.legend()
-
-        # 在数据点上添加标签
-        for x, y in zip(performance_df.index, performance_df["Portfolio Value (K)"]):
-            ax1.annotate(f'{y:.1f}K',
-                         (x, y),
-                         textcoords="offset points",
-                         xytext=(0, 10),
-                         ha='center',
-                         fontsize=8)
-
-        # 绘制收益率变化图
-        colors = ['green' if x >= 0 else 'red' for x in performance_df["Cumulative Return"]]
-        line2 = ax2.plot(performance_df.index,
-                         performance_df["Cumulative Return"], label="Cumulative Return", color='green', marker='o', linewidth=2, markersize=4)
-        ax2.set_ylabel("Cumulative Return (%)", fontsize=12)
-        ax2.set_title("Cumulative Return Over Time", fontsize=12, fontweight='bold')
-        ax2.grid(True, alpha=0.3)
-        ax2.legend()
-        
-        # 添加零线
-        ax2.axhline(y=0, color='black', linestyle='--', alpha=0.5)
-
-        # 在数据点上添加标签
-        for x, y in zip(performance_df.index, performance_df["Cumulative Return"]):
-            color = 'green' if y >= 0 else 'red'
-            ax2.annotate(f'{y:.2f}%',
-                         (x, y),
-                         textcoords="offset points",
-                         xytext=(0, 10),
-                         ha='center',
-                         fontsize=8,
-                         color=color,
-                         fontweight='bold')
-
-        # 设置x轴标签
-        ax2.set_xlabel("Date", fontsize=12)
-
-        # 自动调整布局以防止标签重叠
-        plt.tight_layout()
-
-        # 显示图表
-        plt.show()
-
-        # 计算和打印性能指标
-        total_return = (
-            self.portfolio["portfolio_value"] - self.initial_capital) / self.initial_capital
-        print(f"\nTotal Return: {total_return * 100:.2f}%")
+        metrics = analyze_frame(performance_df, initial_value=self.initial_capital)
+
+        if report_dir is None:
+            backtest_period = f"{self.start_date.replace('-', '')}_{self.end_date.replace('-', '')}"
+            report_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs',
+                                      f"backtest_report_{self.ticker}_{backtest_period}")
+        paths = write_report(report_dir, performance_df, metrics,
+                             title=f"Backtest Results: {self.ticker}")
+        print(f"\nReport: {os.path.abspath(paths['html'])}")
 
         # 记录最终回测结果
         self.backtest_logger.info("\n" + "=" * 50)
@@ -421,24 +590,27 @@ class Backtester:
         self.backtest_logger.info("=" * 50)
         self.backtest_logger.info(f"Initial Capital: {self.initial_capital:,.2f}")
         self.backtest_logger.info(
-            f"Final Portfolio Value: {self.portfolio['portfolio_value']:,.2f}")
-        self.backtest_logger.info(f"Total Return: {total_return * 100:.2f}%")
-
-        # 计算夏普比率
-        daily_returns = performance_df["Daily Return"] / 100  # 转换为小数
-        mean_daily_return = daily_returns.mean()
-        std_daily_return = daily_returns.std()
-        sharpe_ratio = (mean_daily_return / std_daily_return) * \
-            (252 ** 0.5) if std_daily_return != 0 else 0
-        print(f"Sharpe Ratio: {sharpe_ratio:.2f}")
-        self.backtest_logger.info(f"Sharpe Ratio: {sharpe_ratio:.2f}")
-
-        # 计算最大回撤
-        rolling_max = performance_df["Portfolio Value"].cummax()
-        drawdown = (performance_df["Portfolio Value"] / rolling_max - 1) * 100
-        max_drawdown = drawdown.min()
-        print(f"Maximum Drawdown: {max_drawdown:.2f}%")
-        self.backtest_logger.info(f"Maximum Drawdown: {max_drawdown:.2f}%")
+            f"Final Portfolio Value: {performance_df['Portfolio Value'].iloc[-1]:,.2f}")
+
+        summary = [
+            ("Total Return", f"{metrics['total_return'] * 100:.2f}%"),
+            ("Annual Return", f"{metrics['annual_return'] * 100:.2f}%"),
+            ("Sharpe Ratio", f"{metrics['sharpe_ratio']:.2f}"),
+            ("Sortino Ratio", f"{metrics['sortino_ratio']:.2f}"),
+            ("Calmar Ratio", f"{metrics['calmar_ratio']:.2f}"),
+            ("Maximum Drawdown", f"{metrics['max_drawdown'] * 100:.2f}%"),
+            ("Max Drawdown Duration", f"{metrics['max_drawdown_duration']} days"),
+            ("Hit Rate", f"{metrics['hit_rate'] * 100:.2f}%"),
+        ]
+        if "exposure" in metrics:
+            summary.append(("Exposure", f"{metrics['exposure'] * 100:.2f}%"))
+        if "turnover" in metrics:
+            summary.append(("Turnover", f"{metrics['turnover']:.2f}x"))
+        if "Fees" in performance_df and performance_df["Fees"].sum() > 0:
+            summary.append(("Total Fees", f"{performance_df['Fees'].sum():,.2f}"))
+        for name, value in summary:
+            print(f"{name}: {value}")
+            self.backtest_logger.info(f"{name}: {value}")
 
         return performance_df
 
@@ -458,21 +630,58 @@ if __name__ == "__main__":
                         default=100000, help='初始资金 (默认: 100000)')
     parser.add_argument('--num-of-news', type=int, default=5,
                         help='Number of news articles to analyze for sentiment (default: 5)')
+    parser.add_argument('--pit-store', type=str, default=None,
+                        help='时点数据存储的 SQLite 路径，提供时按当日已知的快照读取财务和市场数据')
+    parser.add_argument('--pit-strict', action='store_true',
+                        help='时点数据缺失时不回退到实时数据')
+    parser.add_argument('--mode', choices=['llm', 'fast'], default='llm',
+                        help='llm: 完整智能体链路; fast: 只使用确定性智能体和规则聚合，不调用 LLM (默认: llm)')
+    parser.add_argument('--decision-cache', type=str, default=None,
+                        help='决策缓存的 SQLite 路径，提供时相同输入的交易日复用记录的智能体输出')
+    parser.add_argument('--cache-ignore-portfolio', action='store_true',
+                        help='决策缓存键不包含组合快照（不同初始资金的回测也复用决策）')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                        help='检查点文件路径 (默认: data/checkpoints/backtest_<代码>_<区间>.json)')
+    parser.add_argument('--checkpoint-every', type=int, default=0,
+                        help='每完成多少个交易日写入一次检查点；默认 0 表示不写，'
+                             '提供 --checkpoint 或 --resume 时为每天一次')
+    parser.add_argument('--journal', type=str, default=None,
+                        help='决策日志的 SQLite 路径，提供时记录每天的智能体信号和决策')
+    parser.add_argument('--execution', choices=['none', 'auto', 'a_share', 'us', 'crypto'],
+                        default='none',
+                        help='成交模型：none 按开盘价无成本成交; auto 按代码选择 A股/美股/加密货币的费用和滑点 (默认: none)')
+    parser.add_argument('--report-dir', type=str, default=None,
+                        help='回测报告目录 (默认: logs/backtest_report_<代码>_<区间>)')
+    parser.add_argument('--resume', action='store_true',
+                        help='从检查点最后完成的交易日继续回测')
 
     args = parser.parse_args()
 
     # 创建回测器实例
+    fast_mode = args.mode == 'fast'
+    # 检查点默认关闭，避免每个交易日写盘并 fsync
+    use_checkpoint = bool(args.checkpoint) or args.resume or args.checkpoint_every > 0
     backtester = Backtester(
-        agent=run_hedge_fund,
+        agent=FastAgent() if fast_mode else run_hedge_fund,
         ticker=args.ticker,
         start_date=args.start_date,
         end_date=args.end_date,
         initial_capital=args.initial_capital,
-        num_of_news=args.num_of_news
+        num_of_news=args.num_of_news,
+        pit_store=PointInTimeStore(args.pit_store, strict=args.pit_strict) if args.pit_store else None,
+        decision_cache=DecisionCache(args.decision_cache, match_portfolio=not args.cache_ignore_portfolio)
+        if args.decision_cache else None,
+        checkpoint=BacktestCheckpoint(args.checkpoint or default_checkpoint_path(
+            args.ticker, args.start_date, args.end_date)) if use_checkpoint else None,
+        checkpoint_every=args.checkpoint_every or 1,
+        resume=args.resume,
+        rate_limit=not fast_mode,
+        journal=DecisionJournal(args.journal) if args.journal else None,
+        execution_model=build_execution_model(args.execution, args.ticker) if args.execution != 'none' else None
     )
 
     # 运行回测
     backtester.run_backtest()
 
     # 分析性能
-    performance_df = backtester.analyze_performance()
+    performance_df = backtester.analyze_performance(args.report_dir)
@@ -0,0 +1,3 @@
+"""
+Backtesting modules
+"""
@@ -0,0 +1,53 @@
+"""
+智能体输出解析
+
+run_hedge_fund 返回投资组合经理的 JSON 文本（可能带 markdown 代码块标记），
+确定性的快速模式直接返回解析后的字典。两者统一转换为
+{"decision": {...}, "analyst_signals": {智能体名称: {"signal", "confidence"}}}。
+"""
+
+import json
+from typing import Any, Dict
+
+HOLD_DECISION = {"action": "hold", "quantity": 0}
+
+
+def hold_output() -> Dict[str, Any]:
+    """无法获得决策时使用的默认输出"""
+    return {"decision": dict(HOLD_DECISION), "analyst_signals": {}}
+
+
+def parse_agent_output(result: Any) -> Dict[str, Any]:
+    """把智能体返回值解析为标准格式
+
+    Args:
+        result: JSON 文本或已解析的字典
+
+    Returns:
+        包含 decision 和 analyst_signals 的字典
+
+    Raises:
+        json.JSONDecodeError: 文本不是合法的 JSON
+    """
+    if not isinstance(result, str):
+        return result
+
+    # 清理可能的markdown标记
+    result = result.replace('```json\n', '').replace('\n```', '').strip()
+    parsed_result = json.loads(result)
+
+    formatted_result = {
+        "decision": parsed_result,  # 保持原始决策结构
+        "analyst_signals": {}
+    }
+
+    # agent_signals 在 decision 下面，字段名是 agent_name
+    if "decision" in parsed_result and "agent_signals" in parsed_result["decision"]:
+        formatted_result["analyst_signals"] = {
+            signal["agent_name"]: {
+                "signal": signal.get("signal", "unknown"),
+                "confidence": signal.get("confidence", 0)
+            }
+            for signal in parsed_result["decision"]["agent_signals"]
+        }
+    return formatted_result
@@ -0,0 +1,148 @@
+"""
+向量化的回测绩效分析
+
+所有指标都由组合净值序列（以及可选的持仓市值、成交额序列）通过 numpy 一次性计算，
+不逐日循环，十年日线的分析耗时在毫秒级。
+
+指标:
+    total_return / annual_return / annual_volatility   总收益、年化收益、年化波动
+    sharpe_ratio / sortino_ratio / calmar_ratio         夏普、索提诺、卡玛比率
+    max_drawdown / max_drawdown_duration               最大回撤及最长水下时间（交易日数）
+    hit_rate                                            有盈亏的交易日中盈利日的比例
+    exposure                                            持仓市值占净值的平均比例
+    turnover                                            年化换手率（成交额 / 平均净值）
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    """分母为 0 或无效时返回 0，与 analyze_performance 对夏普比率的处理一致"""
+    if not np.isfinite(denominator) or denominator == 0 or not np.isfinite(numerator):
+        return 0.0
+    return float(numerator / denominator)
+
+
+def simple_returns(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    return values[1:] / values[:-1] - 1
+
+
+def drawdown_series(values: np.ndarray) -> np.ndarray:
+    """每个时点相对历史最高净值的回撤（非正数）"""
+    values = np.asarray(values, dtype=float)
+    return values / np.maximum.accumulate(values) - 1
+
+
+def max_drawdown_duration(values: np.ndarray) -> int:
+    """净值低于历史最高点的最长连续时间（以数据点计，未恢复的回撤计算到最后一天）"""
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return 0
+    index = np.arange(len(values))
+    at_peak = values >= np.maximum.accumulate(values)
+    last_peak = np.maximum.accumulate(np.where(at_peak, index, 0))
+    return int((index - last_peak).max())
+
+
+def performance_metrics(values, position_values=None, traded_values=None,
+                        initial_value: Optional[float] = None,
+                        periods_per_year: int = TRADING_DAYS_PER_YEAR,
+                        risk_free_rate: float = 0.0) -> Dict[str, float]:
+    """计算组合层面的绩效指标
+
+    Args:
+        values: 每日组合净值
+        position_values: 每日持仓市值，用于计算 exposure
+        traded_values: 每日成交额，用于计算 turnover
+        initial_value: 初始资金，提供时第一天的收益相对初始资金计算
+        periods_per_year: 每年的数据点数
+        risk_free_rate: 年化无风险利率
+
+    Returns:
+        指标名称到数值的映射，无法计算的指标为 0
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return {}
+    series = values if initial_value is None else np.concatenate([[initial_value], values])
+    returns = simple_returns(series)
+    excess = returns - risk_free_rate / periods_per_year
+
+    total_return = series[-1] / series[0] - 1
+    years = len(returns) / periods_per_year
+    annual_return = (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else 0.0
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2)) if len(excess) else 0.0
+    max_drawdown = drawdown_series(series).min()
+
+    metrics = {
+        "total_return": float(total_return),
+        "annual_return": float(annual_return),
+        "annual_volatility": float(std * np.sqrt(periods_per_year)),
+        "sharpe_ratio": _ratio(excess.mean() * np.sqrt(periods_per_year), std) if len(excess) else 0.0,
+        "sortino_ratio": _ratio(excess.mean() * np.sqrt(periods_per_year), downside) if len(excess) else 0.0,
+        "calmar_ratio": _ratio(annual_return, abs(max_drawdown)),
+        "max_drawdown": float(max_drawdown),
+        "max_drawdown_duration": max_drawdown_duration(series),
+        "hit_rate": _ratio(np.count_nonzero(returns > 0), np.count_nonzero(returns)),
+        "best_day": float(returns.max()) if len(returns) else 0.0,
+        "worst_day": float(returns.min()) if len(returns) else 0.0,
+        "trading_days": int(len(values)),
+    }
+    if position_values is not None:
+        position_values = np.nan_to_num(np.asarray(position_values, dtype=float))
+        metrics["exposure"] = float(np.mean(position_values / values))
+    if traded_values is not None:
+        traded_values = np.nan_to_num(np.asarray(traded_values, dtype=float))
+        metrics["turnover"] = _ratio(traded_values.sum() / values.mean(), years)
+    return metrics
+
+
+def rolling_metrics(values: pd.Series, window: int = 63,
+                    periods_per_year: int = TRADING_DAYS_PER_YEAR) -> pd.DataFrame:
+    """滚动窗口的收益、年化波动、夏普比率和回撤
+
+    Args:
+        values: 以日期为索引的组合净值
+        window: 窗口长度（数据点数）
+
+    Returns:
+        与 values 同索引的 DataFrame，窗口未满的行为 NaN
+    """
+    returns = values.pct_change()
+    rolling = returns.rolling(window)
+    mean, std = rolling.mean(), rolling.std()
+    return pd.DataFrame({
+        "return": values / values.shift(window) - 1,
+        "volatility": std * np.sqrt(periods_per_year),
+        "sharpe_ratio": (mean / std.replace(0, np.nan)) * np.sqrt(periods_per_year),
+        "drawdown": values / values.rolling(window, min_periods=1).max() - 1,
+    }, index=values.index)
+
+
+def analyze_frame(performance_df: pd.DataFrame, initial_value: Optional[float] = None,
+                  periods_per_year: int = TRADING_DAYS_PER_YEAR) -> Dict[str, float]:
+    """从回测记录的 DataFrame 计算指标
+
+    Args:
+        performance_df: 包含 "Portfolio Value" 列，可选 "Position Value" 和 "Traded Value" 列
+        initial_value: 初始资金
+
+    Returns:
+        performance_metrics 的结果
+    """
+    return performance_metrics(
+        performance_df["Portfolio Value"].to_numpy(dtype=float),
+        position_values=performance_df["Position Value"].to_numpy(dtype=float)
+        if "Position Value" in performance_df else None,
+        traded_values=performance_df["Traded Value"].to_numpy(dtype=float)
+        if "Traded Value" in performance_df else None,
+        initial_value=initial_value,
+        periods_per_year=periods_per_year,
+    )
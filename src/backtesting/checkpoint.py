@@ -0,0 +1,149 @@
+"""
+回测检查点 - 长时间回测中断后从最后完成的交易日继续
+
+检查点是一个 JSON 文件，包含组合状态、每日组合价值序列、最后完成的交易日、
+随机数状态和回测配置指纹。写入时先写临时文件并 fsync，再用 os.replace 原子替换，
+进程在任何时刻崩溃都不会留下写了一半的检查点。
+
+恢复时校验配置指纹（代码、区间、初始资金、新闻数量），不一致时拒绝恢复；
+智能体代码或模型变化只给出警告。
+"""
+
+import hashlib
+import json
+import os
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('backtest_checkpoint')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CHECKPOINT_DIR = os.path.join(PROJECT_ROOT, "data", "checkpoints")
+
+CHECKPOINT_VERSION = 1
+
+
+def default_checkpoint_path(ticker: str, start_date: str, end_date: str) -> str:
+    """按代码和回测区间生成默认检查点路径"""
+    name = f"backtest_{ticker}_{start_date.replace('-', '')}_{end_date.replace('-', '')}.json"
+    return os.path.join(DEFAULT_CHECKPOINT_DIR, name)
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """回测配置的指纹，恢复时必须一致"""
+    encoded = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def _plain(record: Dict[str, Any]) -> Dict[str, Any]:
+    """numpy 标量转换为 Python 类型，便于 JSON 序列化"""
+    return {key: value.item() if isinstance(value, np.generic) else value
+            for key, value in record.items()}
+
+
+def capture_rng_state() -> Dict[str, Any]:
+    """记录 random 和 numpy 全局随机数状态"""
+    version, state, gauss = random.getstate()
+    name, keys, pos, has_gauss, cached = np.random.get_state()
+    return {
+        "python": [version, list(state), gauss],
+        "numpy": [name, keys.tolist(), pos, has_gauss, cached],
+    }
+
+
+def restore_rng_state(rng_state: Dict[str, Any]):
+    version, state, gauss = rng_state["python"]
+    random.setstate((version, tuple(state), gauss))
+    name, keys, pos, has_gauss, cached = rng_state["numpy"]
+    np.random.set_state((name, np.array(keys, dtype=np.uint32), pos, has_gauss, cached))
+
+
+class BacktestCheckpoint:
+    """单个回测的检查点文件
+
+    Args:
+        path: 检查点 JSON 路径
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def save(self, config: Dict[str, Any], portfolio: Dict[str, Any],
+             portfolio_values: List[Dict[str, Any]], last_date: str,
+             versions: Optional[Dict[str, str]] = None):
+        """原子写入检查点
+
+        Args:
+            config: 回测配置，用于计算指纹
+            portfolio: 组合状态
+            portfolio_values: 每日组合价值记录（Date 为时间戳）
+            last_date: 最后完成的交易日，格式：YYYY-MM-DD
+            versions: 智能体代码哈希、模型名称等，恢复时不一致只警告
+        """
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "fingerprint": config_fingerprint(config),
+            "config": config,
+            "versions": versions or {},
+            "last_date": last_date,
+            "portfolio": _plain(portfolio),
+            "portfolio_values": [
+                {**_plain(record), "Date": pd.Timestamp(record["Date"]).strftime("%Y-%m-%d")}
+                for record in portfolio_values
+            ],
+            "rng_state": capture_rng_state(),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def load(self, config: Dict[str, Any], versions: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """读取并校验检查点，恢复随机数状态
+
+        Args:
+            config: 当前回测配置，指纹必须与检查点一致
+            versions: 当前的智能体代码哈希、模型名称等
+
+        Returns:
+            检查点内容（portfolio_values 中的 Date 已转换为时间戳），文件不存在时返回 None
+
+        Raises:
+            ValueError: 检查点属于另一个回测配置或版本不兼容
+        """
+        if not self.exists():
+            return None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {state.get('version')} in {self.path}")
+        if state["fingerprint"] != config_fingerprint(config):
+            raise ValueError(
+                f"Checkpoint {self.path} was written for a different backtest: {state['config']}")
+        for name, value in (versions or {}).items():
+            recorded = state["versions"].get(name)
+            if recorded is not None and recorded != value:
+                logger.warning(f"{name} changed since checkpoint ({recorded} -> {value})")
+        for record in state["portfolio_values"]:
+            record["Date"] = pd.Timestamp(record["Date"])
+        restore_rng_state(state["rng_state"])
+        logger.info(f"Resuming from checkpoint {self.path} after {state['last_date']}")
+        return state
+
+    def clear(self):
+        if self.exists():
+            os.remove(self.path)
@@ -0,0 +1,316 @@
+"""
+单次回测中并列比较多个策略
+
+分别运行 Backtester 比较完整 LLM 链路、纯技术策略和买入持有时，每次运行都重新获取数据、
+重新计算确定性的智能体信号。本模块在一次回测中:
+    - 一次性预加载价格（LLM 链路中的 get_price_history 也从预加载的数据中切片）
+    - 一次性计算五个技术策略的信号序列和风险指标，所有基于 FastAgent 的策略共享，
+      各自只按自己的权重组合
+    - 每个交易日并发获取各策略的决策，每个策略有独立的组合，按同一开盘价成交
+    - 输出并列的绩效指标和对比报告
+
+用法:
+    python -m src.backtesting.comparison --ticker 600519 --strategies llm,technicals,buy_and_hold
+"""
+
+import argparse
+import contextvars
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.backtesting.agent_output import hold_output, parse_agent_output
+from src.backtesting.analytics import analyze_frame
+from src.backtesting.fast_mode import FastAgent, risk_metric_frame, technical_strategy_signals
+from src.backtesting.rate_limiter import RateLimiter
+from src.backtesting.report import write_comparison_report
+from src.tools.api import EXTENDED_HISTORY_DAYS, preload_price_history, price_preload_scope
+from src.tools.crypto_symbols import is_crypto
+from src.tools.trading_calendar import get_calendar_for_symbol
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('strategy_comparison')
+
+
+class SharedInputs:
+    """所有策略共享的输入，每次回测只计算一次
+
+    Attributes:
+        prices: 含预热区间的价格历史
+        strategy_signals: technical_strategy_signals 的结果
+        risk_metrics: risk_metric_frame 的结果
+    """
+
+    def __init__(self, prices: pd.DataFrame):
+        self.prices = prices
+        self.strategy_signals = technical_strategy_signals(prices)
+        self.risk_metrics = risk_metric_frame(prices)
+
+
+class Strategy:
+    """策略接口：setup() 在回测开始时调用一次，decide() 每个交易日调用一次
+
+    Args:
+        name: 策略名称，在报告中作为列名
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, ticker: str, shared: SharedInputs):
+        pass
+
+    def decide(self, ticker: str, current_date: str, lookback_start: str, price: float,
+               portfolio: Dict[str, Any]) -> Dict[str, Any]:
+        """返回当日决策 {"action", "quantity", ...}"""
+        raise NotImplementedError
+
+
+class AgentStrategy(Strategy):
+    """按 run_hedge_fund 的调用方式运行的智能体（完整 LLM 链路或 FastAgent）
+
+    Args:
+        name: 策略名称
+        agent: 决策函数
+        num_of_news: 传给智能体的新闻数量
+        rate_limiter: LLM 调用限速器，None 表示不限速
+    """
+
+    def __init__(self, name: str, agent: Callable[..., Any], num_of_news: int = 5,
+                 rate_limiter: Optional[RateLimiter] = None):
+        super().__init__(name)
+        self.agent = agent
+        self.num_of_news = num_of_news
+        self.rate_limiter = rate_limiter
+
+    def setup(self, ticker: str, shared: SharedInputs):
+        if isinstance(self.agent, FastAgent):
+            # 共享策略信号和风险指标，只按本策略的权重重新组合
+            self.agent.prepare(ticker, shared.prices, strategy_signals=shared.strategy_signals,
+                               risk_metrics=shared.risk_metrics)
+        elif hasattr(self.agent, "prepare"):
+            self.agent.prepare(ticker, shared.prices)
+
+    def decide(self, ticker, current_date, lookback_start, price, portfolio):
+        def call():
+            return self.agent(
+                ticker=ticker,
+                start_date=lookback_start,
+                end_date=current_date,
+                portfolio=portfolio,
+                num_of_news=self.num_of_news,
+                run_id=f"compare_{self.name}_{ticker}_{current_date.replace('-', '')}"
+            )
+
+        try:
+            if self.rate_limiter is not None:
+                with self.rate_limiter:
+                    result = call()
+            else:
+                result = call()
+            return parse_agent_output(result).get("decision", hold_output()["decision"])
+        except Exception as e:
+            logger.warning(f"{self.name}: failed to get decision for {current_date}: {e}")
+            return hold_output()["decision"]
+
+
+class BuyAndHoldStrategy(Strategy):
+    """第一个交易日用全部现金买入并一直持有"""
+
+    def __init__(self, name: str = "buy_and_hold"):
+        super().__init__(name)
+
+    def decide(self, ticker, current_date, lookback_start, price, portfolio):
+        if portfolio["stock"] == 0 and portfolio["cash"] >= price > 0:
+            return {"action": "buy", "quantity": portfolio["cash"] / price}
+        return {"action": "hold", "quantity": 0}
+
+
+class MultiStrategyBacktester:
+    """一次回测并列运行多个策略
+
+    Args:
+        ticker: 代码
+        start_date: 开始日期 YYYY-MM-DD
+        end_date: 结束日期 YYYY-MM-DD
+        initial_capital: 每个策略的初始资金
+        strategies: 策略列表，名称不能重复
+        max_workers: 每个交易日并发获取决策的线程数
+    """
+
+    def __init__(self, ticker: str, start_date: str, end_date: str, initial_capital: float,
+                 strategies: Sequence[Strategy], max_workers: Optional[int] = None):
+        names = [strategy.name for strategy in strategies]
+        if not strategies or len(set(names)) != len(names):
+            raise ValueError("Strategies must be non-empty with unique names")
+        if datetime.strptime(start_date, "%Y-%m-%d") >= datetime.strptime(end_date, "%Y-%m-%d"):
+            raise ValueError("Start date must be before end date")
+        if initial_capital <= 0:
+            raise ValueError("Initial capital must be greater than 0")
+
+        self.ticker = ticker
+        self.start_date = start_date
+        self.end_date = end_date
+        self.initial_capital = initial_capital
+        self.strategies = list(strategies)
+        self.max_workers = max_workers or len(self.strategies)
+        self.fractional = is_crypto(ticker)
+
+        self.portfolios = {name: {"cash": initial_capital, "stock": 0} for name in names}
+        self.portfolio_values: Dict[str, List[Dict[str, Any]]] = {name: [] for name in names}
+        self.shared: Optional[SharedInputs] = None
+
+    def execute_trade(self, portfolio: Dict[str, Any], action: str, quantity, price: float):
+        """执行交易，规则与 Backtester.execute_trade 相同（虚拟币允许小数数量）
+
+        Returns:
+            成交数量
+        """
+        if not self.fractional:
+            quantity = int(quantity)
+        if action == "buy" and quantity > 0:
+            affordable = portfolio["cash"] / price
+            quantity = min(quantity, affordable if self.fractional else int(affordable))
+        elif action == "sell" and quantity > 0:
+            quantity = min(quantity, portfolio["stock"])
+        else:
+            return 0
+        if quantity <= 0:
+            return 0
+        sign = 1 if action == "buy" else -1
+        portfolio["stock"] += sign * quantity
+        portfolio["cash"] -= sign * quantity * price
+        return quantity
+
+    def run_backtest(self):
+        # 预加载的价格只在本次比较内可见
+        with price_preload_scope():
+            self._run_backtest()
+
+    def _run_backtest(self):
+        warmup_start = (datetime.strptime(self.start_date, "%Y-%m-%d") -
+                        timedelta(days=EXTENDED_HISTORY_DAYS)).strftime("%Y-%m-%d")
+        prices = preload_price_history(self.ticker, warmup_start, self.end_date)
+        if prices.empty:
+            raise ValueError(f"No price history for {self.ticker}")
+        self.shared = SharedInputs(prices)
+        for strategy in self.strategies:
+            strategy.setup(self.ticker, self.shared)
+
+        price_dates = pd.to_datetime(prices["date"]).to_numpy(dtype="datetime64[ns]")
+        open_prices = prices["open"].to_numpy(dtype=float)
+        dates = get_calendar_for_symbol(self.ticker).trading_days(self.start_date, self.end_date)
+        logger.info(f"Comparing {len(self.strategies)} strategies on {self.ticker} over {len(dates)} days")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for current_date in dates:
+                idx = np.searchsorted(price_dates, np.datetime64(current_date, "ns"), side="right") - 1
+                if idx < 0:
+                    continue
+                price = open_prices[idx]
+                current_date_str = current_date.strftime("%Y-%m-%d")
+                lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
+
+                futures = [executor.submit(contextvars.copy_context().run, strategy.decide,
+                                           self.ticker, current_date_str, lookback_start,
+                                           price, dict(self.portfolios[strategy.name]))
+                           for strategy in self.strategies]
+                for strategy, future in zip(self.strategies, futures):
+                    decision = future.result()
+                    portfolio = self.portfolios[strategy.name]
+                    executed = self.execute_trade(portfolio, decision.get("action", "hold"),
+                                                  decision.get("quantity", 0) or 0, price)
+                    self._record(strategy.name, current_date, price, executed)
+
+    def _record(self, name: str, current_date, price: float, executed):
+        portfolio = self.portfolios[name]
+        values = self.portfolio_values[name]
+        total_value = portfolio["cash"] + portfolio["stock"] * price
+        daily_return = (total_value / values[-1]["Portfolio Value"] - 1) * 100 if values else 0
+        values.append({
+            "Date": current_date,
+            "Portfolio Value": total_value,
+            "Daily Return": daily_return,
+            "Position Value": portfolio["stock"] * price,
+            "Traded Value": executed * price,
+        })
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """策略名称到绩效指标的映射"""
+        return {name: analyze_frame(pd.DataFrame(values), initial_value=self.initial_capital)
+                for name, values in self.portfolio_values.items() if values}
+
+    def compare(self) -> pd.DataFrame:
+        """各策略的绩效指标，行为指标、列为策略"""
+        return pd.DataFrame(self.metrics())
+
+    def write_report(self, output_dir: Optional[str] = None) -> Dict[str, str]:
+        """写出对比报告，默认目录 logs/compare_<代码>_<区间>"""
+        if output_dir is None:
+            period = f"{self.start_date.replace('-', '')}_{self.end_date.replace('-', '')}"
+            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__)))), "logs", f"compare_{self.ticker}_{period}")
+        curves = {name: pd.DataFrame(values).set_index("Date")["Portfolio Value"]
+                  for name, values in self.portfolio_values.items() if values}
+        return write_comparison_report(output_dir, curves, self.metrics(),
+                                       title=f"Strategy Comparison: {self.ticker}")
+
+
+def build_strategies(names: Sequence[str], num_of_news: int = 5,
+                     rate_limiter: Optional[RateLimiter] = None) -> List[Strategy]:
+    """按名称创建策略：llm（完整智能体链路）、fast（FastAgent）、technicals（只用技术信号）、
+    buy_and_hold"""
+    strategies = []
+    for name in names:
+        if name == "llm":
+            from src.main import run_hedge_fund
+            strategies.append(AgentStrategy(name, run_hedge_fund, num_of_news, rate_limiter))
+        elif name == "fast":
+            strategies.append(AgentStrategy(name, FastAgent()))
+        elif name == "technicals":
+            strategies.append(AgentStrategy(name, FastAgent(use_fundamentals=False)))
+        elif name == "buy_and_hold":
+            strategies.append(BuyAndHoldStrategy(name))
+        else:
+            raise ValueError(f"Unknown strategy: {name}")
+    return strategies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='单次回测中并列比较多个策略')
+    parser.add_argument('--ticker', type=str, required=True,
+                        help='股票代码 (例如: 600519)')
+    parser.add_argument('--end-date', type=str,
+                        default=datetime.now().strftime('%Y-%m-%d'), help='结束日期，格式：YYYY-MM-DD')
+    parser.add_argument('--start-date', type=str, default=(datetime.now() -
+                        timedelta(days=90)).strftime('%Y-%m-%d'), help='开始日期，格式：YYYY-MM-DD')
+    parser.add_argument('--initial-capital', type=float, default=100000,
+                        help='每个策略的初始资金 (默认: 100000)')
+    parser.add_argument('--num-of-news', type=int, default=5,
+                        help='情绪分析使用的新闻数量 (默认: 5)')
+    parser.add_argument('--strategies', type=str, default='llm,technicals,buy_and_hold',
+                        help='逗号分隔的策略: llm, fast, technicals, buy_and_hold (默认: llm,technicals,buy_and_hold)')
+    parser.add_argument('--calls-per-minute', type=int, default=8,
+                        help='llm 策略每分钟最多调用次数 (默认: 8)')
+    parser.add_argument('--report-dir', type=str, default=None,
+                        help='对比报告目录 (默认: logs/compare_<代码>_<区间>)')
+    args = parser.parse_args()
+
+    strategies = build_strategies(
+        [s.strip() for s in args.strategies.split(",") if s.strip()], args.num_of_news,
+        RateLimiter(max_calls=args.calls_per_minute, period=60, min_interval=6))
+    backtester = MultiStrategyBacktester(args.ticker, args.start_date, args.end_date,
+                                         args.initial_capital, strategies)
+    backtester.run_backtest()
+    print(backtester.compare().to_string())
+    paths = backtester.write_report(args.report_dir)
+    print(f"\nReport: {os.path.abspath(paths['html'])}")
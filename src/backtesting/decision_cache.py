@@ -0,0 +1,156 @@
+"""
+回测决策缓存 - 相同输入的交易日不再重复调用智能体
+
+回测每天调用一次 run_hedge_fund，整条智能体链路包含多次 LLM 调用。
+只修改成交、仓位或绩效计算代码后重跑回测时，智能体的输入和输出并没有变化，
+缓存按以下内容生成键，命中时直接返回记录的智能体输出：
+    - 代码、交易日、回看开始日期、新闻数量
+    - 组合快照（现金、持仓），可通过 match_portfolio=False 忽略
+    - 智能体代码的哈希（src/agents 下的源文件，修改提示词或逻辑后自动失效）
+    - 模型名称
+
+缓存的是智能体返回的原始文本，解析逻辑修改后同样生效。
+
+用法:
+    cache = DecisionCache()
+    backtester = Backtester(..., decision_cache=cache)
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('decision_cache')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "decision_cache.sqlite")
+AGENTS_DIR = os.path.join(PROJECT_ROOT, "src", "agents")
+
+
+def agent_config_hash(agents_dir: str = AGENTS_DIR) -> str:
+    """智能体源代码的哈希，任何智能体文件变化都会得到不同的值"""
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(agents_dir, "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class DecisionCache:
+    """持久化的智能体决策缓存
+
+    Args:
+        db_path: SQLite 文件路径，默认 data/decision_cache.sqlite
+        model: 模型名称，默认按 LLM 客户端的自动选择规则读取环境变量
+        config_hash: 智能体配置哈希，默认为 agent_config_hash()
+        match_portfolio: 是否把组合快照纳入缓存键。关闭后不同初始资金的回测也能复用决策，
+            但智能体给出的交易数量是按原组合计算的
+    """
+
+    def __init__(self, db_path: Optional[str] = None, model: Optional[str] = None,
+                 config_hash: Optional[str] = None, match_portfolio: bool = True):
+        if model is None:
+            from src.utils.llm_clients import active_model_name
+            model = active_model_name()
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.model = model
+        self.config_hash = config_hash or agent_config_hash()
+        self.match_portfolio = match_portfolio
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS decisions ("
+            " key TEXT PRIMARY KEY,"
+            " ticker TEXT NOT NULL,"
+            " trade_date TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " config_hash TEXT NOT NULL,"
+            " created_at TEXT NOT NULL,"
+            " result TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ticker_date ON decisions (ticker, trade_date)")
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def key(self, ticker: str, trade_date: str, portfolio: Dict[str, Any], **inputs) -> str:
+        """计算缓存键
+
+        Args:
+            ticker: 代码
+            trade_date: 交易日，格式：YYYY-MM-DD
+            portfolio: 组合，只使用 cash 和 stock
+            **inputs: 其他影响智能体输出的输入（回看开始日期、新闻数量等）
+
+        Returns:
+            十六进制的 SHA-256
+        """
+        payload = {
+            "ticker": ticker,
+            "trade_date": trade_date,
+            "model": self.model,
+            "config_hash": self.config_hash,
+            "inputs": inputs,
+        }
+        if self.match_portfolio:
+            payload["portfolio"] = {
+                "cash": round(float(portfolio.get("cash", 0)), 2),
+                "stock": portfolio.get("stock", 0),
+            }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """返回缓存的智能体输出，未命中返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM decisions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, ticker: str, trade_date: str, result: str):
+        """记录智能体输出"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO decisions"
+                " (key, ticker, trade_date, model, config_hash, created_at, result)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, ticker, trade_date, self.model, self.config_hash,
+                 datetime.now().isoformat(timespec="seconds"), result))
+            self._conn.commit()
+
+    def clear(self, ticker: Optional[str] = None) -> int:
+        """删除缓存，ticker 为 None 时全部删除
+
+        Returns:
+            删除的条数
+        """
+        with self._lock:
+            if ticker is None:
+                cursor = self._conn.execute("DELETE FROM decisions")
+            else:
+                cursor = self._conn.execute("DELETE FROM decisions WHERE ticker = ?", (ticker,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
@@ -0,0 +1,250 @@
+"""
+回测成交模型 - 佣金、滑点和成交量限制
+
+默认的回测按开盘价无成本成交，高换手的参数组合收益会被明显高估。ExecutionModel 把成交拆成三部分：
+    - 佣金: AShareCommission（佣金 + 卖出印花税 + 过户费）、PerShareCommission（美股按股计费）、
+      MakerTakerCommission（加密货币按挂单/吃单费率）
+    - 滑点: 半个买卖价差 + 冲击成本，冲击成本按平方根模型 impact × 波动率 × √参与率
+    - 成交量限制: 单笔成交不超过当日成交股数的 max_participation
+
+所有计算都以数组为输入，同一天的多笔成交（组合回测）或整段回放可以一次向量化计算；
+每根K线的波动率和成交股数由 market_inputs() 在回测开始前一次性算好。
+
+用法:
+    model = build_execution_model("auto", "600519")
+    volatility, liquidity = model.market_inputs(prices_df)
+    fills = model.fill(1, 1000, 1700.0, volatility[i], liquidity[i], budget=cash)
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.tools.crypto_symbols import is_crypto
+
+BUY, SELL = 1, -1
+
+
+class CommissionModel:
+    """佣金模型基类，默认不收费"""
+
+    def fees(self, sides: np.ndarray, quantities: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        """计算每笔成交的费用
+
+        Args:
+            sides: 1 表示买入，-1 表示卖出
+            quantities: 成交数量（非负）
+            prices: 成交价格
+
+        Returns:
+            每笔成交的费用，数量为 0 的成交费用为 0
+        """
+        return np.zeros(np.broadcast(sides, quantities, prices).shape)
+
+
+@dataclass
+class AShareCommission(CommissionModel):
+    """A股费用：双向佣金（有最低收费）、卖出印花税、双向过户费"""
+    commission_rate: float = 0.00025
+    minimum: float = 5.0
+    stamp_duty: float = 0.0005
+    transfer_fee: float = 0.00001
+
+    def fees(self, sides, quantities, prices):
+        notional = np.asarray(quantities, dtype=float) * prices
+        fees = (np.maximum(notional * self.commission_rate, self.minimum) +
+                notional * self.transfer_fee +
+                np.where(np.asarray(sides) == SELL, notional * self.stamp_duty, 0.0))
+        return np.where(notional > 0, fees, 0.0)
+
+
+@dataclass
+class PerShareCommission(CommissionModel):
+    """美股按股计费：每股 per_share，每笔不低于 minimum、不超过成交额的 max_rate"""
+    per_share: float = 0.005
+    minimum: float = 1.0
+    max_rate: float = 0.01
+
+    def fees(self, sides, quantities, prices):
+        quantities = np.asarray(quantities, dtype=float)
+        notional = quantities * prices
+        fees = np.minimum(np.maximum(quantities * self.per_share, self.minimum),
+                          notional * self.max_rate)
+        return np.where(notional > 0, fees, 0.0)
+
+
+@dataclass
+class MakerTakerCommission(CommissionModel):
+    """加密货币按成交额收费；按开盘价的市价成交视为吃单，maker_fraction 为按挂单费率成交的比例"""
+    maker_rate: float = 0.001
+    taker_rate: float = 0.001
+    maker_fraction: float = 0.0
+
+    def fees(self, sides, quantities, prices):
+        rate = self.maker_fraction * self.maker_rate + (1 - self.maker_fraction) * self.taker_rate
+        return np.asarray(quantities, dtype=float) * prices * rate
+
+
+@dataclass
+class SlippageModel:
+    """滑点比例 = spread_bps / 2 / 10000 + impact × 波动率 × √参与率"""
+    spread_bps: float = 0.0
+    impact: float = 0.0
+
+    def fraction(self, volatility, participation) -> np.ndarray:
+        return (self.spread_bps / 20000 +
+                self.impact * np.asarray(volatility, dtype=float) * np.sqrt(participation))
+
+
+@dataclass
+class Fills:
+    """一组成交：数量、含滑点的成交价和费用（与输入数组形状相同）"""
+    quantity: np.ndarray
+    price: np.ndarray
+    fees: np.ndarray
+
+    @property
+    def notional(self) -> np.ndarray:
+        return self.quantity * self.price
+
+
+class ExecutionModel:
+    """可插拔的成交模型
+
+    Args:
+        commission: 佣金模型，默认不收费
+        slippage: 滑点模型，默认无滑点
+        max_participation: 单笔成交占当日成交股数的上限，None 表示不限制
+        lot_size: 买入数量取整的单位（A股 100 股一手），None 表示允许小数（加密货币）
+        volatility_window: 估计日波动率的窗口
+        default_volatility: 历史不足时使用的日波动率
+    """
+
+    def __init__(self, commission: Optional[CommissionModel] = None,
+                 slippage: Optional[SlippageModel] = None,
+                 max_participation: Optional[float] = None, lot_size: Optional[float] = 1,
+                 volatility_window: int = 20, default_volatility: float = 0.02):
+        self.commission = commission or CommissionModel()
+        self.slippage = slippage or SlippageModel()
+        self.max_participation = max_participation
+        self.lot_size = lot_size
+        self.volatility_window = volatility_window
+        self.default_volatility = default_volatility
+
+    def __repr__(self):
+        return (f"ExecutionModel(commission={self.commission!r}, slippage={self.slippage!r}, "
+                f"max_participation={self.max_participation}, lot_size={self.lot_size})")
+
+    def market_inputs(self, prices: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """每根K线的日波动率和成交股数
+
+        波动率为截至前一日收盘的对数收益率滚动标准差（按开盘价成交时不使用当日收盘价）。
+        成交股数优先用 成交额 / 均价 计算，避免各数据源 volume 单位（股或手）不一致；
+        没有成交额时使用 volume。
+
+        Returns:
+            (volatility, liquidity)，与 prices 的行一一对应
+        """
+        close = prices["close"].astype(float)
+        volatility = (np.log(close).diff().rolling(self.volatility_window, min_periods=5).std()
+                      .shift(1).fillna(self.default_volatility).to_numpy())
+
+        liquidity = np.full(len(prices), np.nan)
+        if "volume" in prices:
+            liquidity = prices["volume"].to_numpy(dtype=float)
+        if "amount" in prices:
+            average = prices[["open", "high", "low", "close"]].astype(float).mean(axis=1).to_numpy() \
+                if {"open", "high", "low"}.issubset(prices.columns) else close.to_numpy()
+            amount = prices["amount"].to_numpy(dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                shares = amount / average
+            liquidity = np.where(np.isfinite(shares) & (shares > 0), shares, liquidity)
+        return volatility, liquidity
+
+    def _round(self, quantities: np.ndarray) -> np.ndarray:
+        if self.lot_size is None:
+            return quantities
+        return np.floor(quantities / self.lot_size + 1e-9) * self.lot_size
+
+    def fill(self, sides, quantities, prices, volatility=None, liquidity=None,
+             budget=None) -> Fills:
+        """向量化计算一组成交
+
+        Args:
+            sides: 1 表示买入，-1 表示卖出
+            quantities: 请求数量（卖出数量应已限制在持仓以内）
+            prices: 参考价格（开盘价）
+            volatility: 日波动率，默认 default_volatility
+            liquidity: 当日成交股数，NaN 表示不限制
+            budget: 买入可用的资金，成交额加费用超出时缩减买入数量
+
+        Returns:
+            Fills，数组形状与输入广播后的形状相同
+        """
+        sides, quantities, prices = np.broadcast_arrays(
+            np.asarray(sides), np.asarray(quantities, dtype=float), np.asarray(prices, dtype=float))
+        buys = sides == BUY
+        volatility = self.default_volatility if volatility is None else np.asarray(volatility, dtype=float)
+        liquidity = np.nan if liquidity is None else np.asarray(liquidity, dtype=float)
+        valid_liquidity = np.isfinite(liquidity) & (liquidity > 0)
+
+        quantities = np.maximum(quantities, 0.0)
+        if self.max_participation is not None:
+            cap = np.where(valid_liquidity, self.max_participation * liquidity, np.inf)
+            quantities = np.minimum(quantities, cap)
+        # 只对买入取整：A股允许一次卖出不足一手的零股余额
+        quantities = np.where(buys, self._round(quantities), quantities)
+
+        def evaluate(q):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                participation = np.where(valid_liquidity, q / liquidity, 0.0)
+            slip = self.slippage.fraction(volatility, participation)
+            price = prices * (1 + np.where(buys, slip, -slip))
+            return price, self.commission.fees(sides, q, price)
+
+        price, fees = evaluate(quantities)
+        if budget is not None:
+            budget = np.asarray(budget, dtype=float)
+            # 成交额 + 费用超出预算时按比例缩减买入数量（滑点和最低佣金使成本非线性，迭代几次收敛）
+            for _ in range(5):
+                cost = quantities * price + fees
+                over = buys & (cost > budget + 1e-9)
+                if not over.any():
+                    break
+                ratio = np.maximum(budget - fees, 0.0) / np.maximum(cost - fees, 1e-12)
+                scaled = quantities * ratio
+                quantities = np.where(over, self._round(np.minimum(scaled, quantities)), quantities)
+                price, fees = evaluate(quantities)
+            cost = quantities * price + fees
+            quantities = np.where(buys & (cost > budget + 1e-9), 0.0, quantities)
+            price, fees = evaluate(quantities)
+        fees = np.where(quantities > 0, fees, 0.0)
+        return Fills(quantities, price, fees)
+
+
+# 常用市场的默认参数
+EXECUTION_PRESETS = {
+    "none": lambda: ExecutionModel(),
+    "a_share": lambda: ExecutionModel(AShareCommission(), SlippageModel(spread_bps=2, impact=0.5),
+                                      max_participation=0.1, lot_size=100),
+    "us": lambda: ExecutionModel(PerShareCommission(), SlippageModel(spread_bps=1, impact=0.5),
+                                 max_participation=0.1, lot_size=1),
+    "crypto": lambda: ExecutionModel(MakerTakerCommission(), SlippageModel(spread_bps=2, impact=0.5),
+                                     max_participation=0.05, lot_size=None),
+}
+
+
+def build_execution_model(name: str, ticker: Optional[str] = None) -> ExecutionModel:
+    """按名称构建成交模型；auto 根据代码选择 A股（6 位数字）、加密货币或美股的预设"""
+    if name == "auto":
+        if ticker is not None and is_crypto(ticker):
+            name = "crypto"
+        elif ticker is not None and ticker.isdigit() and len(ticker) == 6:
+            name = "a_share"
+        else:
+            name = "us"
+    if name not in EXECUTION_PRESETS:
+        raise ValueError(f"Unknown execution model: {name}")
+    return EXECUTION_PRESETS[name]()
@@ -0,0 +1,360 @@
+"""
+无 LLM 的快速回测模式
+
+技术分析、基本面和风险管理中的量化部分是确定性的，只有情绪、宏观、辩论和投资组合经理需要 LLM。
+快速模式在整段价格历史上一次性向量化计算这些智能体的信号序列，每个交易日只做一次二分查找，
+并用规则聚合器代替 portfolio_management_agent：
+    - 技术信号：五个策略的信号按 STRATEGY_WEIGHTS 组合，规则与 weighted_signal_combination 相同
+    - 基本面信号：analyze_fundamentals，按当日已知的财务指标快照计算（虚拟币不使用）
+    - 风险：risk_management_agent 的市场风险评分、仓位上限和交易动作规则
+
+滚动窗口指标与智能体在单日价格窗口上的结果一致；EMA 类指标在整段历史上计算，
+与从窗口起点开始计算相比有细微差异。
+
+用法:
+    backtester = Backtester(agent=FastAgent(), ..., rate_limit=False)
+    python src/backtester.py --ticker 600519 --mode fast
+"""
+
+import json
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.agents.fundamentals import analyze_fundamentals
+from src.agents.technicals import (STRATEGY_WEIGHTS, calculate_adx, calculate_bollinger_bands,
+                                   calculate_ema)
+from src.tools.api import EXTENDED_HISTORY_DAYS, get_financial_metrics, get_price_history
+from src.tools.crypto_symbols import is_crypto
+from src.tools.pit_store import fetch_point_in_time
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('fast_mode')
+
+SIGNAL_NAMES = {1: "bullish", 0: "neutral", -1: "bearish"}
+
+# 回测中智能体看到的价格窗口：请求 30 天，不足 120 个交易日时扩展为两年
+AGENT_WINDOW = f"{EXTENDED_HISTORY_DAYS}D"
+
+
+def _signal(bullish, bearish) -> np.ndarray:
+    """布尔条件转换为 1 / 0 / -1"""
+    return np.where(bullish, 1, np.where(bearish, -1, 0))
+
+
+def _indexed(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """按日期排序并以日期为索引，价格统一为 float64"""
+    df = prices_df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values("date").set_index("date")
+    for column in ("open", "high", "low", "close", "volume"):
+        df[column] = df[column].astype("float64")
+    return df
+
+
+def technical_strategy_signals(prices_df: pd.DataFrame, window: str = AGENT_WINDOW) -> pd.DataFrame:
+    """向量化计算技术分析师五个策略每日的信号和置信度
+
+    每一行等价于在截至当日的价格窗口上调用 calculate_*_signals 的结果。
+
+    Args:
+        prices_df: 包含 date, open, high, low, close, volume 列的价格历史
+        window: 智能体价格窗口的长度（pandas 时间偏移）
+
+    Returns:
+        以日期为索引的DataFrame，列为 <策略>_signal（1/0/-1）和 <策略>_confidence
+    """
+    df = _indexed(prices_df)
+    close = df["close"]
+    returns = close.pct_change()
+    columns = {}
+
+    # 趋势：EMA 排列 + ADX 强度
+    ema_8, ema_21, ema_55 = (calculate_ema(df, span) for span in (8, 21, 55))
+    adx = calculate_adx(df[["high", "low", "close"]].copy(), 14)["adx"]
+    short_trend, medium_trend = ema_8 > ema_21, ema_21 > ema_55
+    signal = _signal(short_trend & medium_trend, ~short_trend & ~medium_trend)
+    columns["trend_signal"] = signal
+    columns["trend_confidence"] = np.where(signal != 0, adx / 100.0, 0.5)
+
+    # 均值回归：50 日 Z 分数 + 布林带位置
+    z_score = (close - close.rolling(50).mean()) / close.rolling(50).std()
+    bb_upper, bb_lower = calculate_bollinger_bands(df)
+    price_vs_bb = (close - bb_lower) / (bb_upper - bb_lower)
+    signal = _signal((z_score < -2) & (price_vs_bb < 0.2), (z_score > 2) & (price_vs_bb > 0.8))
+    columns["mean_reversion_signal"] = signal
+    columns["mean_reversion_confidence"] = np.where(signal != 0, np.minimum(z_score.abs() / 4, 1.0), 0.5)
+
+    # 动量：多周期收益 + 成交量确认
+    mom_1m = returns.rolling(21, min_periods=5).sum().fillna(0)
+    mom_3m = returns.rolling(63, min_periods=42).sum().fillna(mom_1m)
+    mom_6m = returns.rolling(126, min_periods=63).sum().fillna(mom_3m)
+    momentum_score = 0.2 * mom_1m + 0.3 * mom_3m + 0.5 * mom_6m
+    volume_confirmation = df["volume"] / df["volume"].rolling(21, min_periods=10).mean() > 1.0
+    signal = _signal((momentum_score > 0.05) & volume_confirmation,
+                     (momentum_score < -0.05) & volume_confirmation)
+    columns["momentum_signal"] = signal
+    columns["momentum_confidence"] = np.where(signal != 0, np.minimum(momentum_score.abs() * 5, 1.0), 0.5)
+
+    # 波动率：波动率区间 + Z 分数
+    hist_vol = returns.rolling(21, min_periods=10).std() * math.sqrt(252)
+    vol_ma = hist_vol.rolling(42, min_periods=21).mean()
+    vol_regime = (hist_vol / vol_ma).fillna(1.0)
+    vol_std = hist_vol.rolling(42, min_periods=21).std()
+    vol_z = ((hist_vol - vol_ma) / vol_std.replace(0, np.nan)).fillna(0.0)
+    signal = _signal((vol_regime < 0.8) & (vol_z < -1), (vol_regime > 1.2) & (vol_z > 1))
+    columns["volatility_signal"] = signal
+    columns["volatility_confidence"] = np.where(signal != 0, np.minimum(vol_z.abs() / 3, 1.0), 0.5)
+
+    # 统计套利：偏度 + Hurst 指数
+    skew = returns.rolling(42, min_periods=21).skew().fillna(0.0)
+    # calculate_hurst_exponent 中的收益率按索引对齐相减，窗口内收益率不少于 20 个时结果为 0，
+    # 否则为 0.5；这里保持与智能体一致
+    hurst = np.where(returns.rolling(window).count() >= 20, 0.0, 0.5)
+    signal = _signal((hurst < 0.4) & (skew > 1), (hurst < 0.4) & (skew < -1))
+    columns["stat_arb_signal"] = signal
+    columns["stat_arb_confidence"] = np.where(signal != 0, (0.5 - hurst) * 2, 0.5)
+
+    return pd.DataFrame(columns, index=df.index)
+
+
+def combine_strategy_signals(strategy_signals: pd.DataFrame,
+                             weights: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """按 weighted_signal_combination 的规则向量化组合策略信号
+
+    Args:
+        strategy_signals: technical_strategy_signals 的结果
+        weights: 策略权重，默认 STRATEGY_WEIGHTS
+
+    Returns:
+        以日期为索引的DataFrame，列为 score（-1 ~ 1）、signal（1/0/-1）和 confidence
+    """
+    weights = weights or STRATEGY_WEIGHTS
+    weighted_sum = np.zeros(len(strategy_signals))
+    total_confidence = np.zeros(len(strategy_signals))
+    for strategy, weight in weights.items():
+        confidence = strategy_signals[f"{strategy}_confidence"].to_numpy(dtype=float)
+        weighted_sum += strategy_signals[f"{strategy}_signal"].to_numpy(dtype=float) * weight * confidence
+        total_confidence += weight * confidence
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(total_confidence > 0, weighted_sum / total_confidence, 0.0)
+    return pd.DataFrame({
+        "score": score,
+        "signal": _signal(score > 0.2, score < -0.2),
+        "confidence": np.abs(score),
+    }, index=strategy_signals.index)
+
+
+def risk_metric_frame(prices_df: pd.DataFrame, window: str = AGENT_WINDOW) -> pd.DataFrame:
+    """向量化计算 calculate_risk_metrics 的每日结果和 risk_management_agent 的市场风险评分
+
+    Args:
+        prices_df: 包含 date, close 列的价格历史
+        window: 智能体价格窗口的长度（pandas 时间偏移）
+
+    Returns:
+        以日期为索引的DataFrame，列为 volatility, volatility_percentile, var_95,
+        max_drawdown 和 market_risk_score
+    """
+    df = _indexed(prices_df)
+    close = df["close"]
+    returns = close.pct_change()
+    volatility = returns.rolling(window).std() * math.sqrt(252)
+    rolling_std = returns.rolling(120).std() * math.sqrt(252)
+    volatility_percentile = ((volatility - rolling_std.rolling(window).mean())
+                             / rolling_std.rolling(window).std())
+    var_95 = returns.rolling(window).quantile(0.05)
+    max_drawdown = (close / close.rolling(60).max() - 1).rolling(window).min()
+
+    market_risk_score = (
+        np.select([volatility_percentile > 1.5, volatility_percentile > 1.0], [2, 1], 0)
+        + np.select([var_95 < -0.03, var_95 < -0.02], [2, 1], 0)
+        + np.select([max_drawdown < -0.20, max_drawdown < -0.10], [2, 1], 0)
+    )
+    return pd.DataFrame({
+        "volatility": volatility,
+        "volatility_percentile": volatility_percentile,
+        "var_95": var_95,
+        "max_drawdown": max_drawdown,
+        "market_risk_score": market_risk_score,
+    }, index=df.index)
+
+
+def build_signal_frame(prices_df: pd.DataFrame, weights: Optional[Dict[str, float]] = None,
+                       window: str = AGENT_WINDOW, strategy_signals: Optional[pd.DataFrame] = None,
+                       risk_metrics: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """技术信号、风险指标和收盘价合并为一张以日期为索引的表
+
+    Args:
+        strategy_signals / risk_metrics: 已计算的 technical_strategy_signals 和 risk_metric_frame
+            结果，多个使用不同权重的智能体可以共享
+    """
+    if strategy_signals is None:
+        strategy_signals = technical_strategy_signals(prices_df, window)
+    if risk_metrics is None:
+        risk_metrics = risk_metric_frame(prices_df, window)
+    technical = combine_strategy_signals(strategy_signals, weights)
+    frame = technical.join(risk_metrics)
+    frame["close"] = _indexed(prices_df)["close"]
+    return frame
+
+
+class FastAgent:
+    """确定性的决策函数，调用方式与 run_hedge_fund 相同，直接返回解析后的决策
+
+    Backtester 预加载价格后会调用 prepare() 一次性计算整段信号序列；
+    未预计算的代码在每次调用时按请求的价格窗口计算。
+
+    Args:
+        weights: 技术策略权重，默认 STRATEGY_WEIGHTS
+        fundamentals_weight: 基本面信号在综合得分中的权重（虚拟币或没有财务数据时为 0）
+        signal_threshold: 综合得分超过该值视为看多/看空（与 weighted_signal_combination 相同）
+        action_confidence: 置信度超过该值才买入或卖出（与 risk_management_agent 相同）
+        use_fundamentals: 是否读取财务指标
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, fundamentals_weight: float = 0.3,
+                 signal_threshold: float = 0.2, action_confidence: float = 0.5,
+                 use_fundamentals: bool = True):
+        self.weights = weights or STRATEGY_WEIGHTS
+        self.fundamentals_weight = fundamentals_weight
+        self.signal_threshold = signal_threshold
+        self.action_confidence = action_confidence
+        self.use_fundamentals = use_fundamentals
+        # 代码 -> (升序日期数组, 列名 -> 数组)
+        self._frames: Dict[str, Tuple[np.ndarray, Dict[str, np.ndarray]]] = {}
+        self._live_metrics: Dict[str, Any] = {}
+        self._fundamental_scores: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def prepare(self, ticker: str, prices_df: pd.DataFrame, **precomputed):
+        """在整段价格历史上预计算信号序列
+
+        Args:
+            precomputed: 可选的 strategy_signals / risk_metrics，见 build_signal_frame
+        """
+        self._frames[ticker] = self._arrays(prices_df, **precomputed)
+        logger.info(f"Precomputed fast-mode signals for {ticker} ({len(prices_df)} bars)")
+
+    def _arrays(self, prices_df: pd.DataFrame, **precomputed) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        frame = build_signal_frame(prices_df, self.weights, **precomputed)
+        return (frame.index.to_numpy(dtype="datetime64[ns]"),
+                {column: frame[column].to_numpy() for column in frame.columns})
+
+    def _fundamental_score(self, ticker: str, end_date: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """当日已知的财务指标对应的 (带符号得分, 分析结果)，没有数据时返回 None"""
+        if not self.use_fundamentals or is_crypto(ticker):
+            return None
+
+        def live_fetch():
+            # 未激活时点存储时只请求一次
+            if ticker not in self._live_metrics:
+                try:
+                    self._live_metrics[ticker] = get_financial_metrics(ticker)
+                except Exception as e:
+                    logger.warning(f"Failed to fetch financial metrics for {ticker}: {e}")
+                    self._live_metrics[ticker] = None
+            return self._live_metrics[ticker]
+
+        metrics = fetch_point_in_time("financial_metrics", ticker, end_date, live_fetch)
+        if not metrics or not metrics[0]:
+            return None
+        key = json.dumps(metrics[0], sort_keys=True, default=str)
+        if key not in self._fundamental_scores:
+            analysis = analyze_fundamentals(metrics[0])
+            value = {"bullish": 1, "neutral": 0, "bearish": -1}[analysis["signal"]]
+            confidence = float(analysis["confidence"].rstrip("%")) / 100
+            self._fundamental_scores[key] = (value * confidence, analysis)
+        return self._fundamental_scores[key]
+
+    def __call__(self, ticker: str, start_date: str, end_date: str, portfolio: Dict[str, Any],
+                 **kwargs) -> Dict[str, Any]:
+        """返回与 Backtester.parse_agent_result 相同格式的决策"""
+        hold = {"decision": {"action": "hold", "quantity": 0}, "analyst_signals": {}}
+        if ticker in self._frames:
+            dates, columns = self._frames[ticker]
+        else:
+            prices_df = get_price_history(ticker, start_date, end_date)
+            if prices_df is None or prices_df.empty:
+                return hold
+            dates, columns = self._arrays(prices_df)
+
+        idx = np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date), "ns"), side="right") - 1
+        if idx < 0:
+            return hold
+
+        technical_score = float(columns["score"][idx])
+        fundamental = self._fundamental_score(ticker, end_date)
+        fundamentals_weight = self.fundamentals_weight if fundamental is not None else 0.0
+        score = (1 - fundamentals_weight) * technical_score
+        if fundamental is not None:
+            score += fundamentals_weight * fundamental[0]
+        signal = SIGNAL_NAMES[int(_signal(score > self.signal_threshold, score < -self.signal_threshold))]
+        confidence = abs(score)
+
+        # risk_management_agent 的规则：辩论置信度过低时风险评分加 1
+        market_risk_score = int(columns["market_risk_score"][idx])
+        risk_score = min(market_risk_score + (1 if confidence < 0.3 else 0), 10)
+        if risk_score >= 9:
+            action = "hold"
+        elif risk_score >= 7:
+            action = "reduce"
+        elif signal == "bullish" and confidence > self.action_confidence:
+            action = "buy"
+        elif signal == "bearish" and confidence > self.action_confidence:
+            action = "sell"
+        else:
+            action = "hold"
+
+        quantity = self._size(ticker, action, portfolio, float(columns["close"][idx]), market_risk_score)
+        if action == "reduce":
+            action = "sell"
+
+        agent_signals = [
+            {"agent_name": "technical_analyst_agent",
+             "signal": SIGNAL_NAMES[int(columns["signal"][idx])],
+             "confidence": float(columns["confidence"][idx])},
+            {"agent_name": "risk_management_agent", "signal": action,
+             "confidence": 1 - risk_score / 10},
+        ]
+        if fundamental is not None:
+            agent_signals.insert(1, {"agent_name": "fundamentals_agent",
+                                     "signal": fundamental[1]["signal"],
+                                     "confidence": abs(fundamental[0])})
+        return {
+            "decision": {
+                "action": action,
+                "quantity": quantity,
+                "confidence": confidence,
+                "agent_signals": agent_signals,
+            },
+            "analyst_signals": {
+                item["agent_name"]: {"signal": item["signal"], "confidence": item["confidence"]}
+                for item in agent_signals
+            },
+        }
+
+    @staticmethod
+    def _size(ticker: str, action: str, portfolio: Dict[str, Any], price: float,
+              market_risk_score: int):
+        """按 risk_management_agent 的仓位上限计算交易数量，股票取整、虚拟币保留小数"""
+        stock = portfolio.get("stock", 0)
+        cash = portfolio.get("cash", 0)
+        if action == "sell":
+            quantity = stock
+        elif action == "reduce":
+            quantity = stock / 2
+        elif action == "buy" and price > 0:
+            stock_value = stock * price
+            max_position = (cash + stock_value) * 0.25
+            if market_risk_score >= 4:
+                max_position *= 0.5
+            elif market_risk_score >= 2:
+                max_position *= 0.75
+            quantity = max(0.0, min(max_position - stock_value, cash) / price)
+        else:
+            quantity = 0
+        if is_crypto(ticker):
+            return float(quantity)
+        return int(quantity)
@@ -0,0 +1,203 @@
+"""
+回测决策日志 - 记录每个 (代码, 交易日) 的智能体信号和最终决策
+
+回测中 run_hedge_fund 的输出只打印一次就丢弃了。决策日志把每一天的以下内容写入 SQLite：
+    - decisions: 最终决策（动作、请求数量、置信度）、实际成交数量、成交前的组合，
+      以及当日的开高低收、成交量和成交额，回放时不需要再获取行情
+    - signals: 每个智能体的信号和置信度
+
+replay.py 在日志上重新模拟成交、仓位和费用，不调用任何智能体。
+
+用法:
+    journal = DecisionJournal()
+    backtester = Backtester(..., journal=journal)
+    python src/backtester.py --ticker 600519 --journal data/journal.sqlite
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('decision_journal')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_JOURNAL_PATH = os.path.join(PROJECT_ROOT, "data", "decision_journal.sqlite")
+
+MARKET_COLUMNS = ("open", "high", "low", "close", "volume", "amount")
+SIGNAL_VALUES = {"bullish": 1, "buy": 1, "neutral": 0, "hold": 0, "bearish": -1, "sell": -1}
+
+
+def default_run_id(ticker: str, start_date: str, end_date: str) -> str:
+    """同一代码和区间的回测使用相同的运行 ID，重跑或从检查点恢复时覆盖原记录"""
+    return f"{ticker}_{start_date.replace('-', '')}_{end_date.replace('-', '')}"
+
+
+class DecisionJournal:
+    """决策日志，按批写入（默认每 100 天提交一次，flush() 时写入剩余记录）
+
+    Args:
+        path: SQLite 文件路径，默认 data/decision_journal.sqlite
+        batch_size: 每批写入的交易日数
+    """
+
+    def __init__(self, path: Optional[str] = None, batch_size: int = 100):
+        self.path = path or DEFAULT_JOURNAL_PATH
+        self.batch_size = batch_size
+        self._pending: List[tuple] = []
+        self._pending_signals: List[tuple] = []
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS decisions ("
+            " run_id TEXT NOT NULL,"
+            " ticker TEXT NOT NULL,"
+            " trade_date TEXT NOT NULL,"
+            " action TEXT NOT NULL,"
+            " quantity REAL NOT NULL,"
+            " confidence REAL,"
+            " executed REAL NOT NULL,"
+            " cash REAL NOT NULL,"
+            " stock REAL NOT NULL,"
+            " open REAL, high REAL, low REAL, close REAL, volume REAL, amount REAL,"
+            " decision TEXT NOT NULL,"
+            " recorded_at TEXT NOT NULL,"
+            " PRIMARY KEY (run_id, ticker, trade_date))")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS signals ("
+            " run_id TEXT NOT NULL,"
+            " ticker TEXT NOT NULL,"
+            " trade_date TEXT NOT NULL,"
+            " agent TEXT NOT NULL,"
+            " signal TEXT,"
+            " confidence REAL,"
+            " PRIMARY KEY (run_id, ticker, trade_date, agent))")
+        self._conn.commit()
+
+    def record(self, run_id: str, ticker: str, trade_date: str, output: Dict[str, Any],
+               portfolio: Dict[str, Any], executed: float, bar: Optional[Dict[str, Any]] = None):
+        """记录一个交易日
+
+        Args:
+            run_id: 回测运行 ID
+            ticker: 代码
+            trade_date: 交易日 YYYY-MM-DD
+            output: 解析后的智能体输出 {"decision", "analyst_signals"}
+            portfolio: 成交前的组合
+            executed: 实际成交数量
+            bar: 当日行情（open, high, low, close, volume, amount）
+        """
+        decision = output.get("decision", {}) or {}
+        bar = bar or {}
+        row = (
+            run_id, ticker, trade_date,
+            str(decision.get("action", "hold")),
+            float(decision.get("quantity", 0) or 0),
+            _float(decision.get("confidence")),
+            float(executed),
+            float(portfolio.get("cash", 0)),
+            float(portfolio.get("stock", 0)),
+            *(_float(bar.get(column)) for column in MARKET_COLUMNS),
+            json.dumps(decision, ensure_ascii=False, default=str),
+            datetime.now().isoformat(timespec="seconds"),
+        )
+        signals = [(run_id, ticker, trade_date, agent, str(signal.get("signal", "unknown")),
+                    _float(signal.get("confidence")))
+                   for agent, signal in (output.get("analyst_signals") or {}).items()]
+        with self._lock:
+            self._pending.append(row)
+            self._pending_signals.extend(signals)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """写入缓冲区中的记录"""
+        with self._lock:
+            if not self._pending:
+                return
+            placeholders = ", ".join("?" * len(self._pending[0]))
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO decisions VALUES ({placeholders})", self._pending)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO signals VALUES (?, ?, ?, ?, ?, ?)", self._pending_signals)
+            self._conn.commit()
+            self._pending.clear()
+            self._pending_signals.clear()
+
+    def runs(self) -> pd.DataFrame:
+        """已记录的运行：run_id, ticker, 起止日期和天数"""
+        self.flush()
+        return pd.read_sql_query(
+            "SELECT run_id, ticker, MIN(trade_date) AS start_date, MAX(trade_date) AS end_date,"
+            " COUNT(*) AS days FROM decisions GROUP BY run_id, ticker ORDER BY run_id, ticker",
+            self._conn)
+
+    def load(self, run_id: Optional[str] = None, ticker: Optional[str] = None,
+             with_signals: bool = True) -> pd.DataFrame:
+        """读取日志
+
+        Args:
+            run_id: 运行 ID，默认全部
+            ticker: 代码，默认全部
+            with_signals: 是否把每个智能体的信号展开为 signal_<智能体> 和 confidence_<智能体> 列
+                （信号转换为 1 / 0 / -1）
+
+        Returns:
+            按代码、日期排序的 DataFrame，date 列为时间戳
+        """
+        self.flush()
+        where, params = _filters(run_id, ticker)
+        df = pd.read_sql_query(
+            "SELECT run_id, ticker, trade_date AS date, action, quantity, confidence, executed,"
+            f" cash, stock, {', '.join(MARKET_COLUMNS)} FROM decisions{where}"
+            " ORDER BY ticker, trade_date", self._conn, params=params)
+        df["date"] = pd.to_datetime(df["date"])
+        if not with_signals or df.empty:
+            return df
+
+        signals = pd.read_sql_query(
+            f"SELECT run_id, ticker, trade_date AS date, agent, signal, confidence FROM signals{where}",
+            self._conn, params=params)
+        if signals.empty:
+            return df
+        signals["date"] = pd.to_datetime(signals["date"])
+        signals["signal"] = signals["signal"].str.lower().map(SIGNAL_VALUES)
+        wide = signals.pivot_table(index=["run_id", "ticker", "date"], columns="agent",
+                                   values=["signal", "confidence"], aggfunc="first")
+        wide.columns = [f"{kind}_{agent}" for kind, agent in wide.columns]
+        return df.merge(wide.reset_index(), on=["run_id", "ticker", "date"], how="left")
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+def _float(value) -> Optional[float]:
+    """数值或 "75%" 形式的百分比转换为浮点数，无法转换时返回 None"""
+    try:
+        if isinstance(value, str) and value.strip().endswith("%"):
+            return float(value.strip()[:-1]) / 100
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _filters(run_id: Optional[str], ticker: Optional[str]):
+    clauses, params = [], []
+    if run_id is not None:
+        clauses.append("run_id = ?")
+        params.append(run_id)
+    if ticker is not None:
+        clauses.append("ticker = ?")
+        params.append(ticker)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
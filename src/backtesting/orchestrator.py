@@ -0,0 +1,174 @@
+"""
+多个回测共享 LLM 调用预算的调度器
+
+分别运行 src/backtester.py 时每个进程各自限速（每分钟 8 次），合起来要么超出服务商配额，
+要么在某个回测等待时浪费配额。调度器在同一进程中运行一批 Backtester：
+    - 每个回测在自己的线程中按交易日顺序运行（下一天依赖前一天的持仓）
+    - 所有回测的智能体调用共享一个 RateLimiter，全局限制调用频率和同时进行的调用数，
+      任何回测在等待时其余回测都可以使用空闲的配额
+    - 定期汇总所有回测的进度和调用速率
+
+用法:
+    python -m src.backtesting.orchestrator --tickers 600519,000858,601318 \\
+        --calls-per-minute 16 --max-concurrent 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.backtesting.rate_limiter import RateLimiter
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('backtest_orchestrator')
+
+
+class BacktestOrchestrator:
+    """在共享的限速器下并发运行多个回测
+
+    Args:
+        backtests: Backtester 实例列表，rate_limiter 会被替换为共享的限速器
+        rate_limiter: 全局限速器，None 表示不限速（快速模式）
+        progress_interval: 汇总进度的间隔（秒）
+        on_progress: 每次汇总进度时调用，参数为 progress() 的结果
+    """
+
+    def __init__(self, backtests: List[Any], rate_limiter: Optional[RateLimiter] = None,
+                 progress_interval: float = 30.0,
+                 on_progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.backtests = backtests
+        # 同一代码和区间的多个回测（如不同参数）的标签加上序号区分
+        labels = [self.label(bt) for bt in backtests]
+        counts = Counter(labels)
+        self.labels = [f"{label} #{i}" if counts[label] > 1 else label
+                       for i, label in enumerate(labels)]
+        self.rate_limiter = rate_limiter
+        self.progress_interval = progress_interval
+        self.on_progress = on_progress
+        for backtest in backtests:
+            backtest.rate_limiter = rate_limiter
+            if rate_limiter is None:
+                backtest.rate_limit = False
+        self._started = None
+
+    @staticmethod
+    def label(backtest) -> str:
+        return f"{backtest.ticker} {backtest.start_date}..{backtest.end_date}"
+
+    def progress(self) -> Dict[str, Any]:
+        """所有回测的已完成交易日数、总交易日数和调用速率"""
+        completed = sum(bt.completed_days for bt in self.backtests)
+        total = sum(bt.total_days for bt in self.backtests)
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        calls = self.rate_limiter.total_calls if self.rate_limiter is not None else completed
+        return {
+            "completed_days": completed,
+            "total_days": total,
+            "finished_backtests": sum(1 for bt in self.backtests if bt.total_days and
+                                      bt.completed_days >= bt.total_days),
+            "backtests": len(self.backtests),
+            "agent_calls": calls,
+            "calls_per_minute": calls / elapsed * 60 if elapsed > 0 else 0.0,
+            "elapsed_seconds": elapsed,
+        }
+
+    def _report(self):
+        progress = self.progress()
+        percent = progress["completed_days"] / progress["total_days"] * 100 if progress["total_days"] else 0.0
+        logger.info(f"Progress: {progress['completed_days']}/{progress['total_days']} days ({percent:.1f}%), "
+                    f"{progress['finished_backtests']}/{progress['backtests']} backtests finished, "
+                    f"{progress['calls_per_minute']:.1f} calls/min")
+        if self.on_progress is not None:
+            self.on_progress(progress)
+
+    def run(self) -> Dict[str, Optional[BaseException]]:
+        """运行所有回测，直到全部完成；单个回测失败不影响其余回测
+
+        Returns:
+            回测标签到异常的映射，成功的回测为 None
+        """
+        self._started = time.monotonic()
+        errors: Dict[str, Optional[BaseException]] = {}
+        with ThreadPoolExecutor(max_workers=len(self.backtests),
+                                thread_name_prefix="backtest") as executor:
+            futures = {executor.submit(bt.run_backtest): label
+                       for bt, label in zip(self.backtests, self.labels)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=self.progress_interval,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    label = futures[future]
+                    errors[label] = future.exception()
+                    if errors[label] is not None:
+                        logger.error(f"Backtest {label} failed: {errors[label]}")
+                    else:
+                        logger.info(f"Backtest {label} finished")
+                if pending:
+                    self._report()
+        self._report()
+        return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='在共享的 LLM 调用预算下运行多个回测')
+    parser.add_argument('--tickers', type=str, required=True,
+                        help='逗号分隔的代码列表')
+    parser.add_argument('--end-date', type=str,
+                        default=datetime.now().strftime('%Y-%m-%d'), help='结束日期，格式：YYYY-MM-DD')
+    parser.add_argument('--start-date', type=str, default=(datetime.now() -
+                        timedelta(days=90)).strftime('%Y-%m-%d'), help='开始日期，格式：YYYY-MM-DD')
+    parser.add_argument('--initial-capital', type=float, default=100000,
+                        help='每个回测的初始资金 (默认: 100000)')
+    parser.add_argument('--num-of-news', type=int, default=5,
+                        help='情绪分析使用的新闻数量 (默认: 5)')
+    parser.add_argument('--mode', choices=['llm', 'fast'], default='llm',
+                        help='llm: 完整智能体链路; fast: 不调用 LLM (默认: llm)')
+    parser.add_argument('--calls-per-minute', type=int, default=8,
+                        help='所有回测合计每分钟最多调用次数 (默认: 8)')
+    parser.add_argument('--min-interval', type=float, default=0.0,
+                        help='相邻两次调用的最小间隔秒数 (默认: 0)')
+    parser.add_argument('--max-concurrent', type=int, default=4,
+                        help='同时进行的智能体调用上限 (默认: 4)')
+    parser.add_argument('--progress-interval', type=float, default=30.0,
+                        help='汇总进度的间隔秒数 (默认: 30)')
+    args = parser.parse_args()
+
+    from src.backtester import Backtester
+    from src.backtesting.fast_mode import FastAgent
+    from src.main import run_hedge_fund
+
+    fast_mode = args.mode == 'fast'
+    backtests = [
+        Backtester(
+            agent=FastAgent() if fast_mode else run_hedge_fund,
+            ticker=ticker,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            initial_capital=args.initial_capital,
+            num_of_news=args.num_of_news,
+        )
+        for ticker in dict.fromkeys(t.strip() for t in args.tickers.split(",") if t.strip())
+    ]
+    limiter = None if fast_mode else RateLimiter(
+        max_calls=args.calls_per_minute, period=60, min_interval=args.min_interval,
+        max_concurrent=args.max_concurrent)
+    orchestrator = BacktestOrchestrator(backtests, limiter, args.progress_interval)
+    errors = orchestrator.run()
+
+    for backtest in backtests:
+        label = orchestrator.label(backtest)
+        if errors.get(label) is None and backtest.portfolio_values:
+            print(f"\n===== {label} =====")
+            backtest.analyze_performance()
+    if any(errors.values()):
+        sys.exit(1)
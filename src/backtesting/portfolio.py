@@ -0,0 +1,400 @@
+"""
+多标的组合回测
+
+Backtester 一次只回测一个代码，每个代码各有一份现金。组合回测在同一个现金账户下持有多个代码：
+    - 回测开始前一次性预加载所有代码的价格，对齐为 (交易日 x 代码) 的开盘价/收盘价矩阵
+    - 每个交易日并发请求所有代码的智能体决策（线程池，LLM 调用共享一个 RateLimiter）
+    - 先执行卖出释放现金，再按置信度从高到低执行买入，现金不足时按可用现金缩减数量
+    - 每日按收盘价向量化计算组合市值，输出组合层面的净值、持仓和成交记录
+
+智能体的调用方式与 run_hedge_fund 相同；每个代码看到的 portfolio 是
+{"cash": 当日开盘前的共享现金, "stock": 该代码的持仓}。
+
+用法:
+    python -m src.backtesting.portfolio --tickers 600519,000858,601318 --mode fast
+"""
+
+import argparse
+import contextvars
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.backtesting.agent_output import hold_output, parse_agent_output
+from src.backtesting.analytics import analyze_frame
+from src.backtesting.execution import BUY, SELL, ExecutionModel, build_execution_model
+from src.backtesting.rate_limiter import RateLimiter
+from src.tools.api import EXTENDED_HISTORY_DAYS, preload_price_history, price_preload_scope
+from src.tools.crypto_symbols import is_crypto
+from src.tools.trading_calendar import get_calendar_for_symbol
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('portfolio_backtester')
+
+
+class PortfolioBacktester:
+    """共享现金账户的多标的回测
+
+    Args:
+        agent: 决策函数，调用方式与 run_hedge_fund 相同
+        tickers: 代码列表
+        start_date: 开始日期 YYYY-MM-DD
+        end_date: 结束日期 YYYY-MM-DD
+        initial_capital: 初始资金
+        num_of_news: 传给智能体的新闻数量
+        max_workers: 每个交易日并发请求决策的线程数
+        rate_limiter: 所有智能体调用共享的限速器，None 表示不限速（快速模式）
+        lookback_days: 智能体请求的价格窗口天数
+        execution_model: 成交模型（佣金、滑点和成交量限制），None 表示按开盘价无成本成交
+    """
+
+    def __init__(self, agent: Callable[..., Any], tickers: Sequence[str], start_date: str,
+                 end_date: str, initial_capital: float, num_of_news: int = 5,
+                 max_workers: int = 4, rate_limiter: Optional[RateLimiter] = None,
+                 lookback_days: int = 30, execution_model: Optional[ExecutionModel] = None):
+        if not tickers:
+            raise ValueError("At least one ticker is required")
+        if len(set(tickers)) != len(tickers):
+            raise ValueError("Tickers must be unique")
+        if datetime.strptime(start_date, "%Y-%m-%d") >= datetime.strptime(end_date, "%Y-%m-%d"):
+            raise ValueError("Start date must be before end date")
+        if initial_capital <= 0:
+            raise ValueError("Initial capital must be greater than 0")
+
+        self.agent = agent
+        self.tickers = list(tickers)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.initial_capital = float(initial_capital)
+        self.num_of_news = num_of_news
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = rate_limiter
+        self.lookback_days = lookback_days
+        self.execution_model = execution_model
+
+        self.cash = self.initial_capital
+        self.positions = np.zeros(len(self.tickers))
+        self._fractional = np.array([is_crypto(t) for t in self.tickers])
+
+        self.dates: List[pd.Timestamp] = []
+        self.open_panel = np.empty((0, len(self.tickers)))
+        self.close_panel = np.empty((0, len(self.tickers)))
+        self.volatility_panel = np.empty((0, len(self.tickers)))
+        self.liquidity_panel = np.empty((0, len(self.tickers)))
+
+        self.portfolio_values: List[Dict[str, Any]] = []
+        self.position_history: List[np.ndarray] = []
+        self.trades: List[Dict[str, Any]] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def load_prices(self):
+        """并发预加载所有代码的价格，构建交易日 x 代码的开盘价/收盘价矩阵
+
+        交易日为各代码交易所开市日的并集；某代码当日无K线（休市或停牌）时开盘价为 NaN，
+        当日不交易，收盘价沿用最近一次的收盘价用于估值。
+        """
+        warmup_start = (datetime.strptime(self.start_date, "%Y-%m-%d") -
+                        timedelta(days=EXTENDED_HISTORY_DAYS)).strftime("%Y-%m-%d")
+
+        def load(ticker):
+            prices = preload_price_history(ticker, warmup_start, self.end_date)
+            if prices.empty:
+                logger.warning(f"Failed to preload prices for {ticker}")
+            elif hasattr(self.agent, "prepare"):
+                self.agent.prepare(ticker, prices)
+            return prices
+
+        # 工作线程复制当前上下文，预加载登记到本次回测的范围中
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, load, ticker)
+                       for ticker in self.tickers]
+            frames = [future.result() for future in futures]
+
+        days = set()
+        for ticker in self.tickers:
+            days.update(get_calendar_for_symbol(ticker).trading_days(self.start_date, self.end_date))
+        index = pd.DatetimeIndex(sorted(days))
+
+        opens = pd.DataFrame(np.nan, index=index, columns=self.tickers)
+        closes = pd.DataFrame(np.nan, index=index, columns=self.tickers)
+        volatility = pd.DataFrame(np.nan, index=index, columns=self.tickers)
+        liquidity = pd.DataFrame(np.nan, index=index, columns=self.tickers)
+        for ticker, prices in zip(self.tickers, frames):
+            if prices.empty:
+                continue
+            bars = prices.assign(date=pd.to_datetime(prices["date"])).set_index("date")
+            # 预热区间的最后一个收盘价用于回测首日之前的估值
+            closes[ticker] = bars["close"].astype(float).reindex(
+                index.union(bars.index)).ffill().reindex(index)
+            opens[ticker] = bars["open"].astype(float).reindex(index)
+            if self.execution_model is not None:
+                vol, shares = self.execution_model.market_inputs(bars)
+                volatility[ticker] = pd.Series(vol, index=bars.index).reindex(index)
+                liquidity[ticker] = pd.Series(shares, index=bars.index).reindex(index)
+
+        self.dates = list(index)
+        self.open_panel = opens.to_numpy()
+        self.close_panel = closes.to_numpy()
+        self.volatility_panel = volatility.to_numpy()
+        self.liquidity_panel = liquidity.to_numpy()
+
+    def _decide(self, ticker: str, date_str: str, lookback_start: str,
+                portfolio: Dict[str, Any]) -> Dict[str, Any]:
+        """请求单个代码的决策，失败时持有"""
+        try:
+            if self.rate_limiter is not None:
+                with self.rate_limiter:
+                    result = self._call_agent(ticker, date_str, lookback_start, portfolio)
+            else:
+                result = self._call_agent(ticker, date_str, lookback_start, portfolio)
+            return parse_agent_output(result)
+        except Exception as e:
+            logger.warning(f"Failed to get decision for {ticker} on {date_str}: {e}")
+            return hold_output()
+
+    def _call_agent(self, ticker, date_str, lookback_start, portfolio):
+        return self.agent(
+            ticker=ticker,
+            start_date=lookback_start,
+            end_date=date_str,
+            portfolio=portfolio,
+            num_of_news=self.num_of_news,
+            run_id=f"portfolio_{ticker}_{date_str.replace('-', '')}"
+        )
+
+    def get_decisions(self, day: int) -> Dict[int, Dict[str, Any]]:
+        """并发请求当日所有可交易代码的决策
+
+        Returns:
+            代码列号到决策 (decision 字段) 的映射
+        """
+        date = self.dates[day]
+        date_str = date.strftime("%Y-%m-%d")
+        lookback_start = (date - timedelta(days=self.lookback_days)).strftime("%Y-%m-%d")
+        columns = np.flatnonzero(~np.isnan(self.open_panel[day]))
+        portfolios = [{"cash": self.cash, "stock": float(self.positions[j])} for j in columns]
+
+        def decide(args):
+            j, portfolio = args
+            return self._decide(self.tickers[j], date_str, lookback_start, portfolio)
+
+        if self._executor is None or len(columns) <= 1:
+            outputs = [decide(args) for args in zip(columns, portfolios)]
+        else:
+            futures = [self._executor.submit(contextvars.copy_context().run, decide, args)
+                       for args in zip(columns, portfolios)]
+            outputs = [future.result() for future in futures]
+        return {int(j): output.get("decision", {"action": "hold", "quantity": 0})
+                for j, output in zip(columns, outputs)}
+
+    def execute_orders(self, day: int, decisions: Dict[int, Dict[str, Any]]) -> Tuple[float, float]:
+        """按当日开盘价执行订单：先卖出，再按置信度从高到低买入（配置了成交模型时按模型计算成交价和费用）
+
+        Returns:
+            (当日成交额, 当日费用)
+        """
+        opens = self.open_panel[day]
+        traded = 0.0
+        sells, buys = [], []
+        for j, decision in decisions.items():
+            action = decision.get("action", "hold")
+            quantity = float(decision.get("quantity", 0) or 0)
+            if quantity <= 0:
+                continue
+            if action == "sell":
+                sells.append((j, quantity))
+            elif action == "buy":
+                buys.append((j, quantity, float(decision.get("confidence", 0) or 0)))
+
+        if self.execution_model is not None:
+            return self._execute_with_model(day, sells, buys)
+
+        for j, quantity in sells:
+            quantity = min(quantity, self.positions[j])
+            if quantity > 0:
+                self.positions[j] -= quantity
+                self.cash += quantity * opens[j]
+                traded += quantity * opens[j]
+                self._record_trade(day, j, "sell", quantity)
+
+        for j, quantity, _ in sorted(buys, key=lambda order: -order[2]):
+            price = opens[j]
+            affordable = self.cash / price
+            if not self._fractional[j]:
+                affordable = math.floor(affordable)
+                quantity = math.floor(quantity)
+            quantity = min(quantity, affordable)
+            if quantity > 0:
+                self.positions[j] += quantity
+                self.cash -= quantity * price
+                traded += quantity * price
+                self._record_trade(day, j, "buy", quantity)
+        return traded, 0.0
+
+    def _execute_with_model(self, day: int, sells: List[tuple], buys: List[tuple]):
+        """按成交模型执行：当日所有卖出一次向量化计算，买入依赖剩余现金，逐笔计算"""
+        model = self.execution_model
+        traded = fees = 0.0
+        if sells:
+            columns = np.array([j for j, _ in sells])
+            quantities = np.minimum([q for _, q in sells], self.positions[columns])
+            fills = model.fill(SELL, quantities, self.open_panel[day, columns],
+                               self.volatility_panel[day, columns], self.liquidity_panel[day, columns])
+            for j, quantity, price, fee in zip(columns, fills.quantity, fills.price, fills.fees):
+                if quantity > 0:
+                    self.positions[j] -= quantity
+                    self.cash += quantity * price - fee
+                    traded += quantity * price
+                    fees += fee
+                    self._record_trade(day, j, "sell", quantity, price, fee)
+
+        for j, quantity, _ in sorted(buys, key=lambda order: -order[2]):
+            if not self._fractional[j]:
+                quantity = math.floor(quantity)
+            fills = model.fill(BUY, quantity, self.open_panel[day, j], self.volatility_panel[day, j],
+                               self.liquidity_panel[day, j], budget=self.cash)
+            quantity, price, fee = float(fills.quantity), float(fills.price), float(fills.fees)
+            if quantity > 0:
+                self.positions[j] += quantity
+                self.cash -= quantity * price + fee
+                traded += quantity * price
+                fees += fee
+                self._record_trade(day, j, "buy", quantity, price, fee)
+        return traded, fees
+
+    def _record_trade(self, day: int, column: int, action: str, quantity: float,
+                      price: Optional[float] = None, fees: float = 0.0):
+        self.trades.append({
+            "Date": self.dates[day],
+            "Ticker": self.tickers[column],
+            "Action": action,
+            "Quantity": float(quantity),
+            "Price": float(self.open_panel[day, column] if price is None else price),
+            "Fees": float(fees),
+        })
+
+    def run_backtest(self):
+        # 整个回测共用一个线程池，避免每个交易日重复创建线程
+        if self.max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            with price_preload_scope():
+                self._run_backtest()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _run_backtest(self):
+        self.load_prices()
+        logger.info(f"Running portfolio backtest: {len(self.tickers)} tickers, "
+                    f"{len(self.dates)} trading days")
+
+        for day, date in enumerate(self.dates):
+            decisions = self.get_decisions(day)
+            traded, fees = self.execute_orders(day, decisions)
+
+            # 向量化估值：现金 + 持仓 · 收盘价（尚无价格的代码持仓必为 0）
+            holdings = self.positions * np.nan_to_num(self.close_panel[day])
+            total_value = self.cash + holdings.sum()
+            if self.portfolio_values:
+                daily_return = (total_value / self.portfolio_values[-1]["Portfolio Value"] - 1) * 100
+            else:
+                daily_return = 0
+            self.portfolio_values.append({
+                "Date": date,
+                "Portfolio Value": total_value,
+                "Daily Return": daily_return,
+                "Cash": self.cash,
+                "Position Value": holdings.sum(),
+                "Traded Value": traded,
+                "Fees": fees,
+            })
+            self.position_history.append(self.positions.copy())
+
+    def positions_frame(self) -> pd.DataFrame:
+        """每日收盘后的持仓数量，行为交易日、列为代码"""
+        return pd.DataFrame(self.position_history, index=pd.DatetimeIndex(self.dates[:len(self.position_history)]),
+                            columns=self.tickers)
+
+    def trades_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.trades, columns=["Date", "Ticker", "Action", "Quantity", "Price", "Fees"])
+
+    def analyze_performance(self) -> Dict[str, Any]:
+        """组合层面的绩效指标（见 analytics.performance_metrics）和交易统计"""
+        if not self.portfolio_values:
+            return {}
+        performance_df = pd.DataFrame(self.portfolio_values).set_index("Date")
+        metrics = analyze_frame(performance_df, initial_value=self.initial_capital)
+
+        position_values = self.positions_frame() * self.close_panel[:len(self.position_history)]
+        trades = self.trades_frame()
+        metrics.update({
+            "final_value": float(performance_df["Portfolio Value"].iloc[-1]),
+            "trades": len(trades),
+            "fees": float(trades["Fees"].sum()) if len(trades) else 0.0,
+            "trades_by_ticker": trades.groupby("Ticker").size().to_dict() if len(trades) else {},
+            "final_weights": (position_values.iloc[-1].fillna(0) /
+                              performance_df["Portfolio Value"].iloc[-1]).to_dict(),
+        })
+        return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='多标的组合回测')
+    parser.add_argument('--tickers', type=str, required=True,
+                        help='逗号分隔的代码列表')
+    parser.add_argument('--end-date', type=str,
+                        default=datetime.now().strftime('%Y-%m-%d'),
+                        help='结束日期 (YYYY-MM-DD)')
+    parser.add_argument('--start-date', type=str, default=(datetime.now() -
+                        timedelta(days=90)).strftime('%Y-%m-%d'),
+                        help='开始日期 (YYYY-MM-DD)')
+    parser.add_argument('--initial-capital', type=float, default=1000000,
+                        help='初始资金 (默认: 1000000)')
+    parser.add_argument('--num-of-news', type=int, default=5,
+                        help='情绪分析使用的新闻数量 (默认: 5)')
+    parser.add_argument('--mode', choices=['llm', 'fast'], default='llm',
+                        help='llm: 完整智能体链路；fast: 无 LLM 的确定性信号 (默认: llm)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='每个交易日并发请求决策的线程数 (默认: 4)')
+    parser.add_argument('--calls-per-minute', type=int, default=8,
+                        help='LLM 模式下每分钟最多调用次数 (默认: 8)')
+    parser.add_argument('--execution', choices=['none', 'auto', 'a_share', 'us', 'crypto'], default='none',
+                        help='成交模型；auto 按第一个代码选择市场 (默认: none，按开盘价无成本成交)')
+    args = parser.parse_args()
+
+    if args.mode == 'fast':
+        from src.backtesting.fast_mode import FastAgent
+        agent, limiter = FastAgent(), None
+    else:
+        from src.main import run_hedge_fund
+        agent = run_hedge_fund
+        limiter = RateLimiter(max_calls=args.calls_per_minute, period=60,
+                              max_concurrent=args.workers)
+
+    tickers = [t.strip() for t in args.tickers.split(",") if t.strip()]
+    backtester = PortfolioBacktester(
+        agent=agent,
+        tickers=tickers,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        initial_capital=args.initial_capital,
+        num_of_news=args.num_of_news,
+        max_workers=args.workers,
+        rate_limiter=limiter,
+        execution_model=build_execution_model(args.execution, tickers[0]) if args.execution != 'none' else None,
+    )
+    backtester.run_backtest()
+    for key, value in backtester.analyze_performance().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,83 @@
+"""
+线程安全的 LLM 调用限速器
+
+Backtester 的限速状态属于单个实例；多个回测或多个代码并发调用智能体时，
+需要共享同一个限速器，保证整个进程对 LLM 的调用频率不超过配额。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class RateLimiter:
+    """滑动窗口限速 + 最小调用间隔 + 并发上限
+
+    Args:
+        max_calls: 每个时间窗口内最多的调用次数
+        period: 时间窗口长度（秒）
+        min_interval: 相邻两次调用开始时间的最小间隔（秒）
+        max_concurrent: 同时进行的调用上限，None 表示不限制
+
+    用法:
+        limiter = RateLimiter(max_calls=8, period=60, min_interval=6)
+        with limiter:
+            result = run_hedge_fund(...)
+    """
+
+    def __init__(self, max_calls: int = 8, period: float = 60.0, min_interval: float = 0.0,
+                 max_concurrent: Optional[int] = None):
+        self.max_calls = max_calls
+        self.period = period
+        self.min_interval = min_interval
+        self._calls = deque()
+        self._paused_until = 0.0
+        self.total_calls = 0
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+    def wait(self):
+        """阻塞直到可以发起下一次调用，并记录调用时间"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                delay = self._paused_until - now
+                if len(self._calls) >= self.max_calls:
+                    delay = max(delay, self.period - (now - self._calls[0]))
+                if self._calls and self.min_interval > 0:
+                    delay = max(delay, self.min_interval - (now - self._calls[-1]))
+                if delay <= 0:
+                    self._calls.append(now)
+                    self.total_calls += 1
+                    return
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        """服务端限流时让所有调用方暂停 seconds 秒"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self):
+        """占用一个并发名额并等待限速"""
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        try:
+            self.wait()
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
@@ -0,0 +1,162 @@
+"""
+在决策日志上重新模拟成交 - 不调用任何智能体
+
+决策日志记录了每天的决策和当日行情，执行层面的实验（仓位规则、费率、滑点、成交价格）
+只需要在日志上重放，一年的决策重放一次只需要几毫秒:
+
+    journal = DecisionJournal()
+    df = journal.load(run_id="600519_20240101_20241231")
+    records = replay(df, initial_capital=100000, sizing="confidence", fee_rate=0.0003)
+    metrics = replay_variants(df, {
+        "recorded": {},
+        "all_in_10bps": {"sizing": "all_in", "slippage_bps": 10},
+    })
+
+仓位规则:
+    recorded    使用智能体请求的数量（与回测的 execute_trade 一致）
+    confidence  买入时目标仓位为 置信度 × max_weight 的组合净值，卖出时清仓
+    all_in      买入时用尽现金，卖出时清仓
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.backtesting.analytics import analyze_frame
+from src.backtesting.execution import BUY, SELL, ExecutionModel
+
+SIZING_RULES = ("recorded", "confidence", "all_in")
+
+
+def replay(journal_df: pd.DataFrame, initial_capital: float, sizing: str = "recorded",
+           fee_rate: float = 0.0, slippage_bps: float = 0.0, price_column: str = "open",
+           max_weight: float = 1.0, lot_size: Optional[float] = 1,
+           execution_model: Optional[ExecutionModel] = None) -> List[Dict[str, Any]]:
+    """按日志中的决策重新模拟一个代码的成交
+
+    Args:
+        journal_df: DecisionJournal.load() 的结果（单个代码）
+        initial_capital: 初始资金
+        sizing: 仓位规则，见 SIZING_RULES
+        fee_rate: 按成交额收取的费率
+        slippage_bps: 滑点（基点），买入价上浮、卖出价下调
+        price_column: 成交和估值价格所在的列（回测使用开盘价）
+        max_weight: confidence 规则下置信度为 1 时的目标仓位比例
+        lot_size: 每手股数，成交数量向下取整到整手；None 表示不取整（加密货币等可按小数成交的品种）
+        execution_model: 成交模型（佣金、滑点和成交量限制），提供时代替 fee_rate、slippage_bps 和 lot_size
+
+    Returns:
+        与 Backtester.portfolio_values 相同格式的记录列表
+    """
+    if sizing not in SIZING_RULES:
+        raise ValueError(f"Unknown sizing rule: {sizing}")
+    if journal_df["ticker"].nunique() > 1:
+        raise ValueError("replay() expects the journal of a single ticker")
+
+    actions = journal_df["action"].to_numpy()
+    requested = journal_df["quantity"].to_numpy(dtype=float)
+    confidence = journal_df["confidence"].fillna(0.0).to_numpy(dtype=float)
+    prices = journal_df[price_column].to_numpy(dtype=float)
+    dates = journal_df["date"].to_numpy()
+    slippage = slippage_bps / 10000
+    if execution_model is not None:
+        volatility, liquidity = execution_model.market_inputs(journal_df)
+
+    cash, stock = float(initial_capital), 0.0
+    records = []
+    previous_value = None
+    for i in range(len(actions)):
+        price = prices[i]
+        traded = fees = 0.0
+        tradable = not np.isnan(price) and price > 0
+        if tradable and execution_model is not None:
+            if actions[i] == "buy":
+                quantity = _target_quantity(sizing, requested[i], confidence[i], max_weight,
+                                            cash, stock, price, cash / price)
+                fills = execution_model.fill(BUY, quantity, price, volatility[i], liquidity[i],
+                                             budget=cash)
+            elif actions[i] == "sell":
+                quantity = stock if sizing != "recorded" else min(requested[i], stock)
+                fills = execution_model.fill(SELL, quantity, price, volatility[i], liquidity[i])
+            else:
+                fills = None
+            if fills is not None:
+                quantity, traded, fees = float(fills.quantity), float(fills.notional), float(fills.fees)
+                side = 1 if actions[i] == "buy" else -1
+                cash -= side * traded + fees
+                stock += side * quantity
+        elif tradable:
+            if actions[i] == "buy":
+                fill = price * (1 + slippage)
+                quantity = _target_quantity(sizing, requested[i], confidence[i], max_weight,
+                                            cash, stock, price, cash / fill)
+                affordable = cash / (fill * (1 + fee_rate))
+                quantity = _round_lot(min(quantity, affordable), lot_size)
+                if quantity > 0:
+                    traded = quantity * fill
+                    fees = traded * fee_rate
+                    cash -= traded + fees
+                    stock += quantity
+            elif actions[i] == "sell":
+                fill = price * (1 - slippage)
+                quantity = stock if sizing != "recorded" else min(requested[i], stock)
+                # 清仓时允许不足一手的零股卖出
+                if quantity < stock:
+                    quantity = _round_lot(quantity, lot_size)
+                if quantity > 0:
+                    traded = quantity * fill
+                    fees = traded * fee_rate
+                    cash += traded - fees
+                    stock -= quantity
+
+        # 与回测一致，按成交价格列对持仓估值
+        position_value = stock * price if not np.isnan(price) else 0.0
+        value = cash + position_value
+        records.append({
+            "Date": pd.Timestamp(dates[i]),
+            "Portfolio Value": value,
+            "Daily Return": (value / previous_value - 1) * 100 if previous_value else 0,
+            "Position Value": position_value,
+            "Traded Value": traded,
+            "Fees": fees,
+        })
+        previous_value = value
+    return records
+
+
+def _target_quantity(sizing: str, requested: float, confidence: float, max_weight: float,
+                     cash: float, stock: float, price: float, all_in: float) -> float:
+    """按仓位规则计算买入数量（未考虑现金和费用的限制）"""
+    if sizing == "recorded":
+        return requested
+    if sizing == "confidence":
+        target = (cash + stock * price) * min(confidence, 1.0) * max_weight
+        return max(target / price - stock, 0.0)
+    return all_in
+
+
+def _round_lot(quantity: float, lot_size: Optional[float]) -> float:
+    if lot_size is None:
+        return float(quantity)
+    return float(np.floor(quantity / lot_size + 1e-9) * lot_size)
+
+
+def replay_variants(journal_df: pd.DataFrame, variants: Dict[str, Dict[str, Any]],
+                    initial_capital: float = 100000) -> pd.DataFrame:
+    """在同一份日志上重放多组执行参数并比较绩效
+
+    Args:
+        journal_df: DecisionJournal.load() 的结果（单个代码）
+        variants: 名称到 replay() 关键字参数的映射
+        initial_capital: 初始资金
+
+    Returns:
+        以名称为索引、每列一个绩效指标的 DataFrame
+    """
+    rows = {}
+    for name, params in variants.items():
+        records = replay(journal_df, initial_capital, **params)
+        frame = pd.DataFrame(records).set_index("Date")
+        rows[name] = analyze_frame(frame, initial_capital)
+    return pd.DataFrame.from_dict(rows, orient="index")
@@ -0,0 +1,196 @@
+"""
+无界面的回测报告
+
+使用 Agg 后端直接渲染 PNG（不需要显示器，不经过 pyplot 的全局状态），并输出:
+    metrics.json    绩效指标
+    report.png      净值、回撤和滚动夏普比率
+    report.html     指标表格 + 图表
+
+曲线超过 max_points 个点时按桶保留每个桶内的最低点和最高点，
+渲染耗时只取决于 max_points，与回测长度无关，且不会丢失极值。
+"""
+
+import html
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from src.backtesting.analytics import drawdown_series, rolling_metrics
+
+DEFAULT_MAX_POINTS = 2000
+
+# 百分比形式显示的指标
+PERCENT_METRICS = {"total_return", "annual_return", "annual_volatility", "max_drawdown",
+                   "hit_rate", "best_day", "worst_day", "exposure"}
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int = DEFAULT_MAX_POINTS
+               ) -> Tuple[np.ndarray, np.ndarray]:
+    """保留极值的降采样：分为 max_points / 2 个桶，每个桶保留最低点和最高点
+
+    Returns:
+        按原顺序排列的 (x, y)，NaN 视为不参与极值比较
+    """
+    n = len(y)
+    if n <= max_points or max_points < 2:
+        return x, y
+    buckets = max_points // 2
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(buckets, size)
+    valid = ~np.isnan(blocks).all(axis=1)
+    offsets = np.arange(buckets)[valid] * size
+    lows = np.nanargmin(blocks[valid], axis=1) + offsets
+    highs = np.nanargmax(blocks[valid], axis=1) + offsets
+    keep = np.unique(np.concatenate([lows, highs, [0, n - 1]]))
+    return x[keep], y[keep]
+
+
+def render_chart(values: pd.Series, path: str, rolling: Optional[pd.DataFrame] = None,
+                 title: str = "Backtest Results", max_points: int = DEFAULT_MAX_POINTS):
+    """渲染净值、回撤和滚动夏普比率三个子图到 PNG"""
+    dates = values.index.to_numpy()
+    panels = 3 if rolling is not None else 2
+    fig = Figure(figsize=(12, 3.2 * panels))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(panels, 1, sharex=True)
+    fig.suptitle(title, fontsize=14, fontweight='bold')
+
+    x, y = downsample(dates, values.to_numpy(dtype=float), max_points)
+    axes[0].plot(x, y / 1000, linewidth=1.2)
+    axes[0].set_ylabel("Portfolio Value (K)")
+    # 只标注最终净值，不逐点标注
+    axes[0].annotate(f"{y[-1] / 1000:.1f}K", (x[-1], y[-1] / 1000), textcoords="offset points",
+                     xytext=(0, 8), ha="right", fontsize=9)
+
+    x, y = downsample(dates, drawdown_series(values.to_numpy(dtype=float)) * 100, max_points)
+    axes[1].fill_between(x, y, 0, color="red", alpha=0.3, linewidth=0)
+    axes[1].set_ylabel("Drawdown (%)")
+
+    if rolling is not None:
+        x, y = downsample(dates, rolling["sharpe_ratio"].to_numpy(dtype=float), max_points)
+        axes[2].plot(x, y, color="purple", linewidth=1)
+        axes[2].axhline(0, color="black", linestyle="--", alpha=0.5)
+        axes[2].set_ylabel("Rolling Sharpe")
+
+    for ax in axes:
+        ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+
+
+def _format_metric(name: str, value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value * 100:.2f}%" if name in PERCENT_METRICS else f"{value:.2f}"
+    return str(value)
+
+
+def write_report(output_dir: str, performance_df: pd.DataFrame, metrics: Dict[str, Any],
+                 title: str = "Backtest Report", rolling_window: int = 63,
+                 max_points: int = DEFAULT_MAX_POINTS) -> Dict[str, str]:
+    """写出 metrics.json、report.png 和 report.html
+
+    Args:
+        output_dir: 输出目录
+        performance_df: 以日期为索引、包含 "Portfolio Value" 列的回测记录
+        metrics: performance_metrics 的结果
+        title: 报告标题
+        rolling_window: 滚动指标的窗口长度
+        max_points: 每条曲线最多绘制的点数
+
+    Returns:
+        文件类型到路径的映射
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, filename) for name, filename in
+             (("json", "metrics.json"), ("png", "report.png"), ("html", "report.html"))}
+
+    with open(paths["json"], "w", encoding="utf-8") as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
+
+    values = performance_df["Portfolio Value"]
+    rolling = rolling_metrics(values, rolling_window) if len(values) > rolling_window else None
+    render_chart(values, paths["png"], rolling, title, max_points)
+
+    rows = "\n".join(f"<tr><th>{html.escape(name)}</th><td>{html.escape(_format_metric(name, value))}</td></tr>"
+                     for name, value in metrics.items())
+    _write_html(paths["html"], title, _period(values.index), rows)
+    return paths
+
+
+def write_comparison_report(output_dir: str, curves: Dict[str, pd.Series],
+                            metrics: Dict[str, Dict[str, Any]], title: str = "Strategy Comparison",
+                            max_points: int = DEFAULT_MAX_POINTS) -> Dict[str, str]:
+    """多个策略的对比报告：各策略的净值曲线画在同一张图上，指标并列成表
+
+    Args:
+        output_dir: 输出目录
+        curves: 策略名称到以日期为索引的组合净值
+        metrics: 策略名称到 performance_metrics 结果
+        title: 报告标题
+        max_points: 每条曲线最多绘制的点数
+
+    Returns:
+        文件类型到路径的映射
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, filename) for name, filename in
+             (("json", "metrics.json"), ("png", "report.png"), ("html", "report.html"))}
+
+    with open(paths["json"], "w", encoding="utf-8") as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
+
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    equity_ax, drawdown_ax = fig.subplots(2, 1, sharex=True)
+    fig.suptitle(title, fontsize=14, fontweight='bold')
+    for name, values in curves.items():
+        dates = values.index.to_numpy()
+        array = values.to_numpy(dtype=float)
+        x, y = downsample(dates, array / array[0] - 1, max_points)
+        equity_ax.plot(x, y * 100, linewidth=1.2, label=name)
+        x, y = downsample(dates, drawdown_series(array) * 100, max_points)
+        drawdown_ax.plot(x, y, linewidth=1, label=name)
+    equity_ax.set_ylabel("Cumulative Return (%)")
+    equity_ax.axhline(0, color="black", linestyle="--", alpha=0.5)
+    equity_ax.legend()
+    drawdown_ax.set_ylabel("Drawdown (%)")
+    for ax in (equity_ax, drawdown_ax):
+        ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(paths["png"], dpi=100)
+
+    names = list(metrics)
+    metric_names = list(dict.fromkeys(key for name in names for key in metrics[name]))
+    header = "<tr><th></th>" + "".join(f"<th>{html.escape(name)}</th>" for name in names) + "</tr>"
+    rows = header + "\n" + "\n".join(
+        f"<tr><th>{html.escape(metric)}</th>" + "".join(
+            f"<td>{html.escape(_format_metric(metric, metrics[name].get(metric, '')))}</td>"
+            for name in names) + "</tr>"
+        for metric in metric_names)
+    index = next(iter(curves.values())).index if curves else pd.DatetimeIndex([])
+    _write_html(paths["html"], title, _period(index), rows)
+    return paths
+
+
+def _period(index: pd.Index) -> str:
+    return f"{index[0]:%Y-%m-%d} – {index[-1]:%Y-%m-%d}" if len(index) else ""
+
+
+def _write_html(path: str, title: str, subtitle: str, table_rows: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse}}
+th,td{{padding:4px 12px;border-bottom:1px solid #ddd;text-align:left}}</style></head>
+<body><h1>{html.escape(title)}</h1><p>{subtitle}</p>
+<table>{table_rows}</table>
+<img src="report.png" alt="performance chart" style="max-width:100%">
+</body></html>
+""")
@@ -0,0 +1,93 @@
+"""
+Unit tests for the vectorized performance analytics and headless report.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.backtesting.analytics import (analyze_frame, max_drawdown_duration, performance_metrics,
+                                       rolling_metrics)
+from src.backtesting.report import downsample, write_report
+
+
+class TestAnalytics(unittest.TestCase):
+
+    def test_metrics_match_reference_formulas(self):
+        values = np.array([100, 110, 99, 105, 111, 90, 95], dtype=float)
+        metrics = performance_metrics(values, periods_per_year=252)
+
+        returns = pd.Series(values).pct_change().dropna()
+        self.assertAlmostEqual(metrics["total_return"], -0.05)
+        self.assertAlmostEqual(metrics["sharpe_ratio"], returns.mean() / returns.std() * np.sqrt(252))
+        downside = np.sqrt((returns.clip(upper=0) ** 2).mean())
+        self.assertAlmostEqual(metrics["sortino_ratio"], returns.mean() / downside * np.sqrt(252))
+        self.assertAlmostEqual(metrics["max_drawdown"], 90 / 111 - 1)
+        self.assertAlmostEqual(metrics["hit_rate"], 4 / 6)
+        self.assertAlmostEqual(metrics["calmar_ratio"],
+                               metrics["annual_return"] / abs(metrics["max_drawdown"]))
+
+    def test_drawdown_duration_counts_underwater_days(self):
+        self.assertEqual(max_drawdown_duration([100, 110, 99, 105, 111, 90, 95]), 2)
+        self.assertEqual(max_drawdown_duration([100, 90, 80, 85, 95]), 4)
+        self.assertEqual(max_drawdown_duration([100, 101, 102]), 0)
+
+    def test_exposure_and_turnover(self):
+        frame = pd.DataFrame({
+            "Portfolio Value": [100.0] * 252,
+            "Position Value": [50.0] * 252,
+            "Traded Value": [0.0] * 251 + [300.0],
+        })
+        metrics = analyze_frame(frame, initial_value=100.0)
+        self.assertAlmostEqual(metrics["exposure"], 0.5)
+        self.assertAlmostEqual(metrics["turnover"], 3.0)
+        self.assertEqual(metrics["sharpe_ratio"], 0.0)
+
+    def test_rolling_metrics(self):
+        values = pd.Series(np.linspace(100, 200, 100), index=pd.bdate_range("2023-01-02", periods=100))
+        rolling = rolling_metrics(values, window=20)
+        self.assertTrue(rolling["return"].iloc[:20].isna().all())
+        self.assertAlmostEqual(rolling["return"].iloc[-1], values.iloc[-1] / values.iloc[-21] - 1)
+        self.assertTrue((rolling["drawdown"] == 0).all())
+
+
+class TestReport(unittest.TestCase):
+
+    def test_downsample_keeps_extremes(self):
+        rng = np.random.default_rng(0)
+        y = np.cumsum(rng.normal(size=10000))
+        x = np.arange(len(y))
+        xs, ys = downsample(x, y, max_points=500)
+        self.assertLessEqual(len(xs), 502)
+        self.assertEqual(ys.max(), y.max())
+        self.assertEqual(ys.min(), y.min())
+        self.assertEqual((xs[0], xs[-1]), (0, len(y) - 1))
+        self.assertTrue((np.diff(xs) > 0).all())
+
+    def test_write_report_for_ten_year_run(self):
+        rng = np.random.default_rng(1)
+        dates = pd.bdate_range("2014-01-01", periods=2520)
+        values = 1e6 * np.cumprod(1 + rng.normal(0.0003, 0.01, len(dates)))
+        frame = pd.DataFrame({"Portfolio Value": values}, index=dates)
+        metrics = analyze_frame(frame, initial_value=1e6)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = write_report(tmpdir, frame, metrics, max_points=1000)
+            self.assertTrue(all(os.path.getsize(path) > 0 for path in paths.values()))
+            with open(paths["json"], encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["trading_days"], 2520)
+            with open(paths["html"], encoding="utf-8") as f:
+                self.assertIn("sharpe_ratio", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Unit tests for backtest checkpoints.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.backtesting.checkpoint import BacktestCheckpoint
+
+
+class TestBacktestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint = BacktestCheckpoint(os.path.join(self.tmpdir.name, "bt.json"))
+        self.config = {"ticker": "600519", "start_date": "2024-01-02",
+                       "end_date": "2024-06-28", "initial_capital": 100000}
+        self.values = [
+            {"Date": pd.Timestamp("2024-01-02"), "Portfolio Value": np.float64(100000.0), "Daily Return": 0},
+            {"Date": pd.Timestamp("2024-01-03"), "Portfolio Value": np.float64(100500.0), "Daily Return": 0.5},
+        ]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip(self):
+        self.checkpoint.save(self.config, {"cash": np.float64(50000.0), "stock": np.int64(300)},
+                             self.values, "2024-01-03", {"model": "m"})
+        self.assertEqual(os.listdir(self.tmpdir.name), ["bt.json"])
+        state = self.checkpoint.load(self.config, {"model": "m"})
+        self.assertEqual(state["last_date"], "2024-01-03")
+        self.assertEqual(state["portfolio"], {"cash": 50000.0, "stock": 300})
+        self.assertIsInstance(state["portfolio"]["stock"], int)
+        self.assertEqual(state["portfolio_values"][1]["Date"], pd.Timestamp("2024-01-03"))
+        self.assertEqual(state["portfolio_values"][1]["Portfolio Value"], 100500.0)
+
+    def test_missing_checkpoint(self):
+        self.assertIsNone(self.checkpoint.load(self.config))
+
+    def test_rejects_other_config(self):
+        self.checkpoint.save(self.config, {"cash": 1.0, "stock": 0}, [], "2024-01-03")
+        with self.assertRaises(ValueError):
+            self.checkpoint.load(dict(self.config, initial_capital=200000))
+
+    def test_restores_rng_state(self):
+        random.seed(1)
+        np.random.seed(1)
+        self.checkpoint.save(self.config, {"cash": 1.0, "stock": 0}, [], "2024-01-03")
+        expected = (random.random(), np.random.rand())
+        random.seed(2)
+        np.random.seed(2)
+        self.checkpoint.load(self.config)
+        self.assertEqual((random.random(), np.random.rand()), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
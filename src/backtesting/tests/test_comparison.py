@@ -0,0 +1,87 @@
+"""
+Unit tests for side-by-side strategy comparison.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.backtester import Backtester
+from src.backtesting import comparison
+from src.backtesting.fast_mode import FastAgent
+from src.tools import api
+from src.tools.synthetic_data import generate_price_history
+
+
+class TestStrategyComparison(unittest.TestCase):
+
+    def setUp(self):
+        self.bars = generate_price_history("600519", "2020-01-02", "2023-12-29", seed=5)
+
+        def fetch(symbol, start_date, end_date, adjust):
+            dates = pd.to_datetime(self.bars["date"])
+            return self.bars[(dates >= start_date) & (dates <= end_date)].copy()
+
+        patcher = mock.patch.object(api.A_SHARE_PRICE_HISTORY, "call", side_effect=fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(api.clear_preloaded_prices)
+
+    def _run(self):
+        strategies = comparison.build_strategies(["fast", "technicals", "buy_and_hold"])
+        strategies[0].agent.use_fundamentals = False
+        strategies[1].agent.weights = {"trend": 0.5, "momentum": 0.5}
+        backtester = comparison.MultiStrategyBacktester("600519", "2022-01-04", "2023-12-29",
+                                                        100000, strategies)
+        backtester.run_backtest()
+        return backtester
+
+    def test_shared_inputs_computed_once(self):
+        with mock.patch.object(comparison, "technical_strategy_signals",
+                               wraps=comparison.technical_strategy_signals) as signals, \
+                mock.patch.object(comparison, "risk_metric_frame",
+                                  wraps=comparison.risk_metric_frame) as risk:
+            backtester = self._run()
+        self.assertEqual(signals.call_count, 1)
+        self.assertEqual(risk.call_count, 1)
+        lengths = {len(values) for values in backtester.portfolio_values.values()}
+        self.assertEqual(len(lengths), 1)
+
+    def test_matches_single_strategy_backtester(self):
+        backtester = self._run()
+        single = Backtester(FastAgent(use_fundamentals=False), "600519", "2022-01-04", "2023-12-29",
+                            100000, 5, rate_limit=False)
+        single.run_backtest()
+        expected = [v["Portfolio Value"] for v in single.portfolio_values]
+        actual = [v["Portfolio Value"] for v in backtester.portfolio_values["fast"]]
+        self.assertEqual(actual, expected)
+
+    def test_buy_and_hold_and_report(self):
+        backtester = self._run()
+        first, last = backtester.portfolio_values["buy_and_hold"][0], backtester.portfolio_values["buy_and_hold"][-1]
+        self.assertGreater(first["Position Value"], 0.9 * 100000)
+        self.assertEqual(backtester.portfolios["buy_and_hold"]["stock"] % 1, 0)
+        self.assertEqual(sum(v["Traded Value"] > 0 for v in backtester.portfolio_values["buy_and_hold"]), 1)
+
+        table = backtester.compare()
+        self.assertEqual(list(table.columns), ["fast", "technicals", "buy_and_hold"])
+        self.assertAlmostEqual(table.loc["total_return", "buy_and_hold"],
+                               last["Portfolio Value"] / 100000 - 1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = backtester.write_report(tmpdir)
+            with open(paths["json"], encoding="utf-8") as f:
+                self.assertEqual(set(json.load(f)), {"fast", "technicals", "buy_and_hold"})
+            self.assertGreater(os.path.getsize(paths["png"]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
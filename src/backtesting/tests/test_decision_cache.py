@@ -0,0 +1,83 @@
+"""
+Unit tests for the backtest decision cache.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.backtesting.decision_cache import DecisionCache, agent_config_hash
+
+
+class TestDecisionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "decisions.sqlite")
+        self.portfolio = {"cash": 100000.0, "stock": 0}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _cache(self, **kwargs):
+        kwargs.setdefault("model", "test-model")
+        kwargs.setdefault("config_hash", "abc")
+        cache = DecisionCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_roundtrip_persists_across_instances(self):
+        cache = self._cache()
+        key = cache.key("600519", "2024-03-15", self.portfolio, lookback_start="2024-02-14")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "600519", "2024-03-15", '{"action": "buy", "quantity": 100}')
+
+        reopened = self._cache()
+        key = reopened.key("600519", "2024-03-15", self.portfolio, lookback_start="2024-02-14")
+        self.assertEqual(reopened.get(key), '{"action": "buy", "quantity": 100}')
+        self.assertEqual((reopened.hits, reopened.misses), (1, 0))
+
+    def test_key_depends_on_inputs_model_and_config(self):
+        cache = self._cache()
+        base = cache.key("600519", "2024-03-15", self.portfolio, num_of_news=5)
+        self.assertNotEqual(base, cache.key("600519", "2024-03-18", self.portfolio, num_of_news=5))
+        self.assertNotEqual(base, cache.key("600519", "2024-03-15", self.portfolio, num_of_news=10))
+        self.assertNotEqual(base, cache.key("600519", "2024-03-15", {"cash": 5.0, "stock": 0}, num_of_news=5))
+        self.assertNotEqual(base, self._cache(model="other").key(
+            "600519", "2024-03-15", self.portfolio, num_of_news=5))
+        self.assertNotEqual(base, self._cache(config_hash="def").key(
+            "600519", "2024-03-15", self.portfolio, num_of_news=5))
+        # 回测过程中追加的 portfolio_value 不影响缓存键
+        with_value = dict(self.portfolio, portfolio_value=100000.0)
+        self.assertEqual(base, cache.key("600519", "2024-03-15", with_value, num_of_news=5))
+
+    def test_ignore_portfolio(self):
+        cache = self._cache(match_portfolio=False)
+        self.assertEqual(cache.key("600519", "2024-03-15", self.portfolio),
+                         cache.key("600519", "2024-03-15", {"cash": 1.0, "stock": 300}))
+
+    def test_clear_by_ticker(self):
+        cache = self._cache()
+        cache.put(cache.key("600519", "2024-03-15", self.portfolio), "600519", "2024-03-15", "{}")
+        cache.put(cache.key("AAPL", "2024-03-15", self.portfolio), "AAPL", "2024-03-15", "{}")
+        self.assertEqual(cache.clear("AAPL"), 1)
+        self.assertEqual(len(cache), 1)
+
+    def test_agent_config_hash_tracks_sources(self):
+        agents_dir = os.path.join(self.tmpdir.name, "agents")
+        os.makedirs(agents_dir)
+        with open(os.path.join(agents_dir, "a.py"), "w") as f:
+            f.write("WEIGHT = 0.3\n")
+        before = agent_config_hash(agents_dir)
+        with open(os.path.join(agents_dir, "a.py"), "w") as f:
+            f.write("WEIGHT = 0.4\n")
+        self.assertNotEqual(before, agent_config_hash(agents_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Unit tests for the transaction cost, slippage and liquidity model.
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.backtester import Backtester
+from src.backtesting.execution import (BUY, SELL, AShareCommission, ExecutionModel,
+                                       MakerTakerCommission, PerShareCommission, SlippageModel,
+                                       build_execution_model)
+from src.backtesting.fast_mode import FastAgent
+from src.tools import api
+from src.tools.synthetic_data import generate_price_history
+
+
+class TestExecutionModel(unittest.TestCase):
+
+    def test_commission_schedules(self):
+        sides = np.array([BUY, SELL, BUY])
+        quantities = np.array([100.0, 1000.0, 0.0])
+        prices = np.array([10.0, 100.0, 10.0])
+
+        fees = AShareCommission().fees(sides, quantities, prices)
+        # 1000 元买入按最低佣金 5 元；10 万元卖出收佣金 25 元 + 印花税 50 元；过户费双向
+        np.testing.assert_allclose(fees, [5 + 0.01, 25 + 50 + 1, 0])
+
+        fees = PerShareCommission().fees(sides, quantities, prices)
+        np.testing.assert_allclose(fees, [1.0, 5.0, 0])
+        fees = MakerTakerCommission(maker_rate=0.0002, taker_rate=0.001, maker_fraction=0.5).fees(
+            sides, quantities, prices)
+        np.testing.assert_allclose(fees, [0.6, 60.0, 0])
+
+    def test_slippage_participation_and_budget(self):
+        model = ExecutionModel(slippage=SlippageModel(spread_bps=10, impact=1.0),
+                               max_participation=0.1, lot_size=100)
+        fills = model.fill([BUY, SELL, BUY], [1000, 500, 50000], [10.0, 10.0, 10.0],
+                           volatility=0.02, liquidity=[100000, 10000, 100000])
+        np.testing.assert_allclose(fills.quantity, [1000, 500, 10000])
+        np.testing.assert_allclose(fills.price, [10 * (1 + 0.0005 + 0.02 * np.sqrt(0.01)),
+                                                 10 * (1 - 0.0005 - 0.02 * np.sqrt(0.05)),
+                                                 10 * (1 + 0.0005 + 0.02 * np.sqrt(0.1))])
+
+        model = build_execution_model("a_share")
+        fills = model.fill(BUY, 10000, 10.0, 0.02, 1e7, budget=50000)
+        cost = float(fills.notional + fills.fees)
+        self.assertLessEqual(cost, 50000)
+        self.assertEqual(float(fills.quantity) % 100, 0)
+        self.assertGreater(cost, 50000 - 10 * 100 * 1.01)
+
+    def test_market_inputs_and_presets(self):
+        prices = pd.DataFrame({"open": [10.0] * 30, "high": [10.5] * 30, "low": [9.5] * 30,
+                               "close": np.linspace(10, 13, 30), "volume": [1.0] * 30,
+                               "amount": [1e6] * 30})
+        volatility, liquidity = ExecutionModel().market_inputs(prices)
+        self.assertEqual(volatility[0], 0.02)
+        self.assertTrue(np.isfinite(volatility).all())
+        # 成交股数由成交额推算，不依赖 volume 的单位
+        self.assertAlmostEqual(liquidity[-1], 1e6 / prices.iloc[-1][["open", "high", "low", "close"]].mean())
+
+        self.assertIsInstance(build_execution_model("auto", "600519").commission, AShareCommission)
+        self.assertIsInstance(build_execution_model("auto", "AAPL").commission, PerShareCommission)
+        self.assertIsInstance(build_execution_model("auto", "BTC").commission, MakerTakerCommission)
+        # yfinance 风格的 BTC-USD 同样是加密货币，可以买入不足 1 个单位
+        crypto = build_execution_model("auto", "BTC-USD")
+        self.assertIsInstance(crypto.commission, MakerTakerCommission)
+        self.assertIsNone(crypto.lot_size)
+        self.assertAlmostEqual(FastAgent()._size("BTC-USD", "buy", {"cash": 1000.0, "stock": 0}, 30000.0, 0),
+                               0.25 * 1000.0 / 30000.0)
+        with self.assertRaises(ValueError):
+            build_execution_model("unknown")
+
+    def test_backtester_costs_reduce_returns(self):
+        bars = generate_price_history("600519", "2021-01-04", "2023-12-29", seed=3)
+
+        def fetch(symbol, start_date, end_date, adjust):
+            dates = pd.to_datetime(bars["date"])
+            return bars[(dates >= start_date) & (dates <= end_date)].copy()
+
+        with mock.patch.object(api.A_SHARE_PRICE_HISTORY, "call", side_effect=fetch):
+            results = {}
+            for name in ("none", "a_share"):
+                model = build_execution_model(name)
+                backtester = Backtester(FastAgent(use_fundamentals=False), "600519", "2023-01-03",
+                                        "2023-12-29", 1000000, 5, rate_limit=False,
+                                        execution_model=model if name != "none" else None)
+                backtester.run_backtest()
+                results[name] = pd.DataFrame(backtester.portfolio_values)
+            api.clear_preloaded_prices()
+
+        self.assertEqual(results["none"]["Fees"].sum(), 0)
+        self.assertGreater(results["a_share"]["Fees"].sum(), 0)
+        self.assertLess(results["a_share"]["Portfolio Value"].iloc[-1],
+                        results["none"]["Portfolio Value"].iloc[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Unit tests for the LLM-free fast backtest mode.
+"""
+
+import os
+import sys
+import unittest
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.agents import technicals
+from src.agents.risk_manager import calculate_risk_metrics
+from src.backtesting.fast_mode import (FastAgent, combine_strategy_signals, risk_metric_frame,
+                                       technical_strategy_signals)
+from src.tools.synthetic_data import generate_price_history
+
+PER_DAY_FUNCTIONS = {
+    "mean_reversion": technicals.calculate_mean_reversion_signals,
+    "momentum": technicals.calculate_momentum_signals,
+    "volatility": technicals.calculate_volatility_signals,
+    "stat_arb": technicals.calculate_stat_arb_signals,
+}
+
+
+class TestFastMode(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.prices = generate_price_history("600519", "2019-01-02", "2023-12-29", seed=11)
+        cls.prices["date"] = pd.to_datetime(cls.prices["date"])
+        cls.signals = technical_strategy_signals(cls.prices)
+
+    def _window(self, end):
+        """回测中智能体实际看到的价格窗口"""
+        dates = self.prices["date"]
+        mask = (dates > end - pd.Timedelta(days=730)) & (dates <= end)
+        return self.prices[mask].reset_index(drop=True)
+
+    def test_rolling_strategies_match_per_day_agent_functions(self):
+        for end in pd.to_datetime(["2022-03-15", "2022-11-01", "2023-06-30", "2023-12-29"]):
+            window = self._window(end)
+            for strategy, function in PER_DAY_FUNCTIONS.items():
+                expected = function(window.copy())
+                row = self.signals.loc[end]
+                self.assertEqual(row[f"{strategy}_signal"],
+                                 {"bullish": 1, "neutral": 0, "bearish": -1}[expected["signal"]],
+                                 f"{strategy} @ {end.date()}")
+                self.assertAlmostEqual(row[f"{strategy}_confidence"], expected["confidence"], places=6)
+
+    def test_combination_matches_weighted_signal_combination(self):
+        combined = combine_strategy_signals(self.signals)
+        names = {1: "bullish", 0: "neutral", -1: "bearish"}
+        for end in self.signals.index[-300::37]:
+            row = self.signals.loc[end]
+            expected = technicals.weighted_signal_combination({
+                strategy: {"signal": names[row[f"{strategy}_signal"]],
+                           "confidence": row[f"{strategy}_confidence"]}
+                for strategy in technicals.STRATEGY_WEIGHTS
+            }, technicals.STRATEGY_WEIGHTS)
+            self.assertEqual(names[combined.loc[end, "signal"]], expected["signal"])
+            self.assertAlmostEqual(combined.loc[end, "confidence"], expected["confidence"])
+
+    def test_risk_metrics_track_agent_calculation(self):
+        risk = risk_metric_frame(self.prices)
+        end = pd.Timestamp("2023-06-30")
+        expected = calculate_risk_metrics(self._window(end))
+        self.assertAlmostEqual(risk.loc[end, "var_95"], expected["var_95"], places=3)
+        self.assertAlmostEqual(risk.loc[end, "volatility"], expected["volatility"], places=2)
+
+    def test_fast_agent_decisions(self):
+        agent = FastAgent(use_fundamentals=False)
+        agent.prepare("600519", self.prices)
+        portfolio = {"cash": 100000.0, "stock": 0}
+        actions = set()
+        for end in self.signals.index[-250:]:
+            output = agent("600519", None, end.strftime("%Y-%m-%d"), portfolio)
+            decision = output["decision"]
+            actions.add(decision["action"])
+            self.assertIn(decision["action"], ("buy", "sell", "hold"))
+            self.assertIsInstance(decision["quantity"], int)
+            if decision["action"] == "buy":
+                price = self.prices.set_index("date").loc[end, "close"]
+                # 仓位上限为组合总值的 25%
+                self.assertLessEqual(decision["quantity"] * price, 25000.0 + 1e-6)
+        self.assertIn("hold", actions)
+        before_history = agent("600519", None, "2018-06-01", portfolio)
+        self.assertEqual(before_history["decision"], {"action": "hold", "quantity": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
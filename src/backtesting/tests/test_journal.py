@@ -0,0 +1,105 @@
+"""
+Unit tests for the decision journal and the execution replay engine.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.backtester import Backtester
+from src.backtesting.fast_mode import FastAgent
+from src.backtesting.journal import DecisionJournal, default_run_id
+from src.backtesting.replay import replay, replay_variants
+from src.tools import api
+from src.tools.synthetic_data import generate_price_history
+
+
+class TestDecisionJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.bars = generate_price_history("600519", "2021-01-04", "2023-12-29", seed=11)
+
+        def fetch(symbol, start_date, end_date, adjust):
+            dates = pd.to_datetime(self.bars["date"])
+            return self.bars[(dates >= start_date) & (dates <= end_date)].copy()
+
+        patcher = mock.patch.object(api.A_SHARE_PRICE_HISTORY, "call", side_effect=fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(api.clear_preloaded_prices)
+
+        self.journal = DecisionJournal(os.path.join(self.tmpdir.name, "journal.sqlite"), batch_size=16)
+        self.addCleanup(self.journal.close)
+        self.backtester = Backtester(FastAgent(use_fundamentals=False), "600519", "2023-01-03",
+                                     "2023-12-29", 100000, 5, rate_limit=False, journal=self.journal)
+        self.backtester.run_backtest()
+        self.df = self.journal.load(run_id=default_run_id("600519", "2023-01-03", "2023-12-29"))
+
+    def test_every_day_recorded_with_signals(self):
+        self.assertEqual(len(self.df), len(self.backtester.portfolio_values))
+        self.assertEqual(self.journal.runs()["days"].tolist(), [len(self.df)])
+        self.assertIn("signal_technical_analyst_agent", self.df.columns)
+        self.assertTrue(self.df["signal_technical_analyst_agent"].isin([1, 0, -1]).all())
+        self.assertTrue(self.df[["open", "high", "low", "close", "volume"]].notna().all().all())
+
+    def test_recorded_replay_matches_backtest(self):
+        records = replay(self.df, 100000)
+        expected = [v["Portfolio Value"] for v in self.backtester.portfolio_values]
+        self.assertEqual([r["Portfolio Value"] for r in records], expected)
+
+    def test_costs_and_sizing_variants(self):
+        table = replay_variants(self.df, {
+            "recorded": {},
+            "costly": {"fee_rate": 0.001, "slippage_bps": 20},
+            "all_in": {"sizing": "all_in", "lot_size": 100},
+        })
+        self.assertLess(table.loc["costly", "total_return"], table.loc["recorded", "total_return"])
+        records = replay(self.df, 100000, sizing="all_in", lot_size=100)
+        final_stock = records[-1]["Position Value"] / self.df["open"].iloc[-1]
+        self.assertEqual(round(final_stock) % 100, 0)
+        with self.assertRaises(ValueError):
+            replay(self.df, 100000, sizing="kelly")
+
+
+class TestCryptoReplay(unittest.TestCase):
+
+    def setUp(self):
+        dates = pd.bdate_range("2024-01-01", periods=4)
+        self.df = pd.DataFrame({
+            "ticker": "BTC",
+            "date": dates,
+            "action": ["buy", "hold", "sell", "hold"],
+            "quantity": [0.75, 0.0, 0.3, 0.0],
+            "confidence": [0.6, 0.0, 0.6, 0.0],
+            "open": [40000.0, 42000.0, 44000.0, 43000.0],
+        })
+
+    def test_fractional_quantities_are_kept(self):
+        records = replay(self.df, 100000, lot_size=None)
+        self.assertAlmostEqual(records[0]["Position Value"], 0.75 * 40000)
+        self.assertAlmostEqual(records[-1]["Position Value"], 0.45 * 43000)
+        self.assertAlmostEqual(records[-1]["Portfolio Value"],
+                               100000 - 0.75 * 40000 + 0.3 * 44000 + 0.45 * 43000)
+
+        # 默认按 1 股取整时，0.75 个 BTC 的买入会被截断为 0
+        records = replay(self.df, 100000)
+        self.assertEqual(records[0]["Traded Value"], 0)
+
+    def test_fractional_all_in_with_fees(self):
+        records = replay(self.df, 100000, sizing="all_in", fee_rate=0.001, lot_size=None)
+        self.assertAlmostEqual(records[0]["Traded Value"] + records[0]["Fees"], 100000)
+        self.assertAlmostEqual(records[2]["Position Value"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
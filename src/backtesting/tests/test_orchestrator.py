@@ -0,0 +1,164 @@
+"""
+Unit tests for running several backtests under one shared LLM budget.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.backtester import Backtester
+from src.backtesting.orchestrator import BacktestOrchestrator
+from src.backtesting.rate_limiter import RateLimiter
+from src.tools import api
+from src.tools.pit_store import PointInTimeStore, fetch_point_in_time, get_active_store
+from src.tools.synthetic_data import generate_price_history
+
+TICKERS = ["600519", "000858", "601318"]
+
+
+class _SlowAgent:
+    """模拟 LLM 调用：每次耗时 20ms，记录同时进行的调用数和每个代码的调用日期"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.dates = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, ticker, start_date, end_date, portfolio, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.dates.setdefault(ticker, []).append(end_date)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return '{"action": "buy", "quantity": 10, "confidence": 0.6}'
+
+
+class _PointInTimeAgent:
+    """每天按时点读取财务指标并记录读到的值；实时接口不应被调用"""
+
+    def __init__(self):
+        self.seen = {}
+        self.live_calls = 0
+
+    def live(self):
+        self.live_calls += 1
+        return [{"pe_ratio": -1.0}]
+
+    def __call__(self, ticker, start_date, end_date, portfolio, **kwargs):
+        metrics = fetch_point_in_time("financial_metrics", ticker, end_date, self.live)
+        # 让两个回测的交易日交替执行
+        time.sleep(0.005)
+        self.seen.setdefault(ticker, set()).add(metrics[0]["pe_ratio"])
+        return '{"action": "hold", "quantity": 0, "confidence": 0.5}'
+
+
+class TestBacktestOrchestrator(unittest.TestCase):
+
+    def setUp(self):
+        self.bars = {ticker: generate_price_history(ticker, "2022-01-04", "2023-12-29", seed=i)
+                     for i, ticker in enumerate(TICKERS)}
+
+        def fetch(symbol, start_date, end_date, adjust):
+            bars = self.bars[symbol]
+            dates = pd.to_datetime(bars["date"])
+            return bars[(dates >= start_date) & (dates <= end_date)].copy()
+
+        patcher = mock.patch.object(api.A_SHARE_PRICE_HISTORY, "call", side_effect=fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(api.clear_preloaded_prices)
+
+    def _backtests(self, agent):
+        return [Backtester(agent, ticker, "2023-11-01", "2023-11-30", 100000, 5)
+                for ticker in TICKERS]
+
+    def test_shared_budget_limits_concurrency(self):
+        agent = _SlowAgent()
+        backtests = self._backtests(agent)
+        limiter = RateLimiter(max_calls=1000, period=60, max_concurrent=2)
+        updates = []
+        orchestrator = BacktestOrchestrator(backtests, limiter, progress_interval=0.05,
+                                            on_progress=updates.append)
+        errors = orchestrator.run()
+
+        self.assertEqual(set(errors.values()), {None})
+        self.assertEqual(agent.max_active, 2)
+        progress = orchestrator.progress()
+        self.assertEqual(progress["completed_days"], progress["total_days"])
+        self.assertEqual(progress["finished_backtests"], 3)
+        self.assertEqual(limiter.total_calls, sum(bt.total_days for bt in backtests))
+        self.assertGreater(len(updates), 1)
+        # 每个回测内部仍按交易日顺序调用
+        for ticker, dates in agent.dates.items():
+            self.assertEqual(dates, sorted(dates))
+        for backtest in backtests:
+            self.assertEqual(len(backtest.portfolio_values), backtest.total_days)
+
+    def test_failed_backtest_does_not_stop_others(self):
+        backtests = self._backtests(_SlowAgent())
+        backtests[1].run_backtest = mock.Mock(side_effect=RuntimeError("boom"))
+        errors = BacktestOrchestrator(backtests, RateLimiter(max_calls=1000)).run()
+        self.assertIsInstance(errors[BacktestOrchestrator.label(backtests[1])], RuntimeError)
+        self.assertIsNone(errors[BacktestOrchestrator.label(backtests[0])])
+        self.assertTrue(backtests[2].portfolio_values)
+
+    def test_concurrent_point_in_time_backtests_use_own_store(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        agent = _PointInTimeAgent()
+        backtests = []
+        for i, ticker in enumerate(TICKERS[:2]):
+            # 两个存储都有两个代码的快照，读到别人的存储时记录的值会不同
+            store = PointInTimeStore(os.path.join(tmpdir.name, f"pit_{i}.sqlite"), strict=True)
+            self.addCleanup(store.close)
+            for symbol in TICKERS[:2]:
+                store.record("financial_metrics", symbol, [{"pe_ratio": float(i)}],
+                             known_at="2023-01-01 18:00:00")
+            backtests.append(Backtester(agent, ticker, "2023-11-01", "2023-11-30", 100000, 5,
+                                        pit_store=store))
+
+        errors = BacktestOrchestrator(backtests, RateLimiter(max_calls=1000)).run()
+
+        self.assertEqual(set(errors.values()), {None})
+        self.assertEqual(agent.seen, {TICKERS[0]: {0.0}, TICKERS[1]: {1.0}})
+        self.assertEqual(agent.live_calls, 0)
+        self.assertIsNone(get_active_store())
+
+    def test_same_ticker_backtests_keep_their_own_preload(self):
+        slow_agent = _SlowAgent()
+
+        def agent(ticker, start_date, end_date, portfolio, **kwargs):
+            # 与智能体一样按交易日请求价格，应全部从本回测的预加载中切片
+            api.get_price_history(ticker, start_date, end_date)
+            return slow_agent(ticker, start_date, end_date, portfolio, **kwargs)
+
+        # 同一代码、不同区间：先结束的回测不会清除另一个回测的预加载
+        backtests = [Backtester(agent, TICKERS[0], "2023-11-01", "2023-11-10", 100000, 5),
+                     Backtester(agent, TICKERS[0], "2023-11-01", "2023-11-30", 100000, 5),
+                     Backtester(agent, TICKERS[0], "2023-11-01", "2023-11-30", 500000, 5)]
+        orchestrator = BacktestOrchestrator(backtests, RateLimiter(max_calls=1000))
+        self.assertEqual(len(set(orchestrator.labels)), 3)
+        errors = orchestrator.run()
+
+        self.assertEqual(set(errors.values()), {None})
+        # 每个回测只在预加载时获取一次价格
+        self.assertEqual(api.A_SHARE_PRICE_HISTORY.call.call_count, 3)
+        for backtest in backtests:
+            self.assertEqual(len(backtest.portfolio_values), backtest.total_days)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Unit tests for the multi-asset portfolio backtester.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.backtesting.fast_mode import FastAgent
+from src.backtesting.portfolio import PortfolioBacktester
+from src.backtesting.rate_limiter import RateLimiter
+from src.tools import api
+from src.tools.synthetic_data import generate_price_history
+
+TICKERS = ["600519", "000858", "601318"]
+
+
+class _ScriptedAgent:
+    """第一个交易日按固定数量和置信度买入，之后持有；记录每次调用看到的组合"""
+
+    def __init__(self, orders):
+        self.orders = orders
+        self.calls = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, ticker, start_date, end_date, portfolio, **kwargs):
+        with self._lock:
+            first_day = not any(call[0] == ticker for call in self.calls)
+            self.calls.append((ticker, end_date, dict(portfolio)))
+            self.threads.add(threading.get_ident())
+        if first_day and ticker in self.orders:
+            quantity, confidence = self.orders[ticker]
+            return {"decision": {"action": "buy", "quantity": quantity, "confidence": confidence},
+                    "analyst_signals": {}}
+        return '```json\n{"action": "hold", "quantity": 0}\n```'
+
+
+class TestPortfolioBacktester(unittest.TestCase):
+
+    def setUp(self):
+        self.bars = {ticker: generate_price_history(ticker, "2021-01-04", "2023-12-29", seed=i)
+                     for i, ticker in enumerate(TICKERS)}
+
+        def fetch(symbol, start_date, end_date, adjust):
+            bars = self.bars[symbol]
+            dates = pd.to_datetime(bars["date"])
+            return bars[(dates >= start_date) & (dates <= end_date)].copy()
+
+        patcher = mock.patch.object(api.A_SHARE_PRICE_HISTORY, "call", side_effect=fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(api.clear_preloaded_prices)
+
+    def _open(self, ticker, date):
+        bars = self.bars[ticker]
+        return float(bars.loc[pd.to_datetime(bars["date"]) == date, "open"].iloc[0])
+
+    def test_buys_share_cash_in_confidence_order(self):
+        agent = _ScriptedAgent({"600519": (10 ** 6, 0.6), "000858": (100, 0.9)})
+        backtester = PortfolioBacktester(agent, TICKERS, "2023-06-01", "2023-06-30", 100000,
+                                         max_workers=3)
+        backtester.run_backtest()
+
+        first_day = backtester.dates[0]
+        trades = backtester.trades_frame()
+        self.assertEqual(trades["Ticker"].tolist(), ["000858", "600519"])
+        # 高置信度的订单先成交，剩余现金全部用于第二个订单
+        cost = 100 * self._open("000858", first_day)
+        expected = int((100000 - cost) // self._open("600519", first_day))
+        self.assertEqual(trades["Quantity"].tolist(), [100, expected])
+        self.assertGreaterEqual(backtester.cash, 0)
+
+        # 每个代码每个交易日都请求一次决策，且看到的是开盘前的共享现金
+        self.assertEqual(len(agent.calls), len(TICKERS) * len(backtester.dates))
+        first_calls = [call for call in agent.calls if call[1] == first_day.strftime("%Y-%m-%d")]
+        self.assertTrue(all(call[2] == {"cash": 100000, "stock": 0.0} for call in first_calls))
+
+    def test_mark_to_market_uses_close_panel(self):
+        agent = _ScriptedAgent({"600519": (50, 0.5), "601318": (200, 0.5)})
+        backtester = PortfolioBacktester(agent, TICKERS, "2023-06-01", "2023-06-30", 1000000,
+                                         max_workers=1)
+        backtester.run_backtest()
+
+        positions = backtester.positions_frame()
+        closes = pd.DataFrame({t: pd.to_datetime(self.bars[t]["date"]).pipe(
+            lambda d: pd.Series(self.bars[t]["close"].to_numpy(), index=d)) for t in TICKERS})
+        closes = closes.reindex(positions.index).ffill()
+        values = pd.DataFrame(backtester.portfolio_values).set_index("Date")
+        expected = values["Cash"] + (positions * closes).sum(axis=1)
+        np.testing.assert_allclose(values["Portfolio Value"].to_numpy(), expected.to_numpy())
+
+        summary = backtester.analyze_performance()
+        self.assertEqual(summary["trades"], 2)
+        self.assertAlmostEqual(summary["final_value"], values["Portfolio Value"].iloc[-1])
+
+    def test_fast_agent_portfolio_run(self):
+        backtester = PortfolioBacktester(FastAgent(use_fundamentals=False), TICKERS,
+                                         "2023-01-03", "2023-12-29", 1000000, max_workers=4)
+        backtester.run_backtest()
+        summary = backtester.analyze_performance()
+        self.assertEqual(summary["trading_days"], len(backtester.dates))
+        self.assertGreater(summary["final_value"], 0)
+        self.assertTrue((backtester.positions_frame().to_numpy() >= 0).all())
+
+    def test_rate_limiter_spaces_calls(self):
+        limiter = RateLimiter(max_calls=2, period=0.3, max_concurrent=2)
+        starts = []
+
+        def call():
+            with limiter:
+                starts.append(time.monotonic())
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        starts.sort()
+        # 任意 0.3 秒窗口内最多 2 次调用
+        self.assertGreaterEqual(starts[2] - starts[0], 0.3 - 1e-3)
+        self.assertGreaterEqual(starts[3] - starts[1], 0.3 - 1e-3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Unit tests for the walk-forward strategy weight sweep.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.backtesting import weight_sweep
+from src.backtesting.fast_mode import combine_strategy_signals, technical_strategy_signals
+from src.tools.feature_store import FeatureStore
+from src.tools.synthetic_data import generate_price_history
+
+
+class TestWeightSweep(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.prices = {ticker: generate_price_history(ticker, "2017-01-03", "2023-12-29", seed=seed)
+                      for seed, ticker in enumerate(["600519", "000858"])}
+        cls.arrays = {ticker: weight_sweep.load_signals(ticker, prices, "2019-01-02", "2023-12-29")
+                      for ticker, prices in cls.prices.items()}
+
+    def test_scores_match_combine_strategy_signals(self):
+        signals = technical_strategy_signals(self.prices["600519"])
+        expected = combine_strategy_signals(signals)["score"].to_numpy()
+        weights, _ = weight_sweep.build_configs(weight_sweep.grid_weights(0.5))
+        _, weighted, confidence, _ = weight_sweep.signal_arrays(signals, pd.Series(1.0, index=signals.index))
+        scores = weight_sweep.combined_scores(weighted, confidence, weights)
+        np.testing.assert_allclose(scores[:, 0], np.nan_to_num(expected))
+
+    def test_positions_hold_between_thresholds(self):
+        scores = np.array([[0.0], [0.5], [0.1], [-0.1], [-0.5], [0.1]])
+        held = weight_sweep.positions(scores, np.array([0.2]))
+        self.assertEqual(held[:, 0].tolist(), [0, 1, 1, 1, 0, 0])
+
+    def test_window_sharpe_matches_direct_computation(self):
+        daily = np.random.default_rng(0).normal(0.001, 0.01, size=(300, 3))
+        result = weight_sweep.window_sharpe(daily, [(0, 100), (100, 300)])
+        window = daily[100:300]
+        expected = window.mean(axis=0) / window.std(axis=0, ddof=1) * np.sqrt(252)
+        np.testing.assert_allclose(result[1], expected)
+
+    def test_grid_weights_cover_simplex(self):
+        grid = weight_sweep.grid_weights(0.25)
+        self.assertEqual(len(grid), 70)
+        np.testing.assert_allclose(grid.sum(axis=1), 1.0)
+        weights, thresholds = weight_sweep.build_configs(grid, thresholds=(0.1, 0.2))
+        self.assertEqual(len(weights), 2 * 71)
+        self.assertEqual(thresholds[0], 0.2)
+        np.testing.assert_allclose(weights[0], [0.30, 0.25, 0.25, 0.15, 0.05])
+
+    def test_walk_forward_parallel_matches_serial(self):
+        calendar = np.unique(np.concatenate([a[0] for a in self.arrays.values()]))
+        windows = weight_sweep.walk_forward_windows("2019-01-02", "2023-12-29", 252, 126, calendar)
+        weights, thresholds = weight_sweep.build_configs(
+            weight_sweep.random_weights(200, seed=1), thresholds=(0.1, 0.2))
+
+        serial = weight_sweep.walk_forward(self.arrays, windows, weights, thresholds, cost_bps=5)
+        parallel = weight_sweep.walk_forward(self.arrays, windows, weights, thresholds,
+                                             cost_bps=5, workers=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(len(serial["folds"]), len(windows))
+        self.assertEqual(serial["summary"]["configs"], 402)
+        for fold in serial["folds"]:
+            self.assertLess(fold["train_end"], fold["test_start"])
+            self.assertAlmostEqual(sum(fold["weights"].values()), 1.0, places=3)
+
+    def test_signal_cache_skips_recomputation(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = FeatureStore(tmpdir)
+            first = weight_sweep.load_signals("600519", self.prices["600519"], "2019-01-02",
+                                              "2023-12-29", cache=cache)
+            with mock.patch.object(weight_sweep, "technical_strategy_signals") as compute:
+                second = weight_sweep.load_signals("600519", None, "2019-01-02", "2023-12-29", cache=cache)
+                compute.assert_not_called()
+        for a, b in zip(first, second):
+            np.testing.assert_allclose(a.astype(float), b.astype(float))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,412 @@
+"""
+技术策略权重的滚动前推 (walk-forward) 寻优
+
+technical_analyst_agent 用 STRATEGY_WEIGHTS 组合五个策略的信号。本模块在缓存的策略信号序列上
+评估大量权重组合，不重新运行智能体：
+    - 每个代码的策略信号和置信度由 fast_mode.technical_strategy_signals 一次性计算，
+      可缓存到 FeatureStore（默认 data/signals）
+    - 一批权重组合的综合得分是一次矩阵乘法：(信号 x 置信度) @ W / 置信度 @ W
+    - 策略按综合得分做多/空仓：得分超过阈值持有，低于负阈值清仓，其余时间维持原仓位，
+      次日收益计入，换仓按 cost_bps 扣费
+    - 每个训练/测试窗口的夏普比率由累计和一次得到
+    - 权重组合分块并行到多个进程
+
+每个窗口在训练区间选出夏普比率最高的组合，在随后的测试区间评估，
+报告样本外夏普、训练与测试排名的相关性和所选权重的离散度。
+
+用法:
+    python -m src.backtesting.weight_sweep --tickers 600519,000858 --start-date 2018-01-01 \\
+        --end-date 2024-12-31 --grid-step 0.1 --thresholds 0.1,0.2,0.3 --workers 8
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.agents.technicals import STRATEGY_WEIGHTS
+from src.backtesting.fast_mode import technical_strategy_signals
+from src.tools.api import EXTENDED_HISTORY_DAYS
+from src.tools.feature_store import FeatureStore
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('weight_sweep')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_SIGNAL_DIR = os.path.join(PROJECT_ROOT, "data", "signals")
+
+STRATEGIES = list(STRATEGY_WEIGHTS)
+DEFAULT_THRESHOLD = 0.2
+TRADING_DAYS_PER_YEAR = 252
+CHUNK_SIZE = 512
+
+
+# 单个代码的信号数组：日期、信号 x 置信度、置信度 (T x 5) 和日收益
+SignalArrays = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def signal_arrays(strategy_signals: pd.DataFrame, close: pd.Series) -> SignalArrays:
+    """把 technical_strategy_signals 的结果转换为评估用的数组"""
+    confidence = np.nan_to_num(np.column_stack(
+        [strategy_signals[f"{s}_confidence"].to_numpy(dtype=float) for s in STRATEGIES]))
+    signals = np.nan_to_num(np.column_stack(
+        [strategy_signals[f"{s}_signal"].to_numpy(dtype=float) for s in STRATEGIES]))
+    close = close.to_numpy(dtype=float)
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1
+    return (strategy_signals.index.to_numpy(dtype="datetime64[ns]"),
+            signals * confidence, confidence, np.nan_to_num(returns))
+
+
+def load_signals(ticker: str, prices_df: Optional[pd.DataFrame] = None, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None, cache: Optional[FeatureStore] = None) -> SignalArrays:
+    """计算（或从缓存读取）一个代码的策略信号数组
+
+    Args:
+        ticker: 代码
+        prices_df: 价格历史，缓存未命中时必须提供或能通过 get_price_history 获取
+        start_date: 信号开始日期（之前一段时间作为指标预热区间自动获取）
+        end_date: 信号结束日期
+        cache: 信号缓存，命中时不重新计算
+
+    Returns:
+        (日期, 信号 x 置信度, 置信度, 日收益)
+    """
+    columns = [f"{s}_{kind}" for s in STRATEGIES for kind in ("signal", "confidence")] + ["close"]
+    if cache is not None and start_date and end_date:
+        cached = cache.read_fresh(ticker, start_date, end_date)
+        if cached is not None and all(c in cached.columns for c in columns):
+            frame = cached.set_index("date")
+            return signal_arrays(frame, frame["close"])
+
+    if prices_df is None:
+        from src.tools.api import get_price_history
+        warmup_start = (pd.Timestamp(start_date) - timedelta(days=EXTENDED_HISTORY_DAYS)).strftime("%Y-%m-%d")
+        prices_df = get_price_history(ticker, warmup_start, end_date)
+        if prices_df is None or prices_df.empty:
+            raise ValueError(f"No price history for {ticker}")
+
+    frame = technical_strategy_signals(prices_df)
+    frame["close"] = prices_df.assign(date=pd.to_datetime(prices_df["date"])).set_index("date")["close"].astype(float)
+    if cache is not None:
+        cache.write(ticker, frame.rename_axis("date").reset_index())
+    if start_date or end_date:
+        frame = frame.loc[start_date:end_date]
+    return signal_arrays(frame, frame["close"])
+
+
+def grid_weights(step: float = 0.1, strategies: Sequence[str] = STRATEGIES) -> np.ndarray:
+    """所有和为 1、步长为 step 的非负权重组合
+
+    Returns:
+        (组合数, 策略数) 的数组
+    """
+    units = int(round(1 / step))
+    rows = [combo for combo in itertools.product(range(units + 1), repeat=len(strategies) - 1)
+            if sum(combo) <= units]
+    grid = np.array([list(combo) + [units - sum(combo)] for combo in rows], dtype=float)
+    return grid / units
+
+
+def random_weights(n: int, seed: Optional[int] = None, strategies: Sequence[str] = STRATEGIES) -> np.ndarray:
+    """在权重单纯形上均匀随机抽样 n 个组合"""
+    return np.random.default_rng(seed).dirichlet(np.ones(len(strategies)), size=n)
+
+
+def build_configs(weights: np.ndarray, thresholds: Sequence[float] = (DEFAULT_THRESHOLD,),
+                  include_default: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """权重与阈值的笛卡尔积，默认组合 (STRATEGY_WEIGHTS, 0.2) 放在第一个作为基准
+
+    Returns:
+        (权重矩阵 K x 5, 阈值数组 K)
+    """
+    if include_default:
+        default = np.array([[STRATEGY_WEIGHTS[s] for s in STRATEGIES]])
+        weights = np.vstack([default, weights])
+    thresholds = np.asarray(thresholds, dtype=float)
+    all_weights = np.repeat(weights, len(thresholds), axis=0)
+    all_thresholds = np.tile(thresholds, len(weights))
+    if include_default and DEFAULT_THRESHOLD in thresholds:
+        # 把默认阈值对应的默认权重移到第一行
+        first = int(np.flatnonzero(thresholds == DEFAULT_THRESHOLD)[0])
+        order = np.r_[first, np.delete(np.arange(len(all_weights)), first)]
+        all_weights, all_thresholds = all_weights[order], all_thresholds[order]
+    return all_weights, all_thresholds
+
+
+def combined_scores(weighted_signals: np.ndarray, confidence: np.ndarray,
+                    weights: np.ndarray) -> np.ndarray:
+    """一批权重组合的综合得分，规则与 combine_strategy_signals 相同
+
+    Returns:
+        (T, K) 的得分矩阵
+    """
+    numerator = weighted_signals @ weights.T
+    denominator = confidence @ weights.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, 0.0)
+
+
+def positions(scores: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """得分超过阈值持仓、低于负阈值空仓，其余时间维持前一日仓位"""
+    state = np.where(scores > thresholds, 1.0, np.where(scores < -thresholds, 0.0, np.nan))
+    state[0] = np.nan_to_num(state[0])
+    rows = np.where(np.isnan(state), 0, np.arange(len(state))[:, None])
+    rows = np.maximum.accumulate(rows, axis=0)
+    return np.take_along_axis(state, rows, axis=0)
+
+
+def strategy_returns(weighted_signals: np.ndarray, confidence: np.ndarray, returns: np.ndarray,
+                     weights: np.ndarray, thresholds: np.ndarray, cost_bps: float = 0.0) -> np.ndarray:
+    """一批组合的每日策略收益 (T, K)：前一日仓位 x 当日收益 - 换仓成本"""
+    held = positions(combined_scores(weighted_signals, confidence, weights), thresholds)
+    previous = np.vstack([np.zeros((1, held.shape[1])), held[:-1]])
+    return previous * returns[:, None] - np.abs(held - previous) * cost_bps / 10000
+
+
+def window_sharpe(daily: np.ndarray, bounds: Sequence[Tuple[int, int]],
+                  periods_per_year: int = TRADING_DAYS_PER_YEAR) -> np.ndarray:
+    """各窗口 [start, end) 的年化夏普比率
+
+    Returns:
+        (窗口数, K)，标准差为 0 的窗口为 0
+    """
+    sums = np.vstack([np.zeros((1, daily.shape[1])), np.cumsum(daily, axis=0)])
+    squares = np.vstack([np.zeros((1, daily.shape[1])), np.cumsum(daily ** 2, axis=0)])
+    result = np.zeros((len(bounds), daily.shape[1]))
+    for i, (start, end) in enumerate(bounds):
+        n = end - start
+        if n < 2:
+            continue
+        mean = (sums[end] - sums[start]) / n
+        variance = ((squares[end] - squares[start]) - n * mean ** 2) / (n - 1)
+        std = np.sqrt(np.maximum(variance, 0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result[i] = np.where(std > 1e-12, mean / std * np.sqrt(periods_per_year), 0.0)
+    return result
+
+
+def walk_forward_windows(start_date: str, end_date: str, train_days: int = 504,
+                         test_days: int = 126, calendar_dates: Optional[np.ndarray] = None
+                         ) -> List[Tuple[pd.Timestamp, pd.Timestamp, pd.Timestamp, pd.Timestamp]]:
+    """滚动的 (训练开始, 训练结束, 测试开始, 测试结束)，测试窗口首尾相接
+
+    Args:
+        train_days / test_days: 窗口长度（交易日数，按 calendar_dates 计；未提供时按工作日计）
+    """
+    if calendar_dates is None:
+        calendar_dates = pd.bdate_range(start_date, end_date).to_numpy()
+    dates = pd.DatetimeIndex(calendar_dates)
+    dates = dates[(dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))]
+    windows = []
+    start = 0
+    while start + train_days < len(dates):
+        test_end = min(start + train_days + test_days, len(dates))
+        windows.append((dates[start], dates[start + train_days - 1],
+                        dates[start + train_days], dates[test_end - 1]))
+        start += test_days
+    return windows
+
+
+def _bounds(dates: np.ndarray, first: pd.Timestamp, last: pd.Timestamp) -> Tuple[int, int]:
+    return (int(np.searchsorted(dates, np.datetime64(first, "ns"), side="left")),
+            int(np.searchsorted(dates, np.datetime64(last, "ns"), side="right")))
+
+
+# 工作进程中的数据，由 _init_worker 设置，避免每个任务重复序列化信号数组
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(arrays: Dict[str, SignalArrays], windows, cost_bps: float):
+    _WORKER_STATE.update(arrays=arrays, windows=windows, cost_bps=cost_bps)
+
+
+def _evaluate_chunk(weights: np.ndarray, thresholds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """一块组合在所有代码上的训练/测试夏普比率，按代码取平均
+
+    Returns:
+        (训练夏普 F x k, 测试夏普 F x k)
+    """
+    arrays, windows, cost_bps = (_WORKER_STATE["arrays"], _WORKER_STATE["windows"],
+                                 _WORKER_STATE["cost_bps"])
+    train = np.zeros((len(windows), len(weights)))
+    test = np.zeros((len(windows), len(weights)))
+    for dates, weighted, confidence, returns in arrays.values():
+        daily = strategy_returns(weighted, confidence, returns, weights, thresholds, cost_bps)
+        train += window_sharpe(daily, [_bounds(dates, w[0], w[1]) for w in windows])
+        test += window_sharpe(daily, [_bounds(dates, w[2], w[3]) for w in windows])
+    return train / len(arrays), test / len(arrays)
+
+
+def _rank(values: np.ndarray) -> np.ndarray:
+    return values.argsort().argsort().astype(float)
+
+
+def evaluate_configs(arrays: Dict[str, SignalArrays], windows, weights: np.ndarray,
+                     thresholds: np.ndarray, cost_bps: float = 0.0, workers: int = 1,
+                     chunk_size: int = CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """分块（可多进程）评估所有组合
+
+    Returns:
+        (训练夏普 F x K, 测试夏普 F x K)
+    """
+    chunks = [(weights[i:i + chunk_size], thresholds[i:i + chunk_size])
+              for i in range(0, len(weights), chunk_size)]
+    if workers <= 1:
+        _init_worker(arrays, windows, cost_bps)
+        results = [_evaluate_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(arrays, windows, cost_bps)) as executor:
+            results = list(executor.map(_evaluate_chunk, *zip(*chunks)))
+    return (np.hstack([train for train, _ in results]),
+            np.hstack([test for _, test in results]))
+
+
+def walk_forward(arrays: Dict[str, SignalArrays], windows, weights: np.ndarray,
+                 thresholds: np.ndarray, cost_bps: float = 0.0, workers: int = 1) -> Dict[str, Any]:
+    """运行滚动前推寻优并生成样本外稳定性报告
+
+    Args:
+        arrays: 代码到信号数组的映射
+        windows: walk_forward_windows 的结果
+        weights / thresholds: build_configs 的结果，第一行为基准组合
+
+    Returns:
+        包含每个窗口的选择结果和汇总统计的报告
+    """
+    train, test = evaluate_configs(arrays, windows, weights, thresholds, cost_bps, workers)
+    folds = []
+    for i, (train_start, train_end, test_start, test_end) in enumerate(windows):
+        best = int(np.argmax(train[i]))
+        folds.append({
+            "train_start": f"{train_start:%Y-%m-%d}",
+            "train_end": f"{train_end:%Y-%m-%d}",
+            "test_start": f"{test_start:%Y-%m-%d}",
+            "test_end": f"{test_end:%Y-%m-%d}",
+            "weights": dict(zip(STRATEGIES, np.round(weights[best], 4).tolist())),
+            "threshold": float(thresholds[best]),
+            "train_sharpe": float(train[i, best]),
+            "test_sharpe": float(test[i, best]),
+            "baseline_test_sharpe": float(test[i, 0]),
+            # 训练与测试夏普比率排名的相关性，越高说明样本内排序在样本外越稳定
+            "rank_correlation": float(np.corrcoef(_rank(train[i]), _rank(test[i]))[0, 1])
+            if len(weights) > 2 else 0.0,
+        })
+
+    chosen = np.array([[fold["weights"][s] for s in STRATEGIES] for fold in folds])
+    oos = np.array([fold["test_sharpe"] for fold in folds])
+    baseline = np.array([fold["baseline_test_sharpe"] for fold in folds])
+    summary = {
+        "configs": int(len(weights)),
+        "folds": len(folds),
+        "mean_test_sharpe": float(oos.mean()) if len(oos) else 0.0,
+        "mean_baseline_test_sharpe": float(baseline.mean()) if len(baseline) else 0.0,
+        "positive_test_fraction": float((oos > 0).mean()) if len(oos) else 0.0,
+        "beats_baseline_fraction": float((oos > baseline).mean()) if len(oos) else 0.0,
+        "mean_rank_correlation": float(np.nanmean([f["rank_correlation"] for f in folds])) if folds else 0.0,
+        "weight_dispersion": dict(zip(STRATEGIES, chosen.std(axis=0).round(4).tolist()))
+        if len(chosen) else {},
+        # 各窗口所选权重的平均值，作为稳健的候选权重
+        "consensus_weights": dict(zip(STRATEGIES, chosen.mean(axis=0).round(4).tolist()))
+        if len(chosen) else {},
+    }
+    return {"summary": summary, "folds": folds}
+
+
+def run_sweep(tickers: Sequence[str], start_date: str, end_date: str, weights: np.ndarray,
+              thresholds: Sequence[float] = (DEFAULT_THRESHOLD,), train_days: int = 504,
+              test_days: int = 126, cost_bps: float = 0.0, workers: int = 1,
+              cache: Optional[FeatureStore] = None) -> Dict[str, Any]:
+    """加载信号并运行滚动前推寻优
+
+    Args:
+        tickers: 代码列表，组合得分为各代码夏普比率的平均值
+        start_date / end_date: 寻优区间
+        weights: grid_weights 或 random_weights 的结果
+        thresholds: 信号阈值候选
+        train_days / test_days: 训练和测试窗口的交易日数
+        cost_bps: 单边换仓成本（基点）
+        workers: 进程数
+        cache: 信号缓存
+
+    Returns:
+        walk_forward 的报告
+    """
+    arrays = {}
+    for ticker in tickers:
+        try:
+            arrays[ticker] = load_signals(ticker, start_date=start_date, end_date=end_date, cache=cache)
+        except Exception as e:
+            logger.error(f"Failed to load signals for {ticker}: {e}")
+    if not arrays:
+        raise ValueError("No signals loaded for any ticker")
+
+    calendar = np.unique(np.concatenate([dates for dates, *_ in arrays.values()]))
+    windows = walk_forward_windows(start_date, end_date, train_days, test_days, calendar)
+    if not windows:
+        raise ValueError(f"Period {start_date}..{end_date} is shorter than one train/test window")
+
+    all_weights, all_thresholds = build_configs(weights, thresholds)
+    logger.info(f"Evaluating {len(all_weights)} configs on {len(arrays)} tickers, {len(windows)} folds")
+    report = walk_forward(arrays, windows, all_weights, all_thresholds, cost_bps, workers)
+    report["summary"]["tickers"] = list(arrays)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='技术策略权重的滚动前推寻优')
+    parser.add_argument('--tickers', type=str, required=True,
+                        help='逗号分隔的代码列表')
+    parser.add_argument('--start-date', type=str, required=True,
+                        help='开始日期 (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=str, default=datetime.now().strftime('%Y-%m-%d'),
+                        help='结束日期 (YYYY-MM-DD)')
+    parser.add_argument('--grid-step', type=float, default=0.1,
+                        help='网格搜索的权重步长 (默认: 0.1)')
+    parser.add_argument('--random', type=int, default=0,
+                        help='随机搜索的组合数，大于 0 时代替网格搜索')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='随机搜索的随机种子')
+    parser.add_argument('--thresholds', type=str, default=str(DEFAULT_THRESHOLD),
+                        help='逗号分隔的信号阈值候选 (默认: 0.2)')
+    parser.add_argument('--train-days', type=int, default=504,
+                        help='训练窗口的交易日数 (默认: 504)')
+    parser.add_argument('--test-days', type=int, default=126,
+                        help='测试窗口的交易日数 (默认: 126)')
+    parser.add_argument('--cost-bps', type=float, default=0.0,
+                        help='单边换仓成本，基点 (默认: 0)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='并行进程数 (默认: CPU 核数)')
+    parser.add_argument('--signal-cache', type=str, default=DEFAULT_SIGNAL_DIR,
+                        help='策略信号缓存目录，传空字符串不缓存 (默认: data/signals)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='报告 JSON 输出路径')
+    args = parser.parse_args()
+
+    weights = (random_weights(args.random, args.seed) if args.random > 0
+               else grid_weights(args.grid_step))
+    report = run_sweep(
+        [t.strip() for t in args.tickers.split(",") if t.strip()],
+        args.start_date, args.end_date, weights,
+        thresholds=[float(t) for t in args.thresholds.split(",")],
+        train_days=args.train_days, test_days=args.test_days, cost_bps=args.cost_bps,
+        workers=args.workers, cache=FeatureStore(args.signal_cache) if args.signal_cache else None,
+    )
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,221 @@
+"""
+收盘后用全市场快照追加A股日线
+
+一次 stock_zh_a_spot_em 请求即包含所有A股当日的开高低收、成交量、成交额和换手率，
+本任务把它转换为当日K线追加到共享K线存储 (SharedBarStore)。
+只有存储中缺少前几个交易日数据的代码才逐个调用历史日线接口补齐。
+
+存储中保存的是不复权价格（快照本身不复权），补缺口时同样请求不复权数据。
+
+用法:
+    python -m src.eod_bars_job                         # 收盘后运行
+    python -m src.eod_bars_job --backfill-days 365     # 新代码补一年历史
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time
+from typing import Callable, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.bar_store import BAR_COLUMNS, BarStoreWriter
+from src.tools.trading_calendar import get_calendar
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('eod_bars_job')
+
+MARKET_TZ = ZoneInfo("Asia/Shanghai")
+MARKET_OPEN = time(9, 15)
+MARKET_CLOSE = time(15, 5)
+
+# 东财实时行情表的列名映射（成交量单位为手，与 stock_zh_a_hist 一致）
+SPOT_COLUMNS = {
+    "代码": "symbol",
+    "今开": "open",
+    "最高": "high",
+    "最低": "low",
+    "最新价": "close",
+    "成交量": "volume",
+    "成交额": "amount",
+    "振幅": "amplitude",
+    "涨跌幅": "pct_change",
+    "涨跌额": "change_amount",
+    "换手率": "turnover",
+}
+
+EOD_BAR_COLUMNS = {
+    **BAR_COLUMNS,
+    "amplitude": "float64",
+    "pct_change": "float64",
+    "change_amount": "float64",
+    "turnover": "float64",
+}
+
+
+def snapshot_to_bars(snapshot: pd.DataFrame, trade_date) -> pd.DataFrame:
+    """把全市场行情快照转换为当日K线，剔除停牌（无成交）的代码
+
+    Args:
+        snapshot: stock_zh_a_spot_em 返回的表
+        trade_date: 快照对应的交易日
+
+    Returns:
+        每个代码一行，列为 symbol, date 及 SPOT_COLUMNS 中的字段
+    """
+    bars = snapshot[list(SPOT_COLUMNS)].rename(columns=SPOT_COLUMNS)
+    for column in bars.columns:
+        if column != "symbol":
+            bars[column] = pd.to_numeric(bars[column], errors="coerce")
+    bars["symbol"] = bars["symbol"].astype(str).str.zfill(6)
+    traded = (bars["volume"] > 0) & (bars["open"] > 0) & bars["close"].notna()
+    bars = bars[traded].copy()
+    bars.insert(1, "date", pd.Timestamp(trade_date))
+    return bars.reset_index(drop=True)
+
+
+def resolve_trade_date(now: Optional[datetime] = None, force: bool = False) -> pd.Timestamp:
+    """确定快照对应的交易日
+
+    交易日开盘前运行时快照仍是上一交易日的数据；盘中运行会得到未收盘的数据，需要 force。
+    """
+    calendar = get_calendar("SSE")
+    now = now or datetime.now(MARKET_TZ)
+    today = pd.Timestamp(now.date())
+    if not calendar.is_trading_day(today):
+        return calendar.last_trading_day(today)
+    if now.time() < MARKET_OPEN:
+        return calendar.previous_trading_day(today)
+    if now.time() < MARKET_CLOSE and not force:
+        raise RuntimeError(f"Market is still open ({now:%H:%M}), rerun after "
+                           f"{MARKET_CLOSE:%H:%M} or pass --force")
+    return today
+
+
+def find_gaps(writer: BarStoreWriter, symbols, trade_date: pd.Timestamp,
+              backfill_days: int = 0) -> Dict[str, Tuple[pd.Timestamp, pd.Timestamp]]:
+    """找出存储中缺少 trade_date 之前交易日数据的代码
+
+    Args:
+        writer: 持有锁的写入者
+        symbols: 当日有成交的代码
+        trade_date: 快照交易日
+        backfill_days: 存储中没有的代码向前补齐的天数，0 表示不补
+
+    Returns:
+        代码到需要补齐的 (开始日期, 结束日期) 的映射
+    """
+    calendar = get_calendar("SSE")
+    previous_day = calendar.previous_trading_day(trade_date)
+    gaps = {}
+    for symbol in symbols:
+        last = writer.last_date(symbol)
+        if last is None:
+            if backfill_days > 0:
+                gaps[symbol] = (trade_date - pd.Timedelta(days=backfill_days), previous_day)
+        elif last < previous_day:
+            gaps[symbol] = (calendar.next_trading_day(last), previous_day)
+    return gaps
+
+
+def _fetch_history(symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    from src.tools.api import A_SHARE_PRICE_HISTORY
+    return A_SHARE_PRICE_HISTORY.call(symbol, start.to_pydatetime(), end.to_pydatetime(), "")
+
+
+def repair_gaps(gaps: Dict[str, Tuple[pd.Timestamp, pd.Timestamp]], workers: int = 4,
+                fetch: Callable[[str, pd.Timestamp, pd.Timestamp], pd.DataFrame] = _fetch_history
+                ) -> Dict[str, pd.DataFrame]:
+    """并行请求历史日线补齐缺口
+
+    Returns:
+        代码到历史K线的映射，请求失败的代码不包含在内（下次运行会再次尝试）
+    """
+    def run(item):
+        symbol, (start, end) = item
+        try:
+            df = fetch(symbol, start, end)
+        except Exception as e:
+            logger.error(f"Failed to repair {symbol} {start:%Y-%m-%d}..{end:%Y-%m-%d}: {e}")
+            return symbol, None
+        if df is None or df.empty:
+            return symbol, None
+        df = df.copy()
+        df["date"] = pd.to_datetime(df["date"])
+        return symbol, df[(df["date"] >= start) & (df["date"] <= end)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(run, gaps.items())
+        return {symbol: df for symbol, df in results if df is not None and not df.empty}
+
+
+def run_eod_job(root: Optional[str] = None, trade_date=None, snapshot: Optional[pd.DataFrame] = None,
+                backfill_days: int = 0, workers: int = 4, force: bool = False,
+                fetch: Callable[[str, pd.Timestamp, pd.Timestamp], pd.DataFrame] = _fetch_history) -> Dict:
+    """抓取全市场快照并追加当日K线
+
+    Args:
+        root: 共享K线存储目录
+        trade_date: 快照交易日，默认按当前时间推断
+        snapshot: 已获取的快照，默认调用 stock_zh_a_spot_em
+        backfill_days: 新代码向前补齐的天数
+        workers: 补缺口的并发请求数
+        force: 盘中也允许运行
+        fetch: 历史日线获取函数
+
+    Returns:
+        运行摘要
+    """
+    trade_date = pd.Timestamp(trade_date) if trade_date is not None else resolve_trade_date(force=force)
+    if snapshot is None:
+        import akshare as ak
+        snapshot = ak.stock_zh_a_spot_em()
+    bars = snapshot_to_bars(snapshot, trade_date)
+    logger.info(f"Snapshot for {trade_date:%Y-%m-%d}: {len(bars)} traded symbols")
+
+    with BarStoreWriter(root, columns=EOD_BAR_COLUMNS) as writer:
+        gaps = find_gaps(writer, bars["symbol"], trade_date, backfill_days)
+        if gaps:
+            logger.info(f"Repairing gaps for {len(gaps)} symbols")
+        repaired = repair_gaps(gaps, workers, fetch)
+        # 历史先于当日快照写入，保证每个代码的日期有序
+        writer.append_many(repaired)
+
+        frames = {symbol: group.drop(columns="symbol")
+                  for symbol, group in bars.groupby("symbol", sort=False)}
+        written = writer.append_many(frames)
+
+    summary = {
+        "trade_date": trade_date.strftime("%Y-%m-%d"),
+        "symbols": len(frames),
+        "appended": sum(1 for n in written.values() if n),
+        "gaps": len(gaps),
+        "repaired": len(repaired),
+    }
+    logger.info(f"EOD bars: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='收盘后用全市场快照追加A股日线')
+    parser.add_argument('--root', type=str, default=None,
+                        help='共享K线存储目录 (默认: BAR_STORE_DIR 或 data/bars)')
+    parser.add_argument('--trade-date', type=str, default=None,
+                        help='快照对应的交易日，默认按当前时间推断')
+    parser.add_argument('--backfill-days', type=int, default=0,
+                        help='存储中没有的代码向前补齐的天数 (默认: 0，不补)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='补缺口的并发请求数 (默认: 4)')
+    parser.add_argument('--force', action='store_true',
+                        help='盘中也允许运行')
+    args = parser.parse_args()
+
+    print(run_eod_job(args.root, args.trade_date, backfill_days=args.backfill_days,
+                      workers=args.workers, force=args.force))
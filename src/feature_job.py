@@ -0,0 +1,129 @@
+"""
+收盘后批量生成特征
+
+为股票池中的每个代码拉取日线、计算 enrich_price_history 衍生指标和技术分析指标，
+写入 FeatureStore。各代码在独立进程中并行计算。
+
+用法:
+    python -m src.feature_job --symbols 600519 000001 AAPL
+    python -m src.feature_job --universe-file universe.txt --workers 8
+
+股票池也可通过环境变量 FEATURE_UNIVERSE（逗号分隔）配置。
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.api import get_price_history
+from src.tools.feature_store import FeatureStore
+from src.tools.trading_calendar import get_calendar_for_symbol
+from src.agents.technicals import compute_technical_features
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('feature_job')
+
+DEFAULT_LOOKBACK_DAYS = 3 * 365
+
+
+def build_symbol_features(symbol: str, root: Optional[str] = None,
+                          lookback_days: int = DEFAULT_LOOKBACK_DAYS) -> Tuple[str, int, Optional[str]]:
+    """拉取并计算单个代码的特征，写入特征存储
+
+    Args:
+        symbol: 代码
+        root: 特征存储根目录
+        lookback_days: 回看天数
+
+    Returns:
+        (代码, 行数, 错误信息)
+    """
+    try:
+        end_date = get_calendar_for_symbol(symbol).last_trading_day()
+        start_date = end_date - timedelta(days=lookback_days)
+        df = get_price_history(symbol, start_date.strftime('%Y-%m-%d'),
+                               end_date.strftime('%Y-%m-%d'))
+        if df is None or df.empty:
+            return symbol, 0, "no price data"
+
+        features = compute_technical_features(df)
+        df = df.join(features)
+        meta = FeatureStore(root).write(symbol, df)
+        return symbol, meta["n_rows"], None
+    except Exception as e:
+        return symbol, 0, str(e)
+
+
+def run_feature_job(symbols: List[str], root: Optional[str] = None, workers: Optional[int] = None,
+                    lookback_days: int = DEFAULT_LOOKBACK_DAYS) -> List[Tuple[str, int, Optional[str]]]:
+    """并行刷新股票池的特征
+
+    Args:
+        symbols: 代码列表
+        root: 特征存储根目录
+        workers: 进程数，默认为 CPU 核数
+        lookback_days: 回看天数
+
+    Returns:
+        每个代码的 (代码, 行数, 错误信息)
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(build_symbol_features, symbol, root, lookback_days)
+                   for symbol in symbols]
+        for future in as_completed(futures):
+            symbol, n_rows, error = future.result()
+            if error:
+                logger.error(f"Failed to build features for {symbol}: {error}")
+            else:
+                logger.info(f"Built {n_rows} feature rows for {symbol}")
+            results.append((symbol, n_rows, error))
+    return results
+
+
+def load_universe(symbols: Optional[List[str]], universe_file: Optional[str]) -> List[str]:
+    """合并命令行、文件和环境变量中的股票池，去重并保持顺序"""
+    universe = list(symbols or [])
+    if universe_file:
+        with open(universe_file, 'r', encoding='utf-8') as f:
+            universe.extend(line.split('#')[0].strip() for line in f)
+    if not universe:
+        universe = os.getenv("FEATURE_UNIVERSE", "").split(",")
+    return list(dict.fromkeys(s.strip() for s in universe if s.strip()))
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='收盘后批量生成特征')
+    parser.add_argument('--symbols', type=str, nargs='*',
+                        help='代码列表')
+    parser.add_argument('--universe-file', type=str, default=None,
+                        help='股票池文件，每行一个代码，# 之后为注释')
+    parser.add_argument('--root', type=str, default=None,
+                        help='特征存储目录 (默认: FEATURE_STORE_DIR 或 data/features)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='并行进程数 (默认: CPU 核数)')
+    parser.add_argument('--lookback-days', type=int, default=DEFAULT_LOOKBACK_DAYS,
+                        help=f'回看天数 (默认: {DEFAULT_LOOKBACK_DAYS})')
+    args = parser.parse_args()
+
+    universe = load_universe(args.symbols, args.universe_file)
+    if not universe:
+        parser.error("股票池为空，请通过 --symbols、--universe-file 或 FEATURE_UNIVERSE 指定")
+
+    results = run_feature_job(universe, args.root, args.workers, args.lookback_days)
+    failed = [symbol for symbol, _, error in results if error]
+    print(f"Built features for {len(results) - len(failed)}/{len(results)} symbols")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
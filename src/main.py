@@ -1,5 +1,6 @@
 import sys
 import argparse
+import asyncio
 import uuid  # Import uuid for run IDs
 import threading  # Import threading for background task
 import uvicorn  # Import uvicorn to run FastAPI
@@ -35,6 +36,9 @@ from src.utils.llm_interaction_logger import (
 from backend.dependencies import get_log_storage
 from backend.main import app as fastapi_app
 from src.utils.logging_config import setup_logger
+from src.utils.async_nodes import async_node, sync_node
+from src.utils.node_cache import NodeCache, cached_node
+from src.tools.trading_calendar import get_calendar_for_symbol
 
 # --- Import Summary Report Generator ---
 try:
@@ -67,7 +71,9 @@ MESSAGES_LOG_FILE_MAIN = os.path.join(PROJECT_ROOT_FOR_LOG, "data", "temp_messag
 # --- Run the Hedge Fund Workflow ---
 
 
-def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, portfolio: dict, show_reasoning: bool = False, num_of_news: int = 5, show_summary: bool = False):
+def _prepare_run(run_id: str, ticker: str, start_date: str, end_date: str, portfolio: dict,
+                 show_reasoning: bool, num_of_news: int, show_summary: bool) -> dict:
+    """清空临时消息日志、登记运行 ID，返回工作流的初始状态"""
     print(f"--- Starting Workflow Run ID: {run_id} ---")
 
     # 清空临时消息日志文件
@@ -91,7 +97,7 @@ def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, por
     except Exception as e:
         print(f"Note: Could not update API state: {str(e)}")
 
-    initial_state = {
+    return {
         "messages": [],  # 初始消息为空
         "data": {
             "ticker": ticker,
@@ -107,31 +113,57 @@ def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, por
         }
     }
 
+
+def _finish_run(run_id: str, final_state: dict, show_reasoning: bool, show_summary: bool):
+    print(f"--- Finished Workflow Run ID: {run_id} ---")
+
+    if HAS_SUMMARY_REPORT and show_summary:
+        store_final_state(final_state)
+        enhanced_state = get_enhanced_final_state()
+        print_summary_report(enhanced_state)
+
+    if HAS_STRUCTURED_OUTPUT and show_reasoning:
+        print_structured_output(final_state)
+
+
+def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, portfolio: dict, show_reasoning: bool = False, num_of_news: int = 5, show_summary: bool = False):
+    initial_state = _prepare_run(run_id, ticker, start_date, end_date, portfolio,
+                                 show_reasoning, num_of_news, show_summary)
     try:
         from backend.utils.context_managers import workflow_run
         with workflow_run(run_id):
             final_state = app.invoke(initial_state)
-            print(f"--- Finished Workflow Run ID: {run_id} ---")
-
-            if HAS_SUMMARY_REPORT and show_summary:
-                store_final_state(final_state)
-                enhanced_state = get_enhanced_final_state()
-                print_summary_report(enhanced_state)
-
-            if HAS_STRUCTURED_OUTPUT and show_reasoning:
-                print_structured_output(final_state)
+            _finish_run(run_id, final_state, show_reasoning, show_summary)
     except ImportError:
         final_state = app.invoke(initial_state)
-        print(f"--- Finished Workflow Run ID: {run_id} ---")
+        _finish_run(run_id, final_state, show_reasoning, show_summary)
+        try:
+            from backend.state import api_state
+            api_state.complete_run(run_id, "completed")
+        except Exception:
+            pass
+    return final_state["messages"][-1].content
 
-        if HAS_SUMMARY_REPORT and show_summary:
-            store_final_state(final_state)
-            enhanced_state = get_enhanced_final_state()
-            print_summary_report(enhanced_state)
 
-        if HAS_STRUCTURED_OUTPUT and show_reasoning:
-            print_structured_output(final_state)
+async def run_hedge_fund_async(run_id: str, ticker: str, start_date: str, end_date: str, portfolio: dict,
+                               show_reasoning: bool = False, num_of_news: int = 5, show_summary: bool = False):
+    """run_hedge_fund 的异步版本：用 ainvoke 运行由异步节点组成的图
+
+    分析师分支并发执行，扇出阶段的耗时为最慢的分支；同一个事件循环中可以用
+    asyncio.gather 同时推进多个运行。
+    """
+    initial_state = _prepare_run(run_id, ticker, start_date, end_date, portfolio,
+                                 show_reasoning, num_of_news, show_summary)
+    try:
+        from backend.utils.context_managers import workflow_run
+        with workflow_run(run_id):
+            final_state = await async_app.ainvoke(initial_state)
+            _finish_run(run_id, final_state, show_reasoning, show_summary)
+    except ImportError:
+        final_state = await async_app.ainvoke(initial_state)
+        _finish_run(run_id, final_state, show_reasoning, show_summary)
         try:
+            from backend.state import api_state
             api_state.complete_run(run_id, "completed")
         except Exception:
             pass
@@ -139,57 +171,75 @@ def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, por
 
 
 # --- Define the Workflow Graph ---
-workflow = StateGraph(AgentState)
-
-# Add nodes
-workflow.add_node("market_data_agent", market_data_agent)
-workflow.add_node("technical_analyst_agent", technical_analyst_agent)
-workflow.add_node("fundamentals_agent", fundamentals_agent)
-workflow.add_node("sentiment_agent", sentiment_agent)
-workflow.add_node("macro_news_agent", macro_news_agent)  # 新闻 agent
-workflow.add_node("researcher_bull_agent", researcher_bull_agent)
-workflow.add_node("researcher_bear_agent", researcher_bear_agent)
-workflow.add_node("debate_room_agent", debate_room_agent)
-workflow.add_node("risk_management_agent", risk_management_agent)
-workflow.add_node("macro_analyst_agent", macro_analyst_agent)
-workflow.add_node("portfolio_management_agent", portfolio_management_agent)
-
-# Set entry point
-workflow.set_entry_point("market_data_agent")
-
-# Edges from market_data_agent to the five parallel agents
-workflow.add_edge("market_data_agent", "technical_analyst_agent")
-workflow.add_edge("market_data_agent", "fundamentals_agent")
-workflow.add_edge("market_data_agent", "sentiment_agent")
-workflow.add_edge("market_data_agent", "macro_news_agent")
-
-# Main analysis path (technical, fundamentals, sentiment, macro_news -> researchers -> ... -> macro_analyst)
-workflow.add_edge("technical_analyst_agent", "researcher_bull_agent")
-workflow.add_edge("fundamentals_agent", "researcher_bull_agent")
-workflow.add_edge("sentiment_agent", "researcher_bull_agent")
-workflow.add_edge("macro_news_agent", "researcher_bull_agent") # Added
-
-workflow.add_edge("technical_analyst_agent", "researcher_bear_agent")
-workflow.add_edge("fundamentals_agent", "researcher_bear_agent")
-workflow.add_edge("sentiment_agent", "researcher_bear_agent")
-workflow.add_edge("macro_news_agent", "researcher_bear_agent") # Added
-
-workflow.add_edge("researcher_bull_agent", "debate_room_agent")
-workflow.add_edge("researcher_bear_agent", "debate_room_agent")
-
-workflow.add_edge("debate_room_agent", "risk_management_agent")
-workflow.add_edge("risk_management_agent", "macro_analyst_agent")
-
-# Edges to portfolio_management_agent (汇聚点)
-# macro_analyst_agent (end of main analysis path) and macro_news_agent (parallel news path)
-# both feed into portfolio_management_agent.
-# LangGraph will wait for both parent nodes to complete before running portfolio_management_agent.
-workflow.add_edge("macro_analyst_agent", "portfolio_management_agent")
-
-# Final node
-workflow.add_edge("portfolio_management_agent", END)
-
-app = workflow.compile()
+# 节点结果缓存，NODE_CACHE=1 时启用
+node_cache = NodeCache.from_env()
+
+
+def build_workflow(wrap=sync_node, cache=None) -> StateGraph:
+    """构建工作流图
+
+    Args:
+        wrap: 节点适配函数，sync_node 用于 invoke，async_node 用于 ainvoke
+        cache: 节点结果缓存，None 表示每次都执行节点
+    """
+    workflow = StateGraph(AgentState)
+
+    def add_node(name, node):
+        workflow.add_node(name, wrap(cached_node(name, node, cache)))
+
+    # Add nodes
+    add_node("market_data_agent", market_data_agent)
+    add_node("technical_analyst_agent", technical_analyst_agent)
+    add_node("fundamentals_agent", fundamentals_agent)
+    add_node("sentiment_agent", sentiment_agent)
+    add_node("macro_news_agent", macro_news_agent)  # 新闻 agent
+    add_node("researcher_bull_agent", researcher_bull_agent)
+    add_node("researcher_bear_agent", researcher_bear_agent)
+    add_node("debate_room_agent", debate_room_agent)
+    add_node("risk_management_agent", risk_management_agent)
+    add_node("macro_analyst_agent", macro_analyst_agent)
+    add_node("portfolio_management_agent", portfolio_management_agent)
+
+    # Set entry point
+    workflow.set_entry_point("market_data_agent")
+
+    # Edges from market_data_agent to the five parallel agents
+    workflow.add_edge("market_data_agent", "technical_analyst_agent")
+    workflow.add_edge("market_data_agent", "fundamentals_agent")
+    workflow.add_edge("market_data_agent", "sentiment_agent")
+    workflow.add_edge("market_data_agent", "macro_news_agent")
+
+    # Main analysis path (technical, fundamentals, sentiment, macro_news -> researchers -> ... -> macro_analyst)
+    workflow.add_edge("technical_analyst_agent", "researcher_bull_agent")
+    workflow.add_edge("fundamentals_agent", "researcher_bull_agent")
+    workflow.add_edge("sentiment_agent", "researcher_bull_agent")
+    workflow.add_edge("macro_news_agent", "researcher_bull_agent") # Added
+
+    workflow.add_edge("technical_analyst_agent", "researcher_bear_agent")
+    workflow.add_edge("fundamentals_agent", "researcher_bear_agent")
+    workflow.add_edge("sentiment_agent", "researcher_bear_agent")
+    workflow.add_edge("macro_news_agent", "researcher_bear_agent") # Added
+
+    workflow.add_edge("researcher_bull_agent", "debate_room_agent")
+    workflow.add_edge("researcher_bear_agent", "debate_room_agent")
+
+    workflow.add_edge("debate_room_agent", "risk_management_agent")
+    workflow.add_edge("risk_management_agent", "macro_analyst_agent")
+
+    # Edges to portfolio_management_agent (汇聚点)
+    # macro_analyst_agent (end of main analysis path) and macro_news_agent (parallel news path)
+    # both feed into portfolio_management_agent.
+    # LangGraph will wait for both parent nodes to complete before running portfolio_management_agent.
+    workflow.add_edge("macro_analyst_agent", "portfolio_management_agent")
+
+    # Final node
+    workflow.add_edge("portfolio_management_agent", END)
+
+    return workflow
+
+
+app = build_workflow(cache=node_cache).compile()
+async_app = build_workflow(async_node, cache=node_cache).compile()
 
 # --- FastAPI Background Task ---
 
@@ -221,13 +271,18 @@ if __name__ == "__main__":
                         default=0, help='Initial stock position (default: 0)')
     parser.add_argument('--summary', action='store_true',
                         help='Show beautiful summary report at the end')
+    parser.add_argument('--async-nodes', action='store_true',
+                        help='Run the agent graph with async nodes via ainvoke')
     args = parser.parse_args()
+    calendar = get_calendar_for_symbol(args.ticker)
     current_date = datetime.now()
     yesterday = current_date - timedelta(days=1)
     end_date = yesterday if not args.end_date else min(
         datetime.strptime(args.end_date, '%Y-%m-%d'), yesterday)
+    # 结束日期对齐到最近一个交易日，默认回看一年的交易日
+    end_date = calendar.last_trading_day(end_date)
     if not args.start_date:
-        start_date = end_date - timedelta(days=365)
+        start_date = calendar.offset(end_date, -calendar.days_per_year)
     else:
         start_date = datetime.strptime(args.start_date, '%Y-%m-%d')
     if start_date > end_date:
@@ -238,7 +293,7 @@ if __name__ == "__main__":
         raise ValueError("Number of news articles cannot exceed 100")
     portfolio = {"cash": args.initial_capital, "stock": args.initial_position}
     main_run_id = str(uuid.uuid4())
-    result = run_hedge_fund(
+    run_kwargs = dict(
         run_id=main_run_id,
         ticker=args.ticker,
         start_date=start_date.strftime('%Y-%m-%d'),
@@ -248,5 +303,9 @@ if __name__ == "__main__":
         num_of_news=args.num_of_news,
         show_summary=args.summary
     )
+    if args.async_nodes:
+        result = asyncio.run(run_hedge_fund_async(**run_kwargs))
+    else:
+        result = run_hedge_fund(**run_kwargs)
     print("\nFinal Result:")
     print(result)
@@ -1,12 +1,16 @@
 import logging
 import os
 
-import requests
+from ..utils.http_cache import cached_session
 
 logger = logging.getLogger(__name__)
 
 
 class JinaClient:
+    def __init__(self):
+        # 同一 URL 的读取结果缓存一天，见 http_cache.DEFAULT_TTL_RULES
+        self.session = cached_session()
+
     def crawl(self, url: str, return_format: str = "html") -> str:
         headers = {
             "Content-Type": "application/json",
@@ -19,5 +23,5 @@ class JinaClient:
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
             )
         data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
+        response = self.session.post("https://r.jina.ai/", headers=headers, json=data)
         return response.text
@@ -6,6 +6,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from ..utils.logging_config import setup_logger
+from ..utils.http_cache import mount_cache
 import json
 
 logger = setup_logger('algogene_client')
@@ -36,6 +37,8 @@ class AlgogeneClient:
             
         self.base_url = "https://algogene.com/rest/v1"
         self.session = requests.Session()
+        # 历史/元数据接口的响应缓存，实时接口不缓存（见 http_cache.DEFAULT_TTL_RULES）
+        mount_cache(self.session)
         self.session.headers.update({
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
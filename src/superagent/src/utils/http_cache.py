@@ -0,0 +1,34 @@
+"""
+HTTP 响应缓存 - 与主项目共用 src/utils/http_cache.py 的实现
+
+superagent 的顶层包同样名为 src，无法直接 import 主项目的 src.utils，这里按文件路径加载主项目的模块，
+并导出相同的接口。缓存文件同为主项目的 data/http_cache.sqlite，两个项目共享已缓存的响应。
+"""
+
+import importlib.util
+import os
+import sys
+
+# trading_agent 项目根目录（src/superagent/src/utils 向上四级）
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+_MODULE_NAME = "trading_agent_http_cache"
+
+_module = sys.modules.get(_MODULE_NAME)
+if _module is None:
+    _spec = importlib.util.spec_from_file_location(
+        _MODULE_NAME, os.path.join(_REPO_ROOT, "src", "utils", "http_cache.py"))
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[_MODULE_NAME] = _module
+    _spec.loader.exec_module(_module)
+
+CachingAdapter = _module.CachingAdapter
+HTTPCache = _module.HTTPCache
+DEFAULT_TTL_RULES = _module.DEFAULT_TTL_RULES
+DEFAULT_VALIDATORS = _module.DEFAULT_VALIDATORS
+algogene_payload_ok = _module.algogene_payload_ok
+cache_enabled = _module.cache_enabled
+cached_session = _module.cached_session
+get_http_cache = _module.get_http_cache
+mount_cache = _module.mount_cache
+request_fingerprint = _module.request_fingerprint
@@ -1,6 +1,8 @@
 # 主流虚拟币 symbol 映射表（支持20种）
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
 import pandas as pd
 import akshare as ak
 from datetime import datetime, timedelta
@@ -13,6 +15,8 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from src.tools.algogene_client import AlgogeneClient
 import yfinance as yf
+import os
+from src.tools.providers import Provider, ProviderError, ProviderGroup
 
 # 设置日志记录
 from src.tools.crypto_symbols import CRYPTO_SYMBOLS
@@ -338,6 +342,96 @@ def get_financial_statements(symbol: str) -> Dict[str, Any]:
         return [default_item, default_item]
 
 
+def _a_share_exchange(symbol: str) -> str:
+    """A股代码对应的交易所前缀：sh/sz/bj"""
+    if symbol.startswith(("6", "9")):
+        return "sh"
+    if symbol.startswith(("4", "8")):
+        return "bj"
+    return "sz"
+
+
+def _items_to_dict(stock_info: pd.DataFrame) -> Dict[str, Any]:
+    """把 item/value 两列的行情表转为字典"""
+    stock_data = {}
+    if stock_info is not None and not stock_info.empty:
+        for _, row in stock_info.iterrows():
+            item = str(row['item']) if 'item' in row else str(row.iloc[0])
+            value = row['value'] if 'value' in row else row.iloc[1]
+            stock_data[item] = value
+    return stock_data
+
+
+def _fetch_market_data_xq(symbol: str) -> Dict[str, Any]:
+    """雪球个股实时行情"""
+    return _items_to_dict(ak.stock_individual_spot_xq(
+        symbol=_a_share_exchange(symbol).upper() + symbol))
+
+
+def _fetch_market_data_em(symbol: str) -> Dict[str, Any]:
+    """东财个股信息"""
+    return _items_to_dict(ak.stock_individual_info_em(symbol=symbol))
+
+
+def _fetch_price_history_em(symbol: str, start_date: datetime, end_date: datetime, adjust: str) -> pd.DataFrame:
+    """东财日线"""
+    df = ak.stock_zh_a_hist(
+        symbol=symbol,
+        period="daily",
+        start_date=start_date.strftime("%Y%m%d"),
+        end_date=end_date.strftime("%Y%m%d"),
+        adjust=adjust
+    )
+    if df is None or df.empty:
+        return pd.DataFrame()
+    return df.rename(columns={
+        "日期": "date",
+        "开盘": "open",
+        "最高": "high",
+        "最低": "low",
+        "收盘": "close",
+        "成交量": "volume",
+        "成交额": "amount",
+        "振幅": "amplitude",
+        "涨跌幅": "pct_change",
+        "涨跌额": "change_amount",
+        "换手率": "turnover"
+    })
+
+
+def _fetch_price_history_sina(symbol: str, start_date: datetime, end_date: datetime, adjust: str) -> pd.DataFrame:
+    """新浪日线，换算为与东财一致的单位（成交量：手，换手率：%）"""
+    df = ak.stock_zh_a_daily(
+        symbol=_a_share_exchange(symbol) + symbol,
+        start_date=start_date.strftime("%Y%m%d"),
+        end_date=end_date.strftime("%Y%m%d"),
+        adjust=adjust
+    )
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df[["date", "open", "high", "low", "close", "volume", "amount", "turnover"]].copy()
+    df["volume"] = df["volume"] / 100
+    df["turnover"] = df["turnover"] * 100
+    prev_close = df["close"].shift(1)
+    df["amplitude"] = (df["high"] - df["low"]) / prev_close * 100
+    df["pct_change"] = df["close"].pct_change() * 100
+    df["change_amount"] = df["close"].diff()
+    return df
+
+
+# A股数据源：实时行情对冲请求（雪球超过 p95 未返回时并行请求东财），
+# 日线按顺序回退（东财 -> 新浪），均带熔断
+A_SHARE_MARKET_DATA = ProviderGroup("a_share_market_data", [
+    Provider("xueqiu", _fetch_market_data_xq),
+    Provider("eastmoney", _fetch_market_data_em),
+], hedge=True, timeout=20.0)
+
+A_SHARE_PRICE_HISTORY = ProviderGroup("a_share_price_history", [
+    Provider("eastmoney", _fetch_price_history_em),
+    Provider("sina", _fetch_price_history_sina),
+], validate=lambda df: df is not None and not df.empty, timeout=60.0)
+
+
 def get_market_data(symbol: str) -> Dict[str, Any]:
     try:
         symbol_upper = symbol.upper().replace("-", "")
@@ -380,21 +474,7 @@ def get_market_data(symbol: str) -> Dict[str, Any]:
         # A股逻辑（雪球/东财）
         # ...existing code...
         try:
-            stock_info = ak.stock_individual_spot_xq(symbol="SH"+symbol)
-            stock_data = {}
-            if stock_info is not None and not stock_info.empty:
-                for _, row in stock_info.iterrows():
-                    item = str(row['item']) if 'item' in row else str(row.iloc[0])
-                    value = row['value'] if 'value' in row else row.iloc[1]
-                    stock_data[item] = value
-            else:
-                # 备选：使用东财接口
-                stock_info = ak.stock_individual_info_em(symbol=symbol)
-                if stock_info is not None and not stock_info.empty:
-                    for _, row in stock_info.iterrows():
-                        item = row['item'] if 'item' in row else str(row.iloc[0])
-                        value = row['value'] if 'value' in row else str(row.iloc[1])
-                        stock_data[item] = value
+            stock_data = A_SHARE_MARKET_DATA.call(symbol)
             def safe_float(value, default=0.0):
                 try:
                     if isinstance(value, str):
@@ -402,7 +482,8 @@ def get_market_data(symbol: str) -> Dict[str, Any]:
                     return float(value) if value and str(value).strip() != '-' else default
                 except:
                     return default
-            market_cap = safe_float(stock_data.get("资产净值/总市值", 0))
+            # 雪球为"资产净值/总市值"，东财为"总市值"
+            market_cap = safe_float(stock_data.get("资产净值/总市值", stock_data.get("总市值", 0)))
             volume = safe_float(stock_data.get("成交量", 0))
             week_52_high = safe_float(stock_data.get("52周最高", 0))
             week_52_low = safe_float(stock_data.get("52周最低", 0))
@@ -438,7 +519,226 @@ def get_market_data(symbol: str) -> Dict[str, Any]:
         return {}
 
 
-def get_price_history(symbol: str, start_date: str = None, end_date: str = None, adjust: str = "qfq") -> pd.DataFrame:
+def enrich_price_history(df: pd.DataFrame) -> pd.DataFrame:
+    """在原始日线数据上计算动量、波动率和统计套利等衍生指标
+
+    Args:
+        df: 至少包含 date, open, high, low, close, volume 列的DataFrame
+
+    Returns:
+        按日期升序排列并追加了技术指标列的DataFrame，列说明见 get_price_history
+    """
+    # 计算动量指标
+    df["momentum_1m"] = df["close"].pct_change(periods=20)  # 20个交易日约等于1个月
+    df["momentum_3m"] = df["close"].pct_change(periods=60)  # 60个交易日约等于3个月
+    df["momentum_6m"] = df["close"].pct_change(
+        periods=120)  # 120个交易日约等于6个月
+
+    # 计算成交量动量（相对于20日平均成交量的变化）
+    df["volume_ma20"] = df["volume"].rolling(window=20).mean()
+    df["volume_momentum"] = df["volume"] / df["volume_ma20"]
+
+    # 计算波动率指标
+    # 1. 历史波动率 (20日)
+    returns = df["close"].pct_change()
+    df["historical_volatility"] = returns.rolling(
+        window=20).std() * np.sqrt(252)  # 年化
+
+    # 2. 波动率区间 (相对于过去120天的波动率的位置)
+    volatility_120d = returns.rolling(window=120).std() * np.sqrt(252)
+    vol_min = volatility_120d.rolling(window=120).min()
+    vol_max = volatility_120d.rolling(window=120).max()
+    vol_range = vol_max - vol_min
+    df["volatility_regime"] = np.where(
+        vol_range > 0,
+        (df["historical_volatility"] - vol_min) / vol_range,
+        0  # 当范围为0时返回0
+    )
+
+    # 3. 波动率Z分数
+    vol_mean = df["historical_volatility"].rolling(window=120).mean()
+    vol_std = df["historical_volatility"].rolling(window=120).std()
+    df["volatility_z_score"] = (
+        df["historical_volatility"] - vol_mean) / vol_std
+
+    # 4. ATR比率
+    tr = pd.DataFrame()
+    tr["h-l"] = df["high"] - df["low"]
+    tr["h-pc"] = abs(df["high"] - df["close"].shift(1))
+    tr["l-pc"] = abs(df["low"] - df["close"].shift(1))
+    tr["tr"] = tr[["h-l", "h-pc", "l-pc"]].max(axis=1)
+    df["atr"] = tr["tr"].rolling(window=14).mean()
+    df["atr_ratio"] = df["atr"] / df["close"]
+
+    # 计算统计套利指标
+    # 1. 赫斯特指数 (使用过去120天的数据)
+    def calculate_hurst(series):
+        """
+        计算Hurst指数。
+
+        Args:
+            series: 价格序列
+
+        Returns:
+            float: Hurst指数，或在计算失败时返回np.nan
+        """
+        try:
+            series = series.dropna()
+            if len(series) < 30:  # 降低最小数据点要求
+                return np.nan
+
+            # 使用对数收益率
+            log_returns = np.log(series / series.shift(1)).dropna()
+            if len(log_returns) < 30:  # 降低最小数据点要求
+                return np.nan
+
+            # 使用更小的lag范围
+            # 减少lag范围到2-10天
+            lags = range(2, min(11, len(log_returns) // 4))
+
+            # 计算每个lag的标准差
+            tau = []
+            for lag in lags:
+                # 计算滚动标准差
+                std = log_returns.rolling(window=lag).std().dropna()
+                if len(std) > 0:
+                    tau.append(np.mean(std))
+
+            # 基本的数值检查
+            if len(tau) < 3:  # 进一步降低最小要求
+                return np.nan
+
+            # 使用对数回归
+            lags_log = np.log(list(lags))
+            tau_log = np.log(tau)
+
+            # 计算回归系数
+            reg = np.polyfit(lags_log, tau_log, 1)
+            hurst = reg[0] / 2.0
+
+            # 只保留基本的数值检查
+            if np.isnan(hurst) or np.isinf(hurst):
+                return np.nan
+
+            return hurst
+
+        except Exception as e:
+            return np.nan
+
+    # 使用对数收益率计算Hurst指数
+    log_returns = np.log(df["close"] / df["close"].shift(1))
+    df["hurst_exponent"] = log_returns.rolling(
+        window=120,
+        min_periods=60  # 要求至少60个数据点
+    ).apply(calculate_hurst)
+
+    # 2. 偏度 (20日)
+    df["skewness"] = returns.rolling(window=20).skew()
+
+    # 3. 峰度 (20日)
+    df["kurtosis"] = returns.rolling(window=20).kurt()
+
+    # 按日期升序排序
+    df = df.sort_values("date")
+
+    # 重置索引
+    df = df.reset_index(drop=True)
+
+    return df
+
+
+# 技术指标至少需要的交易日数，不足时把请求区间扩大到两年
+MIN_PRICE_HISTORY_DAYS = 120
+EXTENDED_HISTORY_DAYS = 730
+
+# 预加载的价格表：(代码, 复权类型) -> (升序日期数组, 已计算指标的DataFrame, 覆盖区间)
+# 登记表保存在 ContextVar 中，只对登记它的回测（及其用 copy_context 提交的工作线程）可见：
+# 并发的回测即使代码相同也互不清除，其它线程中无关的 get_price_history 调用照常实时获取
+PreloadRegistry = Dict[Tuple[str, str], Tuple[np.ndarray, pd.DataFrame, Tuple[pd.Timestamp, pd.Timestamp]]]
+_preloaded_prices: ContextVar[Optional[PreloadRegistry]] = ContextVar("preloaded_prices", default=None)
+
+
+@contextmanager
+def price_preload_scope():
+    """在一次运行的范围内登记预加载价格，退出时丢弃该范围内的所有预加载
+
+    用法:
+        with price_preload_scope():
+            preload_price_history("600519", "2022-01-01", "2023-12-31")
+            ...  # 本线程和复制了上下文的工作线程中的 get_price_history 切片返回
+    """
+    token = _preloaded_prices.set({})
+    try:
+        yield
+    finally:
+        _preloaded_prices.reset(token)
+
+
+def preload_price_history(symbol: str, start_date: str, end_date: str, adjust: str = "qfq") -> pd.DataFrame:
+    """一次性获取整段区间的价格数据并登记，之后落在该区间内的 get_price_history 请求直接切片返回
+
+    回测时在开始前调用一次，代替每个交易日的网络请求。技术指标在整段数据上计算，
+    均只使用当日及之前的数据，切片不会引入未来信息。
+    登记在当前的 price_preload_scope 中；不在任何范围内时登记到当前上下文，由 clear_preloaded_prices 清除。
+
+    Args:
+        symbol: 股票代码
+        start_date: 开始日期（应包含指标预热区间），格式：YYYY-MM-DD
+        end_date: 结束日期，格式：YYYY-MM-DD
+        adjust: 复权类型
+
+    Returns:
+        预加载的DataFrame，获取失败时为空表（不登记）
+    """
+    df = get_price_history(symbol, start_date, end_date, adjust, compact=False)
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df.sort_values("date").reset_index(drop=True)
+    df["date"] = pd.to_datetime(df["date"])
+    dates = df["date"].to_numpy(dtype="datetime64[ns]")
+    registry = _preloaded_prices.get()
+    if registry is None:
+        registry = {}
+        _preloaded_prices.set(registry)
+    registry[(symbol, adjust)] = (
+        dates, df, (pd.Timestamp(start_date), pd.Timestamp(end_date)))
+    logger.info(f"Preloaded {len(df)} price records for {symbol} ({start_date} ~ {end_date})")
+    return df
+
+
+def clear_preloaded_prices(symbol: str = None):
+    """清除当前上下文中预加载的价格数据，symbol 为 None 时全部清除"""
+    registry = _preloaded_prices.get()
+    if registry is None:
+        return
+    for key in list(registry):
+        if symbol is None or key[0] == symbol:
+            del registry[key]
+
+
+def _slice_preloaded(symbol: str, start_date: Optional[str], end_date: Optional[str],
+                     adjust: str) -> Optional[pd.DataFrame]:
+    """从预加载数据中切出请求区间，区间不在预加载范围内时返回 None"""
+    registry = _preloaded_prices.get()
+    entry = registry.get((symbol, adjust)) if registry else None
+    if entry is None or not end_date:
+        return None
+    dates, df, (covered_start, covered_end) = entry
+    end = pd.Timestamp(end_date)
+    start = pd.Timestamp(start_date) if start_date else end - timedelta(days=365)
+    if start < covered_start or end > covered_end:
+        return None
+    lo = np.searchsorted(dates, start.to_datetime64(), side="left")
+    hi = np.searchsorted(dates, end.to_datetime64(), side="right")
+    if hi - lo < MIN_PRICE_HISTORY_DAYS:
+        # 与实时请求相同的扩展规则，超出预加载范围的部分截断
+        extended = (end - timedelta(days=EXTENDED_HISTORY_DAYS)).to_datetime64()
+        lo = np.searchsorted(dates, extended, side="left")
+    return df.iloc[lo:hi].reset_index(drop=True)
+
+
+def get_price_history(symbol: str, start_date: str = None, end_date: str = None, adjust: str = "qfq",
+                      compact: bool = None) -> pd.DataFrame:
     """获取历史价格数据
 
     Args:
@@ -449,6 +749,7 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
                - "": 不复权
                - "qfq": 前复权（默认）
                - "hfq": 后复权
+        compact: 是否返回紧凑类型（float32），None 时读取环境变量 COMPACT_DTYPES，见 compact_price_frame
 
     Returns:
         包含以下列的DataFrame：
@@ -477,6 +778,10 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
         - skewness: 偏度
         - kurtosis: 峰度
     """
+    preloaded = _slice_preloaded(symbol, start_date, end_date, adjust)
+    if preloaded is not None:
+        return compact_price_frame(preloaded) if compact_enabled(compact) else preloaded
+
     try:
         symbol_upper = symbol.upper().replace("-", "")
         if symbol_upper in CRYPTO_SYMBOLS:
@@ -513,63 +818,9 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
                 df["pct_change"] = df["close"].pct_change() * 100
                 df["change_amount"] = df["close"].diff()
                 df["turnover"] = None
-                df["momentum_1m"] = df["close"].pct_change(periods=20)
-                df["momentum_3m"] = df["close"].pct_change(periods=60)
-                df["momentum_6m"] = df["close"].pct_change(periods=120)
-                df["volume_ma20"] = df["volume"].rolling(window=20).mean()
-                df["volume_momentum"] = df["volume"] / df["volume_ma20"]
-                returns = df["close"].pct_change()
-                df["historical_volatility"] = returns.rolling(window=20).std() * np.sqrt(252)
-                volatility_120d = returns.rolling(window=120).std() * np.sqrt(252)
-                vol_min = volatility_120d.rolling(window=120).min()
-                vol_max = volatility_120d.rolling(window=120).max()
-                vol_range = vol_max - vol_min
-                df["volatility_regime"] = np.where(
-                    vol_range > 0,
-                    (df["historical_volatility"] - vol_min) / vol_range,
-                    0
-                )
-                vol_mean = df["historical_volatility"].rolling(window=120).mean()
-                vol_std = df["historical_volatility"].rolling(window=120).std()
-                df["volatility_z_score"] = (df["historical_volatility"] - vol_mean) / vol_std
-                tr = pd.DataFrame()
-                tr["h-l"] = df["high"] - df["low"]
-                tr["h-pc"] = abs(df["high"] - df["close"].shift(1))
-                tr["l-pc"] = abs(df["low"] - df["close"].shift(1))
-                tr["tr"] = tr[["h-l", "h-pc", "l-pc"]].max(axis=1)
-                df["atr"] = tr["tr"].rolling(window=14).mean()
-                df["atr_ratio"] = df["atr"] / df["close"]
-                def calculate_hurst(series):
-                    try:
-                        series = series.dropna()
-                        if len(series) < 30:
-                            return np.nan
-                        log_returns = np.log(series / series.shift(1)).dropna()
-                        if len(log_returns) < 30:
-                            return np.nan
-                        lags = range(2, min(11, len(log_returns) // 4))
-                        tau = []
-                        for lag in lags:
-                            std = log_returns.rolling(window=lag).std().dropna()
-                            if len(std) > 0:
-                                tau.append(np.mean(std))
-                        if len(tau) < 3:
-                            return np.nan
-                        lags_log = np.log(list(lags))
-                        tau_log = np.log(tau)
-                        reg = np.polyfit(lags_log, tau_log, 1)
-                        hurst = reg[0] / 2.0
-                        if np.isnan(hurst) or np.isinf(hurst):
-                            return np.nan
-                        return hurst
-                    except Exception as e:
-                        return np.nan
-                log_returns = np.log(df["close"] / df["close"].shift(1))
-                df["hurst_exponent"] = log_returns.rolling(window=120, min_periods=60).apply(calculate_hurst)
-                df["skewness"] = returns.rolling(window=20).skew()
-                df["kurtosis"] = returns.rolling(window=20).kurt()
-                df = df.sort_values("date")
-                df = df.reset_index(drop=True)
+                df = enrich_price_history(df)
+                if compact_enabled(compact):
+                    df = compact_price_frame(df)
                 logger.info(f"Successfully fetched crypto price history data ({len(df)} records)")
                 return df
             else:
@@ -617,63 +868,9 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
                 except Exception as e:
                     logger.warning(f"Failed to get sharesOutstanding for {symbol}: {e}")
                     df["turnover"] = None
-                df["momentum_1m"] = df["close"].pct_change(periods=20)
-                df["momentum_3m"] = df["close"].pct_change(periods=60)
-                df["momentum_6m"] = df["close"].pct_change(periods=120)
-                df["volume_ma20"] = df["volume"].rolling(window=20).mean()
-                df["volume_momentum"] = df["volume"] / df["volume_ma20"]
-                returns = df["close"].pct_change()
-                df["historical_volatility"] = returns.rolling(window=20).std() * np.sqrt(252)
-                volatility_120d = returns.rolling(window=120).std() * np.sqrt(252)
-                vol_min = volatility_120d.rolling(window=120).min()
-                vol_max = volatility_120d.rolling(window=120).max()
-                vol_range = vol_max - vol_min
-                df["volatility_regime"] = np.where(
-                    vol_range > 0,
-                    (df["historical_volatility"] - vol_min) / vol_range,
-                    0
-                )
-                vol_mean = df["historical_volatility"].rolling(window=120).mean()
-                vol_std = df["historical_volatility"].rolling(window=120).std()
-                df["volatility_z_score"] = (df["historical_volatility"] - vol_mean) / vol_std
-                tr = pd.DataFrame()
-                tr["h-l"] = df["high"] - df["low"]
-                tr["h-pc"] = abs(df["high"] - df["close"].shift(1))
-                tr["l-pc"] = abs(df["low"] - df["close"].shift(1))
-                tr["tr"] = tr[["h-l", "h-pc", "l-pc"]].max(axis=1)
-                df["atr"] = tr["tr"].rolling(window=14).mean()
-                df["atr_ratio"] = df["atr"] / df["close"]
-                def calculate_hurst(series):
-                    try:
-                        series = series.dropna()
-                        if len(series) < 30:
-                            return np.nan
-                        log_returns = np.log(series / series.shift(1)).dropna()
-                        if len(log_returns) < 30:
-                            return np.nan
-                        lags = range(2, min(11, len(log_returns) // 4))
-                        tau = []
-                        for lag in lags:
-                            std = log_returns.rolling(window=lag).std().dropna()
-                            if len(std) > 0:
-                                tau.append(np.mean(std))
-                        if len(tau) < 3:
-                            return np.nan
-                        lags_log = np.log(list(lags))
-                        tau_log = np.log(tau)
-                        reg = np.polyfit(lags_log, tau_log, 1)
-                        hurst = reg[0] / 2.0
-                        if np.isnan(hurst) or np.isinf(hurst):
-                            return np.nan
-                        return hurst
-                    except Exception as e:
-                        return np.nan
-                log_returns = np.log(df["close"] / df["close"].shift(1))
-                df["hurst_exponent"] = log_returns.rolling(window=120, min_periods=60).apply(calculate_hurst)
-                df["skewness"] = returns.rolling(window=20).skew()
-                df["kurtosis"] = returns.rolling(window=20).kurt()
-                df = df.sort_values("date")
-                df = df.reset_index(drop=True)
+                df = enrich_price_history(df)
+                if compact_enabled(compact):
+                    df = compact_price_frame(df)
                 logger.info(f"Successfully fetched US price history data ({len(df)} records)")
                 return df
             else:
@@ -698,28 +895,13 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
             logger.info(f"Start date: {start_date.strftime('%Y-%m-%d')}")
             logger.info(f"End date: {end_date.strftime('%Y-%m-%d')}")
             def get_and_process_data(start_date, end_date):
-                df = ak.stock_zh_a_hist(
-                    symbol=symbol,
-                    period="daily",
-                    start_date=start_date.strftime("%Y%m%d"),
-                    end_date=end_date.strftime("%Y%m%d"),
-                    adjust=adjust
-                )
+                try:
+                    df = A_SHARE_PRICE_HISTORY.call(symbol, start_date, end_date, adjust)
+                except ProviderError as e:
+                    logger.error(f"Error fetching A股 price history: {e}")
+                    return pd.DataFrame()
                 if df is None or df.empty:
                     return pd.DataFrame()
-                df = df.rename(columns={
-                    "日期": "date",
-                    "开盘": "open",
-                    "最高": "high",
-                    "最低": "low",
-                    "收盘": "close",
-                    "成交量": "volume",
-                    "成交额": "amount",
-                    "振幅": "amplitude",
-                    "涨跌幅": "pct_change",
-                    "涨跌额": "change_amount",
-                    "换手率": "turnover"
-                })
                 df["date"] = pd.to_datetime(df["date"])
                 return df
             df = get_and_process_data(start_date, end_date)
@@ -727,135 +909,21 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
                 logger.warning(f"Warning: No price history data found for {symbol}")
                 return pd.DataFrame()
         # 检查数据量是否足够
-        min_required_days = 120  # 至少需要120个交易日的数据
+        min_required_days = MIN_PRICE_HISTORY_DAYS
         if len(df) < min_required_days:
             logger.warning(
                 f"Warning: Insufficient data ({len(df)} days) for all technical indicators")
             logger.info("Attempting to fetch more data...")
 
             # 扩大时间范围到2年
-            start_date = end_date - timedelta(days=730)
+            start_date = end_date - timedelta(days=EXTENDED_HISTORY_DAYS)
             df = get_and_process_data(start_date, end_date)
 
             if len(df) < min_required_days:
                 logger.warning(
                     f"Warning: Even with extended time range, insufficient data ({len(df)} days)")
 
-        # 计算动量指标
-        df["momentum_1m"] = df["close"].pct_change(periods=20)  # 20个交易日约等于1个月
-        df["momentum_3m"] = df["close"].pct_change(periods=60)  # 60个交易日约等于3个月
-        df["momentum_6m"] = df["close"].pct_change(
-            periods=120)  # 120个交易日约等于6个月
-
-        # 计算成交量动量（相对于20日平均成交量的变化）
-        df["volume_ma20"] = df["volume"].rolling(window=20).mean()
-        df["volume_momentum"] = df["volume"] / df["volume_ma20"]
-
-        # 计算波动率指标
-        # 1. 历史波动率 (20日)
-        returns = df["close"].pct_change()
-        df["historical_volatility"] = returns.rolling(
-            window=20).std() * np.sqrt(252)  # 年化
-
-        # 2. 波动率区间 (相对于过去120天的波动率的位置)
-        volatility_120d = returns.rolling(window=120).std() * np.sqrt(252)
-        vol_min = volatility_120d.rolling(window=120).min()
-        vol_max = volatility_120d.rolling(window=120).max()
-        vol_range = vol_max - vol_min
-        df["volatility_regime"] = np.where(
-            vol_range > 0,
-            (df["historical_volatility"] - vol_min) / vol_range,
-            0  # 当范围为0时返回0
-        )
-
-        # 3. 波动率Z分数
-        vol_mean = df["historical_volatility"].rolling(window=120).mean()
-        vol_std = df["historical_volatility"].rolling(window=120).std()
-        df["volatility_z_score"] = (
-            df["historical_volatility"] - vol_mean) / vol_std
-
-        # 4. ATR比率
-        tr = pd.DataFrame()
-        tr["h-l"] = df["high"] - df["low"]
-        tr["h-pc"] = abs(df["high"] - df["close"].shift(1))
-        tr["l-pc"] = abs(df["low"] - df["close"].shift(1))
-        tr["tr"] = tr[["h-l", "h-pc", "l-pc"]].max(axis=1)
-        df["atr"] = tr["tr"].rolling(window=14).mean()
-        df["atr_ratio"] = df["atr"] / df["close"]
-
-        # 计算统计套利指标
-        # 1. 赫斯特指数 (使用过去120天的数据)
-        def calculate_hurst(series):
-            """
-            计算Hurst指数。
-
-            Args:
-                series: 价格序列
-
-            Returns:
-                float: Hurst指数，或在计算失败时返回np.nan
-            """
-            try:
-                series = series.dropna()
-                if len(series) < 30:  # 降低最小数据点要求
-                    return np.nan
-
-                # 使用对数收益率
-                log_returns = np.log(series / series.shift(1)).dropna()
-                if len(log_returns) < 30:  # 降低最小数据点要求
-                    return np.nan
-
-                # 使用更小的lag范围
-                # 减少lag范围到2-10天
-                lags = range(2, min(11, len(log_returns) // 4))
-
-                # 计算每个lag的标准差
-                tau = []
-                for lag in lags:
-                    # 计算滚动标准差
-                    std = log_returns.rolling(window=lag).std().dropna()
-                    if len(std) > 0:
-                        tau.append(np.mean(std))
-
-                # 基本的数值检查
-                if len(tau) < 3:  # 进一步降低最小要求
-                    return np.nan
-
-                # 使用对数回归
-                lags_log = np.log(list(lags))
-                tau_log = np.log(tau)
-
-                # 计算回归系数
-                reg = np.polyfit(lags_log, tau_log, 1)
-                hurst = reg[0] / 2.0
-
-                # 只保留基本的数值检查
-                if np.isnan(hurst) or np.isinf(hurst):
-                    return np.nan
-
-                return hurst
-
-            except Exception as e:
-                return np.nan
-
-        # 使用对数收益率计算Hurst指数
-        log_returns = np.log(df["close"] / df["close"].shift(1))
-        df["hurst_exponent"] = log_returns.rolling(
-            window=120,
-            min_periods=60  # 要求至少60个数据点
-        ).apply(calculate_hurst)
-
-        # 2. 偏度 (20日)
-        df["skewness"] = returns.rolling(window=20).skew()
-
-        # 3. 峰度 (20日)
-        df["kurtosis"] = returns.rolling(window=20).kurt()
-
-        # 按日期升序排序
-        df = df.sort_values("date")
-
-        # 重置索引
-        df = df.reset_index(drop=True)
+        df = enrich_price_history(df)
 
         logger.info(
             f"Successfully fetched price history data ({len(df)} records)")
@@ -868,14 +936,63 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
             for col, nan_count in nan_columns[nan_columns > 0].items():
                 logger.warning(f"- {col}: {nan_count} records")
 
+        if compact_enabled(compact):
+            df = compact_price_frame(df)
         return df
     except Exception as e:
         logger.error(f"Error getting price history: {e}")
         return pd.DataFrame()
 
 
-def prices_to_df(prices):
-    """Convert price data to DataFrame with standardized column names"""
+def compact_enabled(compact: bool = None) -> bool:
+    """紧凑类型开关：显式参数优先，否则读取环境变量 COMPACT_DTYPES"""
+    if compact is not None:
+        return compact
+    return os.getenv("COMPACT_DTYPES", "false").lower() in ("1", "true", "yes")
+
+
+def compact_price_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """将价格/特征表转换为紧凑类型，内存约减半
+
+    - 浮点列（价格、成交量、技术指标）转为 float32，整数列按取值范围向下转换
+    - date 列转为 datetime64
+    - 全为数值或空值的 object 列转为 float32，其余字符串列（如 symbol）转为 category
+
+    float32 约有 7 位有效数字，Hurst、VaR 等统计量的相对误差在 1e-4 以内，
+    需要精确累加的场景（如长区间累计成交量）请使用默认类型。
+
+    Args:
+        df: get_price_history 或 prices_to_df 返回的DataFrame
+
+    Returns:
+        新的DataFrame，列名和顺序不变
+    """
+    df = df.copy()
+    for column in df.columns:
+        series = df[column]
+        if column == "date":
+            df[column] = pd.to_datetime(series)
+        elif pd.api.types.is_float_dtype(series):
+            df[column] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series):
+            df[column] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            # 代码等字符串即使形如数字（如 "000001"）也保留为字符串
+            if series.map(lambda value: isinstance(value, str)).any():
+                if series.nunique(dropna=True) <= len(series) // 2:
+                    df[column] = series.astype("category")
+            else:
+                df[column] = pd.to_numeric(series, errors="coerce").astype(np.float32)
+    return df
+
+
+def prices_to_df(prices, compact: bool = None):
+    """Convert price data to DataFrame with standardized column names
+
+    Args:
+        prices: list of price records
+        compact: convert to float32/categorical dtypes, defaults to COMPACT_DTYPES env
+    """
     try:
         df = pd.DataFrame(prices)
 
@@ -904,6 +1021,8 @@ def prices_to_df(prices):
             if col not in df.columns:
                 df[col] = 0.0  # 使用0填充缺失的必要列
 
+        if compact_enabled(compact):
+            df = compact_price_frame(df)
         return df
     except Exception as e:
         logger.error(f"Error converting price data: {str(e)}")
@@ -0,0 +1,391 @@
+"""
+内存映射的共享K线存储 (Shared bar store)
+
+面向多进程只读共享的列式布局：每列一个定长二进制文件，所有代码的数据首尾相接，
+通过偏移索引定位。任意数量的工作进程以只读方式 np.memmap 同一组文件，
+操作系统页缓存只保留一份数据。
+
+目录结构:
+    <root>/index.json          偏移索引 {generation, n_rows, columns, symbols: {代码: [offset, length, capacity]}}
+    <root>/<列名>.g<代数>.bin   列数据，date 列为 datetime64[D]
+    <root>/writer.lock         写入锁
+
+写入规则（单写多读）:
+    - 同一时间只有一个写入者（文件锁）
+    - 追加的数据先写入代码段的预留空间或文件末尾的新段，fsync 后再用 os.replace 原子替换
+      index.json；读者只读取索引中声明的长度，永远看不到写了一半的数据
+    - 已发布的数据从不原地覆盖；compact() 写入新一代文件后再切换索引
+
+用法:
+    with BarStoreWriter(root) as writer:
+        writer.append("600519", df)
+
+    store = SharedBarStore(root)
+    arrays = store.arrays("600519")        # 零拷贝的只读视图
+    df = store.frame("600519", "2024-01-01", "2024-06-30")
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging_config import setup_logger
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows
+    import msvcrt
+    HAS_FCNTL = False
+
+logger = setup_logger('bar_store')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_BAR_STORE_DIR = os.path.join(PROJECT_ROOT, "data", "bars")
+
+INDEX_FILE = "index.json"
+LOCK_FILE = "writer.lock"
+
+# 默认列及类型，写入者可在首次创建时指定特征列
+BAR_COLUMNS = {
+    "date": "datetime64[D]",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "float64",
+    "amount": "float64",
+}
+
+MIN_CAPACITY = 256
+
+
+def _column_path(root: str, column: str, generation: int) -> str:
+    return os.path.join(root, f"{column}.g{generation}.bin")
+
+
+def _read_index(root: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(root, INDEX_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class SharedBarStore:
+    """只读访问共享K线存储，可在任意多个进程中同时打开
+
+    Args:
+        root: 存储目录，默认读取环境变量 BAR_STORE_DIR，否则为 data/bars
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("BAR_STORE_DIR") or DEFAULT_BAR_STORE_DIR
+        self._index_signature = None
+        self._index: Optional[Dict] = None
+        self._maps: Dict[str, np.memmap] = {}
+
+    def refresh(self) -> bool:
+        """写入者发布了新索引时重新加载索引和映射，返回是否有更新"""
+        try:
+            stat = os.stat(os.path.join(self.root, INDEX_FILE))
+        except FileNotFoundError:
+            return False
+        # 每次发布都通过 os.replace 生成新文件，inode 变化即有更新
+        signature = (stat.st_ino, stat.st_mtime_ns)
+        if signature == self._index_signature:
+            return False
+        index = _read_index(self.root)
+        if index is None:
+            return False
+        self._index, self._index_signature = index, signature
+        self._maps = {}
+        return True
+
+    def _map(self, column: str) -> np.ndarray:
+        if column not in self._maps:
+            dtype = np.dtype(self._index["columns"][column])
+            n_rows = self._index["n_rows"]
+            if n_rows == 0:
+                self._maps[column] = np.empty(0, dtype=dtype)
+            else:
+                path = _column_path(self.root, column, self._index["generation"])
+                self._maps[column] = np.memmap(path, dtype=dtype, mode="r", shape=(n_rows,))
+        return self._maps[column]
+
+    @property
+    def columns(self) -> List[str]:
+        self.refresh()
+        return list(self._index["columns"]) if self._index else []
+
+    def symbols(self) -> List[str]:
+        self.refresh()
+        return sorted(self._index["symbols"]) if self._index else []
+
+    def __contains__(self, symbol: str) -> bool:
+        self.refresh()
+        return bool(self._index) and symbol in self._index["symbols"]
+
+    def arrays(self, symbol: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, np.ndarray]]:
+        """返回代码各列的只读内存映射视图（不复制数据）
+
+        Args:
+            symbol: 代码
+            columns: 需要的列，默认全部
+
+        Returns:
+            列名到 numpy 数组的字典，代码不存在时返回 None
+        """
+        self.refresh()
+        if not self._index or symbol not in self._index["symbols"]:
+            return None
+        offset, length, _ = self._index["symbols"][symbol]
+        return {column: self._map(column)[offset:offset + length]
+                for column in (columns or self._index["columns"])}
+
+    def frame(self, symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+              columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """读取代码的日期区间为DataFrame
+
+        Args:
+            symbol: 代码
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+            columns: 需要的列，默认全部
+
+        Returns:
+            含 date 列的DataFrame，代码不存在时返回 None
+        """
+        columns = [c for c in (columns or self.columns) if c != "date"]
+        arrays = self.arrays(symbol, ["date"] + columns)
+        if arrays is None:
+            return None
+        dates = arrays["date"]
+        lo = 0 if start_date is None else int(np.searchsorted(
+            dates, np.datetime64(pd.Timestamp(start_date).date()), side="left"))
+        hi = len(dates) if end_date is None else int(np.searchsorted(
+            dates, np.datetime64(pd.Timestamp(end_date).date()), side="right"))
+        data = {"date": pd.to_datetime(np.asarray(dates[lo:hi]))}
+        for column in columns:
+            data[column] = np.asarray(arrays[column][lo:hi])
+        return pd.DataFrame(data)
+
+    def last_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        arrays = self.arrays(symbol, ["date"])
+        if not arrays or len(arrays["date"]) == 0:
+            return None
+        return pd.Timestamp(arrays["date"][-1])
+
+
+class BarStoreWriter:
+    """共享K线存储的唯一写入者
+
+    Args:
+        root: 存储目录
+        columns: 首次创建时的列及类型，默认 BAR_COLUMNS；已存在的存储以索引为准
+    """
+
+    def __init__(self, root: Optional[str] = None, columns: Optional[Dict[str, str]] = None):
+        self.root = root or os.getenv("BAR_STORE_DIR") or DEFAULT_BAR_STORE_DIR
+        os.makedirs(self.root, exist_ok=True)
+        self._lock_fd = None
+        self._index = _read_index(self.root) or {
+            "generation": 0,
+            "n_rows": 0,
+            "columns": dict(columns or BAR_COLUMNS),
+            "symbols": {},
+        }
+        if "date" not in self._index["columns"]:
+            raise ValueError("Bar store columns must include 'date'")
+
+    def __enter__(self):
+        self._lock_fd = os.open(os.path.join(self.root, LOCK_FILE), os.O_RDWR | os.O_CREAT)
+        if HAS_FCNTL:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(self._lock_fd, msvcrt.LK_LOCK, 1)
+        # 拿到锁之后重新读取索引，可能有其他写入者刚刚发布过
+        self._index = _read_index(self.root) or self._index
+        for column in self._index["columns"]:
+            path = _column_path(self.root, column, self._index["generation"])
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if HAS_FCNTL:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        else:
+            msvcrt.locking(self._lock_fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._lock_fd)
+        self._lock_fd = None
+
+    def _require_lock(self):
+        if self._lock_fd is None:
+            raise RuntimeError("BarStoreWriter must be used as a context manager")
+
+    def _column_arrays(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for column, dtype in self._index["columns"].items():
+            if column == "date":
+                arrays[column] = pd.to_datetime(df["date"]).values.astype("datetime64[D]")
+            elif column in df.columns:
+                arrays[column] = pd.to_numeric(df[column], errors="coerce").to_numpy(
+                    dtype=np.dtype(dtype), na_value=np.nan)
+            else:
+                arrays[column] = np.full(len(df), np.nan, dtype=np.dtype(dtype))
+        return arrays
+
+    def _write_rows(self, position: int, arrays: Dict[str, np.ndarray], generation: int):
+        for column, values in arrays.items():
+            path = _column_path(self.root, column, generation)
+            with open(path, 'r+b') as f:
+                f.seek(position * values.dtype.itemsize)
+                f.write(values.tobytes())
+
+    def _read_segment(self, symbol: str) -> Dict[str, np.ndarray]:
+        offset, length, _ = self._index["symbols"][symbol]
+        segment = {}
+        for column, dtype in self._index["columns"].items():
+            path = _column_path(self.root, column, self._index["generation"])
+            segment[column] = np.fromfile(path, dtype=np.dtype(dtype), count=length,
+                                          offset=offset * np.dtype(dtype).itemsize)
+        return segment
+
+    def _publish(self):
+        # 预留容量也要占据文件空间，读者按 n_rows 映射整个文件；
+        # 列数据落盘后再替换索引，崩溃时索引不会指向未写入的数据
+        for column, dtype in self._index["columns"].items():
+            path = _column_path(self.root, column, self._index["generation"])
+            size = self._index["n_rows"] * np.dtype(dtype).itemsize
+            with open(path, 'r+b') as f:
+                if os.path.getsize(path) < size:
+                    f.truncate(size)
+                os.fsync(f.fileno())
+        tmp_path = os.path.join(self.root, f".{INDEX_FILE}.{os.getpid()}")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.root, INDEX_FILE))
+
+    def append(self, symbol: str, df: pd.DataFrame) -> int:
+        """追加K线，只写入晚于已有最后日期的行
+
+        代码段还有预留空间时原地写入预留区，否则把整段迁移到文件末尾并将容量翻倍。
+
+        Args:
+            symbol: 代码
+            df: 含 date 列的K线
+
+        Returns:
+            新写入的行数
+        """
+        self._require_lock()
+        n_new = self._append(symbol, df)
+        if n_new:
+            self._publish()
+        return n_new
+
+    def append_many(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, int]:
+        """批量追加多个代码的K线，全部写完后只发布一次索引
+
+        Args:
+            frames: 代码到K线的映射
+
+        Returns:
+            代码到新写入行数的映射
+        """
+        self._require_lock()
+        written = {symbol: self._append(symbol, df) for symbol, df in frames.items()}
+        if any(written.values()):
+            self._publish()
+        return written
+
+    def _append(self, symbol: str, df: pd.DataFrame) -> int:
+        if df is None or df.empty:
+            return 0
+        df = df.sort_values("date")
+        arrays = self._column_arrays(df)
+
+        entry = self._index["symbols"].get(symbol)
+        if entry is not None and entry[1] > 0:
+            last = self._read_tail_date(symbol)
+            mask = arrays["date"] > last
+            arrays = {column: values[mask] for column, values in arrays.items()}
+        n_new = len(arrays["date"])
+        if n_new == 0:
+            return 0
+
+        generation = self._index["generation"]
+        if entry is not None and entry[1] + n_new <= entry[2]:
+            offset, length, capacity = entry
+            self._write_rows(offset + length, arrays, generation)
+            self._index["symbols"][symbol] = [offset, length + n_new, capacity]
+        else:
+            existing = self._read_segment(symbol) if entry is not None else None
+            if existing is not None:
+                arrays = {column: np.concatenate([existing[column], arrays[column]])
+                          for column in arrays}
+            length = len(arrays["date"])
+            capacity = max(MIN_CAPACITY, 2 * length)
+            offset = self._index["n_rows"]
+            self._write_rows(offset, arrays, generation)
+            self._index["symbols"][symbol] = [offset, length, capacity]
+            self._index["n_rows"] = offset + capacity
+            if existing is not None:
+                logger.debug(f"Relocated {symbol} to offset {offset} (capacity {capacity})")
+        return n_new
+
+    def last_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        """代码已写入的最后日期（含尚未发布的写入），没有数据时返回 None"""
+        entry = self._index["symbols"].get(symbol)
+        if not entry or entry[1] == 0:
+            return None
+        return pd.Timestamp(self._read_tail_date(symbol))
+
+    def _read_tail_date(self, symbol: str) -> np.datetime64:
+        offset, length, _ = self._index["symbols"][symbol]
+        path = _column_path(self.root, "date", self._index["generation"])
+        dtype = np.dtype(self._index["columns"]["date"])
+        return np.fromfile(path, dtype=dtype, count=1,
+                           offset=(offset + length - 1) * dtype.itemsize)[0]
+
+    def compact(self) -> int:
+        """把所有代码重新紧凑写入新一代文件，回收迁移留下的空洞
+
+        旧文件在切换索引后删除；仍映射着旧文件的读者在 POSIX 系统上不受影响，
+        下次 refresh() 时切换到新文件。
+
+        Returns:
+            新的代数
+        """
+        self._require_lock()
+        old_generation = self._index["generation"]
+        new_generation = old_generation + 1
+        segments = {symbol: self._read_segment(symbol) for symbol in self._index["symbols"]}
+
+        for column in self._index["columns"]:
+            open(_column_path(self.root, column, new_generation), 'wb').close()
+        position = 0
+        symbols = {}
+        for symbol, arrays in segments.items():
+            length = len(arrays["date"])
+            capacity = max(MIN_CAPACITY, length + length // 4)
+            self._write_rows(position, arrays, new_generation)
+            symbols[symbol] = [position, length, capacity]
+            position += capacity
+
+        self._index = {**self._index, "generation": new_generation,
+                       "n_rows": position, "symbols": symbols}
+        self._publish()
+        for column in self._index["columns"]:
+            try:
+                os.remove(_column_path(self.root, column, old_generation))
+            except (FileNotFoundError, PermissionError):
+                pass
+        return new_generation
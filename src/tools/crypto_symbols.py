@@ -294,3 +294,11 @@ CRYPTO_SYMBOLS = {
     "ZIL": "ZILUSDT",
     "ZRX": "ZRXUSDT",
 }
+
+
+def is_crypto(symbol: str) -> bool:
+    """判断代码是否为虚拟币，兼容 "BTC" 和 yfinance 风格的 "BTC-USD" 两种写法"""
+    base = symbol.upper()
+    if base.endswith("-USD"):
+        base = base[:-len("-USD")]
+    return base.replace("-", "") in CRYPTO_SYMBOLS
@@ -0,0 +1,347 @@
+"""
+本地宏观经济数据存储 - 经济序列与发布日历
+
+Algogene 的经济序列 (history_econs_stat) 和经济日历 (history_econs_calendar) 更新频率很低，
+本模块把它们保存在本地 SQLite 中，同步时只请求最后一条之后的新数据；
+回测中的宏观特征通过 asof_join 离线拼接到价格表上，不再逐日调用接口。
+
+用法:
+    store = EconsStore()
+    store.sync_series(["CPI", "GDP"])            # 增量同步
+    df = store.join_onto(prices_df, ["CPI"], lag_days={"CPI": 15})
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('econs_store')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "econs.sqlite")
+
+# 首次同步的默认起始日期
+DEFAULT_START_DATE = "2000-01-01"
+# 日历同步时向后包含的天数（已排期但尚未发生的事件）
+CALENDAR_LOOKAHEAD_DAYS = 30
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _records(response) -> Optional[List[Dict]]:
+    """取出接口返回的 res 记录列表，错误信息等格式不符的返回值返回 None"""
+    if not isinstance(response, dict):
+        return None
+    res = response.get("res") or []
+    if not isinstance(res, list) or not all(isinstance(item, dict) for item in res):
+        return None
+    return res
+
+
+def asof_join(prices_df: pd.DataFrame, observations: Dict[str, pd.Series],
+              lag_days: Union[int, Dict[str, int]] = 0, date_column: str = "date",
+              prefix: str = "econ_") -> pd.DataFrame:
+    """把经济序列按时点拼接到价格表上
+
+    每个交易日取"该日已可获得"的最新观测值：观测日期加上发布滞后 lag_days 不晚于交易日。
+    例如月度 CPI 通常在次月中旬公布，可设置 lag_days={"CPI": 15} 避免前视偏差。
+
+    Args:
+        prices_df: 含日期列的价格表
+        observations: 序列ID到观测值 Series（以日期为索引）的映射
+        lag_days: 统一或按序列指定的发布滞后天数
+        date_column: 价格表的日期列
+        prefix: 新增列名前缀
+
+    Returns:
+        追加了 <prefix><序列ID> 列的新DataFrame，行顺序与输入一致
+    """
+    dates = pd.to_datetime(prices_df[date_column])
+    order = np.argsort(dates.to_numpy(), kind="stable")
+    left = pd.DataFrame({"_date": dates.to_numpy()[order]})
+
+    result = prices_df.copy()
+    for series_id, series in observations.items():
+        column = f"{prefix}{series_id}"
+        lag = lag_days.get(series_id, 0) if isinstance(lag_days, dict) else lag_days
+        if series is None or series.empty:
+            result[column] = np.nan
+            continue
+        right = pd.DataFrame({
+            "_available": (pd.to_datetime(series.index) + pd.Timedelta(days=lag)).astype(left["_date"].dtype),
+            column: series.to_numpy(dtype=float),
+        }).sort_values("_available")
+        merged = pd.merge_asof(left, right, left_on="_date", right_on="_available",
+                               direction="backward")
+        values = np.empty(len(merged))
+        values[order] = merged[column].to_numpy()
+        result[column] = values
+    return result
+
+
+class EconsStore:
+    """经济序列与经济日历的本地存储
+
+    Args:
+        db_path: SQLite 文件路径，默认 data/econs.sqlite
+        client: AlgogeneClient 实例，默认在首次同步时创建；只读使用时不需要
+    """
+
+    def __init__(self, db_path: Optional[str] = None, client=None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self._client = client
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS observations ("
+            " series_id TEXT NOT NULL, date TEXT NOT NULL, value REAL,"
+            " PRIMARY KEY (series_id, date));"
+            "CREATE TABLE IF NOT EXISTS calendar ("
+            " timestamp TEXT NOT NULL, country TEXT NOT NULL, event TEXT NOT NULL,"
+            " impact TEXT, payload TEXT NOT NULL,"
+            " PRIMARY KEY (timestamp, country, event));"
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, synced_at TEXT NOT NULL,"
+            " PRIMARY KEY (kind, key));")
+        self._conn.commit()
+
+    @property
+    def client(self):
+        if self._client is None:
+            from src.tools.algogene_client import AlgogeneClient
+            self._client = AlgogeneClient()
+        return self._client
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _recently_synced(self, kind: str, key: str, max_age_hours: float) -> bool:
+        row = self._conn.execute("SELECT synced_at FROM sync_state WHERE kind = ? AND key = ?",
+                                 (kind, key)).fetchone()
+        if row is None or max_age_hours <= 0:
+            return False
+        return datetime.now() - datetime.fromisoformat(row[0]) < timedelta(hours=max_age_hours)
+
+    def _mark_synced(self, kind: str, key: str):
+        self._conn.execute("INSERT OR REPLACE INTO sync_state (kind, key, synced_at) VALUES (?, ?, ?)",
+                           (kind, key, datetime.now().isoformat(timespec="seconds")))
+
+    # -------------------------------------------------------------------------
+    # 经济序列
+    # -------------------------------------------------------------------------
+
+    def last_date(self, series_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(date) FROM observations WHERE series_id = ?",
+                                     (series_id,)).fetchone()
+        return row[0]
+
+    def sync_series(self, series_ids: Union[str, Iterable[str]], start_date: str = DEFAULT_START_DATE,
+                    max_age_hours: float = 12) -> Dict[str, int]:
+        """增量同步经济序列，只请求本地最后日期之后的观测值
+
+        Args:
+            series_ids: 一个或多个序列ID
+            start_date: 本地没有数据时的起始日期
+            max_age_hours: 距上次同步不足该小时数时跳过请求，0 表示总是请求
+
+        Returns:
+            序列ID到新增观测数的映射
+        """
+        if isinstance(series_ids, str):
+            series_ids = [series_ids]
+        added = {}
+        end_date = datetime.now().strftime("%Y-%m-%d")
+        for series_id in series_ids:
+            with self._lock:
+                if self._recently_synced("series", series_id, max_age_hours):
+                    added[series_id] = 0
+                    continue
+            last = self.last_date(series_id)
+            request_start = start_date if last is None else \
+                (pd.Timestamp(last) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+            if request_start > end_date:
+                added[series_id] = 0
+                continue
+
+            try:
+                response = self.client.get_econs_statistics(series_id, start_date=request_start,
+                                                            end_date=end_date)
+            except Exception as e:
+                logger.error(f"Failed to sync econs series {series_id}: {e}")
+                added[series_id] = 0
+                continue
+
+            records = _records(response)
+            if records is None:
+                logger.error(f"Unexpected econs response for {series_id}: {str(response)[:200]}")
+                added[series_id] = 0
+                continue
+            rows = [(series_id, str(pd.Timestamp(item["date"]).date()), _to_float(item.get("value")))
+                    for item in records if item.get("date")]
+            with self._lock:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO observations (series_id, date, value) VALUES (?, ?, ?)", rows)
+                added[series_id] = self._conn.total_changes - before
+                self._mark_synced("series", series_id)
+                self._conn.commit()
+            logger.info(f"Synced {added[series_id]} observations for {series_id} since {request_start}")
+        return added
+
+    def series(self, series_id: str, start_date: Optional[str] = None,
+               end_date: Optional[str] = None) -> pd.Series:
+        """读取本地经济序列，索引为日期"""
+        query = "SELECT date, value FROM observations WHERE series_id = ?"
+        params: List = [series_id]
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY date", params).fetchall()
+        return pd.Series([row[1] for row in rows], index=pd.to_datetime([row[0] for row in rows]),
+                         name=series_id, dtype=float)
+
+    def join_onto(self, prices_df: pd.DataFrame, series_ids: List[str],
+                  lag_days: Union[int, Dict[str, int]] = 0, sync: bool = False,
+                  date_column: str = "date", prefix: str = "econ_") -> pd.DataFrame:
+        """把本地经济序列按时点拼接到价格表上，见 asof_join
+
+        Args:
+            prices_df: 含日期列的价格表
+            series_ids: 序列ID列表
+            lag_days: 发布滞后天数
+            sync: 拼接前是否先增量同步（回测中通常为 False，完全离线）
+            date_column: 价格表的日期列
+            prefix: 新增列名前缀
+        """
+        if sync:
+            self.sync_series(series_ids)
+        observations = {series_id: self.series(series_id) for series_id in series_ids}
+        return asof_join(prices_df, observations, lag_days, date_column, prefix)
+
+    # -------------------------------------------------------------------------
+    # 经济日历
+    # -------------------------------------------------------------------------
+
+    def sync_calendar(self, start_date: str = DEFAULT_START_DATE, end_date: Optional[str] = None,
+                      country: Optional[str] = None, max_age_hours: float = 12) -> int:
+        """增量同步经济日历，从本地最后一个事件的日期开始请求
+
+        Args:
+            start_date: 本地没有数据时的起始日期
+            end_date: 结束日期，默认今天之后 CALENDAR_LOOKAHEAD_DAYS 天
+            country: 国家代码过滤
+            max_age_hours: 距上次同步不足该小时数时跳过请求
+
+        Returns:
+            新增或更新的事件数
+        """
+        key = country or "*"
+        with self._lock:
+            if self._recently_synced("calendar", key, max_age_hours):
+                return 0
+            query = "SELECT MAX(timestamp) FROM calendar"
+            params = []
+            if country:
+                query += " WHERE country = ?"
+                params.append(country)
+            last = self._conn.execute(query, params).fetchone()[0]
+
+        # 从最后一天重新请求，补齐同一天较晚发布的事件
+        request_start = start_date if last is None else last[:10]
+        end_date = end_date or (datetime.now() + timedelta(days=CALENDAR_LOOKAHEAD_DAYS)).strftime("%Y-%m-%d")
+        try:
+            response = self.client.get_econs_calendar(start_date=request_start, end_date=end_date,
+                                                      country=country)
+        except Exception as e:
+            logger.error(f"Failed to sync econs calendar: {e}")
+            return 0
+
+        records = _records(response)
+        if records is None:
+            logger.error(f"Unexpected econs calendar response: {str(response)[:200]}")
+            return 0
+        rows = [(str(item["timestamp"]), item.get("country") or country or "",
+                 item.get("nevent", ""), item.get("impact"),
+                 json.dumps(item, ensure_ascii=False))
+                for item in records if item.get("timestamp")]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO calendar (timestamp, country, event, impact, payload)"
+                " VALUES (?, ?, ?, ?, ?)", rows)
+            changed = self._conn.total_changes - before
+            self._mark_synced("calendar", key)
+            self._conn.commit()
+        logger.info(f"Synced {changed} calendar events since {request_start}")
+        return changed
+
+    def calendar(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                 country: Optional[str] = None) -> pd.DataFrame:
+        """读取本地经济日历，列为 timestamp, country, event, impact"""
+        query = "SELECT timestamp, country, event, impact FROM calendar WHERE 1 = 1"
+        params: List = []
+        if start_date:
+            query += " AND timestamp >= ?"
+            params.append(start_date)
+        if end_date:
+            # 包含 end_date 当天的所有事件
+            query += " AND timestamp < ?"
+            params.append((pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime("%Y-%m-%d"))
+        if country:
+            query += " AND country = ?"
+            params.append(country)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY timestamp", params).fetchall()
+        df = pd.DataFrame(rows, columns=["timestamp", "country", "event", "impact"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        return df
+
+
+_default_store: Optional[EconsStore] = None
+
+
+def get_econs_store() -> EconsStore:
+    """进程内共享的默认存储"""
+    global _default_store
+    if _default_store is None:
+        _default_store = EconsStore()
+    return _default_store
+
+
+def get_econs_series(series_id: str, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None, sync: bool = True) -> pd.Series:
+    """获取经济序列：先增量同步（12 小时内只同步一次），再从本地读取"""
+    store = get_econs_store()
+    if sync:
+        store.sync_series(series_id)
+    return store.series(series_id, start_date, end_date)
+
+
+def get_econs_calendar_events(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                              country: Optional[str] = None, sync: bool = True) -> pd.DataFrame:
+    """获取经济日历：先增量同步，再从本地读取"""
+    store = get_econs_store()
+    if sync:
+        store.sync_calendar(country=country)
+    return store.calendar(start_date, end_date, country)
@@ -0,0 +1,172 @@
+"""
+预计算特征存储 (Feature store)
+
+按代码分目录的列式存储，每列一个 .npy 文件，读取时使用内存映射，只加载需要的列和日期区间。
+目录结构:
+    <root>/<symbol>/current.json         当前版本的元数据（列名、行数、日期范围、更新时间）
+    <root>/<symbol>/v<时间戳>/<列名>.npy  各列数据，date 列存为 datetime64[D]
+
+写入时先写新版本目录，再用 os.replace 原子替换 current.json，读者不会看到写了一半的数据。
+特征由 src/feature_job.py 在收盘后批量生成。
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.tools.trading_calendar import get_calendar_for_symbol
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('feature_store')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_FEATURE_DIR = os.path.join(PROJECT_ROOT, "data", "features")
+
+META_FILE = "current.json"
+
+
+class FeatureStore:
+    """列式特征存储
+
+    Args:
+        root: 存储根目录，默认读取环境变量 FEATURE_STORE_DIR，否则为 data/features
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("FEATURE_STORE_DIR") or DEFAULT_FEATURE_DIR
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.root, symbol.replace(os.sep, "_"))
+
+    def meta(self, symbol: str) -> Optional[Dict]:
+        """返回代码当前版本的元数据，不存在时返回 None"""
+        path = os.path.join(self._symbol_dir(symbol), META_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def symbols(self) -> List[str]:
+        """列出已有特征的代码"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, META_FILE)))
+
+    def write(self, symbol: str, df: pd.DataFrame) -> Dict:
+        """写入一个代码的完整特征表，替换旧版本
+
+        Args:
+            symbol: 代码
+            df: 含 date 列的特征表，非数值列会被忽略
+
+        Returns:
+            新版本的元数据
+        """
+        if "date" not in df.columns:
+            raise ValueError("Feature frame must contain a 'date' column")
+        df = df.sort_values("date").reset_index(drop=True)
+
+        symbol_dir = self._symbol_dir(symbol)
+        version = f"v{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        version_dir = os.path.join(symbol_dir, version)
+        os.makedirs(version_dir, exist_ok=True)
+
+        dates = pd.to_datetime(df["date"]).values.astype("datetime64[D]")
+        np.save(os.path.join(version_dir, "date.npy"), dates)
+        columns = []
+        for column in df.columns:
+            if column == "date" or not pd.api.types.is_numeric_dtype(df[column]):
+                continue
+            np.save(os.path.join(version_dir, f"{column}.npy"),
+                    df[column].to_numpy(dtype=np.float64, na_value=np.nan))
+            columns.append(column)
+
+        meta = {
+            "symbol": symbol,
+            "version": version,
+            "columns": columns,
+            "n_rows": int(len(df)),
+            "first_date": str(dates[0]) if len(dates) else None,
+            "last_date": str(dates[-1]) if len(dates) else None,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_meta = os.path.join(symbol_dir, f".{version}.json")
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        previous = self.meta(symbol)
+        os.replace(tmp_meta, os.path.join(symbol_dir, META_FILE))
+
+        # 保留上一个版本给仍在读取的进程，更早的版本删除
+        keep = {version, previous["version"] if previous else None}
+        for name in os.listdir(symbol_dir):
+            if name.startswith("v") and name not in keep:
+                shutil.rmtree(os.path.join(symbol_dir, name), ignore_errors=True)
+        return meta
+
+    def read(self, symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+             columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """读取特征表的日期区间
+
+        Args:
+            symbol: 代码
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+            columns: 需要的列，默认全部
+
+        Returns:
+            含 date 列的DataFrame，没有数据时返回 None
+        """
+        meta = self.meta(symbol)
+        if meta is None:
+            return None
+        version_dir = os.path.join(self._symbol_dir(symbol), meta["version"])
+        try:
+            dates = np.load(os.path.join(version_dir, "date.npy"), mmap_mode="r")
+            lo = 0 if start_date is None else int(np.searchsorted(
+                dates, np.datetime64(pd.Timestamp(start_date).date()), side="left"))
+            hi = len(dates) if end_date is None else int(np.searchsorted(
+                dates, np.datetime64(pd.Timestamp(end_date).date()), side="right"))
+
+            data = {"date": pd.to_datetime(np.asarray(dates[lo:hi]))}
+            for column in columns or meta["columns"]:
+                if column not in meta["columns"]:
+                    continue
+                values = np.load(os.path.join(version_dir, f"{column}.npy"), mmap_mode="r")
+                data[column] = np.asarray(values[lo:hi])
+        except FileNotFoundError:
+            # 读取期间版本被替换两次，由调用方回退到实时计算
+            logger.warning(f"Feature version {meta['version']} of {symbol} disappeared while reading")
+            return None
+        return pd.DataFrame(data)
+
+    def read_fresh(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """仅当特征覆盖完整区间且已更新到 end_date 对应的最近交易日时返回数据
+
+        Args:
+            symbol: 代码
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            特征表，不满足新鲜度要求时返回 None
+        """
+        meta = self.meta(symbol)
+        if meta is None or not meta["n_rows"]:
+            return None
+        last_trading_day = get_calendar_for_symbol(symbol).last_trading_day(end_date)
+        if pd.Timestamp(meta["first_date"]) > pd.Timestamp(start_date):
+            return None
+        if pd.Timestamp(meta["last_date"]) < pd.Timestamp(last_trading_day):
+            return None
+        df = self.read(symbol, start_date, end_date)
+        if df is None or df.empty:
+            return None
+        return df
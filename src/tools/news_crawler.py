@@ -6,7 +6,8 @@ from datetime import datetime
 import akshare as ak
 import requests
 from bs4 import BeautifulSoup
-from src.tools.openrouter_config import get_chat_completion, logger as api_logger
+from src.tools.openrouter_config import get_chat_completion, get_chat_completion_async, logger as api_logger
+from src.utils.http_cache import cached_session
 import time
 import pandas as pd
 import traceback
@@ -123,11 +124,12 @@ def get_us_stock_news(symbol: str, max_news: int = 10) -> list:
                 keywords.append(company_name)
             else:
                 keywords.append(symbol)
+        session = cached_session()
         for kw in keywords:
             try:
                 url = f"https://query2.finance.yahoo.com/v1/finance/search?q={kw}"
                 headers = {'User-Agent': 'Mozilla/5.0'}
-                resp = requests.get(url, headers=headers, timeout=10)
+                resp = session.get(url, headers=headers, timeout=10)
                 resp.raise_for_status()
                 data = resp.json()
                 search_news = data.get('news', [])
@@ -290,6 +292,38 @@ def get_news_sentiment(news_list: list, num_of_news: int = 5) -> float:
     #     print("未找到情感分析缓存文件，将创建新文件")
     #     cache = {}
 
+    try:
+        # 获取LLM分析结果
+        result = get_chat_completion(_sentiment_messages(news_list, num_of_news))
+        return _parse_sentiment(result)
+
+    except Exception as e:
+        print(f"Error analyzing news sentiment: {e}")
+        return 0.0  # 出错时返回中性分数
+
+
+async def get_news_sentiment_async(news_list: list, num_of_news: int = 5) -> float:
+    """get_news_sentiment 的协程版本，用 get_chat_completion_async 调用 LLM
+
+    Args:
+        news_list (list): 新闻列表
+        num_of_news (int): 用于分析的新闻数量，默认为5条
+
+    Returns:
+        float: 情感得分，范围[-1, 1]，-1最消极，1最积极
+    """
+    if not news_list:
+        return 0.0
+    try:
+        result = await get_chat_completion_async(_sentiment_messages(news_list, num_of_news))
+        return _parse_sentiment(result)
+    except Exception as e:
+        print(f"Error analyzing news sentiment: {e}")
+        return 0.0
+
+
+def _sentiment_messages(news_list: list, num_of_news: int) -> list:
+    """情感分析的 LLM 请求消息"""
     # 准备系统消息
     system_message = {
         "role": "system",
@@ -332,37 +366,27 @@ def get_news_sentiment(news_list: list, num_of_news: int = 5) -> float:
         "content": f"请分析以下A股上市公司相关新闻的情感倾向：\n\n{news_content}\n\n请直接返回一个数字，范围是-1到1，无需解释。"
     }
 
-    try:
-        # 获取LLM分析结果
-        result = get_chat_completion([system_message, user_message])
-        if result is None:
-            print("Error: PI error occurred, LLM returned None")
-            return 0.0
+    return [system_message, user_message]
 
-        # 提取数字结果
-        try:
-            sentiment_score = float(result.strip())
-        except ValueError as e:
-            print(f"Error parsing sentiment score: {e}")
-            print(f"Raw result: {result}")
-            return 0.0
 
-        # 确保分数在-1到1之间
-        sentiment_score = max(-1.0, min(1.0, sentiment_score))
+def _parse_sentiment(result) -> float:
+    """把 LLM 的回答解析为 [-1, 1] 内的情感得分"""
+    if result is None:
+        print("Error: PI error occurred, LLM returned None")
+        return 0.0
 
-        # 缓存结果
-        # cache[news_key] = sentiment_score
-        # try:
-        #     with open(cache_file, 'w', encoding='utf-8') as f:
-        #         json.dump(cache, f, ensure_ascii=False, indent=2)
-        # except Exception as e:
-        #     print(f"Error writing cache: {e}")
+    # 提取数字结果
+    try:
+        sentiment_score = float(result.strip())
+    except ValueError as e:
+        print(f"Error parsing sentiment score: {e}")
+        print(f"Raw result: {result}")
+        return 0.0
 
-        return sentiment_score
+    # 确保分数在-1到1之间
+    sentiment_score = max(-1.0, min(1.0, sentiment_score))
 
-    except Exception as e:
-        print(f"Error analyzing news sentiment: {e}")
-        return 0.0  # 出错时返回中性分数
+    return sentiment_score
 
 # 文件末尾添加 main 测试代码，确保 get_stock_news 已定义
 if __name__ == "__main__":
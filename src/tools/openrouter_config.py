@@ -126,3 +126,43 @@ def get_chat_completion(messages, model=None, max_retries=3, initial_retry_delay
     except Exception as e:
         logger.error(f"{ERROR_ICON} get_chat_completion 发生错误: {str(e)}")
         return None
+
+
+async def get_chat_completion_async(messages, model=None, max_retries=3, initial_retry_delay=1,
+                                    client_type="auto", api_key=None, base_url=None):
+    """
+    get_chat_completion 的协程版本，使用 AsyncOpenAI / google-genai 的 client.aio，
+    等待 LLM 响应期间不占用线程，事件循环可以继续推进其它节点
+
+    Args:
+        与 get_chat_completion 相同
+
+    Returns:
+        str: 模型回答内容或 None（如果出错）
+    """
+    try:
+        client = LLMClientFactory.create_client(
+            client_type=client_type,
+            api_key=api_key,
+            base_url=base_url,
+            model=model
+        )
+    except Exception as e:
+        logger.error(f"{ERROR_ICON} get_chat_completion_async 发生错误: {str(e)}")
+        return None
+
+    try:
+        return await client.get_completion_async(
+            messages=messages,
+            max_retries=max_retries,
+            initial_retry_delay=initial_retry_delay
+        )
+    except Exception as e:
+        logger.error(f"{ERROR_ICON} get_chat_completion_async 发生错误: {str(e)}")
+        return None
+    finally:
+        # 关闭连接失败不影响已经得到的回答
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"{ERROR_ICON} 关闭 LLM 客户端失败: {str(e)}")
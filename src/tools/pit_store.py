@@ -0,0 +1,237 @@
+"""
+时点数据存储 (Point-in-time store) - 无前视偏差的回测数据
+
+每条财务指标、财务报表和市场数据快照都带有"获知时间" (known_at)。
+回测时按 "在日期 D 能知道什么" 查询：取 known_at 不晚于 D 当日结束的最新快照。
+
+存储使用 SQLite，查询时把每个 (类型, 代码) 的时间索引加载为有序数组，
+通过二分查找定位，回测中每天的查询都是本地内存操作。
+
+用法:
+    # 定时记录当前快照（例如每日收盘后）
+    python -m src.tools.pit_store --record 600519 000001 AAPL
+
+    # 回测中启用（只对当前线程/上下文生效，并发的回测互不影响）
+    store = PointInTimeStore()
+    token = activate_store(store)
+    ...
+    restore_store(token)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextvars import ContextVar, Token
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('pit_store')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "point_in_time.sqlite")
+
+KINDS = ("financial_metrics", "financial_statements", "market_data")
+
+
+class PointInTimeStore:
+    """带获知时间的快照存储
+
+    Args:
+        db_path: SQLite 文件路径，默认 data/point_in_time.sqlite
+        strict: 回测中查不到快照时是否拒绝回退到实时数据（实时数据会带来前视偏差）
+    """
+
+    def __init__(self, db_path: Optional[str] = None, strict: bool = False):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.strict = strict
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " kind TEXT NOT NULL,"
+            " symbol TEXT NOT NULL,"
+            " known_at TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " PRIMARY KEY (kind, symbol, known_at))")
+        self._conn.commit()
+        # (kind, symbol) -> (有序的 known_at 数组, 对应的快照列表)
+        self._index: Dict[Tuple[str, str], Tuple[np.ndarray, List[Any]]] = {}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(self, kind: str, symbol: str, payload: Any,
+               known_at: Optional[datetime] = None):
+        """写入一条快照
+
+        Args:
+            kind: 快照类型，见 KINDS
+            symbol: 代码
+            payload: 与对应数据接口返回值结构相同的 JSON 可序列化对象
+            known_at: 获知时间，默认当前时间
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown snapshot kind: {kind}")
+        known_at = pd.Timestamp(known_at or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (kind, symbol, known_at, payload) VALUES (?, ?, ?, ?)",
+                (kind, symbol, known_at, json.dumps(payload, ensure_ascii=False, default=str)))
+            self._conn.commit()
+            self._index.pop((kind, symbol), None)
+
+    def _load_index(self, kind: str, symbol: str) -> Tuple[np.ndarray, List[Any]]:
+        key = (kind, symbol)
+        with self._lock:
+            if key not in self._index:
+                rows = self._conn.execute(
+                    "SELECT known_at, payload FROM snapshots WHERE kind = ? AND symbol = ? ORDER BY known_at",
+                    key).fetchall()
+                times = np.array([row[0] for row in rows], dtype="datetime64[s]")
+                self._index[key] = (times, [row[1] for row in rows])
+            return self._index[key]
+
+    def as_of(self, kind: str, symbol: str, as_of_date) -> Optional[Any]:
+        """返回在 as_of_date 当日收盘时已知的最新快照，没有则返回 None
+
+        Args:
+            kind: 快照类型
+            symbol: 代码
+            as_of_date: 日期（字符串或日期对象），按当日 23:59:59 截止
+        """
+        times, payloads = self._load_index(kind, symbol)
+        if len(times) == 0:
+            return None
+        cutoff = np.datetime64(pd.Timestamp(as_of_date).normalize() +
+                               pd.Timedelta(days=1) - pd.Timedelta(seconds=1), "s")
+        position = np.searchsorted(times, cutoff, side="right") - 1
+        if position < 0:
+            return None
+        payload = payloads[position]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+            payloads[position] = payload
+        return payload
+
+    def history(self, kind: str, symbol: str) -> pd.DataFrame:
+        """列出某代码某类型的全部快照时间"""
+        times, _ = self._load_index(kind, symbol)
+        return pd.DataFrame({"known_at": pd.to_datetime(times)})
+
+
+# -----------------------------------------------------------------------------
+# 当前生效的存储：回测时激活，数据智能体据此按时点读取
+# 保存在 ContextVar 中，每个线程（和 asyncio 任务）各自独立，同一进程内并发的回测各用各的存储；
+# 向线程池提交任务时用 contextvars.copy_context() 传递
+# -----------------------------------------------------------------------------
+
+_active_store: ContextVar[Optional[PointInTimeStore]] = ContextVar("pit_active_store", default=None)
+_recording_store: Optional[PointInTimeStore] = None
+
+
+def activate_store(store: Optional[PointInTimeStore]) -> Token:
+    """在当前上下文中激活时点存储，之后 fetch_point_in_time 按 as_of 日期读取快照；传 None 关闭
+
+    Returns:
+        用于 restore_store 恢复之前状态的令牌
+    """
+    return _active_store.set(store)
+
+
+def restore_store(token: Token):
+    """恢复 activate_store 之前的存储（须在同一上下文中调用）"""
+    _active_store.reset(token)
+
+
+def get_active_store() -> Optional[PointInTimeStore]:
+    return _active_store.get()
+
+
+def _get_recording_store() -> Optional[PointInTimeStore]:
+    """POINT_IN_TIME_RECORD=true 时，实时获取的数据同时写入默认存储"""
+    global _recording_store
+    if os.getenv("POINT_IN_TIME_RECORD", "false").lower() not in ("1", "true", "yes"):
+        return None
+    if _recording_store is None:
+        _recording_store = PointInTimeStore()
+    return _recording_store
+
+
+def fetch_point_in_time(kind: str, symbol: str, as_of_date: Optional[str],
+                        live_fetch: Callable[[], Any]) -> Any:
+    """按时点读取数据，回退到实时接口
+
+    激活了时点存储时返回 as_of_date 当日已知的快照；没有快照时，非严格模式下
+    回退到实时接口并记录前视偏差警告，严格模式下返回 None 由调用方使用默认值。
+    未激活时直接调用实时接口，并在开启记录时写入快照。
+
+    Args:
+        kind: 快照类型
+        symbol: 代码
+        as_of_date: 时点日期，通常为分析的 end_date
+        live_fetch: 实时获取函数
+
+    Returns:
+        快照或实时数据，严格模式下缺失时为 None
+    """
+    store = _active_store.get()
+    if store is not None and as_of_date:
+        snapshot = store.as_of(kind, symbol, as_of_date)
+        if snapshot is not None:
+            return snapshot
+        if store.strict:
+            logger.warning(f"No {kind} snapshot for {symbol} as of {as_of_date}")
+            return None
+        logger.warning(
+            f"No {kind} snapshot for {symbol} as of {as_of_date}, falling back to live data (look-ahead bias)")
+        return live_fetch()
+
+    value = live_fetch()
+    recorder = _get_recording_store()
+    if recorder is not None and value:
+        try:
+            recorder.record(kind, symbol, value)
+        except Exception as e:
+            logger.error(f"Failed to record {kind} snapshot for {symbol}: {e}")
+    return value
+
+
+def record_current_snapshots(symbols: List[str], store: Optional[PointInTimeStore] = None):
+    """抓取并记录一组代码当前的财务指标、财务报表和市场数据快照"""
+    from src.tools.api import get_financial_metrics, get_financial_statements, get_market_data
+
+    store = store or PointInTimeStore()
+    fetchers = {
+        "financial_metrics": get_financial_metrics,
+        "financial_statements": get_financial_statements,
+        "market_data": get_market_data,
+    }
+    for symbol in symbols:
+        for kind, fetch in fetchers.items():
+            try:
+                value = fetch(symbol)
+                if value:
+                    store.record(kind, symbol, value)
+            except Exception as e:
+                logger.error(f"Failed to record {kind} for {symbol}: {e}")
+        logger.info(f"Recorded point-in-time snapshots for {symbol}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='记录时点数据快照')
+    parser.add_argument('--record', type=str, nargs='+', required=True,
+                        help='要记录的代码列表')
+    parser.add_argument('--db', type=str, default=None,
+                        help='SQLite 文件路径 (默认: data/point_in_time.sqlite)')
+    args = parser.parse_args()
+    record_current_snapshots(args.record, PointInTimeStore(args.db))
@@ -0,0 +1,266 @@
+"""
+数据源提供者：延迟统计、熔断与对冲请求
+
+同一类数据有多个来源（如A股行情的雪球和东财）时，ProviderGroup 按顺序尝试：
+    - 每个来源记录最近的延迟分布和错误率
+    - 连续失败或错误率过高时熔断，冷却期内直接跳过该来源，之后放行一次试探请求
+    - 开启对冲 (hedge) 时，主来源超过其 p95 延迟仍未返回，就并行向备用来源发出请求，
+      取先成功的结果；慢的一方在后台完成并计入统计
+
+用法:
+    group = ProviderGroup("a_share_market_data", [
+        Provider("xueqiu", fetch_xq),
+        Provider("eastmoney", fetch_em),
+    ], hedge=True)
+    data = group.call("600519")
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.utils.logging_config import setup_logger
+from src.utils.request_deadline import request_deadline
+
+logger = setup_logger('providers')
+
+# 所有提供者共享的线程池；被对冲掉的慢请求也在这里跑完
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="provider")
+
+
+class ProviderError(Exception):
+    """所有来源都失败或被熔断"""
+
+
+class EndpointStats:
+    """滑动窗口内的延迟和成功率统计
+
+    Args:
+        window: 保留的最近调用次数
+    """
+
+    def __init__(self, window: int = 200):
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency)
+
+    @property
+    def count(self) -> int:
+        return len(self._outcomes)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """成功调用的延迟分位数（秒），没有样本时返回 None"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            return float(np.percentile(np.fromiter(self._latencies, dtype=float), q))
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return 1.0 - sum(self._outcomes) / len(self._outcomes)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.count,
+            "error_rate": round(self.error_rate, 4),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+class CircuitBreaker:
+    """熔断器：closed -> open（冷却）-> half_open（放行一次试探）-> closed/open
+
+    Args:
+        failure_threshold: 连续失败多少次后熔断
+        error_rate_threshold: 窗口内错误率超过该值且样本足够时熔断
+        min_calls: 按错误率判断所需的最少样本
+        reset_timeout: 熔断后的冷却秒数
+    """
+
+    def __init__(self, failure_threshold: int = 5, error_rate_threshold: float = 0.5,
+                 min_calls: int = 20, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+                return True
+            if self.state == "half_open":
+                # 试探请求进行中，其他调用继续跳过
+                return False
+            return True
+
+    def record(self, ok: bool, stats: EndpointStats) -> bool:
+        """记录调用结果，返回本次是否触发熔断"""
+        with self._lock:
+            if ok:
+                self._consecutive_failures = 0
+                self.state = "closed"
+                return False
+            self._consecutive_failures += 1
+            should_open = (
+                self.state == "half_open"
+                or self._consecutive_failures >= self.failure_threshold
+                or (stats.count >= self.min_calls and stats.error_rate > self.error_rate_threshold)
+            )
+            if should_open and self.state != "open":
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+
+class Provider:
+    """单个数据来源
+
+    Args:
+        name: 来源名称，用于日志和统计
+        fetch: 获取函数
+        breaker: 熔断器，默认参数见 CircuitBreaker
+        default_hedge_delay: 样本不足时的对冲等待秒数
+        min_samples: 用 p95 作为对冲等待时间所需的最少样本
+    """
+
+    def __init__(self, name: str, fetch: Callable[..., Any], breaker: Optional[CircuitBreaker] = None,
+                 default_hedge_delay: float = 2.0, min_samples: int = 10):
+        self.name = name
+        self.fetch = fetch
+        self.stats = EndpointStats()
+        self.breaker = breaker or CircuitBreaker()
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+
+    def hedge_delay(self) -> float:
+        p95 = self.stats.percentile(95)
+        if p95 is None or self.stats.count < self.min_samples:
+            return self.default_hedge_delay
+        return max(0.05, p95)
+
+
+class ProviderGroup:
+    """同一类数据的多个来源
+
+    Args:
+        name: 分组名称
+        providers: 按优先级排列的来源
+        validate: 判断结果是否有数据的函数，无数据时尝试下一个来源（不计为失败）
+        hedge: 是否在主来源超过 p95 时并行请求备用来源
+        timeout: 整体超时秒数
+    """
+
+    def __init__(self, name: str, providers: List[Provider],
+                 validate: Callable[[Any], bool] = bool, hedge: bool = False, timeout: float = 30.0):
+        self.name = name
+        self.providers = providers
+        self.validate = validate
+        self.hedge = hedge
+        self.timeout = timeout
+
+    def _run(self, provider: Provider, deadline: float, args, kwargs):
+        start = time.perf_counter()
+        try:
+            # 底层 HTTP 请求的超时限制在整体截止时间内，超时的来源不会一直占用工作线程
+            with request_deadline(deadline - time.monotonic()):
+                result = provider.fetch(*args, **kwargs)
+        except Exception:
+            provider.stats.record(time.perf_counter() - start, False)
+            if provider.breaker.record(False, provider.stats):
+                logger.warning(f"{self.name}: circuit opened for {provider.name} "
+                               f"({provider.stats.summary()})")
+            raise
+        provider.stats.record(time.perf_counter() - start, True)
+        provider.breaker.record(True, provider.stats)
+        return result
+
+    def call(self, *args, **kwargs) -> Any:
+        """按优先级获取数据
+
+        Returns:
+            第一个有数据的结果；所有来源都没有数据时返回最后一个结果
+
+        Raises:
+            ProviderError: 所有来源都失败、被熔断或超时
+        """
+        candidates = list(self.providers)
+        deadline = time.monotonic() + self.timeout
+        pending = {}
+        errors = []
+        empty_result = None
+        has_empty = False
+
+        def launch():
+            # 熔断状态在真正发出请求时才检查，半开状态的试探名额不会被白白占用
+            while candidates:
+                provider = candidates.pop(0)
+                if not provider.breaker.allow():
+                    errors.append(f"{provider.name}: circuit open")
+                    continue
+                pending[_executor.submit(contextvars.copy_context().run, self._run,
+                                         provider, deadline, args, kwargs)] = provider
+                return time.monotonic() + provider.hedge_delay() if self.hedge else None
+            return None
+
+        hedge_at = launch()
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wait_until = deadline
+            if candidates and hedge_at is not None:
+                wait_until = min(deadline, hedge_at)
+            done, _ = wait(list(pending), timeout=max(0.0, wait_until - now),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{provider.name}: {e}")
+                    continue
+                if self.validate(result):
+                    if len(self.providers) > 1 and provider is not self.providers[0]:
+                        logger.info(f"{self.name}: served by {provider.name}")
+                    return result
+                empty_result, has_empty = result, True
+
+            # 当前请求都失败/无数据，或主来源超过 p95，启动下一个来源
+            if candidates and (not pending or (hedge_at is not None and time.monotonic() >= hedge_at)):
+                if pending:
+                    logger.info(f"{self.name}: hedging to {candidates[0].name}")
+                hedge_at = launch()
+
+        if has_empty:
+            return empty_result
+        if pending:
+            errors.append(f"timed out after {self.timeout}s")
+        raise ProviderError(f"{self.name}: " + "; ".join(errors))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各来源的统计和熔断状态"""
+        return {p.name: {**p.stats.summary(), "circuit": p.breaker.state} for p in self.providers}
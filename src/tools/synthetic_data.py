@@ -0,0 +1,404 @@
+"""
+合成市场数据生成器 - 用于规模测试和压力测试
+
+生成的数据与真实数据接口保持相同结构，不访问 akshare、yfinance 或 Algogene：
+- K线: 与 get_price_history 的原始列一致（date, open, high, low, close, volume,
+  amount, amplitude, pct_change, change_amount, turnover）
+- 财务指标: 与 get_financial_metrics 返回的 [dict] 一致
+- 财务报表: 与 get_financial_statements 返回的 [当期, 上期] 一致
+- 市场数据: 与 get_market_data 返回的 dict 一致
+- 新闻: 与 get_stock_news 返回的 list[dict] 一致
+
+价格过程为带马尔可夫状态切换的几何布朗运动叠加泊松跳跃，全部按股票维度向量化，
+可在数秒内生成数千只股票 × 数十年的日线。
+"""
+
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ["date", "open", "high", "low", "close", "volume", "amount",
+                 "amplitude", "pct_change", "change_amount", "turnover"]
+
+
+@dataclass
+class RegimeParams:
+    """单个市场状态的参数（年化）
+
+    Attributes:
+        drift: 年化漂移率
+        volatility: 年化波动率
+        jump_intensity: 每年跳跃次数的期望
+        jump_mean: 跳跃幅度（对数收益）均值
+        jump_std: 跳跃幅度（对数收益）标准差
+        volume_scale: 该状态下成交量相对基准的倍数
+    """
+    drift: float
+    volatility: float
+    jump_intensity: float = 0.0
+    jump_mean: float = 0.0
+    jump_std: float = 0.0
+    volume_scale: float = 1.0
+
+
+# 默认两状态：平稳上涨 / 高波动下跌
+DEFAULT_REGIMES = (
+    RegimeParams(drift=0.10, volatility=0.20, jump_intensity=2.0,
+                 jump_mean=0.0, jump_std=0.03, volume_scale=1.0),
+    RegimeParams(drift=-0.15, volatility=0.45, jump_intensity=8.0,
+                 jump_mean=-0.02, jump_std=0.06, volume_scale=1.8),
+)
+
+# 状态转移矩阵（按日），行: 当前状态，列: 下一状态
+DEFAULT_TRANSITIONS = ((0.99, 0.01),
+                       (0.04, 0.96))
+
+
+@dataclass
+class SyntheticPanel:
+    """多只股票的合成日线面板，数组形状均为 (日期数, 股票数)"""
+    symbols: List[str]
+    dates: pd.DatetimeIndex
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    amount: np.ndarray
+    turnover: np.ndarray
+    regimes: np.ndarray
+    shares_outstanding: np.ndarray = field(default=None)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def to_frame(self, symbol: str) -> pd.DataFrame:
+        """将单只股票转换为 get_price_history 原始列格式的DataFrame"""
+        i = self.symbols.index(symbol)
+        close = self.close[:, i]
+        prev_close = np.concatenate(([self.open[0, i]], close[:-1]))
+        df = pd.DataFrame({
+            "date": self.dates,
+            "open": self.open[:, i],
+            "high": self.high[:, i],
+            "low": self.low[:, i],
+            "close": close,
+            "volume": self.volume[:, i],
+            "amount": self.amount[:, i],
+            "amplitude": (self.high[:, i] - self.low[:, i]) / prev_close * 100,
+            "pct_change": (close / prev_close - 1) * 100,
+            "change_amount": close - prev_close,
+            "turnover": self.turnover[:, i],
+        })
+        df.loc[0, ["pct_change", "change_amount"]] = np.nan
+        return df
+
+    def to_long_frame(self) -> pd.DataFrame:
+        """转换为 (date, symbol) 长表，适合批量写入存储"""
+        n_dates, n_symbols = self.close.shape
+        return pd.DataFrame({
+            "date": np.repeat(self.dates.values, n_symbols),
+            "symbol": np.tile(np.asarray(self.symbols, dtype=object), n_dates),
+            "open": self.open.ravel(),
+            "high": self.high.ravel(),
+            "low": self.low.ravel(),
+            "close": self.close.ravel(),
+            "volume": self.volume.ravel(),
+            "amount": self.amount.ravel(),
+            "turnover": self.turnover.ravel(),
+        })
+
+
+def symbol_seed(seed: int, symbol: str) -> int:
+    """由全局种子和股票代码得到稳定的子种子（不受 PYTHONHASHSEED 影响）"""
+    return (seed * 1_000_003 + zlib.crc32(symbol.encode("utf-8"))) % (2 ** 32)
+
+
+def make_symbols(n: int, market: str = "cn") -> List[str]:
+    """生成 n 个格式合法的股票代码
+
+    Args:
+        n: 数量
+        market: "cn" 生成6位数字代码，"us" 生成字母代码
+    """
+    if market == "cn":
+        prefixes = ["600", "601", "603", "000", "002", "300"]
+        return [f"{prefixes[i % len(prefixes)]}{i // len(prefixes):03d}" for i in range(n)]
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    symbols = []
+    for i in range(n):
+        code, k = "", i
+        for _ in range(4):
+            code = letters[k % 26] + code
+            k //= 26
+        symbols.append(code)
+    return symbols
+
+
+def generate_price_panel(
+    symbols: Sequence[str],
+    start_date: str = "2000-01-03",
+    end_date: Optional[str] = None,
+    n_bars: Optional[int] = None,
+    seed: int = 0,
+    freq: str = "B",
+    regimes: Sequence[RegimeParams] = DEFAULT_REGIMES,
+    transitions: Sequence[Sequence[float]] = DEFAULT_TRANSITIONS,
+    lot_size: int = 100,
+    dtype=np.float64,
+) -> SyntheticPanel:
+    """生成多只股票的合成日线面板
+
+    Args:
+        symbols: 股票代码列表
+        start_date: 开始日期，格式：YYYY-MM-DD
+        end_date: 结束日期，与 n_bars 二选一
+        n_bars: K线数量，与 end_date 二选一，都为None时默认250根
+        seed: 随机种子，相同的种子和股票列表产生完全相同的数据
+        freq: 日期频率，"B" 为工作日，"D" 为自然日（虚拟币）
+        regimes: 各市场状态参数
+        transitions: 按日的状态转移矩阵
+        lot_size: 每手股数，成交量以手为单位（与 stock_zh_a_hist 一致），虚拟币传1
+        dtype: 输出数组的数据类型，大规模生成时可用 np.float32 减半内存
+
+    Returns:
+        SyntheticPanel
+    """
+    symbols = list(symbols)
+    if end_date is not None:
+        dates = pd.date_range(start_date, end_date, freq=freq)
+    else:
+        dates = pd.date_range(start_date, periods=n_bars or 250, freq=freq)
+    n_dates, n_symbols = len(dates), len(symbols)
+    rng = np.random.default_rng(seed)
+    periods_per_year = 365 if freq == "D" else 252
+    dt = 1.0 / periods_per_year
+
+    drift = np.array([r.drift for r in regimes])
+    vol = np.array([r.volatility for r in regimes])
+    jump_lambda = np.array([r.jump_intensity for r in regimes]) * dt
+    jump_mean = np.array([r.jump_mean for r in regimes])
+    jump_std = np.array([r.jump_std for r in regimes])
+    volume_scale = np.array([r.volume_scale for r in regimes])
+
+    # 1. 马尔可夫状态切换：逐日推进，按股票向量化
+    cumulative = np.cumsum(np.asarray(transitions, dtype=np.float64), axis=1)
+    state = np.zeros((n_dates, n_symbols), dtype=np.int8)
+    state[0] = rng.integers(0, len(regimes), n_symbols)
+    uniforms = rng.random((n_dates, n_symbols))
+    for t in range(1, n_dates):
+        thresholds = cumulative[state[t - 1]]
+        state[t] = (uniforms[t][:, None] > thresholds[:, :-1]).sum(axis=1)
+
+    # 2. 每只股票的个体差异
+    symbol_vol_scale = rng.lognormal(0.0, 0.25, n_symbols)
+    initial_price = rng.lognormal(np.log(20.0), 0.8, n_symbols)
+    base_volume = rng.lognormal(np.log(2e5), 1.0, n_symbols)
+    shares_outstanding = base_volume * lot_size * rng.uniform(80, 400, n_symbols)
+
+    # 3. 几何布朗运动 + 泊松跳跃的对数收益
+    sigma = vol[state] * symbol_vol_scale
+    log_returns = (drift[state] - 0.5 * sigma ** 2) * dt + \
+        sigma * np.sqrt(dt) * rng.standard_normal((n_dates, n_symbols))
+    jumps = rng.poisson(jump_lambda[state])
+    has_jump = jumps > 0
+    log_returns[has_jump] += jumps[has_jump] * jump_mean[state[has_jump]] + \
+        np.sqrt(jumps[has_jump]) * jump_std[state[has_jump]] * \
+        rng.standard_normal(has_jump.sum())
+    log_returns[0] = 0.0
+    close = initial_price * np.exp(np.cumsum(log_returns, axis=0))
+
+    # 4. 开高低：开盘跳空 + 日内振幅与波动率相关
+    prev_close = np.vstack([initial_price, close[:-1]])
+    open_ = prev_close * np.exp(0.25 * sigma * np.sqrt(dt) *
+                                rng.standard_normal((n_dates, n_symbols)))
+    intraday = 0.5 * sigma * np.sqrt(dt)
+    high = np.maximum(open_, close) * \
+        np.exp(np.abs(rng.standard_normal((n_dates, n_symbols))) * intraday)
+    low = np.minimum(open_, close) * \
+        np.exp(-np.abs(rng.standard_normal((n_dates, n_symbols))) * intraday)
+
+    # 5. 成交量与状态、收益绝对值正相关
+    abs_move = np.abs(log_returns) / (sigma * np.sqrt(dt))
+    volume = base_volume * volume_scale[state] * (0.6 + 0.4 * abs_move) * \
+        rng.lognormal(0.0, 0.3, (n_dates, n_symbols))
+    volume = np.round(volume)
+    typical_price = (high + low + close) / 3
+    amount = volume * lot_size * typical_price
+    turnover = volume * lot_size / shares_outstanding * 100
+
+    return SyntheticPanel(
+        symbols=symbols,
+        dates=dates,
+        open=open_.astype(dtype, copy=False),
+        high=high.astype(dtype, copy=False),
+        low=low.astype(dtype, copy=False),
+        close=close.astype(dtype, copy=False),
+        volume=volume.astype(dtype, copy=False),
+        amount=amount.astype(dtype, copy=False),
+        turnover=turnover.astype(dtype, copy=False),
+        regimes=state,
+        shares_outstanding=shares_outstanding,
+    )
+
+
+def iter_price_panels(symbols: Sequence[str], chunk_size: int = 500, seed: int = 0,
+                      **kwargs) -> Iterator[SyntheticPanel]:
+    """按股票分块生成面板，避免一次性生成超大数组
+
+    每块使用 (seed, 块序号) 派生的种子，相同参数下结果可复现。
+    """
+    symbols = list(symbols)
+    for chunk_index, start in enumerate(range(0, len(symbols), chunk_size)):
+        yield generate_price_panel(symbols[start:start + chunk_size],
+                                   seed=seed * 1_000_003 + chunk_index, **kwargs)
+
+
+def generate_price_history(symbol: str, start_date: str = "2000-01-03",
+                           end_date: Optional[str] = None, n_bars: Optional[int] = None,
+                           seed: int = 0, **kwargs) -> pd.DataFrame:
+    """生成单只股票的合成K线，格式与 get_price_history 的原始列一致
+
+    如需技术指标列，可再调用 src.tools.api.enrich_price_history。
+    """
+    panel = generate_price_panel([symbol], start_date=start_date, end_date=end_date,
+                                 n_bars=n_bars, seed=symbol_seed(seed, symbol), **kwargs)
+    return panel.to_frame(symbol)
+
+
+def generate_financial_metrics(symbol: str, price: Optional[float] = None,
+                               seed: int = 0) -> List[Dict[str, Any]]:
+    """生成与 get_financial_metrics 结构一致的财务指标
+
+    Args:
+        symbol: 股票代码
+        price: 最新价格，提供时市盈率、市净率与价格保持一致
+        seed: 随机种子
+
+    Returns:
+        只包含一个指标字典的列表
+    """
+    rng = np.random.default_rng(symbol_seed(seed, symbol))
+    price = price if price is not None else float(rng.lognormal(np.log(20.0), 0.8))
+    earnings_per_share = float(rng.normal(0.04, 0.05) * price)
+    book_value_per_share = float(price / rng.lognormal(np.log(2.5), 0.5))
+    revenue_per_share = float(price / rng.lognormal(np.log(3.0), 0.6))
+    return [{
+        "return_on_equity": float(rng.normal(0.12, 0.08)),
+        "net_margin": float(rng.normal(0.12, 0.1)),
+        "operating_margin": float(rng.normal(0.15, 0.1)),
+        "revenue_growth": float(rng.normal(0.08, 0.15)),
+        "earnings_growth": float(rng.normal(0.06, 0.25)),
+        "book_value_growth": float(rng.normal(0.07, 0.1)),
+        "current_ratio": float(rng.lognormal(np.log(1.6), 0.4)),
+        "debt_to_equity": float(rng.uniform(0.1, 0.8)),
+        "free_cash_flow_per_share": float(rng.normal(0.03, 0.05) * price),
+        "earnings_per_share": earnings_per_share,
+        "pe_ratio": price / earnings_per_share if earnings_per_share > 0 else 0,
+        "price_to_book": price / book_value_per_share,
+        "price_to_sales": price / revenue_per_share,
+    }]
+
+
+def generate_financial_statements(symbol: str, seed: int = 0) -> List[Dict[str, Any]]:
+    """生成与 get_financial_statements 结构一致的 [当期, 上期] 财务报表"""
+    rng = np.random.default_rng(symbol_seed(seed, symbol) + 1)
+    revenue = float(rng.lognormal(np.log(5e9), 1.2))
+    line_items = []
+    for _ in range(2):
+        operating_profit = revenue * float(rng.normal(0.15, 0.08))
+        net_income = operating_profit * float(rng.uniform(0.6, 0.85))
+        depreciation = revenue * float(rng.uniform(0.02, 0.06))
+        capex = revenue * float(rng.uniform(0.03, 0.10))
+        operating_cash_flow = net_income + depreciation * float(rng.uniform(0.8, 1.3))
+        line_items.append({
+            "net_income": net_income,
+            "operating_revenue": revenue,
+            "operating_profit": operating_profit,
+            "working_capital": revenue * float(rng.normal(0.15, 0.1)),
+            "depreciation_and_amortization": depreciation,
+            "capital_expenditure": capex,
+            "free_cash_flow": operating_cash_flow - capex,
+        })
+        # 上一期的收入按增长率回推
+        revenue = revenue / (1 + float(rng.normal(0.08, 0.1)))
+    return line_items
+
+
+def generate_market_data(prices_df: pd.DataFrame, shares_outstanding: Optional[float] = None,
+                         lot_size: int = 100) -> Dict[str, Any]:
+    """根据合成K线生成与 get_market_data 结构一致的市场数据"""
+    recent = prices_df.tail(252)
+    last_close = float(recent["close"].iloc[-1])
+    if shares_outstanding is None:
+        last_turnover = float(recent["turnover"].iloc[-1] or 0)
+        shares_outstanding = (float(recent["volume"].iloc[-1]) * lot_size / last_turnover * 100
+                              if last_turnover > 0 else 0)
+    return {
+        "market_cap": last_close * shares_outstanding,
+        "volume": float(recent["volume"].iloc[-1]),
+        "average_volume": float(recent["volume"].mean()),
+        "fifty_two_week_high": float(recent["high"].max()),
+        "fifty_two_week_low": float(recent["low"].min()),
+    }
+
+
+_NEWS_TEMPLATES = {
+    "bullish": [
+        "{name}业绩超预期，机构上调目标价",
+        "{name}获得大额订单，主营业务持续增长",
+        "北向资金连续加仓{name}",
+    ],
+    "bearish": [
+        "{name}业绩不及预期，多家机构下调评级",
+        "{name}大股东拟减持公司股份",
+        "{name}收到监管问询函",
+    ],
+    "neutral": [
+        "{name}召开年度股东大会",
+        "{name}发布投资者关系活动记录表",
+        "{name}董事会换届选举完成",
+    ],
+}
+_NEWS_SOURCES = ["证券时报", "上海证券报", "中国证券报", "财联社", "东方财富网"]
+
+
+def generate_stock_news(symbol: str, max_news: int = 10, end_date: Optional[str] = None,
+                        bias: float = 0.0, seed: int = 0) -> List[Dict[str, Any]]:
+    """生成与 get_stock_news 结构一致的合成新闻
+
+    Args:
+        symbol: 股票代码
+        max_news: 新闻条数
+        end_date: 最新一条新闻的日期，默认今天
+        bias: 情绪倾向，-1 偏空到 1 偏多，可用近期收益率驱动
+        seed: 随机种子
+
+    Returns:
+        按发布时间倒序排列的新闻列表
+    """
+    rng = np.random.default_rng(symbol_seed(seed, symbol) + 2)
+    end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.now()
+    p_bull = 0.33 + 0.33 * max(min(bias, 1.0), -1.0)
+    p_bear = 0.33 - 0.33 * max(min(bias, 1.0), -1.0)
+    probs = np.array([p_bull, p_bear, 1 - p_bull - p_bear])
+    labels = rng.choice(["bullish", "bearish", "neutral"], size=max_news, p=probs / probs.sum())
+
+    news_list = []
+    for i, label in enumerate(labels):
+        title = rng.choice(_NEWS_TEMPLATES[label]).format(name=f"公司{symbol}")
+        publish_time = end - timedelta(hours=float(rng.uniform(0, 24 * 7)))
+        news_list.append({
+            "title": title,
+            "content": f"{title}。本文为合成测试数据，仅用于性能与负载测试。",
+            "publish_time": publish_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "source": str(rng.choice(_NEWS_SOURCES)),
+            "url": f"https://example.com/news/{symbol}/{i}",
+            "keyword": symbol,
+        })
+    news_list.sort(key=lambda x: x["publish_time"], reverse=True)
+    return news_list
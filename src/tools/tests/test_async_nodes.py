@@ -0,0 +1,227 @@
+"""
+Unit tests for the async agent graph and the async LLM client paths.
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from collections import Counter
+from types import SimpleNamespace
+from unittest import mock
+
+from langchain_core.messages import HumanMessage
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src import main
+from src.tools import openrouter_config
+from src.utils.api_utils import agent_endpoint, log_llm_interaction
+from src.utils.async_nodes import async_node, sync_node
+from src.utils.llm_clients import GeminiClient, OpenAICompatibleClient
+from src.utils.node_cache import NodeCache
+
+# 调用 LLM 的节点是 async def，其余节点是同步函数
+LLM_NODES = ("sentiment_agent", "macro_news_agent", "macro_analyst_agent",
+             "debate_room_agent", "portfolio_management_agent")
+SYNC_NODES = ("market_data_agent", "technical_analyst_agent", "fundamentals_agent",
+              "researcher_bull_agent", "researcher_bear_agent", "risk_management_agent")
+FAN_OUT = ("technical_analyst_agent", "fundamentals_agent", "sentiment_agent", "macro_news_agent")
+BRANCH_SECONDS = 0.3
+
+
+def _initial_state():
+    return {
+        "messages": [HumanMessage(content="Make trading decisions based on the provided data.")],
+        "data": {"ticker": "600519", "start_date": "2024-01-01", "end_date": "2024-06-28",
+                 "portfolio": {"cash": 100000.0, "stock": 0}, "num_of_news": 5},
+        "metadata": {"show_reasoning": False, "run_id": "test-async-nodes"},
+    }
+
+
+def _output(name, state):
+    seen = sorted(m.name or "" for m in state["messages"])
+    message = HumanMessage(content=json.dumps({"node": name, "seen": seen}), name=name)
+    return {"messages": [message], "data": {**state["data"], name: len(seen)},
+            "metadata": state["metadata"]}
+
+
+def _stub_agents(calls, delays):
+    """与 src.main 中同名的桩节点：LLM 节点用 asyncio.sleep 模拟 LLM 调用，其余节点用 time.sleep 模拟同步 I/O"""
+    agents = {}
+    for name in SYNC_NODES:
+        def node(state, name=name):
+            calls[name] += 1
+            time.sleep(delays.get(name, 0))
+            return _output(name, state)
+        node.__name__ = name
+        agents[name] = node
+    for name in LLM_NODES:
+        async def node(state, name=name):
+            calls[name] += 1
+            await asyncio.sleep(delays.get(name, 0))
+            return _output(name, state)
+        node.__name__ = name
+        agents[name] = agent_endpoint(f"test_{name}")(node)
+    return agents
+
+
+class TestAsyncGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = Counter()
+
+    def _graph(self, wrap, delays=None, cache=None):
+        agents = _stub_agents(self.calls, delays or {})
+        with mock.patch.multiple(main, **agents):
+            return main.build_workflow(wrap, cache=cache).compile()
+
+    def _assert_same_state(self, actual, expected):
+        self.assertEqual([(m.name, m.content) for m in actual["messages"]],
+                         [(m.name, m.content) for m in expected["messages"]])
+        self.assertEqual(actual["data"], expected["data"])
+        self.assertEqual(actual["metadata"], expected["metadata"])
+
+    def test_llm_nodes_are_coroutines(self):
+        for name in LLM_NODES:
+            self.assertTrue(inspect.iscoroutinefunction(getattr(main, name)), name)
+        self.assertFalse(inspect.iscoroutinefunction(sync_node(main.sentiment_agent)))
+        self.assertTrue(inspect.iscoroutinefunction(async_node(main.technical_analyst_agent)))
+
+    def test_ainvoke_matches_invoke(self):
+        expected = self._graph(sync_node).invoke(_initial_state())
+        actual = asyncio.run(self._graph(async_node).ainvoke(_initial_state()))
+
+        self._assert_same_state(actual, expected)
+        self.assertEqual(set(self.calls.values()), {2})
+        self.assertEqual(json.loads(actual["messages"][-1].content)["node"],
+                         "portfolio_management_agent")
+
+    def test_sync_invoke_inside_running_loop(self):
+        # 在协程中调用同步的 run_hedge_fund 时，协程节点不能在已有事件循环的线程中 asyncio.run
+        expected = self._graph(sync_node).invoke(_initial_state())
+
+        async def call_sync():
+            return self._graph(sync_node).invoke(_initial_state())
+
+        self._assert_same_state(asyncio.run(call_sync()), expected)
+
+    def test_fan_out_takes_max_branch(self):
+        graph = self._graph(async_node, {name: BRANCH_SECONDS for name in FAN_OUT})
+        start = time.perf_counter()
+        asyncio.run(graph.ainvoke(_initial_state()))
+        elapsed = time.perf_counter() - start
+
+        # 串行执行需要 4 × 0.3 秒
+        self.assertLess(elapsed, 2 * BRANCH_SECONDS)
+        self.assertGreaterEqual(elapsed, BRANCH_SECONDS)
+
+    def test_node_cache_wraps_coroutine_nodes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = NodeCache(os.path.join(tmpdir, "nodes.sqlite"), model="test-model")
+            try:
+                graph = self._graph(async_node, cache=cache)
+                first = asyncio.run(graph.ainvoke(_initial_state()))
+                second = asyncio.run(graph.ainvoke(_initial_state()))
+            finally:
+                cache.close()
+
+        self.assertEqual(cache.hits, 11)
+        self.assertEqual(set(self.calls.values()), {1})
+        self._assert_same_state(second, first)
+
+
+class TestAsyncLLMClients(unittest.TestCase):
+
+    def test_openai_compatible_uses_async_client(self):
+        client = OpenAICompatibleClient(api_key="key", base_url="http://localhost:1/v1", model="m")
+        response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="0.6"))])
+        async_client = mock.Mock()
+        async_client.chat.completions.create = mock.AsyncMock(return_value=response)
+        async_client.close = mock.AsyncMock()
+        client._async_client = async_client
+        client.client = mock.Mock()
+
+        async def run():
+            result = await client.get_completion_async([{"role": "user", "content": "hi"}])
+            await client.aclose()
+            return result
+
+        self.assertEqual(asyncio.run(run()), "0.6")
+        async_client.chat.completions.create.assert_awaited_once_with(
+            model="m", messages=[{"role": "user", "content": "hi"}])
+        async_client.close.assert_awaited_once()
+        client.client.chat.completions.create.assert_not_called()
+
+    def test_gemini_uses_aio_client(self):
+        client = GeminiClient(api_key="key", model="gemini-test")
+        client.client = mock.Mock()
+        client.client.aio.models.generate_content = mock.AsyncMock(
+            return_value=SimpleNamespace(text="-0.2"))
+        messages = [{"role": "system", "content": "be brief"}, {"role": "user", "content": "news"}]
+
+        self.assertEqual(asyncio.run(client.get_completion_async(messages)), "-0.2")
+        client.client.aio.models.generate_content.assert_awaited_once_with(
+            model="gemini-test", contents="User: news", config={"system_instruction": "be brief"})
+        client.client.models.generate_content.assert_not_called()
+
+    def test_get_chat_completion_async_closes_client(self):
+        client = mock.Mock()
+        client.get_completion_async = mock.AsyncMock(return_value="answer")
+        client.aclose = mock.AsyncMock()
+        with mock.patch.object(openrouter_config.LLMClientFactory, "create_client", return_value=client):
+            result = asyncio.run(openrouter_config.get_chat_completion_async([{"role": "user", "content": "q"}]))
+
+        self.assertEqual(result, "answer")
+        client.aclose.assert_awaited_once()
+
+    def test_close_failure_keeps_answer(self):
+        client = mock.Mock()
+        client.get_completion_async = mock.AsyncMock(return_value="answer")
+        client.aclose = mock.AsyncMock(side_effect=RuntimeError("close failed"))
+        with mock.patch.object(openrouter_config.LLMClientFactory, "create_client", return_value=client):
+            result = asyncio.run(openrouter_config.get_chat_completion_async([{"role": "user", "content": "q"}]))
+
+        self.assertEqual(result, "answer")
+
+    def _gemini_completion(self, client):
+        # 只替换发出请求的 generate_content，client.aio 和它的 aclose 使用 google-genai 的真实对象
+        response = SimpleNamespace(text="0.3")
+        with mock.patch.object(client.client.aio.models, "generate_content",
+                               mock.AsyncMock(return_value=response)), \
+                mock.patch.object(openrouter_config.LLMClientFactory, "create_client", return_value=client):
+            return asyncio.run(openrouter_config.get_chat_completion_async([{"role": "user", "content": "q"}]))
+
+    def test_gemini_with_real_aio_client(self):
+        self.assertEqual(self._gemini_completion(GeminiClient(api_key="key", model="gemini-test")), "0.3")
+
+    def test_gemini_aio_client_without_aclose(self):
+        # google-genai 0.6.0 的 AsyncClient 没有 aclose
+        client = GeminiClient(api_key="key", model="gemini-test")
+        aio_type = type(client.client.aio)
+        aclose = aio_type.__dict__.get("aclose")
+        if aclose is not None:
+            delattr(aio_type, "aclose")
+            self.addCleanup(setattr, aio_type, "aclose", aclose)
+        self.assertFalse(hasattr(client.client.aio, "aclose"))
+
+        self.assertEqual(self._gemini_completion(client), "0.3")
+
+    def test_log_llm_interaction_awaits_coroutines(self):
+        async def completion():
+            await asyncio.sleep(0)
+            return "logged"
+
+        state = {"metadata": {"current_agent_name": "test_llm_logging", "run_id": "r"}}
+        result = asyncio.run(log_llm_interaction(state)(lambda: completion())())
+        self.assertEqual(result, "logged")
+
+
+if __name__ == "__main__":
+    unittest.main()
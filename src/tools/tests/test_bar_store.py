@@ -0,0 +1,92 @@
+"""
+Unit tests for the memory-mapped shared bar store.
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.tools.bar_store import MIN_CAPACITY, BarStoreWriter, SharedBarStore
+from src.tools.synthetic_data import generate_price_history
+
+
+def _read_last_close(root, symbol):
+    return float(SharedBarStore(root).frame(symbol)["close"].iloc[-1])
+
+
+class TestSharedBarStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        self.bars = generate_price_history("600519", start_date="2023-01-03", n_bars=600, seed=5)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_append_is_incremental_and_idempotent(self):
+        with BarStoreWriter(self.root) as writer:
+            self.assertEqual(writer.append("600519", self.bars.iloc[:100]), 100)
+            self.assertEqual(writer.append("600519", self.bars.iloc[:150]), 50)
+            self.assertEqual(writer.append("600519", self.bars.iloc[:150]), 0)
+
+        df = SharedBarStore(self.root).frame("600519")
+        self.assertEqual(len(df), 150)
+        np.testing.assert_allclose(df["close"].to_numpy(), self.bars["close"].iloc[:150].to_numpy())
+
+    def test_relocation_keeps_other_symbols_intact(self):
+        other = generate_price_history("000001", start_date="2023-01-03", n_bars=50, seed=6)
+        with BarStoreWriter(self.root) as writer:
+            writer.append("600519", self.bars.iloc[:10])
+            writer.append("000001", other)
+            # 超出预留容量，整段迁移到文件末尾
+            writer.append("600519", self.bars.iloc[:MIN_CAPACITY + 100])
+
+        store = SharedBarStore(self.root)
+        self.assertEqual(store.symbols(), ["000001", "600519"])
+        np.testing.assert_allclose(store.frame("000001")["close"].to_numpy(),
+                                   other["close"].to_numpy())
+        self.assertEqual(len(store.frame("600519")), MIN_CAPACITY + 100)
+
+    def test_reader_sees_new_bars_after_refresh(self):
+        with BarStoreWriter(self.root) as writer:
+            writer.append("600519", self.bars.iloc[:100])
+        store = SharedBarStore(self.root)
+        view = store.arrays("600519")["close"]
+        self.assertEqual(len(view), 100)
+        self.assertFalse(view.flags.writeable)
+
+        with BarStoreWriter(self.root) as writer:
+            writer.append("600519", self.bars.iloc[:120])
+            generation = writer.compact()
+        self.assertEqual(generation, 1)
+        # 旧视图仍然有效，新读取看到追加和压缩后的数据
+        self.assertEqual(len(view), 100)
+        df = store.frame("600519", "2023-02-01", "2023-02-28")
+        expected = self.bars[(self.bars["date"] >= "2023-02-01") & (self.bars["date"] <= "2023-02-28")]
+        np.testing.assert_allclose(df["close"].to_numpy(), expected["close"].to_numpy())
+        self.assertEqual(len(store.frame("600519")), 120)
+
+    def test_other_process_reads_shared_files(self):
+        with BarStoreWriter(self.root) as writer:
+            writer.append("600519", self.bars)
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(1) as pool:
+            last_close = pool.apply(_read_last_close, (self.root, "600519"))
+        self.assertAlmostEqual(last_close, float(self.bars["close"].iloc[-1]))
+
+    def test_writer_requires_context(self):
+        with self.assertRaises(RuntimeError):
+            BarStoreWriter(self.root).append("600519", self.bars)
+
+
+if __name__ == "__main__":
+    unittest.main()
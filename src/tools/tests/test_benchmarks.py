@@ -0,0 +1,48 @@
+"""
+Smoke test for the benchmark runner on a tiny synthetic input.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from benchmarks import run_benchmarks
+
+
+class TestRunBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.baseline = os.path.join(self.tmpdir.name, "baseline.json")
+        self.args = ["--filter", "calculate_obv", "--sizes", "200", "--baseline", self.baseline,
+                     "--results-dir", os.path.join(self.tmpdir.name, "results")]
+
+    def test_missing_baseline_fails(self):
+        self.assertEqual(run_benchmarks.main(self.args), run_benchmarks.MISSING_BASELINE_EXIT)
+
+    def test_save_and_compare_one_case(self):
+        self.assertEqual(run_benchmarks.main(self.args + ["--save-baseline"]), 0)
+        with open(self.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        self.assertEqual(list(baseline["results"]), ["calculate_obv[200]"])
+        self.assertGreater(baseline["results"]["calculate_obv[200]"]["min"], 0)
+
+        # 阈值足够大时同一段代码不应被判为回归
+        self.assertEqual(run_benchmarks.main(self.args + ["--threshold", "100"]), 0)
+
+        # 基线被人为调快后应检测到回归
+        baseline["results"]["calculate_obv[200]"]["min"] /= 1000
+        with open(self.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f)
+        self.assertEqual(run_benchmarks.main(self.args), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tolerance and memory tests for the compact float32/categorical price frames.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.agents.risk_manager import calculate_risk_metrics
+from src.agents.technicals import calculate_hurst_exponent
+from src.tools.api import compact_price_frame, enrich_price_history, prices_to_df
+from src.tools.synthetic_data import generate_price_history
+
+
+class TestCompactPriceFrame(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        prices = generate_price_history("000001", start_date="2021-01-04",
+                                        end_date="2024-06-28", seed=7)
+        cls.full = enrich_price_history(prices)
+        cls.full["symbol"] = "000001"
+        cls.compact = compact_price_frame(cls.full)
+
+    def test_memory_footprint_halved(self):
+        full_bytes = self.full.memory_usage(deep=True).sum()
+        compact_bytes = self.compact.memory_usage(deep=True).sum()
+        self.assertLess(compact_bytes, full_bytes / 2)
+
+    def test_dtypes(self):
+        self.assertEqual(self.compact["close"].dtype, np.float32)
+        self.assertEqual(self.compact["momentum_1m"].dtype, np.float32)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(self.compact["date"]))
+        self.assertIsInstance(self.compact["symbol"].dtype, pd.CategoricalDtype)
+        # 形如数字的代码不能被转换为数值
+        self.assertEqual(self.compact["symbol"].iloc[0], "000001")
+        self.assertEqual(list(self.compact.columns), list(self.full.columns))
+
+    def test_prices_to_df_records(self):
+        records = self.full.assign(date=self.full["date"].dt.strftime("%Y-%m-%d")).to_dict("records")
+        df = prices_to_df(records, compact=True)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["date"]))
+        self.assertEqual(df["close"].dtype, np.float32)
+        self.assertEqual(prices_to_df(records, compact=False)["close"].dtype, np.float64)
+
+    def test_var_and_risk_metrics_within_tolerance(self):
+        full = calculate_risk_metrics(self.full)
+        compact = calculate_risk_metrics(self.compact)
+        for key in ("volatility", "var_95", "max_drawdown", "volatility_percentile"):
+            self.assertAlmostEqual(compact[key], full[key], delta=abs(full[key]) * 1e-4 + 1e-7, msg=key)
+
+    def test_hurst_within_tolerance(self):
+        self.assertAlmostEqual(calculate_hurst_exponent(self.compact["close"]),
+                               calculate_hurst_exponent(self.full["close"]), delta=1e-3)
+        # 在紧凑数据上重新计算衍生指标，滚动 Hurst 与 float64 结果一致
+        raw_columns = ["date", "open", "high", "low", "close", "volume"]
+        rolling_full = enrich_price_history(self.full[raw_columns].copy())["hurst_exponent"]
+        rolling_compact = enrich_price_history(self.compact[raw_columns].copy())["hurst_exponent"]
+        np.testing.assert_allclose(rolling_compact.to_numpy(dtype=float),
+                                   rolling_full.to_numpy(dtype=float),
+                                   atol=1e-3, equal_nan=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
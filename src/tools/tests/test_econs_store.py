@@ -0,0 +1,110 @@
+"""
+Unit tests for the local economic series / calendar store.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.tools.econs_store import EconsStore, asof_join
+
+
+class _FakeClient:
+    """模拟 AlgogeneClient 的经济数据接口，记录请求参数"""
+
+    def __init__(self):
+        self.requests = []
+        self.observations = [
+            {"date": "2024-01-31", "value": 3.1},
+            {"date": "2024-02-29", "value": 3.2},
+            {"date": "2024-03-31", "value": 3.5},
+        ]
+
+    def get_econs_statistics(self, series_id, start_date=None, end_date=None):
+        self.requests.append(("stat", series_id, start_date))
+        res = [o for o in self.observations if o["date"] >= start_date]
+        return {"count": len(res), "res": res, "series_id": series_id}
+
+    def get_econs_calendar(self, start_date=None, end_date=None, country=None):
+        self.requests.append(("calendar", country, start_date))
+        return {"count": 2, "res": [
+            {"timestamp": "2024-03-12 12:30:00", "nevent": "CPI m/m", "impact": "High Impact Expected", "country": "US"},
+            {"timestamp": "2024-03-15 12:30:00", "nevent": "Retail Sales", "impact": "Low Impact Expected", "country": "US"},
+        ]}
+
+
+class TestEconsStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.client = _FakeClient()
+        self.store = EconsStore(os.path.join(self.tmpdir.name, "econs.sqlite"), client=self.client)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_incremental_sync_requests_only_new_observations(self):
+        self.assertEqual(self.store.sync_series("CPI", max_age_hours=0), {"CPI": 3})
+        self.client.observations.append({"date": "2024-04-30", "value": 3.4})
+        self.assertEqual(self.store.sync_series("CPI", max_age_hours=0), {"CPI": 1})
+        self.assertEqual(self.client.requests[-1], ("stat", "CPI", "2024-04-01"))
+        self.assertEqual(self.store.series("CPI").tolist(), [3.1, 3.2, 3.5, 3.4])
+
+    def test_recent_sync_skips_request(self):
+        self.store.sync_series("CPI")
+        self.store.sync_series("CPI")
+        self.assertEqual(len(self.client.requests), 1)
+
+    def test_calendar_sync_and_read(self):
+        self.assertEqual(self.store.sync_calendar(country="US", max_age_hours=0), 2)
+        self.store.sync_calendar(country="US", max_age_hours=0)
+        # 第二次从最后一个事件当天开始请求
+        self.assertEqual(self.client.requests[-1], ("calendar", "US", "2024-03-15"))
+        events = self.store.calendar("2024-03-01", "2024-03-12", country="US")
+        self.assertEqual(events["event"].tolist(), ["CPI m/m"])
+
+    def test_malformed_response_does_not_abort_sync(self):
+        responses = {"ERR": {"res": "invalid series"}, "NONE": None, "ROWS": {"res": ["2024-01-31"]}}
+        statistics = self.client.get_econs_statistics
+        with mock.patch.object(self.client, "get_econs_statistics",
+                               side_effect=lambda series_id, **kwargs: responses[series_id]
+                               if series_id in responses else statistics(series_id, **kwargs)):
+            added = self.store.sync_series(["ERR", "NONE", "ROWS", "CPI"], max_age_hours=0)
+        self.assertEqual(added, {"ERR": 0, "NONE": 0, "ROWS": 0, "CPI": 3})
+        self.assertEqual(self.store.series("CPI").tolist(), [3.1, 3.2, 3.5])
+
+        with mock.patch.object(self.client, "get_econs_calendar", return_value={"res": {"error": "quota"}}):
+            self.assertEqual(self.store.sync_calendar(country="US", max_age_hours=0), 0)
+        # 格式不符的返回值不记为已同步，下次照常请求
+        self.assertEqual(self.store.sync_calendar(country="US"), 2)
+
+    def test_join_onto_respects_publication_lag(self):
+        self.store.sync_series("CPI")
+        prices = pd.DataFrame({
+            "date": pd.to_datetime(["2024-03-20", "2024-02-10", "2024-01-15", "2024-04-20"]),
+            "close": [1.0, 2.0, 3.0, 4.0],
+        })
+        joined = self.store.join_onto(prices, ["CPI"], lag_days={"CPI": 15})
+        # 行顺序保持不变；1 月 31 日的数据 2 月 15 日才可用
+        np.testing.assert_array_equal(joined["close"].to_numpy(), prices["close"].to_numpy())
+        np.testing.assert_allclose(joined["econ_CPI"].to_numpy(), [3.2, np.nan, np.nan, 3.5])
+
+    def test_asof_join_without_lag(self):
+        prices = pd.DataFrame({"date": ["2024-01-31", "2024-02-01"]})
+        observations = {"GDP": pd.Series([1.5], index=pd.to_datetime(["2024-01-31"]))}
+        joined = asof_join(prices, observations)
+        self.assertEqual(joined["econ_GDP"].tolist(), [1.5, 1.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
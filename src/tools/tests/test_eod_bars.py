@@ -0,0 +1,88 @@
+"""
+Unit tests for the end-of-day snapshot bar append job.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.eod_bars_job import run_eod_job, snapshot_to_bars
+from src.tools.bar_store import SharedBarStore
+
+
+def _snapshot(close_a=10.5, close_b=20.0):
+    return pd.DataFrame({
+        "序号": [1, 2, 3],
+        "代码": ["000001", "600519", "000002"],
+        "名称": ["平安银行", "贵州茅台", "万科A"],
+        "最新价": [close_a, close_b, None],
+        "涨跌幅": [1.2, -0.5, None],
+        "涨跌额": [0.12, -0.1, None],
+        "成交量": [1000.0, 500.0, 0.0],
+        "成交额": [1.05e6, 1.0e7, 0.0],
+        "振幅": [2.0, 1.5, 0.0],
+        "最高": [10.8, 20.3, None],
+        "最低": [10.2, 19.9, None],
+        "今开": [10.3, 20.1, None],
+        "换手率": [0.3, 0.1, 0.0],
+    })
+
+
+class TestEodBarsJob(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        self.fetches = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _fetch(self, symbol, start, end):
+        self.fetches.append((symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")))
+        dates = pd.bdate_range(start, end)
+        return pd.DataFrame({
+            "date": dates.strftime("%Y-%m-%d"), "open": 1.0, "high": 1.0, "low": 1.0,
+            "close": 1.0, "volume": 1.0, "amount": 1.0, "amplitude": 0.0,
+            "pct_change": 0.0, "change_amount": 0.0, "turnover": 0.1,
+        })
+
+    def test_snapshot_to_bars_drops_suspended(self):
+        bars = snapshot_to_bars(_snapshot(), "2024-03-15")
+        self.assertEqual(bars["symbol"].tolist(), ["000001", "600519"])
+        self.assertTrue((bars["date"] == pd.Timestamp("2024-03-15")).all())
+        self.assertEqual(bars.loc[0, "close"], 10.5)
+
+    def test_daily_append_without_history_requests(self):
+        run_eod_job(self.root, "2024-03-14", snapshot=_snapshot(), fetch=self._fetch)
+        summary = run_eod_job(self.root, "2024-03-15", snapshot=_snapshot(11.0), fetch=self._fetch)
+        self.assertEqual(self.fetches, [])
+        self.assertEqual(summary["appended"], 2)
+        frame = SharedBarStore(self.root).frame("000001")
+        self.assertEqual(frame["close"].tolist(), [10.5, 11.0])
+        self.assertIn("turnover", frame.columns)
+
+    def test_rerun_same_day_is_idempotent(self):
+        run_eod_job(self.root, "2024-03-15", snapshot=_snapshot(), fetch=self._fetch)
+        summary = run_eod_job(self.root, "2024-03-15", snapshot=_snapshot(), fetch=self._fetch)
+        self.assertEqual(summary["appended"], 0)
+        self.assertEqual(len(SharedBarStore(self.root).frame("600519")), 1)
+
+    def test_missed_days_are_repaired_from_history(self):
+        run_eod_job(self.root, "2024-03-12", snapshot=_snapshot(), fetch=self._fetch)
+        summary = run_eod_job(self.root, "2024-03-15", snapshot=_snapshot(), fetch=self._fetch)
+        self.assertEqual(summary["repaired"], 2)
+        self.assertIn(("000001", "2024-03-13", "2024-03-14"), self.fetches)
+        dates = SharedBarStore(self.root).frame("000001")["date"].dt.strftime("%Y-%m-%d").tolist()
+        self.assertEqual(dates, ["2024-03-12", "2024-03-13", "2024-03-14", "2024-03-15"])
+
+
+if __name__ == "__main__":
+    unittest.main()
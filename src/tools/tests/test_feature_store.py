@@ -0,0 +1,71 @@
+"""
+Unit tests for the columnar feature store.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.agents.technicals import TECHNICAL_FEATURE_COLUMNS, compute_technical_features
+from src.tools.feature_store import FeatureStore
+from src.tools.synthetic_data import generate_price_history
+
+
+class TestFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = FeatureStore(self.tmpdir.name)
+        self.prices = generate_price_history("AAPL", start_date="2024-01-02",
+                                             end_date="2024-06-28", seed=1)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip_date_range(self):
+        meta = self.store.write("AAPL", self.prices)
+        self.assertEqual(meta["n_rows"], len(self.prices))
+        self.assertEqual(self.store.symbols(), ["AAPL"])
+
+        df = self.store.read("AAPL", "2024-03-01", "2024-03-29", columns=["close"])
+        expected = self.prices[(self.prices["date"] >= "2024-03-01") &
+                               (self.prices["date"] <= "2024-03-29")]
+        self.assertEqual(list(df.columns), ["date", "close"])
+        np.testing.assert_allclose(df["close"].to_numpy(), expected["close"].to_numpy())
+        self.assertTrue((df["date"].to_numpy() == expected["date"].to_numpy()).all())
+
+    def test_rewrite_keeps_only_recent_versions(self):
+        for _ in range(3):
+            self.store.write("AAPL", self.prices)
+        versions = [name for name in os.listdir(os.path.join(self.tmpdir.name, "AAPL"))
+                    if name.startswith("v")]
+        self.assertEqual(len(versions), 2)
+        self.assertEqual(len(self.store.read("AAPL")), len(self.prices))
+
+    def test_read_fresh_requires_coverage(self):
+        self.store.write("AAPL", self.prices)
+        self.assertIsNotNone(self.store.read_fresh("AAPL", "2024-02-01", "2024-06-28"))
+        # 周末的 end_date 以最近交易日判断新鲜度
+        self.assertIsNotNone(self.store.read_fresh("AAPL", "2024-02-01", "2024-06-30"))
+        self.assertIsNone(self.store.read_fresh("AAPL", "2024-02-01", "2024-07-15"))
+        self.assertIsNone(self.store.read_fresh("AAPL", "2023-12-01", "2024-06-28"))
+        self.assertIsNone(self.store.read_fresh("MSFT", "2024-02-01", "2024-06-28"))
+
+    def test_technical_features_match_agent_indicators(self):
+        features = compute_technical_features(self.prices)
+        self.assertEqual(list(features.columns), TECHNICAL_FEATURE_COLUMNS)
+        self.assertEqual(len(features), len(self.prices))
+        # 不修改输入
+        self.assertNotIn("OBV", self.prices.columns)
+
+
+if __name__ == "__main__":
+    unittest.main()
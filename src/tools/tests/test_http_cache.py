@@ -0,0 +1,131 @@
+"""
+Unit tests for the SQLite-backed HTTP response cache.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import requests
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.utils.http_cache import HTTPCache, algogene_payload_ok, mount_cache, request_fingerprint
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def _respond(self):
+        type(self).hits += 1
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        if "limited" in self.path:
+            # Algogene 以 HTTP 200 返回限流提示
+            payload = '{"status": false, "res": "Exceeded API rate limit"}'
+        else:
+            payload = json.dumps({"res": [], "path": self.path, "body": body.decode(),
+                                  "hit": type(self).hits})
+        payload = payload.encode() + b" " * 2000
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHTTPCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(("127.0.0.1", 0), _CountingHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _CountingHandler.hits = 0
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = HTTPCache(os.path.join(self.tmpdir.name, "cache.sqlite"), max_bytes=10_000)
+        self.session = mount_cache(requests.Session(), ttl_rules=[
+            (r"/realtime", 0),
+            (r"/history", 3600),
+        ], cache=self.cache, validators=[(r"/history", algogene_payload_ok)])
+
+    def tearDown(self):
+        self.session.close()
+        self.tmpdir.cleanup()
+
+    def test_repeat_get_served_from_cache(self):
+        first = self.session.get(f"{self.base}/history?a=1&b=2")
+        second = self.session.get(f"{self.base}/history?b=2&a=1")
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(_CountingHandler.hits, 1)
+
+    def test_zero_ttl_and_unmatched_endpoints_not_cached(self):
+        self.session.get(f"{self.base}/realtime_price")
+        self.session.get(f"{self.base}/realtime_price")
+        self.session.get(f"{self.base}/other")
+        self.session.get(f"{self.base}/other")
+        self.assertEqual(_CountingHandler.hits, 4)
+
+    def test_post_body_is_part_of_key(self):
+        self.session.post(f"{self.base}/history", json={"url": "a"})
+        self.session.post(f"{self.base}/history", json={"url": "a"})
+        self.session.post(f"{self.base}/history", json={"url": "b"})
+        self.assertEqual(_CountingHandler.hits, 2)
+
+    def test_fingerprint_separates_credentials(self):
+        a = requests.Request("GET", f"{self.base}/history?x=1&api_key=one").prepare()
+        b = requests.Request("GET", f"{self.base}/history?api_key=two&x=1").prepare()
+        c = requests.Request("GET", f"{self.base}/history?api_key=one&x=1").prepare()
+        self.assertNotEqual(request_fingerprint(a), request_fingerprint(b))
+        self.assertEqual(request_fingerprint(a), request_fingerprint(c))
+
+        d = requests.Request("GET", f"{self.base}/history?x=1",
+                             headers={"Authorization": "Bearer one"}).prepare()
+        e = requests.Request("GET", f"{self.base}/history?x=1",
+                             headers={"Authorization": "Bearer two"}).prepare()
+        self.assertNotEqual(request_fingerprint(d), request_fingerprint(e))
+
+    def test_error_payloads_not_cached(self):
+        self.session.get(f"{self.base}/history/limited")
+        self.assertFalse(self.session.get(f"{self.base}/history/limited").from_cache)
+        self.assertEqual(_CountingHandler.hits, 2)
+
+        self.assertTrue(algogene_payload_ok(b'{"res": [], "count": 0}'))
+        self.assertFalse(algogene_payload_ok(b'{"error": "invalid api_key"}'))
+        self.assertFalse(algogene_payload_ok(b'{"res": "Invalid instrument"}'))
+        self.assertFalse(algogene_payload_ok(b'<html>busy</html>'))
+
+    def test_size_bound_evicts_least_recently_used(self):
+        for i in range(10):
+            self.session.get(f"{self.base}/history?i={i}")
+        self.assertLessEqual(self.cache.size(), 10_000)
+        # 最近的请求仍在缓存中，最早的已被淘汰
+        hits = _CountingHandler.hits
+        self.assertTrue(self.session.get(f"{self.base}/history?i=9").from_cache)
+        self.assertFalse(self.session.get(f"{self.base}/history?i=0").from_cache)
+        self.assertEqual(_CountingHandler.hits, hits + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,357 @@
+"""
+Unit tests for the agent node result cache.
+"""
+
+import asyncio
+import functools
+import importlib.util
+import inspect
+import json
+import os
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from datetime import datetime
+from unittest import mock
+
+import pandas as pd
+from langchain_core.messages import HumanMessage
+from langgraph.graph import END, StateGraph
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.agents.state import AgentState
+from src.utils import node_cache
+from src.tools.synthetic_data import generate_price_history
+from src.utils.async_nodes import sync_node
+from src.utils.node_cache import NODE_INPUTS, NodeCache, cached_node, node_version, source_hash
+
+
+def _initial_state():
+    return {
+        "messages": [HumanMessage(content="Make trading decisions based on the provided data.")],
+        "data": {"ticker": "600519", "start_date": "2024-01-01", "end_date": "2024-06-28",
+                 "portfolio": {"cash": 100000.0, "stock": 0}},
+        "metadata": {"show_reasoning": False},
+    }
+
+
+class TestNodeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = NodeCache(os.path.join(self.tmpdir.name, "nodes.sqlite"), model="test-model")
+        self.addCleanup(self.cache.close)
+        self.calls = Counter()
+
+    def _graph(self, cache):
+        calls = self.calls
+
+        def market_data_agent(state):
+            calls["market_data_agent"] += 1
+            prices = pd.DataFrame({"date": pd.to_datetime(["2024-06-27", "2024-06-28"]),
+                                   "close": [1700.0, 1710.5]})
+            return {"messages": state["messages"],
+                    "data": {**state["data"], "prices": prices.to_dict("records"),
+                             "frame": prices, "as_of": pd.Timestamp("2024-06-28")},
+                    "metadata": state["metadata"]}
+
+        def researcher_bull_agent(state):
+            # 与 researcher_bull 一致：返回 state["messages"] + [新消息]，并就地修改 metadata
+            calls["researcher_bull_agent"] += 1
+            end_date = state["data"]["end_date"]
+            state["metadata"]["agent_reasoning"] = f"bull at {end_date}"
+            message = HumanMessage(content=f'{{"perspective": "bullish", "as_of": "{end_date}"}}',
+                                   name="researcher_bull_agent")
+            return {"messages": state["messages"] + [message], "data": state["data"],
+                    "metadata": state["metadata"]}
+
+        def technical_analyst_agent(state):
+            calls["technical_analyst_agent"] += 1
+            message = HumanMessage(content='{"signal": "bullish"}', name="technical_analyst_agent")
+            return {"messages": [message], "data": {**state["data"], "signal_count": 1},
+                    "metadata": state["metadata"]}
+
+        def portfolio_management_agent(state):
+            calls["portfolio_management_agent"] += 1
+            names = [m.name for m in state["messages"]]
+            message = HumanMessage(content=f'{{"seen": {len(names)}}}', name="portfolio_management")
+            return {"messages": [message], "data": state["data"], "metadata": state["metadata"]}
+
+        workflow = StateGraph(AgentState)
+        for node in (market_data_agent, researcher_bull_agent, technical_analyst_agent,
+                     portfolio_management_agent):
+            workflow.add_node(node.__name__, cached_node(node.__name__, node, cache))
+        workflow.set_entry_point("market_data_agent")
+        workflow.add_edge("market_data_agent", "researcher_bull_agent")
+        workflow.add_edge("market_data_agent", "technical_analyst_agent")
+        workflow.add_edge(["researcher_bull_agent", "technical_analyst_agent"], "portfolio_management_agent")
+        workflow.add_edge("portfolio_management_agent", END)
+        return workflow.compile()
+
+    def _assert_same_state(self, actual, expected):
+        self.assertEqual([(type(m), m.name, m.content) for m in actual["messages"]],
+                         [(type(m), m.name, m.content) for m in expected["messages"]])
+        actual_data, expected_data = dict(actual["data"]), dict(expected["data"])
+        pd.testing.assert_frame_equal(actual_data.pop("frame"), expected_data.pop("frame"))
+        self.assertEqual(actual_data, expected_data)
+        self.assertEqual(actual["metadata"], expected["metadata"])
+
+    def test_replay_under_message_reducer(self):
+        expected = self._graph(None).invoke(_initial_state())
+        graph = self._graph(self.cache)
+        first = graph.invoke(_initial_state())
+        self.assertEqual(self.cache.misses, 4)
+        second = graph.invoke(_initial_state())
+
+        self.assertEqual(self.cache.hits, 4)
+        self.assertEqual(set(self.calls.values()), {2})
+        self._assert_same_state(first, expected)
+        self._assert_same_state(second, expected)
+        self.assertIsInstance(second["data"]["as_of"], pd.Timestamp)
+
+    def test_key_stable_and_sensitive(self):
+        state = _initial_state()
+        state["data"]["prices"] = pd.DataFrame({"close": [1.0, 2.0]})
+        key = self.cache.key("technical_analyst_agent", state)
+        self.assertEqual(key, self.cache.key("technical_analyst_agent", _initial_state() | {
+            "data": {**_initial_state()["data"], "prices": pd.DataFrame({"close": [1.0, 2.0]})}}))
+        self.assertNotEqual(key, self.cache.key("fundamentals_agent", state))
+
+        changed = _initial_state()
+        changed["data"]["prices"] = pd.DataFrame({"close": [1.0, 2.5]})
+        self.assertNotEqual(key, self.cache.key("technical_analyst_agent", changed))
+        # 节点未读取的字段和消息不影响缓存键；未声明读取集合的节点使用完整状态
+        changed = dict(state, messages=state["messages"] + [HumanMessage(content="x", name="a")])
+        self.assertEqual(key, self.cache.key("technical_analyst_agent", changed))
+        self.assertNotEqual(self.cache.key("custom_agent", state), self.cache.key("custom_agent", changed))
+        changed = dict(state, data={**state["data"], "portfolio": {"cash": 1.0, "stock": 0}})
+        self.assertEqual(key, self.cache.key("technical_analyst_agent", changed))
+        self.assertNotEqual(self.cache.key("risk_management_agent", state),
+                            self.cache.key("risk_management_agent", changed))
+        debate = HumanMessage(content='{"signal": "bullish"}', name="debate_room_agent")
+        self.assertNotEqual(self.cache.key("risk_management_agent", state),
+                            self.cache.key("risk_management_agent",
+                                           dict(state, messages=state["messages"] + [debate])))
+
+        other_model = NodeCache(self.cache.db_path, model="other-model")
+        self.addCleanup(other_model.close)
+        self.assertNotEqual(key, other_model.key("technical_analyst_agent", state))
+        other_model.versions["technical_analyst_agent"] = "changed"
+        self.assertNotEqual(other_model.key("technical_analyst_agent", state),
+                            NodeCache(self.cache.db_path, model="other-model").key(
+                                "technical_analyst_agent", state))
+
+    def test_node_version_covers_own_module_and_shared(self):
+        root = self.tmpdir.name
+        shared = ("src/utils/llm_clients.py", "src/tools/api.py")
+        for path in ("src/agents/a.py", "src/agents/b.py") + shared:
+            os.makedirs(os.path.join(root, os.path.dirname(path)), exist_ok=True)
+            with open(os.path.join(root, path), "w") as f:
+                f.write("def agent(state):\n    return state\n")
+        spec = importlib.util.spec_from_file_location("node_cache_test_agent", os.path.join(root, "src/agents/a.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        def version():
+            return node_version(module.agent, root=root, shared=shared)
+
+        before = version()
+        # 修改其它节点的模块不影响该节点
+        with open(os.path.join(root, "src/agents/b.py"), "a") as f:
+            f.write("# prompt changed\n")
+        self.assertEqual(before, version())
+        for path in ("src/agents/a.py", "src/utils/llm_clients.py"):
+            with open(os.path.join(root, path), "a") as f:
+                f.write("# changed\n")
+            self.assertNotEqual(before, version())
+            before = version()
+
+        # 真实节点穿过 agent_endpoint 找到各自的模块
+        from src.agents.portfolio_manager import portfolio_management_agent
+        from src.agents.technicals import technical_analyst_agent
+        self.assertNotEqual(node_version(portfolio_management_agent), node_version(technical_analyst_agent))
+        self.assertEqual(source_hash(), NodeCache(self.cache.db_path, model="m").shared_version)
+
+    def test_upstream_hits_after_portfolio_or_downstream_change(self):
+        self._graph(self.cache).invoke(_initial_state())
+        changed = _initial_state()
+        changed["data"]["portfolio"] = {"cash": 50000.0, "stock": 100}
+
+        # 只修改组合：只有读取 portfolio 的节点重新执行
+        self.calls.clear()
+        graph = self._graph(self.cache)
+        graph.invoke(changed)
+        self.assertEqual(self.calls, Counter({"portfolio_management_agent": 1}))
+
+        # 只修改下游节点的代码：上游节点全部命中
+        self.calls.clear()
+        self.cache.versions["portfolio_management_agent"] += "-edited"
+        result = graph.invoke(changed)
+        self.assertEqual(self.calls, Counter({"portfolio_management_agent": 1}))
+        self._assert_same_state(result, self._graph(None).invoke(changed))
+
+    def test_hit_miss_and_ttl_expiry(self):
+        cache = NodeCache(os.path.join(self.tmpdir.name, "ttl.sqlite"), model="test-model",
+                          ttls={"sentiment_agent": 60, "portfolio_management_agent": 0})
+        self.addCleanup(cache.close)
+        delta = {"extends_input": False, "messages": [HumanMessage(content="ok", name="sentiment_agent")],
+                 "data": {"score": 0.5}, "metadata": {}}
+        self.assertIsNone(cache.get("sentiment_agent", "k"))
+        cache.put("sentiment_agent", "k", delta)
+        self.assertEqual(cache.get("sentiment_agent", "k")["messages"][0].content, "ok")
+
+        now = node_cache.time.time()
+        with mock.patch.object(node_cache.time, "time", return_value=now + 61):
+            self.assertIsNone(cache.get("sentiment_agent", "k"))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        node = lambda state: state
+        self.assertIs(cache.wrap("portfolio_management_agent", node), node)
+
+    def test_unserializable_output_not_cached(self):
+        delta = {"extends_input": False, "messages": [], "data": {"client": object()}, "metadata": {}}
+        self.cache.put("market_data_agent", "k", delta)
+        self.assertIsNone(self.cache.get("market_data_agent", "k"))
+
+
+class _RecordedData(dict):
+    """记录按键读取的 data；{**data} 展开和 dict(data) 复制不计为读取"""
+
+    def __init__(self, data, reads):
+        super().__init__(data)
+        self.reads = reads
+
+    def __getitem__(self, key):
+        self.reads.add(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.reads.add(key)
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        self.reads.add(key)
+        return super().__contains__(key)
+
+
+def _recorded_messages(messages, reads):
+    """复制消息，读取 content 时记录消息名称"""
+    class RecordedMessage(HumanMessage):
+        def __getattribute__(self, attr):
+            if attr == "content":
+                reads.add(object.__getattribute__(self, "__dict__").get("name"))
+            return super().__getattribute__(attr)
+
+    return [RecordedMessage(content=m.content, name=m.name) for m in messages]
+
+
+def _recording(name, node, reads):
+    """运行未经 agent_endpoint 包装的节点（序列化输入会读取全部字段），记录节点读取的状态"""
+    raw = inspect.unwrap(node)
+
+    def prepare(state):
+        data_reads, message_reads = set(), set()
+        recorded = {**state, "data": _RecordedData(state["data"], data_reads),
+                    "messages": _recorded_messages(state["messages"], message_reads)}
+        return recorded, data_reads, message_reads
+
+    if inspect.iscoroutinefunction(raw):
+        @functools.wraps(raw)
+        async def wrapper(state):
+            recorded, data_reads, message_reads = prepare(state)
+            output = await raw(recorded)
+            reads[name] = (set(data_reads), set(message_reads))
+            return output
+        return wrapper
+
+    @functools.wraps(raw)
+    def wrapper(state):
+        recorded, data_reads, message_reads = prepare(state)
+        output = raw(recorded)
+        reads[name] = (set(data_reads), set(message_reads))
+        return output
+    return wrapper
+
+
+class TestNodeInputs(unittest.TestCase):
+    """真实节点实际读取的 data 字段和上游消息必须在 NODE_INPUTS 中声明，否则缓存会错误命中"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        # macro_news_agent 把摘要写到相对路径 src/data/macro_summary.json
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def _offline_patches(self):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        news = [{"title": "业绩预告", "content": "净利润同比增长", "publish_time": now,
+                 "source": "test", "url": "", "keyword": "600519"}]
+        prices = generate_price_history("600519", "2024-01-02", "2024-06-28", seed=1)
+        fetched = {
+            "prices": prices,
+            "financial_metrics": [{"return_on_equity": 0.25, "net_margin": 0.5, "operating_margin": 0.6,
+                                   "revenue_growth": 0.15, "earnings_growth": 0.18,
+                                   "book_value_growth": 0.1, "current_ratio": 3.0,
+                                   "debt_to_equity": 0.2, "free_cash_flow_per_share": 50.0,
+                                   "earnings_per_share": 60.0, "pe_ratio": 25.0,
+                                   "price_to_book": 8.0, "price_to_sales": 12.0}],
+            "financial_statements": [{"net_income": 1.0}],
+            "market_data": {"market_cap": 2e12},
+        }
+        macro_summary = json.dumps({
+            "overall_sentiment": "bullish", "sentiment_confidence": 0.7,
+            "key_hot_sectors_or_themes": ["consumer"], "key_potential_risks": ["rates"],
+            "policy_impact_summary": "none", "market_outlook_short_term": "stable",
+            "detailed_analysis_report": "report"})
+        macro_analysis = json.dumps({"macro_environment": "positive", "impact_on_stock": "positive",
+                                     "key_factors": ["policy"], "reasoning": "r"})
+        debate = json.dumps({"analysis": "a", "score": 0.2, "reasoning": "r"})
+        decision = json.dumps({"action": "buy", "quantity": 100, "confidence": 0.7,
+                               "reasoning": "r", "agent_signals": []})
+        return [
+            mock.patch("src.agents.market_data.fetch_concurrently", return_value=fetched),
+            mock.patch("src.agents.sentiment.get_stock_news", return_value=news),
+            mock.patch("src.agents.sentiment.get_news_sentiment_async", mock.AsyncMock(return_value=0.6)),
+            mock.patch("src.tools.news_crawler.get_cn_stock_news", return_value=news),
+            mock.patch("src.agents.macro_news_agent.get_chat_completion_async",
+                       mock.AsyncMock(return_value=macro_summary)),
+            mock.patch("src.agents.macro_analyst.get_stock_news", return_value=news),
+            mock.patch("src.agents.macro_analyst.get_chat_completion_async",
+                       mock.AsyncMock(return_value=macro_analysis)),
+            mock.patch("src.agents.debate_room.get_chat_completion_async", mock.AsyncMock(return_value=debate)),
+            mock.patch("src.agents.portfolio_manager.get_chat_completion_async",
+                       mock.AsyncMock(return_value=decision)),
+        ]
+
+    def test_nodes_read_only_declared_inputs(self):
+        from src import main
+
+        reads = {}
+        agents = {name: _recording(name, getattr(main, name), reads) for name in NODE_INPUTS}
+        patches = self._offline_patches() + [mock.patch.multiple(main, **agents)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        state = _initial_state()
+        state["data"]["num_of_news"] = 5
+        state["metadata"]["run_id"] = "test-node-inputs"
+        final_state = main.build_workflow(sync_node).compile().invoke(state)
+
+        self.assertIn("portfolio_management_agent", {m.name for m in final_state["messages"]})
+        self.assertEqual(set(reads), set(NODE_INPUTS))
+        for name, (data_reads, message_reads) in reads.items():
+            spec = NODE_INPUTS[name]
+            self.assertLessEqual(data_reads, set(spec["data"]), name)
+            self.assertLessEqual(message_reads, set(spec.get("messages", ())), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Unit tests for the point-in-time snapshot store.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.tools.pit_store import (
+    PointInTimeStore,
+    activate_store,
+    fetch_point_in_time,
+)
+
+
+class TestPointInTimeStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = PointInTimeStore(os.path.join(self.tmpdir.name, "pit.sqlite"))
+        self.store.record("financial_metrics", "600519",
+                          [{"pe_ratio": 30.0}], known_at="2024-03-29 18:00:00")
+        self.store.record("financial_metrics", "600519",
+                          [{"pe_ratio": 25.0}], known_at="2024-04-30 18:00:00")
+
+    def tearDown(self):
+        activate_store(None)
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_as_of_returns_latest_known_snapshot(self):
+        self.assertIsNone(self.store.as_of("financial_metrics", "600519", "2024-03-28"))
+        self.assertEqual(self.store.as_of("financial_metrics", "600519", "2024-03-29"),
+                         [{"pe_ratio": 30.0}])
+        self.assertEqual(self.store.as_of("financial_metrics", "600519", "2024-04-29"),
+                         [{"pe_ratio": 30.0}])
+        self.assertEqual(self.store.as_of("financial_metrics", "600519", "2024-12-31"),
+                         [{"pe_ratio": 25.0}])
+
+    def test_record_invalidates_cached_index(self):
+        self.store.as_of("financial_metrics", "600519", "2024-12-31")
+        self.store.record("financial_metrics", "600519",
+                          [{"pe_ratio": 20.0}], known_at="2024-06-28 18:00:00")
+        self.assertEqual(self.store.as_of("financial_metrics", "600519", "2024-12-31"),
+                         [{"pe_ratio": 20.0}])
+        self.assertEqual(len(self.store.history("financial_metrics", "600519")), 3)
+
+    def test_unknown_kind_rejected(self):
+        with self.assertRaises(ValueError):
+            self.store.record("news", "600519", [])
+
+    def test_fetch_uses_active_store_instead_of_live(self):
+        activate_store(self.store)
+        live_calls = []
+
+        def live():
+            live_calls.append(1)
+            return [{"pe_ratio": 99.0}]
+
+        value = fetch_point_in_time("financial_metrics", "600519", "2024-04-01", live)
+        self.assertEqual(value, [{"pe_ratio": 30.0}])
+        self.assertEqual(live_calls, [])
+
+        # 缺失快照时非严格模式回退到实时数据，严格模式返回 None
+        self.assertEqual(fetch_point_in_time("financial_metrics", "000001", "2024-04-01", live),
+                         [{"pe_ratio": 99.0}])
+        self.store.strict = True
+        self.assertIsNone(fetch_point_in_time("financial_metrics", "000001", "2024-04-01", live))
+
+    def test_fetch_without_active_store_calls_live(self):
+        value = fetch_point_in_time("market_data", "600519", "2024-04-01",
+                                    lambda: {"market_cap": 1.0})
+        self.assertEqual(value, {"market_cap": 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Unit tests for preloaded price history slicing.
+"""
+
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.tools import api
+from src.tools.synthetic_data import generate_price_history
+
+
+class TestPricePreload(unittest.TestCase):
+
+    def setUp(self):
+        self.bars = generate_price_history("600519", "2021-01-04", "2023-12-29", seed=7)
+        self.calls = []
+
+        def fetch(symbol, start_date, end_date, adjust):
+            self.calls.append((start_date, end_date))
+            dates = pd.to_datetime(self.bars["date"])
+            return self.bars[(dates >= start_date) & (dates <= end_date)].copy()
+
+        patcher = mock.patch.object(api.A_SHARE_PRICE_HISTORY, "call", side_effect=fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(api.clear_preloaded_prices)
+
+    def test_requests_inside_preloaded_range_do_not_fetch(self):
+        api.preload_price_history("600519", "2021-01-04", "2023-12-29")
+        self.assertEqual(len(self.calls), 1)
+        for end in ["2023-03-01", "2023-06-30", "2023-12-29"]:
+            df = api.get_price_history("600519", "2023-01-01", end)
+            self.assertEqual(df["date"].iloc[-1], pd.Timestamp(end))
+        self.assertEqual(len(self.calls), 1)
+
+    def test_short_window_extends_like_live_request(self):
+        api.preload_price_history("600519", "2021-01-04", "2023-12-29")
+        df = api.get_price_history("600519", "2023-06-01", "2023-06-30")
+        # 不足 120 个交易日时与实时请求一样扩展到两年
+        self.assertEqual(df["date"].iloc[0], pd.Timestamp("2021-06-30"))
+        self.assertIn("momentum_1m", df.columns)
+
+    def test_outside_range_falls_back_to_fetch(self):
+        api.preload_price_history("600519", "2022-01-03", "2023-06-30")
+        api.get_price_history("600519", "2023-01-01", "2023-12-29")
+        self.assertGreater(len(self.calls), 1)
+        api.clear_preloaded_prices("600519")
+        api.get_price_history("600519", "2022-06-01", "2023-06-30")
+        self.assertGreater(len(self.calls), 2)
+
+    def test_scope_is_private_to_the_run(self):
+        entered, finished = threading.Event(), threading.Event()
+        seen = {}
+
+        def run_a():
+            with api.price_preload_scope():
+                api.preload_price_history("600519", "2021-01-04", "2023-12-29")
+                entered.set()
+                # 另一个同代码的运行结束并清除自己的预加载后，本运行的预加载仍然有效
+                finished.wait(5)
+                calls = len(self.calls)
+                seen["a"] = api.get_price_history("600519", "2023-01-01", "2023-06-30")
+                seen["a_fetched"] = len(self.calls) - calls
+
+        def run_b():
+            entered.wait(5)
+            with api.price_preload_scope():
+                api.preload_price_history("600519", "2022-01-03", "2023-06-30")
+                api.clear_preloaded_prices("600519")
+            finished.set()
+
+        def unrelated():
+            entered.wait(5)
+            calls = len(self.calls)
+            api.get_price_history("600519", "2023-01-01", "2023-06-30")
+            return len(self.calls) - calls
+
+        with ThreadPoolExecutor(3) as executor:
+            futures = [executor.submit(run_a), executor.submit(run_b), executor.submit(unrelated)]
+            results = [future.result() for future in futures]
+
+        self.assertEqual(seen["a_fetched"], 0)
+        self.assertEqual(seen["a"]["date"].iloc[-1], pd.Timestamp("2023-06-30"))
+        # 不在任何运行范围内的调用不会拿到别人预加载的数据
+        self.assertGreater(results[2], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Unit tests for provider fallback, hedging and circuit breaking.
+"""
+
+import os
+import sys
+import time
+import unittest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.tools.providers import CircuitBreaker, Provider, ProviderError, ProviderGroup
+
+
+def _failing(*args):
+    raise ConnectionError("boom")
+
+
+class TestProviderGroup(unittest.TestCase):
+
+    def test_falls_back_on_error_and_empty_result(self):
+        group = ProviderGroup("test", [
+            Provider("primary", _failing),
+            Provider("secondary", lambda symbol: {}),
+            Provider("tertiary", lambda symbol: {"symbol": symbol}),
+        ])
+        self.assertEqual(group.call("600519"), {"symbol": "600519"})
+        stats = group.stats()
+        self.assertEqual(stats["primary"]["error_rate"], 1.0)
+        # 无数据不计为失败
+        self.assertEqual(stats["secondary"]["error_rate"], 0.0)
+
+    def test_all_empty_returns_last_result(self):
+        group = ProviderGroup("test", [Provider("a", lambda: {}), Provider("b", lambda: {})])
+        self.assertEqual(group.call(), {})
+
+    def test_all_failing_raises(self):
+        group = ProviderGroup("test", [Provider("a", _failing), Provider("b", _failing)])
+        with self.assertRaises(ProviderError):
+            group.call()
+
+    def test_hedges_after_primary_p95(self):
+        calls = []
+
+        def slow(symbol):
+            calls.append("slow")
+            time.sleep(1.0)
+            return {"source": "slow"}
+
+        def fast(symbol):
+            calls.append("fast")
+            return {"source": "fast"}
+
+        primary = Provider("slow", slow, default_hedge_delay=0.1)
+        group = ProviderGroup("test", [primary, Provider("fast", fast)], hedge=True)
+        start = time.monotonic()
+        self.assertEqual(group.call("600519"), {"source": "fast"})
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual(calls, ["slow", "fast"])
+
+    def test_no_hedge_when_primary_is_fast(self):
+        fallback_calls = []
+        group = ProviderGroup("test", [
+            Provider("primary", lambda: "ok", default_hedge_delay=0.5),
+            Provider("secondary", lambda: fallback_calls.append(1) or "fallback"),
+        ], hedge=True)
+        self.assertEqual(group.call(), "ok")
+        self.assertEqual(fallback_calls, [])
+
+    def test_hedge_delay_tracks_p95(self):
+        provider = Provider("p", lambda: "ok", min_samples=5)
+        for latency in [0.1] * 19 + [1.0]:
+            provider.stats.record(latency, True)
+        self.assertGreater(provider.hedge_delay(), 0.1)
+        self.assertLess(provider.hedge_delay(), 1.0)
+
+    def test_circuit_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+        primary_calls = []
+
+        def flaky():
+            primary_calls.append(1)
+            if len(primary_calls) <= 2:
+                raise ConnectionError("down")
+            return "primary"
+
+        group = ProviderGroup("test", [
+            Provider("primary", flaky, breaker=breaker),
+            Provider("secondary", lambda: "secondary"),
+        ])
+        self.assertEqual(group.call(), "secondary")
+        self.assertEqual(group.call(), "secondary")
+        self.assertEqual(breaker.state, "open")
+
+        # 熔断期间不再请求主来源
+        self.assertEqual(group.call(), "secondary")
+        self.assertEqual(len(primary_calls), 2)
+
+        # 冷却后放行一次试探，成功则恢复
+        time.sleep(0.25)
+        self.assertEqual(group.call(), "primary")
+        self.assertEqual(breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
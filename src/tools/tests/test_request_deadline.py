@@ -0,0 +1,109 @@
+"""
+Unit tests for request deadlines and the concurrent market data fetch.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import requests
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.agents.market_data import fetch_concurrently
+from src.utils.request_deadline import DeadlineExceeded, remaining, request_deadline
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        time.sleep(2.0)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRequestDeadline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+        cls.server.daemon_threads = True
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/slow"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_request_without_timeout_is_bounded(self):
+        start = time.monotonic()
+        with request_deadline(0.3):
+            with self.assertRaises(requests.exceptions.Timeout):
+                requests.get(self.url)
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertIsNone(remaining())
+
+    def test_expired_deadline_stops_new_requests(self):
+        with request_deadline(0.0):
+            with self.assertRaises(DeadlineExceeded):
+                requests.get(self.url, timeout=10)
+
+    def test_nested_deadline_keeps_earliest(self):
+        with request_deadline(1.0):
+            with request_deadline(60.0):
+                self.assertLessEqual(remaining(), 1.0)
+
+    def test_timed_out_fetch_releases_worker(self):
+        outcome = {}
+
+        def slow():
+            try:
+                return requests.get(self.url).json()
+            except requests.exceptions.Timeout as e:
+                outcome["error"] = e
+                outcome["finished"] = time.monotonic()
+                raise
+
+        def failing():
+            raise RuntimeError("provider down")
+
+        start = time.monotonic()
+        results = fetch_concurrently(
+            {"slow": slow, "failing": failing, "empty": lambda: {},
+             "prices": lambda: pd.DataFrame({"close": [1.0]}), "quote": lambda: {"market_cap": 10}},
+            defaults={"slow": {"default": "slow"}, "failing": {"default": "failing"},
+                      "empty": {"default": "empty"}, "prices": None, "quote": {"market_cap": 0}},
+            timeouts={"slow": 0.3, "failing": 5, "empty": 5, "prices": 5, "quote": 5})
+
+        self.assertEqual(results["slow"], {"default": "slow"})
+        self.assertEqual(results["failing"], {"default": "failing"})
+        self.assertEqual(results["empty"], {"default": "empty"})
+        self.assertEqual(results["prices"]["close"].tolist(), [1.0])
+        self.assertEqual(results["quote"], {"market_cap": 10})
+        self.assertLess(time.monotonic() - start, 1.5)
+
+        # 超时的请求本身也被终止，工作线程在服务器响应（2 秒）之前退出
+        deadline = time.monotonic() + 1.5
+        while "finished" not in outcome and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertIn("finished", outcome)
+        self.assertLess(outcome["finished"] - start, 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests for the synthetic market data generator.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.tools.synthetic_data import (
+    PRICE_COLUMNS,
+    generate_financial_metrics,
+    generate_financial_statements,
+    generate_market_data,
+    generate_price_history,
+    generate_price_panel,
+    generate_stock_news,
+    iter_price_panels,
+    make_symbols,
+)
+
+
+class TestSyntheticPrices(unittest.TestCase):
+    """K线生成的结构与一致性"""
+
+    def test_price_history_schema(self):
+        df = generate_price_history("600519", n_bars=300, seed=7)
+        self.assertEqual(list(df.columns), PRICE_COLUMNS)
+        self.assertEqual(len(df), 300)
+        self.assertTrue(df["date"].is_monotonic_increasing)
+
+    def test_ohlc_consistency(self):
+        df = generate_price_history("AAPL", n_bars=1000, seed=3)
+        self.assertTrue((df["low"] <= df[["open", "close"]].min(axis=1)).all())
+        self.assertTrue((df["high"] >= df[["open", "close"]].max(axis=1)).all())
+        self.assertTrue((df["volume"] > 0).all())
+        self.assertTrue((df["close"] > 0).all())
+
+    def test_reproducible(self):
+        a = generate_price_history("000001", n_bars=200, seed=11)
+        b = generate_price_history("000001", n_bars=200, seed=11)
+        c = generate_price_history("000001", n_bars=200, seed=12)
+        self.assertTrue(a.equals(b))
+        self.assertFalse(a["close"].equals(c["close"]))
+
+    def test_panel_shapes_and_dtype(self):
+        symbols = make_symbols(50)
+        panel = generate_price_panel(symbols, start_date="2010-01-01", end_date="2011-12-31",
+                                     seed=1, dtype=np.float32)
+        self.assertEqual(panel.close.shape, (len(panel.dates), 50))
+        self.assertEqual(panel.close.dtype, np.float32)
+        self.assertEqual(set(np.unique(panel.regimes)), {0, 1})
+        frame = panel.to_frame(symbols[10])
+        self.assertEqual(list(frame.columns), PRICE_COLUMNS)
+        self.assertEqual(len(panel.to_long_frame()), len(panel.dates) * 50)
+
+    def test_iter_panels_covers_all_symbols(self):
+        symbols = make_symbols(23, market="us")
+        chunks = list(iter_price_panels(symbols, chunk_size=10, n_bars=20))
+        self.assertEqual([len(c.symbols) for c in chunks], [10, 10, 3])
+        self.assertEqual([s for c in chunks for s in c.symbols], symbols)
+
+
+class TestSyntheticFundamentals(unittest.TestCase):
+    """财务、市场和新闻数据与真实接口结构一致"""
+
+    def test_financial_metrics_shape(self):
+        metrics = generate_financial_metrics("600519", price=100.0)
+        self.assertEqual(len(metrics), 1)
+        for key in ["return_on_equity", "net_margin", "pe_ratio", "price_to_book",
+                    "free_cash_flow_per_share", "earnings_per_share"]:
+            self.assertIn(key, metrics[0])
+
+    def test_financial_statements_shape(self):
+        items = generate_financial_statements("600519")
+        self.assertEqual(len(items), 2)
+        self.assertEqual(set(items[0]), {
+            "net_income", "operating_revenue", "operating_profit", "working_capital",
+            "depreciation_and_amortization", "capital_expenditure", "free_cash_flow"})
+
+    def test_market_data_matches_prices(self):
+        df = generate_price_history("600519", n_bars=400)
+        market = generate_market_data(df)
+        self.assertAlmostEqual(market["fifty_two_week_high"], df.tail(252)["high"].max())
+        self.assertGreater(market["market_cap"], 0)
+
+    def test_news_shape(self):
+        news = generate_stock_news("600519", max_news=5, end_date="2024-06-28", bias=0.5)
+        self.assertEqual(len(news), 5)
+        self.assertEqual(set(news[0]), {"title", "content", "publish_time", "source", "url", "keyword"})
+        times = [n["publish_time"] for n in news]
+        self.assertEqual(times, sorted(times, reverse=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
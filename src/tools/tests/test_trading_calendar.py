@@ -0,0 +1,88 @@
+"""
+Unit tests for the offline trading calendar.
+"""
+
+import os
+import sys
+import unittest
+from datetime import date
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+from src.tools.trading_calendar import (
+    get_calendar,
+    get_calendar_for_symbol,
+    nyse_holidays,
+)
+
+
+class TestNyseCalendar(unittest.TestCase):
+    """纽交所规则节假日"""
+
+    def setUp(self):
+        self.calendar = get_calendar("NYSE")
+
+    def test_rule_holidays(self):
+        holidays_2024 = nyse_holidays(2024)
+        self.assertIn(date(2024, 3, 29), holidays_2024)   # Good Friday
+        self.assertIn(date(2024, 6, 19), holidays_2024)   # Juneteenth
+        self.assertIn(date(2024, 11, 28), holidays_2024)  # Thanksgiving
+        self.assertIn(date(2022, 6, 20), nyse_holidays(2022))  # 周日顺延
+
+    def test_saturday_new_year_not_observed(self):
+        self.assertTrue(self.calendar.is_trading_day("2021-12-31"))
+
+    def test_session_count(self):
+        self.assertEqual(self.calendar.count("2024-01-01", "2024-12-31"), 252)
+        self.assertFalse(self.calendar.is_trading_day("2025-01-09"))
+
+
+class TestSseCalendar(unittest.TestCase):
+    """沪深交易所休市表"""
+
+    def setUp(self):
+        self.calendar = get_calendar("SSE")
+
+    def test_spring_festival(self):
+        days = self.calendar.trading_days("2024-02-05", "2024-02-20")
+        self.assertEqual(list(days.strftime("%Y-%m-%d")), [
+            "2024-02-05", "2024-02-06", "2024-02-07", "2024-02-08",
+            "2024-02-19", "2024-02-20"])
+
+    def test_session_count(self):
+        self.assertEqual(self.calendar.count("2024-01-01", "2024-12-31"), 242)
+
+    def test_last_and_previous_trading_day(self):
+        self.assertEqual(self.calendar.last_trading_day("2024-10-06"), pd.Timestamp("2024-09-30"))
+        self.assertEqual(self.calendar.last_trading_day("2024-10-08"), pd.Timestamp("2024-10-08"))
+        self.assertEqual(self.calendar.previous_trading_day("2024-10-08"), pd.Timestamp("2024-09-30"))
+        self.assertEqual(self.calendar.next_trading_day("2024-09-30"), pd.Timestamp("2024-10-08"))
+
+    def test_vectorized_offset(self):
+        result = self.calendar.offset(["2024-09-30", "2024-10-08"], 1)
+        self.assertEqual(list(result.strftime("%Y-%m-%d")), ["2024-10-08", "2024-10-09"])
+        mask = self.calendar.is_trading_day(pd.date_range("2024-10-01", "2024-10-08"))
+        self.assertEqual(mask.tolist(), [False] * 7 + [True])
+
+
+class TestCryptoCalendar(unittest.TestCase):
+    """虚拟币每天交易"""
+
+    def test_every_day_trades(self):
+        calendar = get_calendar("CRYPTO")
+        self.assertTrue(calendar.is_trading_day("2024-12-25"))
+        self.assertEqual(calendar.count("2024-01-01", "2024-12-31"), 366)
+
+    def test_symbol_dispatch(self):
+        self.assertEqual(get_calendar_for_symbol("BTC").name, "CRYPTO")
+        self.assertEqual(get_calendar_for_symbol("BTC-USD").name, "CRYPTO")
+        self.assertEqual(get_calendar_for_symbol("AAPL").name, "NYSE")
+        self.assertEqual(get_calendar_for_symbol("600519").name, "SSE")
+
+
+if __name__ == '__main__':
+    unittest.main()
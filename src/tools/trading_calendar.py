@@ -0,0 +1,251 @@
+"""
+交易日历服务 - 离线的交易所休市表与向量化的交易日计算
+
+支持的日历：
+- SSE / SZSE: 沪深交易所，休市表按国务院放假安排逐年维护（当前覆盖 2019-2026 年）
+- NYSE: 纽约证券交易所，节假日按规则生成，并包含历史临时休市
+- CRYPTO: 虚拟币 7×24 小时交易，每天都是交易日
+
+底层使用 numpy 的 busdaycalendar，交易日区间、偏移和计数都是向量化计算。
+"""
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.tools.crypto_symbols import is_crypto
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('trading_calendar')
+
+DateLike = Union[str, date, datetime, pd.Timestamp, np.datetime64]
+
+# 沪深交易所工作日休市日期（周末本身不交易，不在此列出）
+SSE_HOLIDAYS = {
+    2019: ["2019-01-01", "2019-02-04", "2019-02-05", "2019-02-06", "2019-02-07",
+           "2019-02-08", "2019-04-05", "2019-05-01", "2019-05-02", "2019-05-03",
+           "2019-06-07", "2019-09-13", "2019-10-01", "2019-10-02", "2019-10-03",
+           "2019-10-04", "2019-10-07"],
+    2020: ["2020-01-01", "2020-01-24", "2020-01-27", "2020-01-28", "2020-01-29",
+           "2020-01-30", "2020-01-31", "2020-04-06", "2020-05-01", "2020-05-04",
+           "2020-05-05", "2020-06-25", "2020-06-26", "2020-10-01", "2020-10-02",
+           "2020-10-05", "2020-10-06", "2020-10-07", "2020-10-08"],
+    2021: ["2021-01-01", "2021-02-11", "2021-02-12", "2021-02-15", "2021-02-16",
+           "2021-02-17", "2021-04-05", "2021-05-03", "2021-05-04", "2021-05-05",
+           "2021-06-14", "2021-09-20", "2021-09-21", "2021-10-01", "2021-10-04",
+           "2021-10-05", "2021-10-06", "2021-10-07"],
+    2022: ["2022-01-03", "2022-01-31", "2022-02-01", "2022-02-02", "2022-02-03",
+           "2022-02-04", "2022-04-04", "2022-04-05", "2022-05-02", "2022-05-03",
+           "2022-05-04", "2022-06-03", "2022-09-12", "2022-10-03", "2022-10-04",
+           "2022-10-05", "2022-10-06", "2022-10-07"],
+    2023: ["2023-01-02", "2023-01-23", "2023-01-24", "2023-01-25", "2023-01-26",
+           "2023-01-27", "2023-04-05", "2023-05-01", "2023-05-02", "2023-05-03",
+           "2023-06-22", "2023-06-23", "2023-09-29", "2023-10-02", "2023-10-03",
+           "2023-10-04", "2023-10-05", "2023-10-06"],
+    2024: ["2024-01-01", "2024-02-09", "2024-02-12", "2024-02-13", "2024-02-14",
+           "2024-02-15", "2024-02-16", "2024-04-04", "2024-04-05", "2024-05-01",
+           "2024-05-02", "2024-05-03", "2024-06-10", "2024-09-16", "2024-09-17",
+           "2024-10-01", "2024-10-02", "2024-10-03", "2024-10-04", "2024-10-07"],
+    2025: ["2025-01-01", "2025-01-28", "2025-01-29", "2025-01-30", "2025-01-31",
+           "2025-02-03", "2025-02-04", "2025-04-04", "2025-05-01", "2025-05-02",
+           "2025-05-05", "2025-06-02", "2025-10-01", "2025-10-02", "2025-10-03",
+           "2025-10-06", "2025-10-07", "2025-10-08"],
+    2026: ["2026-01-01", "2026-01-02", "2026-02-16", "2026-02-17", "2026-02-18",
+           "2026-02-19", "2026-02-20", "2026-02-23", "2026-04-06", "2026-05-01",
+           "2026-05-04", "2026-05-05", "2026-06-19", "2026-09-25", "2026-10-01",
+           "2026-10-02", "2026-10-05", "2026-10-06", "2026-10-07"],
+}
+
+# 纽交所临时休市（国葬、灾害等）
+NYSE_SPECIAL_CLOSURES = [
+    "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14",
+    "2004-06-11", "2007-01-02", "2012-10-29", "2012-10-30",
+    "2018-12-05", "2025-01-09",
+]
+
+NYSE_RULE_YEARS = (1990, 2040)
+
+
+def _easter(year: int) -> date:
+    """计算公历复活节日期（Anonymous Gregorian algorithm）"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """某月第 n 个星期几（n=-1 表示最后一个），weekday: 周一为0"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """周六的假日提前到周五，周日的假日顺延到周一"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> List[date]:
+    """按规则生成某年纽交所的工作日休市日期"""
+    holidays = []
+    new_year = date(year, 1, 1)
+    # 元旦落在周六时纽交所不在前一年的12月31日补休
+    if new_year.weekday() != 5:
+        holidays.append(_observed(new_year))
+    if year >= 1998:
+        holidays.append(_nth_weekday(year, 1, 0, 3))   # 马丁·路德·金纪念日
+    holidays.append(_nth_weekday(year, 2, 0, 3))       # 总统日
+    holidays.append(_easter(year) - timedelta(days=2))  # 耶稣受难日
+    holidays.append(_nth_weekday(year, 5, 0, -1))      # 阵亡将士纪念日
+    if year >= 2022:
+        holidays.append(_observed(date(year, 6, 19)))  # 六月节
+    holidays.append(_observed(date(year, 7, 4)))       # 独立日
+    holidays.append(_nth_weekday(year, 9, 0, 1))       # 劳动节
+    holidays.append(_nth_weekday(year, 11, 3, 4))      # 感恩节
+    holidays.append(_observed(date(year, 12, 25)))     # 圣诞节
+    return [d for d in holidays if d.weekday() < 5]
+
+
+def _to_day(value: DateLike) -> np.datetime64:
+    if value is None:
+        value = datetime.now()
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+class TradingCalendar:
+    """基于 numpy busdaycalendar 的交易日历
+
+    Args:
+        name: 日历名称
+        weekmask: 周一到周日是否交易，如 "1111100"
+        holidays: 工作日休市日期
+        coverage: 休市表覆盖的年份范围 (起, 止)，超出范围时只按周末判断并给出警告
+        days_per_year: 一年的交易日数，用于换算默认回看区间
+    """
+
+    def __init__(self, name: str, weekmask: str = "1111100",
+                 holidays: Iterable[DateLike] = (), coverage: Optional[tuple] = None,
+                 days_per_year: int = 252):
+        self.name = name
+        self.weekmask = weekmask
+        self.holidays = np.array(sorted({_to_day(d) for d in holidays}),
+                                 dtype='datetime64[D]')
+        self.coverage = coverage
+        self.days_per_year = days_per_year
+        self._busdaycal = np.busdaycalendar(weekmask=weekmask, holidays=self.holidays)
+        self._warned_years = set()
+
+    def __repr__(self) -> str:
+        return f"TradingCalendar({self.name!r})"
+
+    def _check_coverage(self, *days: np.datetime64):
+        if not self.coverage:
+            return
+        for day in days:
+            year = int(str(day)[:4])
+            if not (self.coverage[0] <= year <= self.coverage[1]) and year not in self._warned_years:
+                self._warned_years.add(year)
+                logger.warning(
+                    f"{self.name} holiday table does not cover {year}, only weekends are excluded")
+
+    def is_trading_day(self, dates):
+        """判断日期是否为交易日，支持标量或数组输入"""
+        if np.ndim(dates) == 0:
+            day = _to_day(dates)
+            self._check_coverage(day)
+            return bool(np.is_busday(day, busdaycal=self._busdaycal))
+        days = pd.DatetimeIndex(dates).values.astype('datetime64[D]')
+        return np.is_busday(days, busdaycal=self._busdaycal)
+
+    def trading_days(self, start: DateLike, end: DateLike) -> pd.DatetimeIndex:
+        """返回 [start, end] 闭区间内的全部交易日"""
+        start_day, end_day = _to_day(start), _to_day(end)
+        self._check_coverage(start_day, end_day)
+        if end_day < start_day:
+            return pd.DatetimeIndex([])
+        days = np.arange(start_day, end_day + np.timedelta64(1, "D"), dtype='datetime64[D]')
+        return pd.DatetimeIndex(days[np.is_busday(days, busdaycal=self._busdaycal)])
+
+    def count(self, start: DateLike, end: DateLike) -> int:
+        """[start, end] 闭区间内的交易日数量"""
+        return int(np.busday_count(_to_day(start), _to_day(end) + np.timedelta64(1, "D"),
+                                   busdaycal=self._busdaycal))
+
+    def offset(self, dates: DateLike, n: int, roll: str = "backward"):
+        """交易日偏移
+
+        Args:
+            dates: 日期，支持标量或数组
+            n: 偏移的交易日数，负数表示向前
+            roll: 起始日期不是交易日时的处理，"backward" 取之前最近的交易日，
+                  "forward" 取之后最近的交易日
+
+        Returns:
+            标量输入返回 pd.Timestamp，数组输入返回 pd.DatetimeIndex
+        """
+        if np.ndim(dates) == 0:
+            day = _to_day(dates)
+            self._check_coverage(day)
+            return pd.Timestamp(np.busday_offset(day, n, roll=roll, busdaycal=self._busdaycal))
+        days = pd.DatetimeIndex(dates).values.astype('datetime64[D]')
+        return pd.DatetimeIndex(np.busday_offset(days, n, roll=roll, busdaycal=self._busdaycal))
+
+    def last_trading_day(self, on_or_before: Optional[DateLike] = None) -> pd.Timestamp:
+        """不晚于给定日期（默认今天）的最近一个交易日"""
+        return self.offset(on_or_before, 0, roll="backward")
+
+    def previous_trading_day(self, before: Optional[DateLike] = None) -> pd.Timestamp:
+        """严格早于给定日期（默认今天）的最近一个交易日"""
+        return self.offset(before, -1, roll="forward")
+
+    def next_trading_day(self, after: Optional[DateLike] = None) -> pd.Timestamp:
+        """严格晚于给定日期（默认今天）的最近一个交易日"""
+        return self.offset(after, 1, roll="backward")
+
+
+@lru_cache(maxsize=None)
+def get_calendar(name: str) -> TradingCalendar:
+    """按名称获取交易日历
+
+    Args:
+        name: "SSE"/"SZSE"/"CN"、"NYSE"/"US" 或 "CRYPTO"
+    """
+    key = name.upper()
+    if key in ("SSE", "SZSE", "CN"):
+        holidays = [d for days in SSE_HOLIDAYS.values() for d in days]
+        return TradingCalendar("SSE", holidays=holidays,
+                               coverage=(min(SSE_HOLIDAYS), max(SSE_HOLIDAYS)))
+    if key in ("NYSE", "US"):
+        holidays = [d for year in range(NYSE_RULE_YEARS[0], NYSE_RULE_YEARS[1] + 1)
+                    for d in nyse_holidays(year)]
+        return TradingCalendar("NYSE", holidays=holidays + NYSE_SPECIAL_CLOSURES,
+                               coverage=NYSE_RULE_YEARS)
+    if key == "CRYPTO":
+        return TradingCalendar("CRYPTO", weekmask="1111111", days_per_year=365)
+    raise ValueError(f"Unknown trading calendar: {name}")
+
+
+def get_calendar_for_symbol(symbol: str) -> TradingCalendar:
+    """按与 get_price_history 相同的规则为代码选择日历：虚拟币、美股（纯字母）、A股"""
+    if is_crypto(symbol) or symbol.upper().endswith("-USD"):
+        return get_calendar("CRYPTO")
+    if symbol.isalpha():
+        return get_calendar("NYSE")
+    return get_calendar("SSE")
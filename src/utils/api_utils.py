@@ -175,97 +175,106 @@ def log_llm_interaction(state): # type: ignore
                 "line": caller_frame.f_lineno # type: ignore
             }
 
-            # 执行原始函数获取结果
-            result = llm_func(*args, **kwargs)
-
-            # 从state中提取agent_name和run_id
-            agent_name_from_state = None # type: ignore
-            run_id_from_state = None # type: ignore
-
-            # 尝试从state参数中提取 (这里的 state 是 log_llm_interaction 的参数，不是 agent 的 state)
-            current_agent_state_dict = None
-            # Check if 'state' (the decorator parameter) is a dict and has metadata
-            if isinstance(state, dict) and "metadata" in state:
-                 current_agent_state_dict = state
-            elif args and isinstance(args[0], dict) and "metadata" in args[0]: # 假设第一个参数是 AgentState
-                 current_agent_state_dict = args[0]
-            elif 'state' in kwargs and isinstance(kwargs['state'], dict) and "metadata" in kwargs['state']:
-                 current_agent_state_dict = kwargs['state']
+            def record(result): # type: ignore
+                # 从state中提取agent_name和run_id
+                agent_name_from_state = None # type: ignore
+                run_id_from_state = None # type: ignore
+
+                # 尝试从state参数中提取 (这里的 state 是 log_llm_interaction 的参数，不是 agent 的 state)
+                current_agent_state_dict = None
+                # Check if 'state' (the decorator parameter) is a dict and has metadata
+                if isinstance(state, dict) and "metadata" in state:
+                     current_agent_state_dict = state
+                elif args and isinstance(args[0], dict) and "metadata" in args[0]: # 假设第一个参数是 AgentState
+                     current_agent_state_dict = args[0]
+                elif 'state' in kwargs and isinstance(kwargs['state'], dict) and "metadata" in kwargs['state']:
+                     current_agent_state_dict = kwargs['state']
+
+
+                if current_agent_state_dict:
+                    agent_name_from_state = current_agent_state_dict.get("metadata", {}).get(
+                        "current_agent_name")
+                    run_id_from_state = current_agent_state_dict.get("metadata", {}).get("run_id")
+
+
+                # 如果state中没有，尝试从上下文变量中获取
+                if not agent_name_from_state:
+                    try:
+                        from src.utils.llm_interaction_logger import current_agent_name_context, current_run_id_context
+                        agent_name_from_state = current_agent_name_context.get()
+                        run_id_from_state = current_run_id_context.get()
+                    except (ImportError, AttributeError, LookupError):
+                        pass
+
+                final_agent_name = agent_name_from_state
+                final_run_id = run_id_from_state
+
+                if not final_agent_name and hasattr(api_state, "current_agent_name"):
+                    final_agent_name = api_state.current_agent_name
+                    final_run_id = api_state.current_run_id
+
+
+                if final_agent_name:
+                    timestamp = datetime.now(UTC)
+
+                    messages_arg = None
+                    if "messages" in kwargs:
+                        messages_arg = kwargs["messages"]
+                    elif args and len(args) > 0 and isinstance(args[0], list):
+                        messages_arg = args[0]
+                    elif args and len(args) > 1 and isinstance(args[1], list):
+                        messages_arg = args[1]
+
+
+                    model_arg = kwargs.get("model")
+                    if not model_arg and args and len(args) > 0 and isinstance(args[0], str):
+                        model_arg = args[0]
+
+                    client_type_arg = kwargs.get("client_type", "auto")
+
+                    formatted_request = {
+                        "caller": caller_info,
+                        "messages": messages_arg,
+                        "model": model_arg,
+                        "client_type": client_type_arg,
+                        "arguments": format_llm_request(args),
+                        "kwargs": format_llm_request(kwargs) if kwargs else {}
+                    }
+                    formatted_response = format_llm_response(result)
 
+                    api_state.update_agent_data(
+                        final_agent_name, "llm_request", formatted_request)
+                    api_state.update_agent_data(
+                        final_agent_name, "llm_response", formatted_response)
+                    api_state.update_agent_data(
+                        final_agent_name, "llm_timestamp", timestamp.isoformat())
+
+                    try:
+                        if _has_log_system:
+                            log_storage = get_log_storage()
+                            if log_storage: # <--- 添加检查 log_storage 是否为 None
+                                log_entry = LLMInteractionLog( # type: ignore
+                                    agent_name=final_agent_name,
+                                    run_id=final_run_id,
+                                    request_data=formatted_request,
+                                    response_data=formatted_response,
+                                    timestamp=timestamp
+                                )
+                                log_storage.add_log(log_entry)
+                                logger.debug(f"已将装饰器捕获的LLM交互保存到日志存储: {final_agent_name}")
+                    except Exception as log_err:
+                        logger.warning(f"保存装饰器捕获的LLM交互到日志存储失败: {str(log_err)}")
 
-            if current_agent_state_dict:
-                agent_name_from_state = current_agent_state_dict.get("metadata", {}).get(
-                    "current_agent_name")
-                run_id_from_state = current_agent_state_dict.get("metadata", {}).get("run_id")
-
-
-            # 如果state中没有，尝试从上下文变量中获取
-            if not agent_name_from_state:
-                try:
-                    from src.utils.llm_interaction_logger import current_agent_name_context, current_run_id_context
-                    agent_name_from_state = current_agent_name_context.get()
-                    run_id_from_state = current_run_id_context.get()
-                except (ImportError, AttributeError, LookupError):
-                    pass
-
-            final_agent_name = agent_name_from_state
-            final_run_id = run_id_from_state
-
-            if not final_agent_name and hasattr(api_state, "current_agent_name"):
-                final_agent_name = api_state.current_agent_name
-                final_run_id = api_state.current_run_id
-
-
-            if final_agent_name:
-                timestamp = datetime.now(UTC)
-
-                messages_arg = None
-                if "messages" in kwargs:
-                    messages_arg = kwargs["messages"]
-                elif args and len(args) > 0 and isinstance(args[0], list):
-                    messages_arg = args[0]
-                elif args and len(args) > 1 and isinstance(args[1], list):
-                    messages_arg = args[1]
-
-
-                model_arg = kwargs.get("model")
-                if not model_arg and args and len(args) > 0 and isinstance(args[0], str):
-                    model_arg = args[0]
-
-                client_type_arg = kwargs.get("client_type", "auto")
-
-                formatted_request = {
-                    "caller": caller_info,
-                    "messages": messages_arg,
-                    "model": model_arg,
-                    "client_type": client_type_arg,
-                    "arguments": format_llm_request(args),
-                    "kwargs": format_llm_request(kwargs) if kwargs else {}
-                }
-                formatted_response = format_llm_response(result)
-
-                api_state.update_agent_data(
-                    final_agent_name, "llm_request", formatted_request)
-                api_state.update_agent_data(
-                    final_agent_name, "llm_response", formatted_response)
-                api_state.update_agent_data(
-                    final_agent_name, "llm_timestamp", timestamp.isoformat())
-
-                try:
-                    if _has_log_system:
-                        log_storage = get_log_storage()
-                        if log_storage: # <--- 添加检查 log_storage 是否为 None
-                            log_entry = LLMInteractionLog( # type: ignore
-                                agent_name=final_agent_name,
-                                run_id=final_run_id,
-                                request_data=formatted_request,
-                                response_data=formatted_response,
-                                timestamp=timestamp
-                            )
-                            log_storage.add_log(log_entry)
-                            logger.debug(f"已将装饰器捕获的LLM交互保存到日志存储: {final_agent_name}")
-                except Exception as log_err:
-                    logger.warning(f"保存装饰器捕获的LLM交互到日志存储失败: {str(log_err)}")
+            # 执行原始函数获取结果
+            result = llm_func(*args, **kwargs)
+            if inspect.isawaitable(result):
+                # 异步调用（例如 get_chat_completion_async）：等待结果后再记录
+                async def await_and_record(): # type: ignore
+                    value = await result
+                    record(value)
+                    return value
+                return await_and_record()
+            record(result)
             return result
         return wrapper
     if callable(state):
@@ -277,6 +286,8 @@ def agent_endpoint(agent_name_param: str, description: str = ""): # Renamed agen
     """
     为Agent创建API端点的装饰器
 
+    同步和 async def 的 Agent 都可以使用；协程 Agent 得到协程包装函数，由 LangGraph 的 ainvoke 直接等待。
+
     用法:
     @agent_endpoint("sentiment")
     def sentiment_agent(state: AgentState) -> AgentState:
@@ -289,8 +300,8 @@ def agent_endpoint(agent_name_param: str, description: str = ""): # Renamed agen
         # 初始化此agent的LLM调用跟踪
         _agent_llm_calls[agent_name_param] = False
 
-        @functools.wraps(agent_func)
-        def wrapper(state: Dict[str, Any]): # type: ignore
+        def begin(state: Dict[str, Any], redirect_std: bool) -> Dict[str, Any]: # type: ignore
+            """执行 Agent 之前：记录输入、挂载日志捕获、设置上下文变量"""
             current_agent_name_for_run = agent_name_param
 
             api_state.update_agent_state(current_agent_name_for_run, "running")
@@ -302,75 +313,71 @@ def agent_endpoint(agent_name_param: str, description: str = ""): # Renamed agen
             if not run_id:
                 logger.warning(f"run_id not found in state metadata for agent {current_agent_name_for_run}. Logging may be affected.")
 
-
-            timestamp_start = datetime.now(UTC)
-            serialized_input = serialize_agent_state(state)
+            run = {
+                "run_id": run_id,
+                "timestamp_start": datetime.now(UTC),
+                "serialized_input": serialize_agent_state(state),
+                "log_stream": io.StringIO(),
+                "redirect_std": redirect_std,
+            }
             api_state.update_agent_data(
-                current_agent_name_for_run, "input_state", serialized_input)
-
-            output_state = None
-            error_details = None
-            terminal_outputs: List[str] = []
+                current_agent_name_for_run, "input_state", run["serialized_input"])
 
-            old_stdout = sys.stdout
-            old_stderr = sys.stderr
-            log_stream = io.StringIO()
-            
             # 使用 agent_name_param 确保日志处理器名称的唯一性
             agent_specific_logger_name = f"agent_stream.{current_agent_name_for_run}"
             agent_specific_logger = logging.getLogger(agent_specific_logger_name)
             agent_specific_logger.handlers.clear() # 清除旧的处理器
             agent_specific_logger.propagate = False # 防止传播到root logger
-            log_handler = logging.StreamHandler(log_stream)
+            log_handler = logging.StreamHandler(run["log_stream"])
             log_handler.setLevel(logging.INFO) 
             # 可以为这个handler设置特定的格式
             # log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
             # log_handler.setFormatter(log_formatter)
             agent_specific_logger.addHandler(log_handler)
-
-
-            redirect_stdout = io.StringIO()
-            redirect_stderr = io.StringIO()
-            sys.stdout = redirect_stdout
-            sys.stderr = redirect_stderr
-
-            try:
-                if _has_log_system:
-                    from src.utils.llm_interaction_logger import current_agent_name_context, current_run_id_context
-                    current_agent_name_context.set(current_agent_name_for_run)
-                    current_run_id_context.set(run_id) # type: ignore
-
-                output_state = agent_func(state)
-                timestamp_end = datetime.now(UTC)
-
-            except Exception as e:
-                timestamp_end = datetime.now(UTC)
-                error_details = str(e)
-                logger.error(f"Error during execution of agent {current_agent_name_for_run}: {error_details}", exc_info=True)
-            finally:
-                sys.stdout = old_stdout
-                sys.stderr = old_stderr
-                agent_specific_logger.removeHandler(log_handler) # 从特定logger移除
-                log_handler.close()
-
-
-                stdout_content = redirect_stdout.getvalue()
-                stderr_content = redirect_stderr.getvalue()
-                log_capture_content = log_stream.getvalue() # 从特定logger的stream获取
-
+            run["logger"], run["log_handler"] = agent_specific_logger, log_handler
+
+            if redirect_std:
+                run["old_stdout"], run["old_stderr"] = sys.stdout, sys.stderr
+                run["redirect_stdout"], run["redirect_stderr"] = io.StringIO(), io.StringIO()
+                sys.stdout = run["redirect_stdout"]
+                sys.stderr = run["redirect_stderr"]
+
+            if _has_log_system:
+                from src.utils.llm_interaction_logger import current_agent_name_context, current_run_id_context
+                current_agent_name_context.set(current_agent_name_for_run)
+                current_run_id_context.set(run_id) # type: ignore
+            return run
+
+        def restore(run: Dict[str, Any]): # type: ignore
+            """执行 Agent 之后（无论成功与否）：恢复输出流、收集终端输出、清除上下文变量"""
+            current_agent_name_for_run = agent_name_param
+            terminal_outputs: List[str] = []
+            if run["redirect_std"]:
+                sys.stdout = run["old_stdout"]
+                sys.stderr = run["old_stderr"]
+                stdout_content = run["redirect_stdout"].getvalue()
+                stderr_content = run["redirect_stderr"].getvalue()
                 if stdout_content:
                     terminal_outputs.append(f"--- STDOUT for {current_agent_name_for_run} ---\n{stdout_content}")
                 if stderr_content:
                     terminal_outputs.append(f"--- STDERR for {current_agent_name_for_run} ---\n{stderr_content}")
-                if log_capture_content:
-                    terminal_outputs.append(f"--- LOGS for {current_agent_name_for_run} ---\n{log_capture_content}")
+            run["logger"].removeHandler(run["log_handler"]) # 从特定logger移除
+            run["log_handler"].close()
 
-                if _has_log_system:
-                    from src.utils.llm_interaction_logger import current_agent_name_context, current_run_id_context
-                    current_agent_name_context.set(None) # type: ignore
-                    current_run_id_context.set(None) # type: ignore
+            log_capture_content = run["log_stream"].getvalue() # 从特定logger的stream获取
+            if log_capture_content:
+                terminal_outputs.append(f"--- LOGS for {current_agent_name_for_run} ---\n{log_capture_content}")
+            run["terminal_outputs"] = terminal_outputs
 
+            if _has_log_system:
+                from src.utils.llm_interaction_logger import current_agent_name_context, current_run_id_context
+                current_agent_name_context.set(None) # type: ignore
+                current_run_id_context.set(None) # type: ignore
 
+        def finish(run: Dict[str, Any], output_state, error_details, timestamp_end): # type: ignore
+            """记录输出状态和执行日志；Agent 出错时重新抛出异常"""
+            current_agent_name_for_run = agent_name_param
+            run_id = run["run_id"]
             serialized_output_for_log = None
             reasoning_details_for_log = None
 
@@ -414,12 +421,12 @@ def agent_endpoint(agent_name_param: str, description: str = ""): # Renamed agen
                         log_entry_agent = AgentExecutionLog( # type: ignore
                             agent_name=current_agent_name_for_run,
                             run_id=run_id, # type: ignore
-                            timestamp_start=timestamp_start,
+                            timestamp_start=run["timestamp_start"],
                             timestamp_end=timestamp_end,
-                            input_state=serialized_input,
+                            input_state=run["serialized_input"],
                             output_state=serialized_output_for_log,
                             reasoning_details=reasoning_details_for_log,
-                            terminal_outputs=terminal_outputs
+                            terminal_outputs=run["terminal_outputs"]
                         )
                         log_storage.add_agent_log(log_entry_agent)
                         logger.debug(
@@ -436,6 +443,41 @@ def agent_endpoint(agent_name_param: str, description: str = ""): # Renamed agen
 
             return output_state # type: ignore
 
+        if inspect.iscoroutinefunction(agent_func):
+            @functools.wraps(agent_func)
+            async def async_wrapper(state: Dict[str, Any]): # type: ignore
+                # sys.stdout 是进程级的，同一事件循环中交替执行的协程 Agent 互相重定向会让输出流
+                # 停留在其它 Agent 的缓冲区，因此协程 Agent 只捕获自己的日志
+                run = begin(state, redirect_std=False)
+                output_state = None
+                error_details = None
+                try:
+                    output_state = await agent_func(state)
+                except Exception as e:
+                    error_details = str(e)
+                    logger.error(f"Error during execution of agent {agent_name_param}: {error_details}", exc_info=True)
+                finally:
+                    timestamp_end = datetime.now(UTC)
+                    restore(run)
+                return finish(run, output_state, error_details, timestamp_end)
+
+            return async_wrapper
+
+        @functools.wraps(agent_func)
+        def wrapper(state: Dict[str, Any]): # type: ignore
+            run = begin(state, redirect_std=True)
+            output_state = None
+            error_details = None
+            try:
+                output_state = agent_func(state)
+            except Exception as e:
+                error_details = str(e)
+                logger.error(f"Error during execution of agent {agent_name_param}: {error_details}", exc_info=True)
+            finally:
+                timestamp_end = datetime.now(UTC)
+                restore(run)
+            return finish(run, output_state, error_details, timestamp_end)
+
         return wrapper
     return decorator
 
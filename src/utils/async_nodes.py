@@ -0,0 +1,57 @@
+"""
+LangGraph 节点的同步 / 异步适配
+
+调用 LLM 的节点（sentiment、macro_news、macro_analyst、debate_room、portfolio_management）是 async def：
+LLM 请求通过 AsyncOpenAI / google-genai 的 client.aio 发出，等待响应期间不占用线程；
+只有同步接口的新闻抓取（akshare、yfinance）在节点内部用 asyncio.to_thread 执行。
+其余节点（行情、技术面、基本面等）是同步函数，主要是 akshare / yfinance 调用和计算。
+
+同一个节点函数要同时用于两种图：
+    - async_node: ainvoke 使用。协程节点原样返回；同步节点用 asyncio.to_thread 在线程中执行
+      （复制 contextvars，工作流运行 ID、请求截止时间等上下文保持不变）
+    - sync_node: invoke 使用。同步节点原样返回；协程节点在当前工作线程中用 asyncio.run 执行
+用 ainvoke 调用时，并行分支在同一个事件循环中并发推进，扇出阶段的耗时为 max(分支)。
+
+用法:
+    workflow.add_node("sentiment_agent", async_node(sentiment_agent))
+    final_state = await app.ainvoke(initial_state)
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict
+
+# 调用线程已经在运行事件循环时（例如在协程中调用同步的 run_hedge_fund），协程节点改在这里执行
+_LOOP_BRIDGE = ThreadPoolExecutor(thread_name_prefix="agent_node_loop")
+
+
+def async_node(node: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Awaitable[Any]]:
+    """把节点适配为协程节点，保留原函数名"""
+    if inspect.iscoroutinefunction(node):
+        return node
+
+    @functools.wraps(node)
+    async def wrapper(state):
+        return await asyncio.to_thread(node, state)
+
+    return wrapper
+
+
+def sync_node(node: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+    """把节点适配为同步节点，保留原函数名"""
+    if not inspect.iscoroutinefunction(node):
+        return node
+
+    @functools.wraps(node)
+    def wrapper(state):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(node(state))
+        context = contextvars.copy_context()
+        return _LOOP_BRIDGE.submit(context.run, asyncio.run, node(state)).result()
+
+    return wrapper
@@ -0,0 +1,319 @@
+"""
+HTTP 响应缓存 (transport-level)
+
+以 requests 的 HTTPAdapter 形式挂载到 Session 上，对所有经过该 Session 的请求生效：
+    - 缓存键为请求指纹：方法 + 规范化 URL（查询参数排序）+ 请求体 + 凭证的 SHA-256
+    - 每个端点按 URL 正则匹配 TTL，实时类接口 TTL 为 0 不缓存，未匹配的请求默认不缓存
+    - 只缓存状态码为 200 且通过响应校验的结果（Algogene 的错误和限流提示同样以 200 返回）
+    - 数据保存在 SQLite 中，超过容量上限时按最近访问时间淘汰
+
+用法:
+    session = requests.Session()
+    mount_cache(session)
+
+环境变量:
+    HTTP_CACHE=false         关闭缓存
+    HTTP_CACHE_PATH          SQLite 文件路径，默认 data/http_cache.sqlite
+    HTTP_CACHE_MAX_MB        容量上限（MB），默认 256
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('http_cache')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_ROOT, "data", "http_cache.sqlite")
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# (URL 正则, TTL 秒)，按顺序匹配第一条
+DEFAULT_TTL_RULES: List[Tuple[str, float]] = [
+    # Algogene：实时接口不缓存，历史和元数据接口按更新频率缓存
+    (r"algogene\.com/rest/v1/realtime_", 0),
+    (r"algogene\.com/rest/v1/history_price", 12 * HOUR),
+    (r"algogene\.com/rest/v1/history_news", HOUR),
+    (r"algogene\.com/rest/v1/history_econs", 6 * HOUR),
+    (r"algogene\.com/rest/v1/(list_all_instrument|query_contract|list_econs_series|meta_econs_series)", DAY),
+    (r"algogene\.com/rest/v1/query_marketprice", HOUR),
+    # Yahoo 新闻搜索
+    (r"query\d\.finance\.yahoo\.com/v1/finance/search", 15 * MINUTE),
+    # Jina 网页读取与搜索
+    (r"r\.jina\.ai", DAY),
+    (r"s\.jina\.ai", HOUR),
+]
+
+# 凭证类查询参数和请求头：不同账户的权限和配额不同，凭证参与指纹计算，账户之间不共享响应
+CREDENTIAL_PARAMS = {"api_key"}
+CREDENTIAL_HEADERS = ("Authorization",)
+
+
+def request_fingerprint(request: requests.PreparedRequest) -> str:
+    """计算请求指纹：方法、规范化 URL、请求体和凭证"""
+    parts = urlsplit(request.url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    query = urlencode(sorted((k, v) for k, v in params if k not in CREDENTIAL_PARAMS))
+    credentials = sorted((k, v) for k, v in params if k in CREDENTIAL_PARAMS)
+    credentials += [(name, request.headers[name]) for name in CREDENTIAL_HEADERS
+                    if name in request.headers]
+    url = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ""))
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha256()
+    digest.update(request.method.upper().encode())
+    digest.update(b"\n")
+    digest.update(url.encode())
+    digest.update(b"\n")
+    digest.update(body)
+    digest.update(b"\n")
+    # 指纹是单向哈希，凭证原文不会写入缓存文件
+    digest.update(json.dumps(credentials).encode())
+    return digest.hexdigest()
+
+
+def algogene_payload_ok(body: bytes) -> bool:
+    """Algogene 的响应是否为正常数据
+
+    Algogene 的参数错误、鉴权失败和限流提示也以 HTTP 200 返回，内容为带 error / status=false
+    或 res 为提示文本的 JSON，这些响应不能缓存
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return False
+    if not isinstance(payload, dict) or "error" in payload or payload.get("status") is False:
+        return False
+    return "res" in payload and not isinstance(payload["res"], str)
+
+
+# (URL 正则, 校验函数)：匹配的响应通过校验才写入缓存
+DEFAULT_VALIDATORS: List[Tuple[str, Callable[[bytes], bool]]] = [
+    (r"algogene\.com/rest/v1/", algogene_payload_ok),
+]
+
+
+class HTTPCache:
+    """SQLite 响应缓存，多线程/多进程安全
+
+    Args:
+        path: SQLite 文件路径
+        max_bytes: 响应体总大小上限，超过后淘汰最久未访问的条目
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or os.getenv("HTTP_CACHE_PATH") or DEFAULT_CACHE_PATH
+        self.max_bytes = max_bytes or int(float(os.getenv("HTTP_CACHE_MAX_MB", "256")) * 1024 * 1024)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " reason TEXT,"
+            " headers TEXT NOT NULL,"
+            " body BLOB NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[int, str, dict, bytes]]:
+        """返回未过期的 (状态码, 原因, 响应头, 响应体)，没有则返回 None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, reason, headers, body, expires_at FROM responses WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            if row[4] <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return row[0], row[1], json.loads(row[2]), row[3]
+
+    def set(self, key: str, response: requests.Response, ttl: float):
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, expires_at, last_access, size, status, reason, headers, body)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, now + ttl, now, len(body), response.status_code, response.reason,
+                 json.dumps(dict(response.headers)), sqlite3.Binary(body)))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """先删过期条目，仍超出上限时按最近访问时间淘汰到上限的 90%"""
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} cached responses")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+
+class CachingAdapter(HTTPAdapter):
+    """带响应缓存的传输适配器
+
+    Args:
+        cache: 缓存存储
+        ttl_rules: (URL 正则, TTL 秒) 列表，默认 DEFAULT_TTL_RULES
+        default_ttl: 未匹配任何规则时的 TTL，默认 0（不缓存）
+        methods: 可缓存的请求方法
+        validators: (URL 正则, 校验函数) 列表，默认 DEFAULT_VALIDATORS
+    """
+
+    def __init__(self, cache: HTTPCache, ttl_rules: Optional[List[Tuple[str, float]]] = None,
+                 default_ttl: float = 0, methods: Tuple[str, ...] = ("GET", "POST"),
+                 validators: Optional[List[Tuple[str, Callable[[bytes], bool]]]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.ttl_rules = [(re.compile(pattern), ttl)
+                          for pattern, ttl in (DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules)]
+        self.default_ttl = default_ttl
+        self.methods = methods
+        self.validators = [(re.compile(pattern), check) for pattern, check in
+                           (DEFAULT_VALIDATORS if validators is None else validators)]
+
+    def ttl_for(self, request: requests.PreparedRequest) -> float:
+        if request.method.upper() not in self.methods:
+            return 0
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(request.url):
+                return ttl
+        return self.default_ttl
+
+    def cacheable(self, request: requests.PreparedRequest, response: requests.Response) -> bool:
+        """状态码为 200 且通过所有匹配的校验函数"""
+        if response.status_code != 200:
+            return False
+        for pattern, check in self.validators:
+            if pattern.search(request.url) and not check(response.content):
+                logger.debug(f"Response rejected by validator, not cached: {pattern.pattern}")
+                return False
+        return True
+
+    def send(self, request, stream=False, **kwargs):
+        ttl = self.ttl_for(request)
+        if ttl <= 0 or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        key = request_fingerprint(request)
+        try:
+            cached = self.cache.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"HTTP cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            return self._build_cached_response(request, *cached)
+
+        response = super().send(request, stream=stream, **kwargs)
+        if self.cacheable(request, response):
+            try:
+                self.cache.set(key, response, ttl)
+            except sqlite3.Error as e:
+                logger.warning(f"HTTP cache write failed: {e}")
+        response.from_cache = False
+        return response
+
+    def _build_cached_response(self, request, status, reason, headers, body) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        # 缓存的是解压后的内容
+        response.headers.pop("Content-Encoding", None)
+        response._content = body
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        return response
+
+
+_default_cache: Optional[HTTPCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """进程内共享的默认缓存"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HTTPCache()
+        return _default_cache
+
+
+def cache_enabled() -> bool:
+    return os.getenv("HTTP_CACHE", "true").lower() not in ("0", "false", "no")
+
+
+def mount_cache(session: requests.Session, ttl_rules: Optional[List[Tuple[str, float]]] = None,
+                cache: Optional[HTTPCache] = None,
+                validators: Optional[List[Tuple[str, Callable[[bytes], bool]]]] = None) -> requests.Session:
+    """在 Session 上挂载缓存适配器（HTTP_CACHE=false 时不挂载）
+
+    Args:
+        session: requests Session
+        ttl_rules: 自定义 TTL 规则，默认 DEFAULT_TTL_RULES
+        cache: 缓存存储，默认 get_http_cache()
+        validators: 响应校验规则，默认 DEFAULT_VALIDATORS
+
+    Returns:
+        同一个 session
+    """
+    if not cache_enabled():
+        return session
+    adapter = CachingAdapter(cache or get_http_cache(), ttl_rules=ttl_rules, validators=validators)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def cached_session(ttl_rules: Optional[List[Tuple[str, float]]] = None) -> requests.Session:
+    """创建挂载了缓存的新 Session"""
+    return mount_cache(requests.Session(), ttl_rules)
@@ -1,9 +1,10 @@
+import asyncio
 import os
 import time
 import backoff
 from abc import ABC, abstractmethod
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from google import genai
 from src.utils.logging_config import setup_logger, SUCCESS_ICON, ERROR_ICON, WAIT_ICON
 
@@ -19,6 +20,14 @@ class LLMClient(ABC):
         """获取模型回答"""
         pass
 
+    async def get_completion_async(self, messages, **kwargs):
+        """get_completion 的协程版本；没有原生异步接口的客户端在线程中调用同步版本"""
+        return await asyncio.to_thread(self.get_completion, messages, **kwargs)
+
+    async def aclose(self):
+        """关闭异步连接，必须在创建连接的事件循环中调用"""
+        pass
+
 
 class GeminiClient(LLMClient):
     """Google Gemini API 客户端"""
@@ -73,6 +82,27 @@ class GeminiClient(LLMClient):
                 logger.error(f"{ERROR_ICON} API 调用失败: {error_msg}")
             raise e
 
+    @staticmethod
+    def _to_request(messages):
+        """把 OpenAI 格式的消息转换为 Gemini 的 contents 和 config"""
+        prompt = ""
+        system_instruction = None
+
+        for message in messages:
+            role = message["role"]
+            content = message["content"]
+            if role == "system":
+                system_instruction = content
+            elif role == "user":
+                prompt += f"User: {content}\n"
+            elif role == "assistant":
+                prompt += f"Assistant: {content}\n"
+
+        config = {}
+        if system_instruction:
+            config['system_instruction'] = system_instruction
+        return prompt.strip(), config
+
     def get_completion(self, messages, max_retries=3, initial_retry_delay=1, **kwargs):
         """获取聊天完成结果，包含重试逻辑"""
         try:
@@ -81,28 +111,10 @@ class GeminiClient(LLMClient):
 
             for attempt in range(max_retries):
                 try:
-                    # 转换消息格式
-                    prompt = ""
-                    system_instruction = None
-
-                    for message in messages:
-                        role = message["role"]
-                        content = message["content"]
-                        if role == "system":
-                            system_instruction = content
-                        elif role == "user":
-                            prompt += f"User: {content}\n"
-                        elif role == "assistant":
-                            prompt += f"Assistant: {content}\n"
-
-                    # 准备配置
-                    config = {}
-                    if system_instruction:
-                        config['system_instruction'] = system_instruction
-
                     # 调用 API
+                    contents, config = self._to_request(messages)
                     response = self.generate_content_with_retry(
-                        contents=prompt.strip(),
+                        contents=contents,
                         config=config
                     )
 
@@ -138,6 +150,60 @@ class GeminiClient(LLMClient):
             logger.error(f"{ERROR_ICON} get_completion 发生错误: {str(e)}")
             return None
 
+    @backoff.on_exception(
+        backoff.expo,
+        (Exception),
+        max_tries=5,
+        max_time=300,
+        giveup=lambda e: "AFC is enabled" not in str(e)
+    )
+    async def generate_content_async_with_retry(self, contents, config=None):
+        """generate_content_with_retry 的协程版本，使用 client.aio"""
+        try:
+            logger.info(f"{WAIT_ICON} 正在调用 Gemini API (async)...")
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=config
+            )
+            logger.info(f"{SUCCESS_ICON} API 调用成功")
+            return response
+        except Exception as e:
+            error_msg = str(e)
+            if "AFC is enabled" in error_msg:
+                logger.warning(
+                    f"{ERROR_ICON} 触发 API 限制，等待重试... 错误: {error_msg}")
+                await asyncio.sleep(5)
+            else:
+                logger.error(f"{ERROR_ICON} API 调用失败: {error_msg}")
+            raise e
+
+    async def get_completion_async(self, messages, max_retries=3, initial_retry_delay=1, **kwargs):
+        """get_completion 的协程版本，等待期间不占用线程"""
+        logger.info(f"{WAIT_ICON} 使用 Gemini 模型 (async): {self.model}")
+        contents, config = self._to_request(messages)
+        for attempt in range(max_retries):
+            try:
+                response = await self.generate_content_async_with_retry(
+                    contents=contents, config=config)
+                if response is not None:
+                    logger.info(f"{SUCCESS_ICON} 成功获取 Gemini 响应")
+                    return response.text
+                logger.warning(
+                    f"{ERROR_ICON} 尝试 {attempt + 1}/{max_retries}: API 返回空值")
+            except Exception as e:
+                logger.error(
+                    f"{ERROR_ICON} 尝试 {attempt + 1}/{max_retries} 失败: {str(e)}")
+            if attempt < max_retries - 1:
+                await asyncio.sleep(initial_retry_delay * (2 ** attempt))
+        return None
+
+    async def aclose(self):
+        # google-genai 0.6.0（poetry.lock 锁定的版本）的 AsyncClient 没有 aclose
+        aclose = getattr(self.client.aio, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
 
 class OpenAICompatibleClient(LLMClient):
     """OpenAI 兼容 API 客户端"""
@@ -162,11 +228,12 @@ class OpenAICompatibleClient(LLMClient):
             raise ValueError(
                 "OPENAI_COMPATIBLE_MODEL not found in environment variables")
 
-        # 初始化 OpenAI 客户端
+        # 初始化 OpenAI 客户端；异步客户端在第一次使用时创建
         self.client = OpenAI(
             base_url=self.base_url,
             api_key=self.api_key
         )
+        self._async_client = None
         logger.info(f"{SUCCESS_ICON} OpenAI Compatible 客户端初始化成功")
 
     @backoff.on_exception(
@@ -240,6 +307,58 @@ class OpenAICompatibleClient(LLMClient):
             logger.error(f"{ERROR_ICON} get_completion 发生错误: {str(e)}")
             return None
 
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key
+            )
+        return self._async_client
+
+    @backoff.on_exception(
+        backoff.expo,
+        (Exception),
+        max_tries=5,
+        max_time=300
+    )
+    async def call_api_async_with_retry(self, messages):
+        """call_api_with_retry 的协程版本，使用 AsyncOpenAI"""
+        try:
+            logger.info(f"{WAIT_ICON} 正在调用 OpenAI Compatible API (async)...")
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages
+            )
+            logger.info(f"{SUCCESS_ICON} API 调用成功")
+            return response
+        except Exception as e:
+            logger.error(f"{ERROR_ICON} API 调用失败: {str(e)}")
+            raise e
+
+    async def get_completion_async(self, messages, max_retries=3, initial_retry_delay=1, **kwargs):
+        """get_completion 的协程版本，等待期间不占用线程"""
+        logger.info(f"{WAIT_ICON} 使用 OpenAI Compatible 模型 (async): {self.model}")
+        for attempt in range(max_retries):
+            try:
+                response = await self.call_api_async_with_retry(messages)
+                if response is not None:
+                    logger.info(f"{SUCCESS_ICON} 成功获取 OpenAI Compatible 响应")
+                    return response.choices[0].message.content
+                logger.warning(
+                    f"{ERROR_ICON} 尝试 {attempt + 1}/{max_retries}: API 返回空值")
+            except Exception as e:
+                logger.error(
+                    f"{ERROR_ICON} 尝试 {attempt + 1}/{max_retries} 失败: {str(e)}")
+            if attempt < max_retries - 1:
+                await asyncio.sleep(initial_retry_delay * (2 ** attempt))
+        return None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
 
 class LLMClientFactory:
     """LLM 客户端工厂类"""
@@ -280,3 +399,11 @@ class LLMClientFactory:
             )
         else:
             raise ValueError(f"不支持的客户端类型: {client_type}")
+
+
+def active_model_name() -> str:
+    """按与 LLMClientFactory.create_client(client_type="auto") 相同的规则返回当前使用的模型名称"""
+    if os.getenv("OPENAI_COMPATIBLE_API_KEY") and os.getenv("OPENAI_COMPATIBLE_BASE_URL") \
+            and os.getenv("OPENAI_COMPATIBLE_MODEL"):
+        return os.getenv("OPENAI_COMPATIBLE_MODEL")
+    return os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
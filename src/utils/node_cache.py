@@ -0,0 +1,365 @@
+"""
+智能体节点结果缓存 - 输入不变的节点不再重复执行
+
+同一交易日内对同一代码重复运行 run_hedge_fund（看板刷新、只修改下游配置后重跑）时，
+上游节点的输入没有变化。cached_node 按以下内容生成每个节点的缓存键：
+    - 节点读取的状态子集：NODE_INPUTS 中声明的 data 字段（DataFrame 按内容哈希）和按名称读取的
+      最新上游消息。只修改组合或下游配置后重跑时，不读取这些字段的上游节点直接命中。
+      test_node_cache 用真实节点检查实际读取的字段都已声明；未声明的节点使用完整状态
+    - 代码版本：节点所在模块和共用模块（SHARED_SOURCE_FILES：LLM 客户端、数据和新闻接口）的哈希，
+      修改某个节点只让该节点失效；以及模型名称
+命中时返回记录的节点输出（新增的消息、修改的 data 和 metadata 字段），不执行节点。
+输出以 JSON 保存（消息使用 langchain 的 messages_to_dict），无法以 JSON 表示的输出不缓存。
+
+每个节点有各自的有效期（NODE_TTLS，秒），依赖实时新闻的节点有效期较短；有效期为 0 的节点不缓存。
+
+启用方式（默认关闭）:
+    NODE_CACHE=1                          启用
+    NODE_CACHE_PATH=data/node_cache.sqlite 缓存文件路径
+    NODE_CACHE_TTLS=sentiment_agent=600,portfolio_management_agent=0  覆盖有效期
+"""
+
+import datetime
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('node_cache')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_NODE_CACHE_PATH = os.path.join(PROJECT_ROOT, "data", "node_cache.sqlite")
+
+# 每个节点读取的状态：data 字段和按名称读取的最新上游消息
+# 所有节点都包含 ticker 和 end_date，缓存不会跨代码或跨交易日命中
+_ANALYSTS = ("technical_analyst_agent", "fundamentals_agent", "sentiment_agent", "macro_news_agent")
+NODE_INPUTS = {
+    "market_data_agent": {"data": ("ticker", "start_date", "end_date")},
+    "technical_analyst_agent": {"data": ("ticker", "end_date", "prices")},
+    "fundamentals_agent": {"data": ("ticker", "end_date", "financial_metrics")},
+    "sentiment_agent": {"data": ("ticker", "end_date", "num_of_news")},
+    "macro_news_agent": {"data": ("ticker", "end_date")},
+    "researcher_bull_agent": {"data": ("ticker", "end_date"), "messages": _ANALYSTS},
+    "researcher_bear_agent": {"data": ("ticker", "end_date"), "messages": _ANALYSTS},
+    "debate_room_agent": {
+        "data": ("ticker", "end_date"),
+        "messages": ("researcher_bull_agent", "researcher_bear_agent"),
+    },
+    "risk_management_agent": {
+        "data": ("ticker", "end_date", "portfolio", "prices"),
+        "messages": ("debate_room_agent",),
+    },
+    "macro_analyst_agent": {"data": ("ticker", "end_date")},
+    "portfolio_management_agent": {
+        "data": ("ticker", "end_date", "portfolio", "macro_news_analysis_result"),
+        "messages": ("technical_analyst_agent", "fundamentals_agent", "sentiment_agent",
+                     "researcher_bull_agent", "researcher_bear_agent"),
+    },
+}
+
+# 所有节点共用的模块，与节点自己的模块一起决定节点的代码版本
+SHARED_SOURCE_FILES = (
+    os.path.join("src", "agents", "state.py"),
+    os.path.join("src", "utils", "llm_clients.py"),
+    os.path.join("src", "tools", "openrouter_config.py"),
+    os.path.join("src", "tools", "api.py"),
+    os.path.join("src", "tools", "news_crawler.py"),
+)
+
+DEFAULT_TTL = 24 * 3600
+# 依赖实时新闻和行情的节点有效期较短
+NODE_TTLS = {
+    "market_data_agent": 6 * 3600,
+    "sentiment_agent": 3600,
+    "macro_news_agent": 3600,
+    "macro_analyst_agent": 3600,
+}
+
+
+def source_hash(patterns: Iterable[str] = SHARED_SOURCE_FILES, root: str = PROJECT_ROOT) -> str:
+    """源文件的哈希，任何一个文件变化都会得到不同的值"""
+    digest = hashlib.sha256()
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(root, pattern))):
+            digest.update(os.path.relpath(path, root).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def node_version(node: Callable, root: str = PROJECT_ROOT,
+                 shared: Iterable[str] = SHARED_SOURCE_FILES) -> str:
+    """节点的代码版本：节点所在模块（穿过 agent_endpoint 等装饰器）和共用模块的哈希"""
+    try:
+        own = (inspect.getsourcefile(inspect.unwrap(node)),)
+    except TypeError:
+        own = ()
+    return source_hash(own + tuple(shared), root)
+
+
+def _parse_ttls(value: str) -> Dict[str, float]:
+    ttls = {}
+    for item in value.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+def _key_default(value: Any) -> Any:
+    """缓存键中非 JSON 类型的规范表示"""
+    if isinstance(value, pd.DataFrame):
+        hashed = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        return {"frame": list(map(str, value.columns)), "hash": hashlib.sha256(hashed.tobytes()).hexdigest()}
+    if isinstance(value, (pd.Timestamp, datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _encode_default(value: Any) -> Any:
+    """节点输出中非 JSON 类型的编码，_decode_hook 还原"""
+    if isinstance(value, pd.DataFrame):
+        return {"__frame__": value.to_dict("split")}
+    if isinstance(value, pd.Timestamp):
+        return {"__timestamp__": value.isoformat()}
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_hook(obj: Dict[str, Any]) -> Any:
+    if "__frame__" in obj:
+        split = obj["__frame__"]
+        return pd.DataFrame(split["data"], index=split["index"], columns=split["columns"])
+    if "__timestamp__" in obj:
+        return pd.Timestamp(obj["__timestamp__"])
+    if "__datetime__" in obj:
+        return datetime.datetime.fromisoformat(obj["__datetime__"])
+    if "__date__" in obj:
+        return datetime.date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def encode_delta(delta: Dict[str, Any]) -> str:
+    """把节点输出差异编码为 JSON"""
+    return json.dumps({**delta, "messages": messages_to_dict(delta["messages"])},
+                      default=_encode_default, ensure_ascii=False)
+
+
+def decode_delta(text: str) -> Dict[str, Any]:
+    delta = json.loads(text, object_hook=_decode_hook)
+    delta["messages"] = messages_from_dict(delta["messages"])
+    return delta
+
+
+class NodeCache:
+    """持久化的节点结果缓存
+
+    Args:
+        db_path: SQLite 文件路径，默认 data/node_cache.sqlite
+        ttls: 节点名称到有效期（秒）的映射，覆盖 NODE_TTLS
+        default_ttl: 未配置节点的有效期
+        model: 模型名称，默认按 LLM 客户端的自动选择规则读取环境变量
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = DEFAULT_TTL, model: Optional[str] = None):
+        if model is None:
+            from src.utils.llm_clients import active_model_name
+            model = active_model_name()
+        self.db_path = db_path or DEFAULT_NODE_CACHE_PATH
+        self.ttls = {**NODE_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.model = model
+        self.shared_version = source_hash()
+        # 节点名称到代码版本，wrap 时计算
+        self.versions: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS node_outputs ("
+            " key TEXT PRIMARY KEY,"
+            " node TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " result TEXT NOT NULL)")
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["NodeCache"]:
+        """NODE_CACHE=1 时按环境变量创建缓存，否则返回 None"""
+        if os.getenv("NODE_CACHE", "").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(db_path=os.getenv("NODE_CACHE_PATH") or None,
+                   ttls=_parse_ttls(os.getenv("NODE_CACHE_TTLS", "")))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def ttl(self, name: str) -> float:
+        return self.ttls.get(name, self.default_ttl)
+
+    def key(self, name: str, state: Dict[str, Any]) -> str:
+        """计算节点的缓存键
+
+        Args:
+            name: 节点名称
+            state: 节点的输入状态
+
+        Returns:
+            十六进制的 SHA-256
+        """
+        spec = NODE_INPUTS.get(name)
+        data = state.get("data", {})
+        messages = state.get("messages", [])
+        if spec is None:
+            inputs = {"data": data, "messages": [(m.name, m.content) for m in messages]}
+        else:
+            latest = {m.name: m.content for m in messages if m.name in spec.get("messages", ())}
+            inputs = {"data": {field: data.get(field) for field in spec["data"]},
+                      "messages": latest}
+        payload = {
+            "node": name,
+            "version": self.versions.get(name, self.shared_version),
+            "model": self.model,
+            "show_reasoning": state.get("metadata", {}).get("show_reasoning"),
+            "inputs": inputs,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=_key_default)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, name: str, key: str) -> Optional[Dict[str, Any]]:
+        """返回有效期内的节点输出差异，未命中返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, result FROM node_outputs WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[0] > self.ttl(name):
+            self.misses += 1
+            return None
+        try:
+            delta = decode_delta(row[1])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"节点 {name} 的缓存无法解析，重新执行: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return delta
+
+    def put(self, name: str, key: str, delta: Dict[str, Any]):
+        try:
+            text = encode_delta(delta)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"节点 {name} 的输出无法以 JSON 保存，不缓存: {e}")
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO node_outputs VALUES (?, ?, ?, ?)",
+                (key, name, time.time(), text))
+            self._conn.commit()
+
+    def wrap(self, name: str, node: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        """包装同步或协程节点，包装结果与原节点同为同步或协程函数；有效期为 0 的节点原样返回"""
+        if self.ttl(name) <= 0:
+            return node
+        self.versions[name] = node_version(node)
+
+        def lookup(state):
+            key = self.key(name, state)
+            delta = self.get(name, key)
+            if delta is not None:
+                logger.info(f"节点缓存命中: {name}")
+            return key, delta
+
+        def snapshot(state):
+            return (list(state.get("messages", [])), dict(state.get("data", {})),
+                    dict(state.get("metadata", {})))
+
+        if inspect.iscoroutinefunction(node):
+            @functools.wraps(node)
+            async def async_wrapper(state):
+                key, delta = lookup(state)
+                if delta is not None:
+                    return _apply_delta(state, delta)
+                before = snapshot(state)
+                output = await node(state)
+                self.put(name, key, _output_delta(output, *before))
+                return output
+
+            return async_wrapper
+
+        @functools.wraps(node)
+        def wrapper(state):
+            key, delta = lookup(state)
+            if delta is not None:
+                return _apply_delta(state, delta)
+            before = snapshot(state)
+            output = node(state)
+            self.put(name, key, _output_delta(output, *before))
+            return output
+
+        return wrapper
+
+
+def _changed(after: Dict[str, Any], before: Dict[str, Any]) -> Dict[str, Any]:
+    # 节点返回 {**state["data"], ...}，未修改的字段是同一个对象
+    return {field: value for field, value in after.items()
+            if field not in before or before[field] is not value}
+
+
+def _output_delta(output: Dict[str, Any], messages: list, data: Dict[str, Any],
+                  metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """节点输出相对输入的差异：新增消息、修改的 data 和 metadata 字段
+
+    部分节点返回 state["messages"] + [新消息]，记录 extends_input 以便命中时按相同形式返回
+    """
+    out_messages = list(output.get("messages", []))
+    extends_input = bool(messages) and len(out_messages) >= len(messages) and all(
+        a is b for a, b in zip(out_messages, messages))
+    return {
+        "extends_input": extends_input,
+        "messages": out_messages[len(messages):] if extends_input else out_messages,
+        "data": _changed(output.get("data", {}), data),
+        "metadata": _changed(output.get("metadata", {}), metadata),
+    }
+
+
+def _apply_delta(state: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    messages = list(state.get("messages", [])) + delta["messages"] if delta["extends_input"] \
+        else list(delta["messages"])
+    return {
+        "messages": messages,
+        "data": {**state.get("data", {}), **delta["data"]},
+        "metadata": {**state.get("metadata", {}), **delta["metadata"]},
+    }
+
+
+def cached_node(name: str, node: Callable, cache: Optional[NodeCache] = None) -> Callable:
+    """用节点缓存包装节点；cache 为 None 时原样返回"""
+    return node if cache is None else cache.wrap(name, node)
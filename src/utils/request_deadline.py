@@ -0,0 +1,99 @@
+"""
+请求截止时间 - 让超时真正终止底层的 HTTP 请求
+
+concurrent.futures 的超时只是不再等待结果，阻塞在 akshare / yfinance 网络请求里的工作线程仍然被占用，
+直到请求自己返回。akshare 的大部分接口和 yfinance 的 Ticker.info 不接受超时参数，
+因此截止时间在传输层生效：
+    - request_deadline(seconds) 在当前上下文（ContextVar）中设置截止时间，
+      提交到线程池时用 contextvars.copy_context() 传递给工作线程
+    - 截止时间内发出的 requests（HTTPAdapter.send）和 curl_cffi（yfinance 使用）请求，
+      超时参数被限制为剩余时间；截止时间已过时直接抛出 DeadlineExceeded，不再发出新请求
+读取超时按单次 socket 读取计算，工作线程最晚在截止时间后一个读取间隔内退出。
+
+用法:
+    with request_deadline(30):
+        df = ak.stock_zh_a_hist(...)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+_install_lock = threading.Lock()
+_installed = False
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """截止时间已过，不再发出请求"""
+
+
+def remaining() -> Optional[float]:
+    """当前上下文的剩余秒数，没有截止时间时返回 None"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _clamp(timeout):
+    """把 requests 风格的超时（None、秒数或 (连接, 读取) 元组）限制在剩余时间内"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    if isinstance(timeout, tuple):
+        return tuple(left if t is None else min(t, left) for t in timeout)
+    return left if timeout is None else min(timeout, left)
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """在当前上下文中设置请求截止时间，嵌套时取较早的截止时间
+
+    Args:
+        seconds: 从现在起的秒数
+    """
+    install()
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def install():
+    """为 requests 和 curl_cffi 安装截止时间检查（幂等，没有设置截止时间的请求不受影响）"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        _installed = True
+
+        adapter_send = HTTPAdapter.send
+
+        def send(self, request, stream=False, timeout=None, **kwargs):
+            return adapter_send(self, request, stream=stream, timeout=_clamp(timeout), **kwargs)
+
+        HTTPAdapter.send = send
+
+        try:
+            from curl_cffi.requests import Session as CurlSession
+            from curl_cffi.requests.utils import NOT_SET
+        except ImportError:
+            return
+
+        curl_request = CurlSession.request
+
+        def request(self, method, url, *args, timeout=NOT_SET, **kwargs):
+            if _deadline.get() is not None:
+                timeout = _clamp(self.timeout if timeout is NOT_SET else timeout)
+            return curl_request(self, method, url, *args, timeout=timeout, **kwargs)
+
+        CurlSession.request = request